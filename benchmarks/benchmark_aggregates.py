@@ -0,0 +1,104 @@
+import argparse
+import datetime
+import logging
+import os
+import tempfile
+import time
+
+import pandas as pd
+from sqlalchemy import Engine, create_engine, select, func
+from sqlalchemy.orm import Session
+
+from japan_avg_hotel_price_finder.configure_logging import main_logger
+from japan_avg_hotel_price_finder.sql.db_model import HotelPrice
+from japan_avg_hotel_price_finder.sql.save_to_db import AggregateKeys, compute_aggregate_medians, \
+    create_aggregate_queries
+from japan_avg_hotel_price_finder.synthetic_dataset import SyntheticDatasetConfig, write_to_database
+
+
+def get_keys_of_check_in_date(engine: Engine, city: str, check_in: str) -> AggregateKeys:
+    """
+    Get the aggregate keys touched by saving the hotels of a city on one check-in date, like one scraped date.
+    :param engine: SQLAlchemy engine.
+    :param city: City.
+    :param check_in: Check-in date in 'YYYY-MM-DD' format.
+    :return: AggregateKeys
+    """
+    query = (
+        select(HotelPrice.Date, HotelPrice.Review, HotelPrice.Location)
+        .where(HotelPrice.City == city)
+        .where(HotelPrice.Date == check_in)
+    )
+    with Session(engine) as session:
+        hotel_data = pd.read_sql(query, session.connection())
+    return AggregateKeys.from_dataframe(hotel_data.astype({'Date': str}))
+
+
+def time_medians(engine: Engine, keys: AggregateKeys | None, repeat: int) -> float:
+    """
+    Get the best wall time of the medians of the aggregate tables.
+    :param engine: SQLAlchemy engine.
+    :param keys: AggregateKeys to calculate, None for every group.
+    :param repeat: Number of timed runs.
+    :return: Best wall time in seconds.
+    """
+    best_time = float('inf')
+    with Session(engine) as session:
+        for _ in range(repeat):
+            start_time = time.perf_counter()
+            compute_aggregate_medians(session, keys)
+            best_time = min(best_time, time.perf_counter() - start_time)
+    return best_time
+
+
+def print_rows_read(engine: Engine, keys: AggregateKeys) -> None:
+    """
+    Print the number of rows each aggregate table is recomputed from.
+    :param engine: SQLAlchemy engine.
+    :param keys: AggregateKeys to recompute.
+    :return: None
+    """
+    with Session(engine) as session:
+        for name, query in create_aggregate_queries(session, keys).items():
+            rows = session.scalar(select(func.count()).select_from(query.subquery()))
+            print(f"    {name}: {rows:,} rows")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Compare the full recomputation of the aggregate tables with the '
+                                                 'recomputation of the keys touched by one saved check-in date.')
+    parser.add_argument('--rows', type=int, default=2_000_000, help='Number of rows, default is 2,000,000')
+    parser.add_argument('--as_of_days', type=int, default=10, help='Number of daily AsOf snapshots, default is 10')
+    parser.add_argument('--db_url', type=str,
+                        help='Empty database to generate the data into, default is a temporary SQLite database')
+    parser.add_argument('--repeat', type=int, default=3, help='Number of timed runs, default is 3')
+    args = parser.parse_args()
+
+    main_logger.setLevel(logging.ERROR)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        engine = create_engine(args.db_url or f"sqlite:///{os.path.join(temp_dir, 'benchmark_aggregates.db')}")
+
+        today = datetime.date.today()
+        config = SyntheticDatasetConfig(start_date=today, end_date=datetime.date(today.year + 1, 3, 31),
+                                        as_of_start=today, as_of_days=args.as_of_days)
+        config.scale_to_rows(args.rows)
+        print(f"Generating about {config.estimate_rows():,} rows...", flush=True)
+        written_rows = write_to_database(config, engine)
+
+        city = config.cities[0]
+        check_in = f'{today.year + 1}-02-15'
+        keys = get_keys_of_check_in_date(engine, city, check_in)
+        print(f"\n{written_rows:,} rows, keys of {city} on {check_in}: {len(keys.dates)} dates, "
+              f"{len(keys.reviews)} review scores, {len(keys.days_of_week)} days of the week, "
+              f"{len(keys.months)} months, {len(keys.locations)} locations")
+        print_rows_read(engine, keys)
+        print(f"  Touched keys: {time_medians(engine, keys, args.repeat):,.2f} s")
+        print(f"  Touched dates and locations only: "
+              f"{time_medians(engine, AggregateKeys(dates=keys.dates, locations=keys.locations), args.repeat):,.2f} s")
+        print(f"  Every group: {time_medians(engine, None, args.repeat):,.2f} s")
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+import argparse
+import logging
+import os
+import tempfile
+import time
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import Engine, create_engine, delete
+from sqlalchemy.orm import Session, sessionmaker
+
+from japan_avg_hotel_price_finder.configure_logging import main_logger
+from japan_avg_hotel_price_finder.sql.bulk_loader import load_dataframe
+from japan_avg_hotel_price_finder.sql.db_model import Base, HotelPrice, JapanHotel
+
+
+def create_hotel_data(rows: int, seed: int = 42) -> pd.DataFrame:
+    """
+    Create hotel data in the shape saved by the scrapers, with the PriceReview column already renamed.
+    :param rows: Number of rows.
+    :param seed: Random seed, default is 42.
+    :return: Pandas DataFrame.
+    """
+    rng = np.random.default_rng(seed)
+    price = rng.uniform(30, 800, rows).round(2)
+    review = rng.uniform(5, 10, rows).round(1)
+    return pd.DataFrame({
+        'Hotel': [f'Hotel {i}' for i in range(rows)],
+        'Price': price,
+        'Review': review,
+        'Location': rng.choice(['Namba', 'Umeda', 'Shinsaibashi', 'Tennoji'], rows),
+        'PriceReview': price / review,
+        'City': 'Osaka',
+        'Date': '2025-01-01',
+        'AsOf': pd.Timestamp.now()
+    })
+
+
+def insert_mappings(session: Session, dataframe: pd.DataFrame) -> None:
+    """
+    Previous HotelPrice path of migrate_data_to_database.
+    :param session: SQLAlchemy session.
+    :param dataframe: Pandas DataFrame.
+    :return: None
+    """
+    session.bulk_insert_mappings(HotelPrice, dataframe.to_dict('records'))
+
+
+def save_orm_objects(session: Session, dataframe: pd.DataFrame) -> None:
+    """
+    Previous JapanHotels path of JapanScraper._load_to_database.
+    :param session: SQLAlchemy session.
+    :param dataframe: Pandas DataFrame.
+    :return: None
+    """
+    hotels = [JapanHotel(**record) for record in dataframe.to_dict('records')]
+    for i in range(0, len(hotels), 1000):
+        session.bulk_save_objects(hotels[i:i + 1000])
+        session.flush()
+
+
+def measure_rows_per_second(engine: Engine,
+                            model: type[Base],
+                            loader: Callable[[Session, pd.DataFrame], None],
+                            dataframe: pd.DataFrame) -> float:
+    """
+    Load the DataFrame in one committed transaction and measure rows/sec.
+    The table is emptied before the run.
+    :param engine: SQLAlchemy engine.
+    :param model: ORM model of the table.
+    :param loader: Function loading the DataFrame within the session.
+    :param dataframe: Pandas DataFrame.
+    :return: Rows per second.
+    """
+    Session = sessionmaker(bind=engine)
+    with Session() as session:
+        session.execute(delete(model))
+        session.commit()
+
+        start_time = time.perf_counter()
+        loader(session, dataframe)
+        session.commit()
+        return len(dataframe) / (time.perf_counter() - start_time)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark loading hotel data into the database.')
+    parser.add_argument('--rows', type=int, default=100_000, help='Number of rows, default is 100,000')
+    parser.add_argument('--db_url', type=str,
+                        help='Database URL, e.g., a PostgreSQL URL. Default is a temporary SQLite database')
+    args = parser.parse_args()
+
+    # Debug logs are written to a file and would dominate the timing
+    main_logger.setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        engine = create_engine(args.db_url or f"sqlite:///{os.path.join(temp_dir, 'benchmark.db')}")
+        Base.metadata.create_all(engine)
+
+        hotel_data = create_hotel_data(args.rows)
+        japan_hotel_data = hotel_data.rename(columns={'City': 'Prefecture'}).assign(Region='Kansai')
+
+        results = {
+            'HotelPrice bulk_insert_mappings': measure_rows_per_second(
+                engine, HotelPrice, insert_mappings, hotel_data),
+            'HotelPrice load_dataframe': measure_rows_per_second(
+                engine, HotelPrice, lambda session, df: load_dataframe(session, HotelPrice, df), hotel_data),
+            'JapanHotels ORM objects': measure_rows_per_second(
+                engine, JapanHotel, save_orm_objects, japan_hotel_data),
+            'JapanHotels load_dataframe': measure_rows_per_second(
+                engine, JapanHotel, lambda session, df: load_dataframe(session, JapanHotel, df), japan_hotel_data)
+        }
+        engine.dispose()
+
+    print(f"Database: {engine.dialect.name} | Rows: {args.rows}")
+    for name, rows_per_second in results.items():
+        print(f"{name}: {rows_per_second:,.0f} rows/sec")
+
+
+if __name__ == '__main__':
+    main()
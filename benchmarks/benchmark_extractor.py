@@ -0,0 +1,184 @@
+import argparse
+import json
+import logging
+import random
+import time
+from typing import Any, Callable
+
+import numpy as np
+import pandas as pd
+
+from japan_avg_hotel_price_finder.configure_logging import main_logger
+from japan_avg_hotel_price_finder.graphql_scraper_func.graphql_data_extractor import extract_hotel_data
+from japan_avg_hotel_price_finder.graphql_scraper_func.graphql_utils_func import concat_df_list
+
+RESULTS_PER_PAGE = 100
+
+
+def extract_hotel_data_per_hotel(df_list: list[pd.DataFrame], hotel_data_list: list[dict]) -> None:
+    """
+    Previous extractor, which builds one Pandas Dataframe for every hotel.
+    Kept as the baseline of the benchmark and as the reference output.
+    :param df_list: A list to store Pandas Dataframes.
+    :param hotel_data_list: List of results.
+    :return: None
+    """
+    for hotel_data in hotel_data_list:
+        display_names = []
+        review_scores = []
+        final_prices = []
+        location = []
+        for key, val in hotel_data.items():
+            if key == "displayName":
+                if val and 'text' in val:
+                    display_names.append(val['text'])
+                else:
+                    display_names.append(None)
+
+            if key == "basicPropertyData":
+                if val and 'reviewScore' in val and 'score' in val['reviewScore']:
+                    review_scores.append(float(val['reviewScore']['score']))
+                else:
+                    review_scores.append(np.nan)
+
+            if key == "blocks":
+                if val and val[0] and 'finalPrice' in val[0] and 'amount' in val[0]['finalPrice']:
+                    final_prices.append(float(val[0]['finalPrice']['amount']))
+                else:
+                    final_prices.append(np.nan)
+
+            if key == "location":
+                if val and 'displayLocation' in val:
+                    location.append(val['displayLocation'])
+                else:
+                    location.append(None)
+
+        df = pd.DataFrame({
+            "Hotel": pd.Series(display_names, dtype='object'),
+            "Review": pd.Series(review_scores, dtype='float64'),
+            "Price": pd.Series(final_prices, dtype='float64'),
+            "Location": pd.Series(location, dtype='object')
+        })
+        df_list.append(df)
+
+
+def create_result(rng: random.Random, index: int) -> dict[str, Any]:
+    """
+    Create one hotel result in the shape of the 'FullSearch' GraphQL response.
+    About 2% of the results have a missing review score, price or location, as seen in real responses.
+    :param rng: Random number generator.
+    :param index: Index of the hotel.
+    :return: Hotel result as a dictionary.
+    """
+    result = {
+        "__typename": "SearchResultProperty",
+        "basicPropertyData": {
+            "id": index,
+            "pageName": f"hotel-{index}",
+            "reviewScore": {"score": round(rng.uniform(5, 10), 1), "reviewCount": rng.randint(1, 5000)},
+            "location": {"address": f"{index} Chome", "city": "Osaka", "countryCode": "jp"}
+        },
+        "blocks": [{"finalPrice": {"amount": round(rng.uniform(30, 800), 2), "currency": "USD"},
+                    "originalPrice": {"amount": 0, "currency": "USD"}, "blockId": {"roomId": str(index)}}],
+        "displayName": {"text": f"Hotel {index}", "translationTag": None},
+        "location": {"displayLocation": rng.choice(["Namba", "Umeda", "Shinsaibashi", "Tennoji"]),
+                     "mainDistance": f"{rng.uniform(0, 10):.1f} km from centre"},
+        "policies": {"showFreeCancellation": rng.random() < 0.5},
+        "priceDisplayInfoIrene": None
+    }
+    roll = rng.random()
+    if roll < 0.005:
+        result["basicPropertyData"] = None
+    elif roll < 0.01:
+        result["blocks"] = None
+    elif roll < 0.015:
+        result["location"] = None
+    elif roll < 0.02:
+        del result["location"]
+    return result
+
+
+def create_pages(num_pages: int, seed: int = 42) -> list[list[dict[str, Any]]]:
+    """
+    Create result pages of 100 hotels each.
+    :param num_pages: Number of pages.
+    :param seed: Random seed, default is 42.
+    :return: List of pages, each one a list of hotel results.
+    """
+    rng = random.Random(seed)
+    return [[create_result(rng, page * RESULTS_PER_PAGE + i) for i in range(RESULTS_PER_PAGE)]
+            for page in range(num_pages)]
+
+
+def load_recorded_pages(path: str) -> list[list[dict[str, Any]]]:
+    """
+    Load recorded GraphQL responses, one JSON response per line.
+    :param path: Path to the JSONL file.
+    :return: List of pages, each one a list of hotel results.
+    """
+    pages = []
+    with open(path, encoding='utf-8') as file:
+        for line in file:
+            if line.strip():
+                pages.append(json.loads(line)['data']['searchQueries']['search']['results'])
+    return pages
+
+
+def run_extractor(extractor: Callable[[list[pd.DataFrame], list[dict]], None],
+                  pages: list[list[dict[str, Any]]]) -> pd.DataFrame:
+    """
+    Extract every page with the given extractor and concatenate the result, as the scraper does for a check-in date.
+    :param extractor: Extractor function.
+    :param pages: List of pages.
+    :return: Pandas Dataframe.
+    """
+    df_list = []
+    for page in pages:
+        extractor(df_list, page)
+    return concat_df_list(df_list)
+
+
+def measure_rows_per_second(extractor: Callable[[list[pd.DataFrame], list[dict]], None],
+                            pages: list[list[dict[str, Any]]],
+                            repeat: int) -> float:
+    """
+    Measure the best rows/sec of the extractor over several runs.
+    :param extractor: Extractor function.
+    :param pages: List of pages.
+    :param repeat: Number of runs.
+    :return: Rows per second.
+    """
+    best_time = float('inf')
+    rows = 0
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        rows = len(run_extractor(extractor, pages))
+        best_time = min(best_time, time.perf_counter() - start_time)
+    return rows / best_time
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark the hotel data extractor.')
+    parser.add_argument('--pages', type=int, default=50, help='Number of 100-result pages, default is 50')
+    parser.add_argument('--recorded_pages', type=str,
+                        help='JSONL file of recorded GraphQL responses, used instead of generated pages')
+    parser.add_argument('--repeat', type=int, default=3, help='Number of runs of each extractor, default is 3')
+    args = parser.parse_args()
+
+    pages = load_recorded_pages(args.recorded_pages) if args.recorded_pages else create_pages(args.pages)
+
+    # Debug logs are written to a file and would dominate the timing
+    main_logger.setLevel(logging.WARNING)
+
+    pd.testing.assert_frame_equal(run_extractor(extract_hotel_data, pages),
+                                  run_extractor(extract_hotel_data_per_hotel, pages))
+
+    per_hotel = measure_rows_per_second(extract_hotel_data_per_hotel, pages, args.repeat)
+    columnar = measure_rows_per_second(extract_hotel_data, pages, args.repeat)
+    print(f"Pages: {len(pages)} | Hotels: {sum(len(page) for page in pages)}")
+    print(f"One DataFrame per hotel: {per_hotel:,.0f} rows/sec")
+    print(f"Column buffers per page: {columnar:,.0f} rows/sec ({columnar / per_hotel:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+import argparse
+import datetime
+import logging
+import os
+import tempfile
+import time
+
+from sqlalchemy import Engine, create_engine, select, func, and_, Select, ClauseElement, Executable
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+
+from japan_avg_hotel_price_finder.configure_logging import main_logger
+from japan_avg_hotel_price_finder.sql.db_model import HotelPrice, create_missing_indexes, has_index
+from japan_avg_hotel_price_finder.synthetic_dataset import SyntheticDatasetConfig, write_to_database
+
+
+class Explain(Executable, ClauseElement):
+    """
+    EXPLAIN of a statement, EXPLAIN QUERY PLAN on SQLite.
+
+    Attributes:
+        statement (Select): Statement to explain.
+    """
+    inherit_cache = False
+
+    def __init__(self, statement: Select):
+        self.statement = statement
+
+
+@compiles(Explain)
+def compile_explain(element: Explain, compiler, **kwargs) -> str:
+    prefix = 'EXPLAIN QUERY PLAN' if compiler.dialect.name == 'sqlite' else 'EXPLAIN'
+    return f"{prefix} {compiler.process(element.statement, **kwargs)}"
+
+
+def create_queries(city: str, as_of: datetime.date, start_date: str, end_date: str) -> dict[str, Select]:
+    """
+    Create the queries of the check-in dates of a city scraped on an AsOf date, filtering AsOf by the date of the
+    column, and by a range from the start of the day to the start of the next one, which can use the indexes on AsOf.
+    :param city: City.
+    :param as_of: AsOf date.
+    :param start_date: First check-in date in 'YYYY-MM-DD' format.
+    :param end_date: Last check-in date in 'YYYY-MM-DD' format.
+    :return: Dictionary of query name to query.
+    """
+    dates = (
+        select(HotelPrice.Date)
+        .where(HotelPrice.City == city)
+        .where(HotelPrice.Date.between(start_date, end_date))
+        .group_by(HotelPrice.Date)
+    )
+    start_of_day = datetime.datetime.combine(as_of, datetime.time.min)
+    return {
+        'func.date(AsOf) == as_of': dates.where(func.date(HotelPrice.AsOf) == as_of),
+        'AsOf range': dates.where(and_(HotelPrice.AsOf >= start_of_day,
+                                       HotelPrice.AsOf < start_of_day + datetime.timedelta(days=1)))
+    }
+
+
+def time_query(engine: Engine, query: Select, repeat: int) -> tuple[float, int]:
+    """
+    Get the best wall time of a query.
+    :param engine: SQLAlchemy engine.
+    :param query: Query.
+    :param repeat: Number of timed runs.
+    :return: Best wall time in seconds and the number of returned rows.
+    """
+    best_time = float('inf')
+    rows = 0
+    with Session(engine) as session:
+        for _ in range(repeat):
+            start_time = time.perf_counter()
+            rows = len(session.execute(query).all())
+            best_time = min(best_time, time.perf_counter() - start_time)
+    return best_time, rows
+
+
+def print_plans_and_timings(engine: Engine, queries: dict[str, Select], repeat: int) -> None:
+    """
+    Print the query plan and the best wall time of each query.
+    :param engine: SQLAlchemy engine.
+    :param queries: Dictionary of query name to query.
+    :param repeat: Number of timed runs.
+    :return: None
+    """
+    for name, query in queries.items():
+        with Session(engine) as session:
+            plan = session.execute(Explain(query)).all()
+        seconds, rows = time_query(engine, query, repeat)
+        print(f"  {name}: {seconds * 1000:,.1f} ms, {rows} dates")
+        for row in plan:
+            # SQLite returns (id, parent, notused, detail), PostgreSQL one line of text per row
+            print(f"    {row[-1]}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Compare the AsOf and Date queries of HotelPrice '
+                                                 'before and after its indexes are created.')
+    parser.add_argument('--rows', type=int, default=2_000_000, help='Number of rows, default is 2,000,000')
+    parser.add_argument('--as_of_days', type=int, default=10, help='Number of daily AsOf snapshots, default is 10')
+    parser.add_argument('--db_url', type=str,
+                        help='Empty database to generate the data into, default is a temporary SQLite database')
+    parser.add_argument('--repeat', type=int, default=5, help='Number of timed runs of each query, default is 5')
+    args = parser.parse_args()
+
+    main_logger.setLevel(logging.ERROR)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        engine = create_engine(args.db_url or f"sqlite:///{os.path.join(temp_dir, 'benchmark_indexes.db')}")
+
+        today = datetime.date.today()
+        config = SyntheticDatasetConfig(start_date=today, end_date=datetime.date(today.year + 1, 3, 31),
+                                        as_of_start=today, as_of_days=args.as_of_days)
+        config.scale_to_rows(args.rows)
+        print(f"Generating about {config.estimate_rows():,} rows...", flush=True)
+        written_rows = write_to_database(config, engine)
+
+        city = config.cities[0]
+        as_of = config.get_as_of_dates()[-1]
+        queries = create_queries(city, as_of, f'{today.year + 1}-02-01', f'{today.year + 1}-02-28')
+
+        for table in HotelPrice.metadata.sorted_tables:
+            for index in table.indexes:
+                # checkfirst does not see the expression indexes of SQLite
+                if has_index(engine, index):
+                    index.drop(engine)
+        print(f"\nWithout indexes, {written_rows:,} rows, {city} as of {as_of}:")
+        print_plans_and_timings(engine, queries, args.repeat)
+
+        start_time = time.perf_counter()
+        create_missing_indexes(engine)
+        print(f"\nIndexes created in {time.perf_counter() - start_time:.1f} s")
+        print(f"With indexes, {written_rows:,} rows, {city} as of {as_of}:")
+        print_plans_and_timings(engine, queries, args.repeat)
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+import argparse
+import datetime
+import logging
+import os
+import tempfile
+import time
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import Engine, create_engine, select, func
+from sqlalchemy.orm import Session
+
+from japan_avg_hotel_price_finder.configure_logging import main_logger
+from japan_avg_hotel_price_finder.sql.db_model import HotelPrice, HotelPriceHistory
+from japan_avg_hotel_price_finder.sql.price_history import enable_price_history
+from japan_avg_hotel_price_finder.sql.save_to_db import migrate_data_to_database
+from japan_avg_hotel_price_finder.synthetic_dataset import SyntheticDatasetConfig, generate_dataset
+
+
+def generate_sticky_snapshots(config: SyntheticDatasetConfig,
+                              change_rate: float,
+                              seed: int = 42) -> Iterator[pd.DataFrame]:
+    """
+    Generate the synthetic snapshots where a hotel keeps the price of its previous snapshot of the same check-in date,
+    except for the given share of them, like real quotes which mostly stay the same between scrape days.
+    :param config: SyntheticDatasetConfig.
+    :param change_rate: Share of prices which change between snapshots, e.g., 0.1 for 10%.
+    :param seed: Random seed, default is 42.
+    :return: Iterator of snapshot DataFrames.
+    """
+    rng = np.random.default_rng(seed)
+    previous_prices: dict[str, pd.Series] = {}
+    for df in generate_dataset(config):
+        city = df['City'].iloc[0]
+        key = pd.MultiIndex.from_arrays([df['Hotel'], df['Date']])
+        if city in previous_prices:
+            previous = previous_prices[city].reindex(key).to_numpy()
+        else:
+            previous = np.full(len(df), np.nan)
+        keep = ~np.isnan(previous) & (rng.random(len(df)) >= change_rate)
+        df['Price'] = np.where(keep, previous, df['Price'])
+        df['PriceReview'] = df['Price'] / df['Review']
+        previous_prices[city] = pd.Series(df['Price'].to_numpy(), index=key)
+        yield df
+
+
+def save_snapshots(engine: Engine, snapshots: list[pd.DataFrame]) -> float:
+    """
+    Save the snapshots in AsOf order, like daily scraping runs.
+    :param engine: SQLAlchemy engine.
+    :param snapshots: Snapshot DataFrames.
+    :return: Wall time in seconds.
+    """
+    start_time = time.perf_counter()
+    for df in snapshots:
+        migrate_data_to_database(df.copy(), engine, defer_aggregates=True)
+    return time.perf_counter() - start_time
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Compare the storage of HotelPrice as snapshots '
+                                                 'and as change-only price history.')
+    parser.add_argument('--num_hotels', type=int, default=300, help='Hotels of each city, default is 300')
+    parser.add_argument('--as_of_days', type=int, default=30, help='Number of daily AsOf snapshots, default is 30')
+    parser.add_argument('--change_rate', type=float, default=0.05,
+                        help='Share of prices which change between snapshots, default is 0.05')
+    parser.add_argument('--availability', type=float, default=1.0,
+                        help='Probability that a hotel is listed for a check-in date in a snapshot, default is 1.0. '
+                             'A hotel which is not listed closes its price interval')
+    args = parser.parse_args()
+
+    main_logger.setLevel(logging.ERROR)
+
+    today = datetime.date.today()
+    config = SyntheticDatasetConfig(cities=['Osaka', 'Tokyo'], num_hotels=args.num_hotels, start_date=today,
+                                    end_date=today + datetime.timedelta(days=90), as_of_start=today,
+                                    as_of_days=args.as_of_days, availability=args.availability)
+    snapshots = list(generate_sticky_snapshots(config, args.change_rate))
+    total_rows = sum(len(df) for df in snapshots)
+    print(f"{len(snapshots)} snapshots, {total_rows:,} scraped rows, {args.change_rate:.0%} of prices change daily")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for mode in ('snapshot', 'history'):
+            path = os.path.join(temp_dir, f'{mode}.db')
+            engine = create_engine(f'sqlite:///{path}')
+            if mode == 'history':
+                enable_price_history(engine)
+            seconds = save_snapshots(engine, snapshots)
+
+            with Session(engine) as session:
+                view_rows = session.scalar(select(func.count()).select_from(HotelPrice))
+                stored_rows = session.scalar(select(func.count()).select_from(
+                    HotelPriceHistory if mode == 'history' else HotelPrice))
+            engine.dispose()
+            print(f"  {mode}: {stored_rows:,} stored rows for {view_rows:,} HotelPrice rows, "
+                  f"{os.path.getsize(path) / 1024 ** 2:,.1f} MB, saved in {seconds:.1f} s")
+
+
+if __name__ == '__main__':
+    main()
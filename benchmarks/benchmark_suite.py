@@ -0,0 +1,282 @@
+import argparse
+import datetime
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass, asdict
+from typing import Any, Callable
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import Engine, create_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from benchmarks.benchmark_extractor import RESULTS_PER_PAGE, create_pages
+from check_missing_dates import MissingDateChecker
+from japan_avg_hotel_price_finder.configure_logging import main_logger
+from japan_avg_hotel_price_finder.graphql_scraper_func.graphql_data_extractor import extract_hotel_data
+from japan_avg_hotel_price_finder.graphql_scraper_func.graphql_data_transformer import transform_data_in_df
+from japan_avg_hotel_price_finder.graphql_scraper_func.graphql_utils_func import concat_df_list
+from japan_avg_hotel_price_finder.sql.db_model import Base
+from japan_avg_hotel_price_finder.sql.save_to_db import migrate_data_to_database, \
+    create_avg_hotel_room_price_by_date_table, create_avg_room_price_by_review_table, \
+    create_avg_hotel_price_by_dow_table, create_avg_hotel_price_by_month_table, create_avg_room_price_by_location
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+# Number of distinct generated pages, larger payloads reuse them, so 1M rows do not need GBs of dictionaries
+MAX_DISTINCT_PAGES = 100
+
+AGGREGATE_STAGES: dict[str, Callable[[Session], None]] = {
+    'create_avg_hotel_room_price_by_date_table': create_avg_hotel_room_price_by_date_table,
+    'create_avg_room_price_by_review_table': create_avg_room_price_by_review_table,
+    'create_avg_hotel_price_by_dow_table': create_avg_hotel_price_by_dow_table,
+    'create_avg_hotel_price_by_month_table': create_avg_hotel_price_by_month_table,
+    'create_avg_room_price_by_location': create_avg_room_price_by_location
+}
+
+
+@dataclass
+class StageResult:
+    """
+    Measurements of one benchmark stage.
+
+    Attributes:
+        stage (str): Name of the stage.
+        rows (int): Number of input rows.
+        seconds (float): Best wall time of the stage.
+        rows_per_second (float): Rows per second of the best run.
+        peak_memory_mb (float): Peak Python memory allocated during the stage, in MB.
+        allocated_blocks (int): Number of memory blocks allocated by the stage and still alive at its end.
+    """
+    stage: str
+    rows: int
+    seconds: float
+    rows_per_second: float
+    peak_memory_mb: float
+    allocated_blocks: int
+
+    @property
+    def key(self) -> str:
+        return f'{self.stage}@{self.rows}'
+
+
+def measure_stage(stage: str,
+                  rows: int,
+                  setup: Callable[[], Any],
+                  run: Callable[[Any], Any],
+                  repeat: int) -> StageResult:
+    """
+    Measure the best wall time of a stage, then its peak memory and allocations in a separate traced run,
+    as tracing slows the stage down.
+    :param stage: Name of the stage.
+    :param rows: Number of input rows.
+    :param setup: Function creating the input of one run, not measured.
+    :param run: Function running the stage on its input.
+    :param repeat: Number of timed runs.
+    :return: StageResult
+    """
+    best_time = float('inf')
+    for _ in range(repeat):
+        stage_input = setup()
+        start_time = time.perf_counter()
+        run(stage_input)
+        best_time = min(best_time, time.perf_counter() - start_time)
+
+    stage_input = setup()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    run(stage_input)
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    allocated_blocks = sum(stat.count_diff for stat in after.compare_to(before, 'lineno') if stat.count_diff > 0)
+
+    result = StageResult(stage=stage, rows=rows, seconds=best_time, rows_per_second=rows / best_time,
+                         peak_memory_mb=peak / 1024 ** 2, allocated_blocks=allocated_blocks)
+    print(f"{result.key}: {result.rows_per_second:,.0f} rows/sec | {result.seconds:.3f} s | "
+          f"peak {result.peak_memory_mb:,.1f} MB | {result.allocated_blocks:,} blocks", flush=True)
+    return result
+
+
+def create_hotel_data(rows: int, seed: int = 42) -> pd.DataFrame:
+    """
+    Create hotel data in the shape returned by transform_data_in_df, scraped today for the rest of the year,
+    with every tenth date missing so the Missing Date Checker has dates to find.
+    :param rows: Number of rows.
+    :param seed: Random seed, default is 42.
+    :return: Pandas DataFrame.
+    """
+    rng = np.random.default_rng(seed)
+    today = datetime.date.today()
+    dates = pd.date_range(today, datetime.date(today.year, 12, 31))
+    dates = dates[np.arange(len(dates)) % 10 != 9] if len(dates) >= 10 else dates
+
+    price = rng.uniform(30, 800, rows).round(2)
+    review = rng.uniform(5, 10, rows).round(1)
+    return pd.DataFrame({
+        'Hotel': [f'Hotel {i}' for i in range(rows)],
+        'Price': price,
+        'Review': review,
+        'Location': rng.choice(['Namba', 'Umeda', 'Shinsaibashi', 'Tennoji', 'Kyobashi'], rows),
+        'Price/Review': price / review,
+        'City': 'Osaka',
+        'Date': rng.choice(dates.strftime('%Y-%m-%d'), rows),
+        'AsOf': datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+    })
+
+
+def create_engine_with_data(directory: str, name: str, hotel_data: pd.DataFrame | None = None) -> Engine:
+    """
+    Create an empty SQLite database, optionally loaded with hotel data.
+    :param directory: Directory of the database file.
+    :param name: Name of the database file.
+    :param hotel_data: Hotel data to load, default is None.
+    :return: SQLAlchemy engine.
+    """
+    path = os.path.join(directory, name)
+    if os.path.exists(path):
+        os.remove(path)
+    engine = create_engine(f'sqlite:///{path}')
+    Base.metadata.create_all(engine)
+    if hotel_data is not None:
+        migrate_data_to_database(hotel_data.copy(), engine, defer_aggregates=True)
+    return engine
+
+
+def run_aggregate(engine: Engine, create_table: Callable[[Session], None]) -> None:
+    """
+    Recompute a whole aggregate table and commit it.
+    :param engine: SQLAlchemy engine.
+    :param create_table: create_avg_* function.
+    :return: None
+    """
+    with sessionmaker(bind=engine)() as session:
+        create_table(session)
+        session.commit()
+
+
+def run_suite(rows: int, repeat: int, directory: str) -> list[StageResult]:
+    """
+    Run every stage with the given number of rows.
+    :param rows: Number of rows.
+    :param repeat: Number of timed runs of each stage.
+    :param directory: Directory of the temporary SQLite databases.
+    :return: List of StageResult.
+    """
+    num_pages = max(1, rows // RESULTS_PER_PAGE)
+    distinct_pages = create_pages(min(num_pages, MAX_DISTINCT_PAGES))
+    pages = [distinct_pages[i % len(distinct_pages)] for i in range(num_pages)]
+    page_rows = num_pages * RESULTS_PER_PAGE
+
+    def extract(_) -> list[pd.DataFrame]:
+        df_list = []
+        for page in pages:
+            extract_hotel_data(df_list, page)
+        return df_list
+
+    df_list = extract(None)
+    extracted = concat_df_list(df_list)
+    hotel_data = create_hotel_data(rows)
+
+    results = [
+        measure_stage('extract_hotel_data', page_rows, lambda: None, extract, repeat),
+        measure_stage('concat_df_list', page_rows, lambda: df_list, concat_df_list, repeat),
+        measure_stage('transform_data_in_df', page_rows, extracted.copy,
+                      lambda df: transform_data_in_df('2025-01-01', 'Osaka', df), repeat),
+        measure_stage('migrate_data_to_database', rows,
+                      lambda: (create_engine_with_data(directory, 'migrate.db'), hotel_data.copy()),
+                      lambda engine_df: migrate_data_to_database(engine_df[1], engine_df[0], defer_aggregates=True),
+                      repeat)
+    ]
+
+    engine = create_engine_with_data(directory, 'aggregate.db', hotel_data)
+    for stage, create_table in AGGREGATE_STAGES.items():
+        results.append(measure_stage(stage, rows, lambda: engine,
+                                     lambda bound_engine: run_aggregate(bound_engine, create_table), repeat))
+
+    checker = MissingDateChecker(engine=engine, city='Osaka')
+    results.append(measure_stage('find_missing_dates_in_db', rows, lambda: checker,
+                                 lambda date_checker: date_checker.find_missing_dates_in_db(
+                                     datetime.date.today().year), repeat))
+    engine.dispose()
+    return results
+
+
+def find_regressions(results: list[StageResult], baseline: dict[str, dict[str, Any]], threshold: float) -> list[str]:
+    """
+    Compare the results with the baseline.
+    A stage regresses if its rows/sec drops, or its peak memory grows, by more than the threshold.
+    Stages which are not in the baseline are skipped.
+    :param results: List of StageResult.
+    :param baseline: Baseline results keyed by stage@rows.
+    :param threshold: Allowed relative change, e.g., 0.2 for 20%.
+    :return: List of regression messages.
+    """
+    regressions = []
+    for result in results:
+        expected = baseline.get(result.key)
+        if expected is None:
+            continue
+        if result.rows_per_second < expected['rows_per_second'] * (1 - threshold):
+            regressions.append(f"{result.key}: {result.rows_per_second:,.0f} rows/sec, "
+                               f"baseline {expected['rows_per_second']:,.0f} rows/sec")
+        if result.peak_memory_mb > expected['peak_memory_mb'] * (1 + threshold):
+            regressions.append(f"{result.key}: peak {result.peak_memory_mb:,.1f} MB, "
+                               f"baseline {expected['peak_memory_mb']:,.1f} MB")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark the extract, transform, save and aggregate stages.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 100_000],
+                        help='Numbers of rows, default is 1,000 and 100,000. Add 1000000 for the 1M-row run')
+    parser.add_argument('--repeat', type=int, default=3, help='Number of timed runs of each stage, default is 3')
+    parser.add_argument('--baseline', type=str, default=DEFAULT_BASELINE,
+                        help='JSON baseline to compare with, default is benchmarks/baseline.json')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='Allowed slowdown or memory growth before the run fails, default is 0.25 (25%%)')
+    parser.add_argument('--save_baseline', action='store_true',
+                        help='Write the results to the baseline instead of comparing with it')
+    args = parser.parse_args()
+
+    # Logs of every row and missing date would dominate the timing
+    main_logger.setLevel(logging.ERROR)
+
+    results = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for rows in args.sizes:
+            results.extend(run_suite(rows, args.repeat, temp_dir))
+
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding='utf-8') as file:
+                baseline = json.load(file)
+        baseline.update({result.key: asdict(result) for result in results})
+        with open(args.baseline, 'w', encoding='utf-8') as file:
+            json.dump(baseline, file, indent=2, sort_keys=True)
+        print(f"Baseline saved to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}, run with --save_baseline first")
+        return
+
+    with open(args.baseline, encoding='utf-8') as file:
+        baseline = json.load(file)
+    regressions = find_regressions(results, baseline, args.threshold)
+    if regressions:
+        print(f"{len(regressions)} regressions over {args.threshold:.0%}:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+    print(f"No regression over {args.threshold:.0%} compared to {args.baseline}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,23 +1,26 @@
 import argparse
 import asyncio
-import calendar
 import datetime
 import os
-from calendar import monthrange
 from dataclasses import dataclass, field
 from typing import Any
 
+import pandas as pd
 from dotenv import load_dotenv
-from sqlalchemy import create_engine, func, Engine, extract, Date, String, Row, FunctionElement
+from sqlalchemy import create_engine, func, Engine, Date, String, Row, select, cast, \
+    literal, text, and_
 from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import sessionmaker, Session
 
+from japan_avg_hotel_price_finder.background_writer import BackgroundWriter
 from japan_avg_hotel_price_finder.booking_details import BookingDetails
 from japan_avg_hotel_price_finder.configure_logging import main_logger
 from japan_avg_hotel_price_finder.date_utils.date_utils import format_date, calculate_check_out_date
 from japan_avg_hotel_price_finder.graphql_scraper import BasicGraphQLScraper
-from japan_avg_hotel_price_finder.sql.db_model import HotelPrice
-from japan_avg_hotel_price_finder.sql.save_to_db import save_scraped_data
+from japan_avg_hotel_price_finder.scrape_scheduler import ScrapeTask, ScrapeScheduler
+from japan_avg_hotel_price_finder.sql.db_model import HotelPrice, ScrapeManifest
+from japan_avg_hotel_price_finder.sql.save_to_db import save_scraped_data, AggregateKeys, refresh_aggregate_tables
+from japan_avg_hotel_price_finder.sql.scrape_manifest import create_manifest_table, combine_manifest_entries
 
 load_dotenv(dotenv_path='.env')
 
@@ -28,147 +31,77 @@ postgres_password = os.getenv('POSTGRES_PASSWORD')
 postgres_db = os.getenv('POSTGRES_DB')
 
 
-def find_missing_dates(dates_in_db: set[str],
-                       days_in_month: int,
-                       month: int,
-                       year: int,
-                       today: datetime.datetime) -> list[str]:
-    """
-    Find missing dates of the given month.
-    :param dates_in_db: Dates of that month in the database of the current AsOf Date.
-                        Date format: '%Y-%m-%d'.
-    :param days_in_month: Total days in the given month.
-    :param month: Month.
-    :param year: Year.
-    :param today: Datetime object of today, used to find the missing dates.
-    :returns: Missing Dates as a list.
-    """
-    main_logger.info(f"Find missing date of {calendar.month_name[month]} {year}.")
-
-    # convert date string to a date object
-    dates_in_db_date_obj = convert_to_date_obj(dates_in_db)
-
-    # filter out past date
-    filtered_dates = filter_past_date(dates_in_db_date_obj, today)
-
-    today_date_obj: datetime.date = today.date()
-    missing_dates_list: list[str] = []
-
-    # find missing dates of the given month
-    for day in range(1, days_in_month + 1):
-        date_to_check: datetime.date = datetime.datetime(year, month, day).date()
-        date_to_check_str: str = format_date(date_to_check)
-        if date_to_check < today_date_obj:
-            main_logger.warning(f"{date_to_check_str} has passed. Skip this date.")
-        else:
-            if date_to_check not in filtered_dates:
-                missing_dates_list.append(date_to_check_str)
-
-    return missing_dates_list
-
-
-def convert_to_date_obj(dates_in_db: set[str]) -> list[datetime.date]:
-    """
-    Convert a list of date strings to date objects.
-    :param dates_in_db: A set of date strings in 'YYYY-MM-DD' format.
-    :return: A list of datetime.date objects corresponding to the input date strings.
-    """
-    dates_in_db_date_obj: list[datetime.date] = [datetime.datetime.strptime(date, '%Y-%m-%d').date()
-                                                 for date in dates_in_db]
-    return dates_in_db_date_obj
-
-
-def filter_past_date(dates_in_db_date_obj: list[datetime.date], today: datetime.datetime) -> list[datetime.date]:
-    """
-    Filter out past dates from a list of dates.
-    :param dates_in_db_date_obj: A list of date objects to filter.
-    :param today: The reference date used for filtering.
-    :return: A new list containing only the dates from the input list
-             that are equal to or greater than the reference date.
-    """
-    filtered_dates: list[datetime.date] = [date for date in dates_in_db_date_obj if date >= today.date()]
-    return filtered_dates
-
-
 async def scrape_missing_dates(missing_dates_list: list[str] = None,
                                booking_details_class: 'BookingDetails' = None,
                                country: str = 'Japan',
-                               engine: Engine = None) -> None:
+                               engine: Engine = None,
+                               max_concurrent_tasks: int = 4,
+                               max_pages_in_flight: int = 10,
+                               flush_rows: int = 10_000) -> list[str]:
     """
-    Scrape missing dates with BasicScraper and load them into a database.
+    Scrape missing dates concurrently with BasicScraper and load them into a database in batches.
+    Batches are written in a background thread while scraping continues.
+    The aggregate tables are refreshed once, for the keys touched by all missing dates, after the last batch is saved.
+    A date which fails is reported and skipped without stopping the other dates.
     :param missing_dates_list: Missing dates.
     :param booking_details_class: Dataclass of booking details as parameters, default is None.
     :param country: Country where the hotels are located, default is Japan.
     :param engine: SQLAlchemy engine.
-    :return: None
+    :param max_concurrent_tasks: Maximum number of dates scraped at the same time, default is 4.
+    :param max_pages_in_flight: Maximum number of result pages requested at the same time across all dates,
+                                default is 10.
+    :param flush_rows: Number of rows which triggers a database write, default is 10,000.
+    :return: List of dates which failed.
     """
     main_logger.info("Scraping missing dates...")
-    if missing_dates_list:
-        for date in missing_dates_list:
-            check_in: str = date
-            check_in_date_obj = datetime.datetime.strptime(check_in, '%Y-%m-%d').date()
-            check_out_date_obj: datetime.date = calculate_check_out_date(current_date=check_in_date_obj, nights=1)
-            check_out: str = format_date(check_out_date_obj)
-
-            if booking_details_class is None:
-                main_logger.warning('The BookingDetailsParam class which contains attributes for scraper is None.')
-
-            city = booking_details_class.city
-            group_adults = booking_details_class.group_adults
-            group_children = booking_details_class.group_children
-            num_rooms = booking_details_class.num_rooms
-            selected_currency = booking_details_class.selected_currency
-            scrape_only_hotel = booking_details_class.scrape_only_hotel
-
-            scraper = BasicGraphQLScraper(check_in=check_in, check_out=check_out, city=city, group_adults=group_adults,
-                                          group_children=group_children, num_rooms=num_rooms,
-                                          selected_currency=selected_currency,
-                                          scrape_only_hotel=scrape_only_hotel, country=country)
-            df = await scraper.scrape_graphql()
-
-            save_scraped_data(dataframe=df, engine=engine)
-    else:
+    if not missing_dates_list:
         main_logger.warning("Missing dates is None. No missing dates to scrape.")
-
-
-def get_date_count_by_month(session: Session, city: str, as_of: datetime.date = None) -> list[tuple[str, int]]:
-    """
-    Get a distinct date count of each month for today's scraped data, for a specific city.
-    :param session: SQLAlchemy session
-    :param city: City name.
-    :param as_of: The date to filter AsOf by.
-                    If None, use the current date.
-    :return: List of tuples containing (month, count)
-    """
-    dialect = session.bind.dialect
-
-    if isinstance(dialect, postgresql.dialect):
-        # PostgreSQL version
-        month_expr: FunctionElement = func.concat(
-            extract('year', func.cast(HotelPrice.Date, Date)).cast(String),
-            '-',
-            func.lpad(extract('month', func.cast(HotelPrice.Date, Date)).cast(String), 2, '0')
-        )
-    elif isinstance(dialect, sqlite.dialect):
-        # SQLite version
-        month_expr: FunctionElement = func.strftime('%Y-%m', func.date(HotelPrice.Date))
-    else:
-        raise NotImplementedError(f"Unsupported dialect: {dialect}")
-
-    query = (
-        session.query(
-            month_expr.label('month'),
-            func.count(func.distinct(HotelPrice.Date)).label('count')
-        )
-        .filter(HotelPrice.City == city)
-    )
-
-    if as_of is not None:
-        query = query.filter(func.date(HotelPrice.AsOf) == as_of)
+        return []
+
+    if booking_details_class is None:
+        main_logger.warning('The BookingDetailsParam class which contains attributes for scraper is None.')
+
+    tasks: list[ScrapeTask] = []
+    for check_in in missing_dates_list:
+        check_in_date_obj = datetime.datetime.strptime(check_in, '%Y-%m-%d').date()
+        check_out_date_obj: datetime.date = calculate_check_out_date(current_date=check_in_date_obj, nights=1)
+        tasks.append(ScrapeTask(city=booking_details_class.city, check_in=check_in,
+                                check_out=format_date(check_out_date_obj)))
+
+    scraper = BasicGraphQLScraper(check_in=tasks[0].check_in, check_out=tasks[0].check_out,
+                                  city=booking_details_class.city,
+                                  group_adults=booking_details_class.group_adults,
+                                  group_children=booking_details_class.group_children,
+                                  num_rooms=booking_details_class.num_rooms,
+                                  selected_currency=booking_details_class.selected_currency,
+                                  scrape_only_hotel=booking_details_class.scrape_only_hotel, country=country)
+
+    aggregate_keys = AggregateKeys()
+    failed_dates: list[str] = []
+
+    def write_batch(batch: list[tuple[ScrapeTask, pd.DataFrame]]) -> None:
+        df_list = [df for _, df in batch if not df.empty]
+        if df_list:
+            # pandas drops the manifest entries of the dates when they differ, so they are combined
+            df = combine_manifest_entries(pd.concat(df_list, ignore_index=True), df_list)
+            aggregate_keys.update(save_scraped_data(dataframe=df, engine=engine, defer_aggregates=True))
+
+    def report_failure(task: ScrapeTask, error: Exception) -> None:
+        main_logger.error(f"Failed to scrape the missing date {task.check_in}: {error}")
+        failed_dates.append(task.check_in)
+
+    scheduler = ScrapeScheduler(max_concurrent_tasks=max_concurrent_tasks, max_pages_in_flight=max_pages_in_flight)
+    async with BackgroundWriter(write=write_batch, flush_rows=flush_rows) as writer:
+        await scheduler.run(scraper, tasks, on_result=writer.put, keep_results=False, on_error=report_failure)
+
+    refresh_aggregate_tables(engine, aggregate_keys)
+
+    if failed_dates:
+        failed_dates.sort()
+        main_logger.warning(f"{len(failed_dates)} of {len(tasks)} missing dates failed: {failed_dates}")
     else:
-        query = query.filter(func.date(HotelPrice.AsOf) == func.current_date())
-
-    return query.group_by('month').all()
+        main_logger.info(f"All {len(tasks)} missing dates were scraped")
+    return failed_dates
 
 
 @dataclass
@@ -192,129 +125,95 @@ class MissingDateChecker:
 
     def find_missing_dates_in_db(self, year: int) -> list[str]:
         """
-        Find missing dates in the database using SQLAlchemy ORM.
+        Find missing dates in the database using SQLAlchemy ORM, with a single set-based query.
         :param year: Year of the dates to check whether they are missing.
         :return: List of missing dates.
         """
-        main_logger.info("Checking if all dates were scraped in a database...")
-        missing_date_list: list[str] = []
+        main_logger.info(f"Checking if all dates of {year} were scraped today, UTC time, "
+                         f"for city {self.city} in a database...")
 
         session = self.Session()
         try:
-            main_logger.info(f'Get a distinct date count of each month for today scraped data, '
-                             f'UTC time, for city {self.city}...')
-
-            count_of_date_by_mth_as_of_today = get_date_count_by_month(session, self.city)
-
-            if not count_of_date_by_mth_as_of_today:
-                today = datetime.datetime.now(datetime.timezone.utc).date()
-                main_logger.warning(f"No scraped data for today, {today}, UTC time for city {self.city} in  a database")
-                return missing_date_list
-
-            today = datetime.datetime.today()
-            current_month: str = today.strftime('%Y-%m')
-
-            self.check_missing_dates(count_of_date_by_mth_as_of_today, current_month, missing_date_list, today, year)
+            create_manifest_table(self.engine)
+            missing_dates: list[str] = [row.Date for row in get_missing_dates_in_db(session, [self.city], year)]
         except Exception as e:
             main_logger.error(f"An error occurred while querying the database: {str(e)}")
-            return missing_date_list
+            return []
         finally:
             session.close()
 
-        return missing_date_list
-
-    def check_missing_dates(self,
-                            count_of_date_by_mth_as_of_today_list: list[tuple],
-                            current_month: str,
-                            missing_date_list: list[str],
-                            today: datetime,
-                            year: int) -> None:
-        """
-        Check missing dates of each month.
-        :param count_of_date_by_mth_as_of_today_list: Count of dates by month as of today as a list of Tuple.
-        :param current_month: Current month.
-        :param missing_date_list: List of missing dates.
-        :param today: Today's date used to check missing dates.
-        :param year: Year of the dates to check whether they are missing.
-        :return: None
-        """
-        main_logger.info(f"Check missing dates of each month in the database for {self.city}...")
-        for row in count_of_date_by_mth_as_of_today_list:
-            month_str, count = row[:2]
-            date_obj = datetime.datetime.strptime(month_str, '%Y-%m')
-            month: int = date_obj.month
-            days_in_month: int = monthrange(year, month)[1]
-
-            is_current_month: bool = (month_str == current_month)
-            expected_count = days_in_month - today.day + 1 if is_current_month else days_in_month
-
-            if count == expected_count:
-                main_logger.info(f"All dates of {calendar.month_name[month]} {year} were scraped")
-            else:
-                main_logger.warning(f"Not all dates of {calendar.month_name[month]} {year} were scraped")
-                dates_in_db, end_date, start_date = self.find_dates_of_the_month_in_db(days_in_month, month, year)
-                new_missing_dates = find_missing_dates(dates_in_db, days_in_month, month, year, today)
-                missing_date_list.extend(new_missing_dates)
-                main_logger.warning(f"Missing dates in {start_date} to {end_date}: {new_missing_dates}")
-
-    def find_dates_of_the_month_in_db(self, days_in_month: int, month: int, year: int) -> tuple[set[str], str, str]:
-        """
-        Find dates of the given month in the Database.
-        :param days_in_month: Total days in the given month.
-        :param month: Month.
-        :param year: Year.
-        :return: Tuple of (Dates in the database, End Date, Start Date).
-                Date format for all values in the Tuple: '%Y-%m-%d'.
-        """
-        main_logger.info(f'Get dates of {calendar.month_name[month]} {year} in the database for {self.city}...')
-        main_logger.info('As of today, UTC time')
-
-        start_date: str = datetime.datetime(year, month, 1).strftime('%Y-%m-%d')
-        end_date: str = datetime.datetime(year, month, days_in_month).strftime('%Y-%m-%d')
-
-        session = self.Session()
-        try:
-            result = get_dates_in_db(session=session, start_date=start_date, end_date=end_date, city=self.city)
-            dates_in_db: set[str] = set(row.Date for row in result)
-            return dates_in_db, end_date, start_date
-        finally:
-            session.close()
+        if missing_dates:
+            main_logger.warning(f"Missing dates of {self.city}: {missing_dates}")
+        else:
+            main_logger.info(f"No missing dates of {self.city} in the months scraped today")
+        return missing_dates
 
 
-def get_dates_in_db(session: Session, start_date: str, end_date: str, city: str, as_of: datetime.date = None) -> list[Row]:
+def get_missing_dates_in_db(session: Session,
+                            cities: list[str],
+                            year: int,
+                            as_of: datetime.date = None,
+                            today: datetime.date = None) -> list[Row]:
     """
-    Retrieve dates from the database for a specific date range and city.
+    Find the missing dates of several cities in one round trip.
+    A calendar of the year from today, generate_series on PostgreSQL or a recursive CTE on SQLite,
+    is limited to the months each city has data for on the AsOf date,
+    then anti-joined against the check-in dates of the scrape manifest of that AsOf date,
+    which is an index lookup instead of a scan of the HotelPrice table.
     :param session: SQLAlchemy session
-    :param start_date: Start date of the range (format: 'YYYY-MM-DD')
-    :param end_date: End date of the range (format: 'YYYY-MM-DD')
-    :param city: City name
+    :param cities: City names.
+    :param year: Year of the dates to check whether they are missing.
     :param as_of: The date to filter AsOf by.
                     If None, use the current date.
-    :return: List of query results containing dates
+    :param today: Dates before today are skipped, as they cannot be scraped anymore.
+                    If None, use the current date.
+    :return: List of (City, Date) rows ordered by City and Date, Date format: '%Y-%m-%d'.
     """
-    dialect = session.bind.dialect
+    if today is None:
+        today = datetime.datetime.today().date()
 
+    start_of_year = datetime.date(year, 1, 1)
+    end_of_year = datetime.date(year, 12, 31)
+    start_date = format_date(max(start_of_year, today))
+    end_date = format_date(end_of_year)
+    if start_date > end_date:
+        return []
+
+    dialect = session.bind.dialect
     if isinstance(dialect, postgresql.dialect):
         # PostgreSQL version
-        date_expr: FunctionElement = func.to_char(func.cast(HotelPrice.Date, Date), 'YYYY-MM-DD')
+        day = func.generate_series(cast(start_date, Date), cast(end_date, Date), text("interval '1 day'"))
+        calendar_dates = select(func.to_char(day, 'YYYY-MM-DD').label('Date')).cte('calendar')
     elif isinstance(dialect, sqlite.dialect):
         # SQLite version
-        date_expr: FunctionElement = func.strftime('%Y-%m-%d', func.date(HotelPrice.Date))
+        calendar_dates = select(literal(start_date).label('Date')).cte('calendar', recursive=True)
+        calendar_dates = calendar_dates.union_all(
+            select(func.date(calendar_dates.c.Date, '+1 day')).where(calendar_dates.c.Date < end_date)
+        )
     else:
         raise NotImplementedError(f"Unsupported dialect: {dialect}")
 
-    query = (
-        session.query(date_expr.label('Date'))
-        .filter(HotelPrice.Date.between(start_date, end_date))
-        .filter(HotelPrice.City == city)
+    as_of_date = format_date(as_of) if as_of is not None else cast(func.current_date(), String)
+    scraped = (
+        select(ScrapeManifest.City, ScrapeManifest.Date)
+        .where(ScrapeManifest.TableName == HotelPrice.__tablename__)
+        .where(ScrapeManifest.City.in_(cities))
+        .where(ScrapeManifest.AsOf == as_of_date)
+        .where(ScrapeManifest.Date.between(format_date(start_of_year), format_date(end_of_year)))
+        .distinct()
+        .cte('scraped')
     )
+    scraped_months = select(scraped.c.City, func.substr(scraped.c.Date, 1, 7).label('Month')).distinct().cte(
+        'scraped_months')
 
-    if as_of is not None:
-        query = query.filter(func.date(HotelPrice.AsOf) == as_of)
-    else:
-        query = query.filter(func.date(HotelPrice.AsOf) == func.current_date())
-
-    return query.group_by(HotelPrice.Date).all()
+    query = (
+        select(scraped_months.c.City, calendar_dates.c.Date)
+        .join_from(calendar_dates, scraped_months, func.substr(calendar_dates.c.Date, 1, 7) == scraped_months.c.Month)
+        .outerjoin(scraped, and_(scraped.c.City == scraped_months.c.City, scraped.c.Date == calendar_dates.c.Date))
+        .where(scraped.c.Date.is_(None))
+        .order_by(scraped_months.c.City, calendar_dates.c.Date)
+    )
+    return list(session.execute(query).all())
 
 
 def parse_arguments() -> argparse.Namespace:
@@ -333,6 +232,11 @@ def parse_arguments() -> argparse.Namespace:
                         help='Whether to scrape only hotel properties, default is True')
     parser.add_argument('--year', type=int, default=datetime.datetime.today().year,
                         help='Year of the dates to check whether they are missing, default is the current year.')
+    parser.add_argument('--max_concurrent_tasks', type=int, default=4,
+                        help='Maximum number of missing dates scraped at the same time, default is 4')
+    parser.add_argument('--max_pages_in_flight', type=int, default=10,
+                        help='Maximum number of result pages requested at the same time across all missing dates, '
+                             'default is 10')
     return parser.parse_args()
 
 
@@ -348,4 +252,6 @@ if __name__ == '__main__':
     engine = create_engine(postgres_url)
     missing_date_checker = MissingDateChecker(engine=engine, city=args.city)
     missing_dates: list[str] = missing_date_checker.find_missing_dates_in_db(year=args.year)
-    asyncio.run(scrape_missing_dates(missing_dates, booking_details_class=booking_details, engine=engine))
+    asyncio.run(scrape_missing_dates(missing_dates, booking_details_class=booking_details, engine=engine,
+                                     max_concurrent_tasks=args.max_concurrent_tasks,
+                                     max_pages_in_flight=args.max_pages_in_flight))
@@ -0,0 +1,132 @@
+import asyncio
+from dataclasses import dataclass, field
+from typing import Callable
+
+import pandas as pd
+
+from japan_avg_hotel_price_finder.configure_logging import main_logger
+from japan_avg_hotel_price_finder.scrape_scheduler import ScrapeTask
+
+# Marks the end of the queue
+_STOP = object()
+
+
+@dataclass
+class BackgroundWriter:
+    """
+    Write scrape results to the database in a worker thread while scraping continues.
+    Scrape tasks put their DataFrame on a bounded queue, and a consumer collects them into batches,
+    which are passed to the write function in a thread once they are large or old enough.
+    Producers wait when the queue is full, so memory stays bounded when the database is slower than the network.
+    Use it as an async context manager, leaving it writes the remaining results.
+
+    Attributes:
+        write (Callable[[list[tuple[ScrapeTask, pd.DataFrame]]], None]): Synchronous function
+                                                                        writing a batch of results.
+        max_queued_results (int): Maximum number of results waiting in the queue, default is 10.
+        flush_rows (int): Number of rows which triggers a write, default is 10,000.
+        flush_interval (float): Maximum number of seconds a result waits before it is written, default is 5.
+    """
+    write: Callable[[list[tuple[ScrapeTask, pd.DataFrame]]], None]
+    max_queued_results: int = 10
+    flush_rows: int = 10_000
+    flush_interval: float = 5.0
+
+    queue: asyncio.Queue = field(init=False, repr=False)
+    consumer: asyncio.Task | None = field(init=False, default=None, repr=False)
+    error: Exception | None = field(init=False, default=None, repr=False)
+
+    def __post_init__(self):
+        if self.max_queued_results <= 0:
+            raise ValueError(f"Invalid max_queued_results: {self.max_queued_results}. Must be positive.")
+        if self.flush_rows <= 0:
+            raise ValueError(f"Invalid flush_rows: {self.flush_rows}. Must be positive.")
+        if self.flush_interval <= 0:
+            raise ValueError(f"Invalid flush_interval: {self.flush_interval}. Must be positive.")
+
+    async def __aenter__(self) -> 'BackgroundWriter':
+        self.queue = asyncio.Queue(maxsize=self.max_queued_results)
+        self.error = None
+        self.consumer = asyncio.create_task(self._consume())
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        # Results of the finished tasks are written even if scraping failed, so they are not lost
+        await self.queue.put(_STOP)
+        await self.consumer
+        self.consumer = None
+        if exc_type is None:
+            self._raise_error()
+
+    async def put(self, task: ScrapeTask, df: pd.DataFrame) -> None:
+        """
+        Queue the DataFrame of a scrape task, waiting while the queue is full.
+        Its signature matches the on_result callback of ScrapeScheduler.run.
+        :param task: Scrape task.
+        :param df: DataFrame of the task.
+        :return: None
+        """
+        self._raise_error()
+        await self.queue.put((task, df))
+
+    async def _consume(self) -> None:
+        """
+        Collect queued results into batches and write them in a thread by size and by age.
+        After a failed write, the remaining results are discarded, so producers never wait forever.
+        :return: None
+        """
+        loop = asyncio.get_running_loop()
+        batch: list[tuple[ScrapeTask, pd.DataFrame]] = []
+        batch_rows = 0
+        flush_deadline = 0.0
+
+        try:
+            while True:
+                timeout = max(flush_deadline - loop.time(), 0) if batch else None
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    main_logger.debug(f"Writing {batch_rows} rows after {self.flush_interval} seconds")
+                    await self._flush(batch)
+                    batch, batch_rows = [], 0
+                    continue
+
+                if item is _STOP:
+                    if batch:
+                        await self._flush(batch)
+                    return
+
+                if not batch:
+                    flush_deadline = loop.time() + self.flush_interval
+                batch.append(item)
+                batch_rows += len(item[1])
+
+                if batch_rows >= self.flush_rows:
+                    await self._flush(batch)
+                    batch, batch_rows = [], 0
+        except Exception as e:
+            main_logger.error(f"Background write failed: {str(e)}")
+            self.error = e
+            while await self.queue.get() is not _STOP:
+                pass
+
+    async def _flush(self, batch: list[tuple[ScrapeTask, pd.DataFrame]]) -> None:
+        """
+        Write a batch of results in a thread, so the event loop keeps scraping.
+        :param batch: List of scrape tasks and their DataFrames.
+        :return: None
+        """
+        main_logger.debug(f"Writing a batch of {len(batch)} results in the background")
+        await asyncio.to_thread(self.write, batch)
+
+    def _raise_error(self) -> None:
+        """
+        Raise the error of a failed write, if any.
+        :return: None
+        """
+        if self.error is not None:
+            raise self.error
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,294 @@
+import argparse
+import asyncio
+import hashlib
+import random
+from dataclasses import dataclass, field
+from typing import Any, Literal
+
+from aiohttp import web
+
+from japan_avg_hotel_price_finder.configure_logging import main_logger
+
+LatencyDistribution = Literal['constant', 'uniform', 'exponential']
+
+# Number of hotels of one result page, the same as the rowsPerPage of the scraper's query
+ROWS_PER_PAGE = 100
+
+LOCATIONS = ['Namba', 'Umeda', 'Shinsaibashi', 'Tennoji', 'Shin-Osaka', 'Kyobashi', 'Honmachi', 'Nishi']
+
+
+@dataclass
+class FakeServerConfig:
+    """
+    Behaviour of the fake GraphQL server.
+
+    Attributes:
+        num_results (int): Number of hotels of every search, default is 250.
+        latency (float): Mean response latency in seconds, default is 0.
+        latency_distribution (str): 'constant', 'uniform' (0 to twice the mean) or 'exponential',
+                                    default is 'constant'.
+        rate_limit_rate (float): Share of requests answered with 429 Too Many Requests, default is 0.
+        retry_after (int | None): Retry-After header of 429 responses in seconds, default is None.
+        server_error_rate (float): Share of requests answered with 500 Internal Server Error, default is 0.
+        malformed_rate (float): Share of requests answered with a malformed payload, default is 0.
+                                Half of them are invalid JSON, the other half JSON without search results.
+        seed (int): Seed of the latency and error injection, default is 0.
+                    Hotels only depend on the city, check-in date and position, so they are always the same.
+    """
+    num_results: int = 250
+    latency: float = 0.0
+    latency_distribution: LatencyDistribution = 'constant'
+    rate_limit_rate: float = 0.0
+    retry_after: int | None = None
+    server_error_rate: float = 0.0
+    malformed_rate: float = 0.0
+    seed: int = 0
+
+    def __post_init__(self):
+        if self.num_results < 0:
+            raise ValueError(f"Invalid num_results: {self.num_results}. Must not be negative.")
+        if self.latency < 0:
+            raise ValueError(f"Invalid latency: {self.latency}. Must not be negative.")
+        if self.rate_limit_rate + self.server_error_rate + self.malformed_rate > 1:
+            raise ValueError("The sum of rate_limit_rate, server_error_rate and malformed_rate must not exceed 1.")
+
+
+@dataclass
+class FakeServerStats:
+    """
+    Counters of the requests served by the fake GraphQL server.
+
+    Attributes:
+        requests (int): Number of requests.
+        status_counts (dict[int, int]): Number of responses by HTTP status.
+        malformed (int): Number of malformed payloads.
+        hotels (int): Number of hotels served.
+    """
+    requests: int = 0
+    status_counts: dict[int, int] = field(default_factory=dict)
+    malformed: int = 0
+    hotels: int = 0
+
+    def count_status(self, status: int) -> None:
+        """
+        Count a response status.
+        :param status: HTTP status.
+        :return: None
+        """
+        self.status_counts[status] = self.status_counts.get(status, 0) + 1
+
+
+def create_hotel(city: str, check_in: str, index: int, currency: str) -> dict[str, Any]:
+    """
+    Create a synthetic hotel in the shape of the FullSearch results.
+    The same city, check-in date and index always give the same hotel.
+    :param city: City of the search.
+    :param check_in: Check-in date of the search.
+    :param index: Position of the hotel in the search results.
+    :param currency: Currency of the price.
+    :return: Hotel as a dictionary.
+    """
+    digest = hashlib.sha256(f'{city}|{check_in}|{index}'.encode()).digest()
+    rng = random.Random(digest)
+    return {
+        "displayName": {"text": f"{city} Hotel {index:05d}"},
+        "basicPropertyData": {
+            "reviewScore": {"score": round(rng.uniform(5.0, 10.0), 1)},
+            "starRating": {"value": rng.randint(1, 5)}
+        },
+        "blocks": [{"finalPrice": {"amount": round(rng.uniform(30, 800), 2), "currency": currency}}],
+        "location": {"displayLocation": rng.choice(LOCATIONS), "geoDistanceMeters": rng.randint(50, 15_000)}
+    }
+
+
+def create_search_response(graphql_query: dict[str, Any], currency: str, num_results: int) -> dict[str, Any]:
+    """
+    Create the response of a FullSearch query, echoing the search input as booking.com does.
+    :param graphql_query: GraphQL query sent by the scraper.
+    :param currency: Currency of the prices.
+    :param num_results: Total number of hotels of the search.
+    :return: Response as a dictionary.
+    """
+    search_input = graphql_query['variables']['input']
+    city, _, country = search_input['location']['searchString'].partition(', ')
+    check_in = search_input['dates']['checkin']
+    offset = search_input['pagination']['offset']
+    rows_per_page = search_input['pagination'].get('rowsPerPage', ROWS_PER_PAGE)
+
+    applied_filters = []
+    if search_input['filters'].get('selectedFilters') == 'ht_id=204':
+        applied_filters.append({"urlId": "ht_id=204"})
+
+    results = [create_hotel(city, check_in, index, currency)
+               for index in range(offset, min(offset + rows_per_page, num_results))]
+    return {
+        "data": {
+            "searchQueries": {
+                "search": {
+                    "pagination": {"nbResultsTotal": num_results},
+                    "breadcrumbs": [{"name": country}, {"name": city}],
+                    "appliedFilterOptions": applied_filters,
+                    "flexibleDatesConfig": {
+                        "dateRangeCalendar": {"checkin": [check_in], "checkout": [search_input['dates']['checkout']]}
+                    },
+                    "searchMeta": {
+                        "nbAdults": search_input['nbAdults'],
+                        "nbChildren": search_input['nbChildren'],
+                        "nbRooms": search_input['nbRooms']
+                    },
+                    "results": results
+                }
+            }
+        }
+    }
+
+
+class FakeGraphQLServer:
+    """
+    Local HTTP server speaking the FullSearch operation of the booking.com GraphQL endpoint well enough for the scrapers,
+    with deterministic synthetic hotels, configurable latency and injected failures.
+    Point a scraper to it with base_url to measure throughput and retry behaviour offline.
+
+    Attributes:
+        config (FakeServerConfig): Behaviour of the server.
+        stats (FakeServerStats): Counters of the served requests.
+        base_url (str): Base URL of the running server, e.g., http://127.0.0.1:8080.
+    """
+
+    def __init__(self, config: FakeServerConfig | None = None):
+        self.config = config if config is not None else FakeServerConfig()
+        self.stats = FakeServerStats()
+        self.base_url = ''
+        self._rng = random.Random(self.config.seed)
+        self._runner: web.AppRunner | None = None
+
+    def create_app(self) -> web.Application:
+        """
+        Create the aiohttp application of the server.
+        :return: aiohttp web application.
+        """
+        app = web.Application()
+        app.router.add_post('/dml/graphql', self.handle_graphql)
+        return app
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> str:
+        """
+        Start the server.
+        :param host: Host to listen on, default is 127.0.0.1.
+        :param port: Port to listen on, default is 0, which picks a free port.
+        :return: Base URL of the server.
+        """
+        self._runner = web.AppRunner(self.create_app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+
+        bound_host, bound_port = self._runner.addresses[0][:2]
+        self.base_url = f'http://{bound_host}:{bound_port}'
+        main_logger.info(f"Fake GraphQL server listening on {self.base_url}")
+        return self.base_url
+
+    async def close(self) -> None:
+        """
+        Stop the server.
+        :return: None
+        """
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> 'FakeGraphQLServer':
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        await self.close()
+
+    async def handle_graphql(self, request: web.Request) -> web.Response:
+        """
+        Answer a GraphQL request after the configured latency, or with an injected failure.
+        :param request: aiohttp request.
+        :return: aiohttp response.
+        """
+        self.stats.requests += 1
+        await asyncio.sleep(self._get_latency())
+
+        response = self._get_injected_failure()
+        if response is None:
+            graphql_query = await request.json()
+            if graphql_query.get('operationName') != 'FullSearch':
+                response = web.json_response({"errors": [{"message": "Unknown operation"}]}, status=400)
+            else:
+                currency = request.query.get('selected_currency', 'USD')
+                body = create_search_response(graphql_query, currency, self.config.num_results)
+                self.stats.hotels += len(body['data']['searchQueries']['search']['results'])
+                response = web.json_response(body)
+
+        self.stats.count_status(response.status)
+        return response
+
+    def _get_latency(self) -> float:
+        """
+        Draw the latency of a response from the configured distribution.
+        :return: Latency in seconds.
+        """
+        if self.config.latency == 0:
+            return 0.0
+        if self.config.latency_distribution == 'uniform':
+            return self._rng.uniform(0, 2 * self.config.latency)
+        if self.config.latency_distribution == 'exponential':
+            return self._rng.expovariate(1 / self.config.latency)
+        return self.config.latency
+
+    def _get_injected_failure(self) -> web.Response | None:
+        """
+        Draw whether a request fails, from the configured failure rates.
+        :return: Failure response, or None if the request succeeds.
+        """
+        draw = self._rng.random()
+        if draw < self.config.rate_limit_rate:
+            headers = {'Retry-After': str(self.config.retry_after)} if self.config.retry_after is not None else None
+            return web.Response(status=429, text='Too Many Requests', headers=headers)
+
+        draw -= self.config.rate_limit_rate
+        if draw < self.config.server_error_rate:
+            return web.Response(status=500, text='Internal Server Error')
+
+        draw -= self.config.server_error_rate
+        if draw < self.config.malformed_rate:
+            self.stats.malformed += 1
+            if self._rng.random() < 0.5:
+                return web.Response(status=200, text='{"data": {"searchQueries": {"sear', content_type='application/json')
+            return web.json_response({"data": None, "errors": [{"message": "Internal error"}]})
+        return None
+
+
+def parse_arguments() -> argparse.Namespace:
+    """
+    Parse the command line arguments
+    :return: argparse.Namespace
+    """
+    parser = argparse.ArgumentParser(description='Local fake booking.com GraphQL server for load and regression tests.')
+    parser.add_argument('--host', type=str, default='127.0.0.1', help='Host to listen on, default is 127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080, help='Port to listen on, default is 8080')
+    parser.add_argument('--num_results', type=int, default=250, help='Hotels of every search, default is 250')
+    parser.add_argument('--latency', type=float, default=0.0, help='Mean latency in seconds, default is 0')
+    parser.add_argument('--latency_distribution', type=str, choices=['constant', 'uniform', 'exponential'],
+                        default='constant', help='Latency distribution, default is "constant"')
+    parser.add_argument('--rate_limit_rate', type=float, default=0.0, help='Share of 429 responses, default is 0')
+    parser.add_argument('--retry_after', type=int, help='Retry-After header of 429 responses in seconds')
+    parser.add_argument('--server_error_rate', type=float, default=0.0, help='Share of 500 responses, default is 0')
+    parser.add_argument('--malformed_rate', type=float, default=0.0,
+                        help='Share of malformed payloads, default is 0')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of latency and error injection, default is 0')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_arguments()
+    server = FakeGraphQLServer(FakeServerConfig(
+        num_results=args.num_results, latency=args.latency, latency_distribution=args.latency_distribution,
+        rate_limit_rate=args.rate_limit_rate, retry_after=args.retry_after,
+        server_error_rate=args.server_error_rate, malformed_rate=args.malformed_rate, seed=args.seed
+    ))
+    web.run_app(server.create_app(), host=args.host, port=args.port)
@@ -1,18 +1,32 @@
 import asyncio
+import datetime
 import json
-from typing import Any
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, get_args
 
-import aiohttp
 import pandas as pd
-from aiohttp import ContentTypeError
-from pydantic import BaseModel, Field
+from aiohttp import ContentTypeError, ClientSession
+from pydantic import BaseModel, Field, ConfigDict
 
 from japan_avg_hotel_price_finder.booking_details import BookingDetails
 from japan_avg_hotel_price_finder.configure_logging import main_logger
 from japan_avg_hotel_price_finder.graphql_scraper_func.graphql_data_extractor import extract_hotel_data
 from japan_avg_hotel_price_finder.graphql_scraper_func.graphql_data_transformer import transform_data_in_df
-from japan_avg_hotel_price_finder.graphql_scraper_func.graphql_request_func import get_header, fetch_hotel_data
+from japan_avg_hotel_price_finder.graphql_scraper_func.graphql_query_func import QueryProfile, get_search_query
+from japan_avg_hotel_price_finder.graphql_scraper_func.graphql_rate_limiter import RetryPolicy, \
+    TokenBucketRateLimiter, rate_limited_post
+from japan_avg_hotel_price_finder.graphql_scraper_func.graphql_request_func import get_header, fetch_page_data, \
+    get_page_results
+from japan_avg_hotel_price_finder.graphql_scraper_func.graphql_response_archive import ResponseArchive
+from japan_avg_hotel_price_finder.graphql_scraper_func.graphql_session_func import SessionStats, \
+    create_client_session
 from japan_avg_hotel_price_finder.graphql_scraper_func.graphql_utils_func import concat_df_list
+from japan_avg_hotel_price_finder.sql.scrape_manifest import ManifestEntry, set_manifest_entries
+
+
+# Base URL of the booking.com GraphQL endpoint
+DEFAULT_BASE_URL = 'https://www.booking.com'
 
 
 def log_booking_details(booking_details: BookingDetails):
@@ -38,7 +52,22 @@ class BasicGraphQLScraper(BaseModel):
         group_children (str): Number of children, default is 0.
         selected_currency (str): Currency of the room price, default is USD.
         scrape_only_hotel (bool): Whether to scrape only the hotel property data, default is True
+        query_profile (str): GraphQL query profile, 'full' or 'minimal', default is 'full'.
+                            'minimal' only asks for the fields read by the scraper, so responses are much smaller.
+        session (ClientSession): Pooled client session shared by the whole run, default is None.
+                                If None, a new pooled session is opened for each scraping run.
+        session_stats (SessionStats): Counters of new and reused connections of the pooled session.
+        page_semaphore (asyncio.Semaphore): Semaphore capping the result pages in flight, default is None.
+                                            If None, all pages of a check-in date are requested at once.
+        rate_limiter (TokenBucketRateLimiter): Rate limiter shared by every request of the scraping run.
+        retry_policy (RetryPolicy): Backoff policy for throttled (429), failed (5xx) and timed out requests.
+        response_archive (ResponseArchive): Archive of the raw GraphQL response of every page, default is None.
+                                            If None, raw responses are not archived.
+        base_url (str): Base URL of the GraphQL endpoint, default is https://www.booking.com.
+                        Point it to the fake GraphQL server to scrape offline.
     """
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
     # Set booking details.
     city: str = Field(..., min_length=1)
     country: str = Field(..., min_length=1)
@@ -49,45 +78,162 @@ class BasicGraphQLScraper(BaseModel):
     group_children: int = Field(0, ge=0)
     selected_currency: str = 'USD'
     scrape_only_hotel: bool = True
+    query_profile: QueryProfile = 'full'
 
+    base_url: str = DEFAULT_BASE_URL
     url: str = ''
     headers: dict = {}
     data: dict = {}
 
+    session: ClientSession | None = None
+    session_stats: SessionStats = Field(default_factory=SessionStats)
+    page_semaphore: asyncio.Semaphore | None = None
+    rate_limiter: TokenBucketRateLimiter = Field(default_factory=TokenBucketRateLimiter)
+    retry_policy: RetryPolicy = Field(default_factory=RetryPolicy)
+    response_archive: ResponseArchive | None = None
+
+    @asynccontextmanager
+    async def shared_session(self) -> AsyncIterator[ClientSession]:
+        """
+        Provide the pooled client session of the current scraping run.
+        Reuse the injected session if there is one,
+        otherwise open a new pooled session which is closed when the run ends.
+        :return: Async iterator yielding the client session.
+        """
+        if self.session is not None:
+            yield self.session
+            return
+
+        async with create_client_session(self.session_stats) as session:
+            self.session = session
+            try:
+                yield session
+            finally:
+                self.session = None
+                self.session_stats.log_summary()
+
     async def scrape_graphql(self) -> pd.DataFrame:
         """
         Scrape hotel data from GraphQL endpoint using async.
+        The DataFrame carries the manifest entry of the check-in date, with its requests, duration and occupancy,
+        which is recorded when the data is saved.
         :return: DataFrame containing hotel data from GraphQL endpoint
         """
         main_logger.info("Start scraping data from GraphQL endpoint...")
+        start_time = time.perf_counter()
         self._log_initial_details()
 
-        self.url = f'https://www.booking.com/dml/graphql?selected_currency={self.selected_currency}'
+        self.url = self._get_graphql_url()
         self.headers = get_header()
 
         if not self._validate_inputs():
             main_logger.warning("Error: city, check_in, check_out and selected_currency are required")
             return pd.DataFrame()
 
-        graphql_query = self._get_graphql_query()
-        self.data = await self._get_response_data(graphql_query)
+        async with self.shared_session():
+            graphql_query = self._get_graphql_query()
+            self.data = await self._get_response_data(graphql_query)
 
-        total_page_num = await self.check_info()
-        main_logger.debug(f"Total page number: {total_page_num}")
+            total_page_num = await self.check_info()
+            main_logger.debug(f"Total page number: {total_page_num}")
 
-        if not total_page_num:
-            main_logger.warning("Total page number not found. Return an empty DataFrame.")
-            return pd.DataFrame()
+            if not total_page_num:
+                main_logger.warning("Total page number not found. Return an empty DataFrame.")
+                return pd.DataFrame()
 
-        df_list = await self._scrape_data_from_endpoint(total_page_num)
+            as_of = datetime.datetime.now()
+            df_list = await self._scrape_data_from_endpoint(total_page_num, as_of)
 
         if df_list:
             df = concat_df_list(df_list)
-            return transform_data_in_df(self.check_in, self.city, df)
+            df = transform_data_in_df(self.check_in, self.city, df, as_of=as_of)
+            # The first page, then every other page of 100 results
+            requests = 1 + len(range(100, total_page_num, 100))
+            return set_manifest_entries(df, [self._create_manifest_entry(df, as_of, requests,
+                                                                         time.perf_counter() - start_time)])
         else:
             main_logger.warning("No hotel data was found. Return an empty DataFrame.")
             return pd.DataFrame()
 
+    async def compare_query_profiles(self) -> dict[str, dict[str, float]]:
+        """
+        Request the first page with every GraphQL query profile,
+        then log the response size, latency and JSON decode time of each profile.
+        :return: Dictionary of measurements keyed by query profile.
+        """
+        main_logger.info("Comparing GraphQL query profiles...")
+        self.url = self._get_graphql_url()
+        self.headers = get_header()
+
+        measurements: dict[str, dict[str, float]] = {}
+        async with self.shared_session() as session:
+            for query_profile in get_args(QueryProfile):
+                graphql_query = self._get_graphql_query(query_profile=query_profile)
+
+                # Do not retry, so the latency is the one of a single request
+                start_time = time.perf_counter()
+                async with rate_limited_post(session, self.url, self.headers, graphql_query,
+                                             self.rate_limiter, RetryPolicy(max_retries=0)) as response:
+                    status = response.status
+                    body = await response.read()
+                latency = time.perf_counter() - start_time
+
+                if status != 200:
+                    main_logger.error(f"Error: HTTP status {status} with {query_profile} query profile")
+                    continue
+
+                start_time = time.perf_counter()
+                try:
+                    json.loads(body)
+                except json.JSONDecodeError as e:
+                    main_logger.error(f"Error: Invalid JSON with {query_profile} query profile - {str(e)}")
+                    continue
+                decode_time = time.perf_counter() - start_time
+
+                measurements[query_profile] = {
+                    'bytes': len(body),
+                    'latency_seconds': latency,
+                    'decode_seconds': decode_time
+                }
+                main_logger.info(f"Query profile {query_profile}: {len(body)} bytes | "
+                                 f"latency {latency:.3f} s | JSON decode {decode_time:.4f} s")
+
+        if 'full' in measurements and 'minimal' in measurements and measurements['full']['bytes']:
+            full, minimal = measurements['full'], measurements['minimal']
+            main_logger.info(f"Minimal query profile response is "
+                             f"{1 - minimal['bytes'] / full['bytes']:.1%} smaller, "
+                             f"latency {minimal['latency_seconds'] - full['latency_seconds']:+.3f} s, "
+                             f"JSON decode {minimal['decode_seconds'] - full['decode_seconds']:+.4f} s "
+                             f"compared to the full query profile")
+
+        return measurements
+
+    def _create_manifest_entry(self,
+                               df: pd.DataFrame,
+                               as_of: datetime.datetime,
+                               requests: int,
+                               duration: float) -> ManifestEntry:
+        """
+        Create the manifest entry of the scraped check-in date.
+        :param df: DataFrame of the scraped hotel data.
+        :param as_of: AsOf timestamp of the data.
+        :param requests: Number of GraphQL requests sent.
+        :param duration: Scraping duration in seconds.
+        :return: ManifestEntry
+        """
+        nights = (datetime.datetime.strptime(self.check_out, '%Y-%m-%d') -
+                  datetime.datetime.strptime(self.check_in, '%Y-%m-%d')).days
+        return ManifestEntry(city=self.city, date=self.check_in, as_of=f'{as_of:%Y-%m-%d}', rows=len(df),
+                             requests=requests, duration=duration, nights=nights, adults=self.group_adults,
+                             children=self.group_children, rooms=self.num_rooms)
+
+    def _get_graphql_url(self) -> str:
+        """
+        Get the GraphQL endpoint URL with the selected currency.
+        :return: GraphQL endpoint URL.
+        """
+        return f'{self.base_url.rstrip("/")}/dml/graphql?selected_currency={self.selected_currency}'
+
     def _log_initial_details(self) -> None:
         """
         Log initial details for debugging.
@@ -96,32 +242,63 @@ class BasicGraphQLScraper(BaseModel):
         main_logger.debug(f"Currency: {self.selected_currency}")
         main_logger.debug(f"Adults: {self.group_adults} | Children: {self.group_children} | Rooms: {self.num_rooms}")
         main_logger.debug(f"Only hotel properties: {self.scrape_only_hotel}")
+        main_logger.debug(f"Query profile: {self.query_profile}")
 
-    async def _scrape_data_from_endpoint(self, total_page_num: int) -> list[Any]:
+    async def _scrape_data_from_endpoint(self,
+                                         total_page_num: int,
+                                         as_of: datetime.datetime | None = None) -> list[Any]:
         """
         Scrape data from the GraphQL endpoint.
         :param total_page_num: Total page number of the hotel data.
+        :param as_of: AsOf timestamp of the data, used to partition the response archive, default is None.
+                    If None, use the current timestamp.
         :return: List of DataFrames containing hotel data.
         """
         df_list = []
         main_logger.info("Scraping data from GraphQL endpoint...")
 
-        results: list[Any] = await self._fetch_hotel_data(total_page_num)
+        # The first page was already fetched to find the total page number, so its results are reused.
+        first_page_results: list[Any] = self._get_first_page_results()
+        if first_page_results:
+            extract_hotel_data(df_list, first_page_results)
 
-        for hotel_data_list in results:
+        pages: list[dict[str, Any]] = await self._fetch_pages(total_page_num)
+        # The session is shared by the check-in dates scraped at the same time, so its counter is a running total
+        main_logger.debug(f"Fetched {len(pages) + 1} pages, reused the first page instead of requesting it again, "
+                          f"{self.session_stats.requests_sent} requests sent by the session so far")
+
+        for page_data in pages:
+            hotel_data_list = get_page_results(page_data)
             if hotel_data_list:
                 extract_hotel_data(df_list, hotel_data_list)
 
+        if self.response_archive is not None:
+            # Compress and write in a thread, so other check-in dates keep scraping
+            await asyncio.to_thread(self.response_archive.write_pages, self._get_booking_details(),
+                                    as_of or datetime.datetime.now(), [self.data, *pages])
+
         return df_list
 
+    def _get_first_page_results(self) -> list[Any]:
+        """
+        Get the hotel results of the first page from the GraphQL response.
+        :return: Hotel data of the first page as a list.
+        """
+        try:
+            return self.data['data']['searchQueries']['search']['results']
+        except (TypeError, KeyError):
+            main_logger.warning("Hotel results not found in the first page response.")
+            return []
+
     async def _get_response_data(self, graphql_query: dict[str, Any]) -> dict[str, Any]:
         """
         Get hotel data from a response with Async.
         :param graphql_query: GraphQL query as a dictionary.
         :return: Hotel data as a dictionary.
         """
-        async with aiohttp.ClientSession() as session:
-            async with session.post(self.url, headers=self.headers, json=graphql_query) as response:
+        async with self.shared_session() as session, self._page_slot():
+            async with rate_limited_post(session, self.url, self.headers, graphql_query,
+                                         self.rate_limiter, self.retry_policy) as response:
                 if response.status == 200:
                     try:
                         return await response.json()
@@ -135,22 +312,53 @@ class BasicGraphQLScraper(BaseModel):
                     main_logger.error(f"Error: HTTP status {response.status}")
                     return {}
 
-    async def _fetch_hotel_data(self, total_page_num: int) -> list[Any]:
+    def _get_booking_details(self) -> BookingDetails:
+        """
+        Get the booking details entered for this scraper.
+        :return: BookingDetails
+        """
+        return BookingDetails(**self.model_dump(include=set(BookingDetails.model_fields)))
+
+    async def _fetch_pages(self, total_page_num: int) -> list[dict[str, Any]]:
         """
-        Scrape hotel data from GraphQL endpoint with Async.
+        Fetch the GraphQL response of every result page with Async.
+        Start from the second page, as the first page is already in the response used to find the total page number.
         :param total_page_num: Total page of the hotel data.
-        :return: Hotel data as a list.
+        :return: GraphQL responses of the pages as a list, ordered by page offset.
         """
-        async with aiohttp.ClientSession() as session:
+        async with self.shared_session() as session:
             tasks = []
-            for offset in range(0, total_page_num, 100):
+            for offset in range(100, total_page_num, 100):
                 main_logger.debug(f'Fetch data from page-offset: {offset}')
 
                 graphql_query = self._get_graphql_query(page_offset=offset)
-                tasks.append(fetch_hotel_data(session, self.url, self.headers, graphql_query))
+                tasks.append(self._fetch_page(session, graphql_query))
 
             return await asyncio.gather(*tasks)
 
+    async def _fetch_page(self, session: ClientSession, graphql_query: dict[str, Any]) -> dict[str, Any]:
+        """
+        Fetch the GraphQL response of one page once a page slot is free.
+        :param session: Client session.
+        :param graphql_query: GraphQL query of the page.
+        :return: GraphQL response of the page as a dictionary.
+        """
+        async with self._page_slot():
+            return await fetch_page_data(session, self.url, self.headers, graphql_query,
+                                         self.rate_limiter, self.retry_policy)
+
+    @asynccontextmanager
+    async def _page_slot(self) -> AsyncIterator[None]:
+        """
+        Wait for a free page slot if the number of pages in flight is capped by the page semaphore.
+        :return: Async iterator yielding None.
+        """
+        if self.page_semaphore is None:
+            yield
+        else:
+            async with self.page_semaphore:
+                yield
+
     def _validate_inputs(self) -> bool:
         """
         Validate if all required inputs are provided.
@@ -158,19 +366,24 @@ class BasicGraphQLScraper(BaseModel):
         """
         return all([self.city, self.check_in, self.check_out, self.selected_currency])
 
-    def _get_graphql_query(self, page_offset: int = 0) -> dict[str, Any]:
+    def _get_graphql_query(self, page_offset: int = 0, query_profile: QueryProfile | None = None) -> dict[str, Any]:
         """
         Constructs and returns a GraphQL query as a dictionary.
         :param page_offset: The offset for pagination, default is 0.
+        :param query_profile: Query profile to use, default is None.
+                            If None, use the query profile of the scraper.
         :return: Graphql query as a dictionary.
         """
         main_logger.debug("Getting graphql query...")
+        if query_profile is None:
+            query_profile = self.query_profile
+
         if self.scrape_only_hotel:
             selected_filter = {"selectedFilters": "ht_id=204"}
         else:
             selected_filter = {}
 
-        return {
+        graphql_query = {
             "operationName": "FullSearch",
             "variables": {
                 "input": {
@@ -248,297 +461,15 @@ class BasicGraphQLScraper(BaseModel):
                 "carouselLowCodeExp": False
             },
             "extensions": {},
-            "query": "query FullSearch($input: SearchQueryInput!, $carouselLowCodeExp: Boolean!) {\n  searchQueries {\n    "
-                     "search(input: $input) {\n      ...FullSearchFragment\n      __typename\n    }\n    __typename\n  "
-                     "}\n}\n\nfragment FullSearchFragment on SearchQueryOutput {\n  banners {\n    ...Banner\n    __typename\n  "
-                     "}\n  breadcrumbs {\n    ... on SearchResultsBreadcrumb {\n      ...SearchResultsBreadcrumb\n      "
-                     "__typename\n    }\n    ... on LandingPageBreadcrumb {\n      ...LandingPageBreadcrumb\n      __typename\n "
-                     "   }\n    __typename\n  }\n  carousels {\n    ...Carousel\n    __typename\n  }\n  destinationLocation {\n "
-                     "   ...DestinationLocation\n    __typename\n  }\n  entireHomesSearchEnabled\n  dateFlexibilityOptions {\n  "
-                     "  enabled\n    __typename\n  }\n  flexibleDatesConfig {\n    broadDatesCalendar {\n      checkinMonths\n  "
-                     "    los\n      startWeekdays\n      losType\n      __typename\n    }\n    dateFlexUseCase\n    "
-                     "dateRangeCalendar {\n      flexWindow\n      checkin\n      checkout\n      __typename\n    }\n    "
-                     "__typename\n  }\n  filters {\n    ...FilterData\n    __typename\n  }\n  filtersTrackOnView {\n    type\n  "
-                     "  experimentHash\n    value\n    __typename\n  }\n  appliedFilterOptions {\n    ...FilterOption\n    "
-                     "__typename\n  }\n  recommendedFilterOptions {\n    ...FilterOption\n    __typename\n  }\n  pagination {\n "
-                     "   nbResultsPerPage\n    nbResultsTotal\n    __typename\n  }\n  tripTypes {\n    ...TripTypesData\n    "
-                     "__typename\n  }\n  results {\n    ...BasicPropertyData\n    ...MatchingUnitConfigurations\n    "
-                     "...PropertyBlocks\n    ...BookerExperienceData\n    priceDisplayInfoIrene {\n      "
-                     "...PriceDisplayInfoIrene\n      __typename\n    }\n    licenseDetails {\n      nextToHotelName\n      "
-                     "__typename\n    }\n    isTpiExclusiveProperty\n    propertyCribsAvailabilityLabel\n    "
-                     "mlBookingHomeTags\n    trackOnView {\n      experimentTag\n      __typename\n    }\n    __typename\n  }\n "
-                     " searchMeta {\n    ...SearchMetadata\n    __typename\n  }\n  sorters {\n    option {\n      "
-                     "...SorterFields\n      __typename\n    }\n    __typename\n  }\n  oneOfThreeDeal {\n    "
-                     "...OneOfThreeDeal\n    __typename\n  }\n  zeroResultsSection {\n    ...ZeroResultsSection\n    "
-                     "__typename\n  }\n  rocketmilesSearchUuid\n  previousSearches {\n    ...PreviousSearches\n    __typename\n "
-                     " }\n  frontierThemes {\n    ...FrontierThemes\n    __typename\n  }\n  merchComponents {\n    "
-                     "...MerchRegionIrene\n    __typename\n  }\n  wishlistData {\n    numProperties\n    __typename\n  }\n  "
-                     "seoThemes {\n    id\n    caption\n    __typename\n  }\n  __typename\n}\n\nfragment BasicPropertyData on "
-                     "SearchResultProperty {\n  acceptsWalletCredit\n  basicPropertyData {\n    accommodationTypeId\n    id\n   "
-                     " isTestProperty\n    location {\n      address\n      city\n      countryCode\n      __typename\n    }\n  "
-                     "  pageName\n    ufi\n    photos {\n      main {\n        highResUrl {\n          relativeUrl\n          "
-                     "__typename\n        }\n        lowResUrl {\n          relativeUrl\n          __typename\n        }\n      "
-                     "  highResJpegUrl {\n          relativeUrl\n          __typename\n        }\n        lowResJpegUrl {\n     "
-                     "     relativeUrl\n          __typename\n        }\n        __typename\n      }\n      __typename\n    }\n "
-                     "   reviewScore: reviews {\n      score: totalScore\n      reviewCount: reviewsCount\n      "
-                     "totalScoreTextTag {\n        translation\n        __typename\n      }\n      showScore\n      "
-                     "secondaryScore\n      secondaryTextTag {\n        translation\n        __typename\n      }\n      "
-                     "showSecondaryScore\n      __typename\n    }\n    externalReviewScore: externalReviews {\n      score: "
-                     "totalScore\n      reviewCount: reviewsCount\n      showScore\n      totalScoreTextTag {\n        "
-                     "translation\n        __typename\n      }\n      __typename\n    }\n    starRating {\n      value\n      "
-                     "symbol\n      caption {\n        translation\n        __typename\n      }\n      tocLink {\n        "
-                     "translation\n        __typename\n      }\n      showAdditionalInfoIcon\n      __typename\n    }\n    "
-                     "isClosed\n    paymentConfig {\n      installments {\n        minPriceFormatted\n        maxAcceptCount\n  "
-                     "      __typename\n      }\n      __typename\n    }\n    __typename\n  }\n  badges {\n    caption {\n      "
-                     "translation\n      __typename\n    }\n    closedFacilities {\n      startDate\n      endDate\n      "
-                     "__typename\n    }\n    __typename\n  }\n  customBadges {\n    showSkiToDoor\n    "
-                     "showBhTravelCreditBadge\n    showOnlineCheckinBadge\n    __typename\n  }\n  description {\n    text\n    "
-                     "__typename\n  }\n  displayName {\n    text\n    translationTag {\n      translation\n      __typename\n   "
-                     " }\n    __typename\n  }\n  geniusInfo {\n    benefitsCommunication {\n      header {\n        title\n     "
-                     "   __typename\n      }\n      items {\n        title\n        __typename\n      }\n      __typename\n    "
-                     "}\n    geniusBenefits\n    geniusBenefitsData {\n      hotelCardHasFreeBreakfast\n      "
-                     "hotelCardHasFreeRoomUpgrade\n      sortedBenefits\n      __typename\n    }\n    showGeniusRateBadge\n    "
-                     "__typename\n  }\n  location {\n    displayLocation\n    mainDistance\n    "
-                     "publicTransportDistanceDescription\n    skiLiftDistance\n    beachDistance\n    nearbyBeachNames\n    "
-                     "beachWalkingTime\n    geoDistanceMeters\n    __typename\n  }\n  mealPlanIncluded {\n    mealPlanType\n    "
-                     "text\n    __typename\n  }\n  persuasion {\n    autoextended\n    geniusRateAvailable\n    highlighted\n   "
-                     " preferred\n    preferredPlus\n    showNativeAdLabel\n    nativeAdId\n    nativeAdsCpc\n    "
-                     "nativeAdsTracking\n    sponsoredAdsData {\n      isDsaCompliant\n      legalEntityName\n      "
-                     "sponsoredAdsDesign\n      __typename\n    }\n    __typename\n  }\n  policies {\n    "
-                     "showFreeCancellation\n    showNoPrepayment\n    enableJapaneseUsersSpecialCase\n    __typename\n  }\n  "
-                     "ribbon {\n    ribbonType\n    text\n    __typename\n  }\n  recommendedDate {\n    checkin\n    checkout\n "
-                     "   lengthOfStay\n    __typename\n  }\n  showGeniusLoginMessage\n  hostTraderLabel\n  soldOutInfo {\n    "
-                     "isSoldOut\n    messages {\n      text\n      __typename\n    }\n    alternativeDatesMessages {\n      "
-                     "text\n      __typename\n    }\n    __typename\n  }\n  nbWishlists\n  visibilityBoosterEnabled\n  "
-                     "showAdLabel\n  isNewlyOpened\n  propertySustainability {\n    isSustainable\n    tier {\n      type\n     "
-                     " __typename\n    }\n    facilities {\n      id\n      __typename\n    }\n    certifications {\n      "
-                     "name\n      __typename\n    }\n    chainProgrammes {\n      chainName\n      programmeName\n      "
-                     "__typename\n    }\n    levelId\n    __typename\n  }\n  seoThemes {\n    caption\n    __typename\n  }\n  "
-                     "relocationMode {\n    distanceToCityCenterKm\n    distanceToCityCenterMiles\n    "
-                     "distanceToOriginalHotelKm\n    distanceToOriginalHotelMiles\n    phoneNumber\n    __typename\n  }\n  "
-                     "bundleRatesAvailable\n  __typename\n}\n\nfragment Banner on Banner {\n  name\n  type\n  isDismissible\n  "
-                     "showAfterDismissedDuration\n  position\n  requestAlternativeDates\n  merchId\n  title {\n    text\n    "
-                     "__typename\n  }\n  imageUrl\n  paragraphs {\n    text\n    __typename\n  }\n  metadata {\n    key\n    "
-                     "value\n    __typename\n  }\n  pendingReviewInfo {\n    propertyPhoto {\n      lowResUrl {\n        "
-                     "relativeUrl\n        __typename\n      }\n      lowResJpegUrl {\n        relativeUrl\n        "
-                     "__typename\n      }\n      __typename\n    }\n    propertyName\n    urlAccessCode\n    __typename\n  }\n  "
-                     "nbDeals\n  primaryAction {\n    text {\n      text\n      __typename\n    }\n    action {\n      name\n   "
-                     "   context {\n        key\n        value\n        __typename\n      }\n      __typename\n    }\n    "
-                     "__typename\n  }\n  secondaryAction {\n    text {\n      text\n      __typename\n    }\n    action {\n     "
-                     " name\n      context {\n        key\n        value\n        __typename\n      }\n      __typename\n    "
-                     "}\n    __typename\n  }\n  iconName\n  flexibleFilterOptions {\n    optionId\n    filterName\n    "
-                     "__typename\n  }\n  trackOnView {\n    type\n    experimentHash\n    value\n    __typename\n  }\n  "
-                     "dateFlexQueryOptions {\n    text {\n      text\n      __typename\n    }\n    action {\n      name\n      "
-                     "context {\n        key\n        value\n        __typename\n      }\n      __typename\n    }\n    "
-                     "isApplied\n    __typename\n  }\n  __typename\n}\n\nfragment Carousel on Carousel {\n  "
-                     "aggregatedCountsByFilterId\n  carouselId\n  position\n  contentType\n  hotelId\n  name\n  "
-                     "soldoutProperties\n  priority\n  themeId\n  frontierThemeIds\n  title {\n    text\n    __typename\n  }\n  "
-                     "slides {\n    captionText {\n      text\n      __typename\n    }\n    name\n    photoUrl\n    subtitle {"
-                     "\n      text\n      __typename\n    }\n    type\n    title {\n      text\n      __typename\n    }\n    "
-                     "action {\n      context {\n        key\n        value\n        __typename\n      }\n      __typename\n    "
-                     "}\n    __typename\n  }\n  __typename\n}\n\nfragment DestinationLocation on DestinationLocation {\n  name "
-                     "{\n    text\n    __typename\n  }\n  inName {\n    text\n    __typename\n  }\n  countryCode\n  ufi\n  "
-                     "__typename\n}\n\nfragment FilterData on Filter {\n  trackOnView {\n    type\n    experimentHash\n    "
-                     "value\n    __typename\n  }\n  trackOnClick {\n    type\n    experimentHash\n    value\n    __typename\n  "
-                     "}\n  name\n  field\n  category\n  filterStyle\n  title {\n    text\n    translationTag {\n      "
-                     "translation\n      __typename\n    }\n    __typename\n  }\n  subtitle\n  options {\n    parentId\n    "
-                     "genericId\n    trackOnView {\n      type\n      experimentHash\n      value\n      __typename\n    }\n    "
-                     "trackOnClick {\n      type\n      experimentHash\n      value\n      __typename\n    }\n    trackOnSelect "
-                     "{\n      type\n      experimentHash\n      value\n      __typename\n    }\n    trackOnDeSelect {\n      "
-                     "type\n      experimentHash\n      value\n      __typename\n    }\n    trackOnViewPopular {\n      type\n  "
-                     "    experimentHash\n      value\n      __typename\n    }\n    trackOnClickPopular {\n      type\n      "
-                     "experimentHash\n      value\n      __typename\n    }\n    trackOnSelectPopular {\n      type\n      "
-                     "experimentHash\n      value\n      __typename\n    }\n    trackOnDeSelectPopular {\n      type\n      "
-                     "experimentHash\n      value\n      __typename\n    }\n    ...FilterOption\n    __typename\n  }\n  "
-                     "filterLayout {\n    isCollapsable\n    collapsedCount\n    __typename\n  }\n  stepperOptions {\n    min\n "
-                     "   max\n    default\n    selected\n    title {\n      text\n      translationTag {\n        translation\n "
-                     "       __typename\n      }\n      __typename\n    }\n    field\n    labels {\n      text\n      "
-                     "translationTag {\n        translation\n        __typename\n      }\n      __typename\n    }\n    "
-                     "trackOnView {\n      type\n      experimentHash\n      value\n      __typename\n    }\n    trackOnClick {"
-                     "\n      type\n      experimentHash\n      value\n      __typename\n    }\n    trackOnSelect {\n      "
-                     "type\n      experimentHash\n      value\n      __typename\n    }\n    trackOnDeSelect {\n      type\n     "
-                     " experimentHash\n      value\n      __typename\n    }\n    trackOnClickDecrease {\n      type\n      "
-                     "experimentHash\n      value\n      __typename\n    }\n    trackOnClickIncrease {\n      type\n      "
-                     "experimentHash\n      value\n      __typename\n    }\n    trackOnDecrease {\n      type\n      "
-                     "experimentHash\n      value\n      __typename\n    }\n    trackOnIncrease {\n      type\n      "
-                     "experimentHash\n      value\n      __typename\n    }\n    __typename\n  }\n  sliderOptions {\n    min\n   "
-                     " max\n    minSelected\n    maxSelected\n    minPriceStep\n    minSelectedFormatted\n    currency\n    "
-                     "histogram\n    selectedRange {\n      translation\n      __typename\n    }\n    __typename\n  }\n  "
-                     "__typename\n}\n\nfragment FilterOption on Option {\n  optionId: id\n  count\n  selected\n  urlId\n  "
-                     "source\n  additionalLabel {\n    text\n    translationTag {\n      translation\n      __typename\n    }\n "
-                     "   __typename\n  }\n  value {\n    text\n    translationTag {\n      translation\n      __typename\n    "
-                     "}\n    __typename\n  }\n  starRating {\n    value\n    symbol\n    caption {\n      translation\n      "
-                     "__typename\n    }\n    showAdditionalInfoIcon\n    __typename\n  }\n  __typename\n}\n\nfragment "
-                     "LandingPageBreadcrumb on LandingPageBreadcrumb {\n  destType\n  name\n  urlParts\n  "
-                     "__typename\n}\n\nfragment MatchingUnitConfigurations on SearchResultProperty {\n  "
-                     "matchingUnitConfigurations {\n    commonConfiguration {\n      name\n      unitId\n      "
-                     "bedConfigurations {\n        beds {\n          count\n          type\n          __typename\n        }\n   "
-                     "     nbAllBeds\n        __typename\n      }\n      nbAllBeds\n      nbBathrooms\n      nbBedrooms\n      "
-                     "nbKitchens\n      nbLivingrooms\n      nbUnits\n      unitTypeNames {\n        translation\n        "
-                     "__typename\n      }\n      localizedArea {\n        localizedArea\n        unit\n        __typename\n     "
-                     " }\n      __typename\n    }\n    unitConfigurations {\n      name\n      unitId\n      bedConfigurations "
-                     "{\n        beds {\n          count\n          type\n          __typename\n        }\n        nbAllBeds\n  "
-                     "      __typename\n      }\n      apartmentRooms {\n        config {\n          roomId: id\n          "
-                     "roomType\n          bedTypeId\n          bedCount: count\n          __typename\n        }\n        "
-                     "roomName: tag {\n          tag\n          translation\n          __typename\n        }\n        "
-                     "__typename\n      }\n      nbAllBeds\n      nbBathrooms\n      nbBedrooms\n      nbKitchens\n      "
-                     "nbLivingrooms\n      nbUnits\n      unitTypeNames {\n        translation\n        __typename\n      }\n   "
-                     "   localizedArea {\n        localizedArea\n        unit\n        __typename\n      }\n      unitTypeId\n  "
-                     "    __typename\n    }\n    __typename\n  }\n  __typename\n}\n\nfragment PropertyBlocks on "
-                     "SearchResultProperty {\n  blocks {\n    blockId {\n      roomId\n      occupancy\n      policyGroupId\n   "
-                     "   packageId\n      mealPlanId\n      __typename\n    }\n    finalPrice {\n      amount\n      currency\n "
-                     "     __typename\n    }\n    originalPrice {\n      amount\n      currency\n      __typename\n    }\n    "
-                     "onlyXLeftMessage {\n      tag\n      variables {\n        key\n        value\n        __typename\n      "
-                     "}\n      translation\n      __typename\n    }\n    freeCancellationUntil\n    hasCrib\n    blockMatchTags "
-                     "{\n      childStaysForFree\n      __typename\n    }\n    thirdPartyInventoryContext {\n      isTpiBlock\n "
-                     "     __typename\n    }\n    __typename\n  }\n  __typename\n}\n\nfragment PriceDisplayInfoIrene on "
-                     "PriceDisplayInfoIrene {\n  badges {\n    name {\n      translation\n      __typename\n    }\n    tooltip "
-                     "{\n      translation\n      __typename\n    }\n    style\n    identifier\n    __typename\n  }\n  "
-                     "chargesInfo {\n    translation\n    __typename\n  }\n  displayPrice {\n    copy {\n      translation\n    "
-                     "  __typename\n    }\n    amountPerStay {\n      amount\n      amountRounded\n      amountUnformatted\n    "
-                     "  currency\n      __typename\n    }\n    __typename\n  }\n  priceBeforeDiscount {\n    copy {\n      "
-                     "translation\n      __typename\n    }\n    amountPerStay {\n      amount\n      amountRounded\n      "
-                     "amountUnformatted\n      currency\n      __typename\n    }\n    __typename\n  }\n  rewards {\n    "
-                     "rewardsList {\n      termsAndConditions\n      amountPerStay {\n        amount\n        amountRounded\n   "
-                     "     amountUnformatted\n        currency\n        __typename\n      }\n      breakdown {\n        "
-                     "productType\n        amountPerStay {\n          amount\n          amountRounded\n          "
-                     "amountUnformatted\n          currency\n          __typename\n        }\n        __typename\n      }\n     "
-                     " __typename\n    }\n    rewardsAggregated {\n      amountPerStay {\n        amount\n        "
-                     "amountRounded\n        amountUnformatted\n        currency\n        __typename\n      }\n      copy {\n   "
-                     "     translation\n        __typename\n      }\n      __typename\n    }\n    __typename\n  }\n  "
-                     "useRoundedAmount\n  discounts {\n    amount {\n      amount\n      amountRounded\n      "
-                     "amountUnformatted\n      currency\n      __typename\n    }\n    name {\n      translation\n      "
-                     "__typename\n    }\n    description {\n      translation\n      __typename\n    }\n    itemType\n    "
-                     "productId\n    __typename\n  }\n  excludedCharges {\n    excludeChargesAggregated {\n      copy {\n       "
-                     " translation\n        __typename\n      }\n      amountPerStay {\n        amount\n        amountRounded\n "
-                     "       amountUnformatted\n        currency\n        __typename\n      }\n      __typename\n    }\n    "
-                     "excludeChargesList {\n      chargeMode\n      chargeInclusion\n      chargeType\n      amountPerStay {\n  "
-                     "      amount\n        amountRounded\n        amountUnformatted\n        currency\n        __typename\n    "
-                     "  }\n      __typename\n    }\n    __typename\n  }\n  taxExceptions {\n    shortDescription {\n      "
-                     "translation\n      __typename\n    }\n    longDescription {\n      translation\n      __typename\n    }\n "
-                     "   __typename\n  }\n  __typename\n}\n\nfragment BookerExperienceData on SearchResultProperty {\n  "
-                     "bookerExperienceContentUIComponentProps {\n    ... on BookerExperienceContentLoyaltyBadgeListProps {\n    "
-                     "  badges {\n        variant\n        key\n        title\n        popover\n        logoSrc\n        "
-                     "logoAlt\n        __typename\n      }\n      __typename\n    }\n    ... on "
-                     "BookerExperienceContentFinancialBadgeProps {\n      paymentMethod\n      backgroundColor\n      "
-                     "hideAccepted\n      __typename\n    }\n    __typename\n  }\n  __typename\n}\n\nfragment SearchMetadata on "
-                     "SearchMeta {\n  availabilityInfo {\n    hasLowAvailability\n    unavailabilityPercent\n    "
-                     "totalAvailableNotAutoextended\n    __typename\n  }\n  boundingBoxes {\n    swLat\n    swLon\n    neLat\n  "
-                     "  neLon\n    type\n    __typename\n  }\n  childrenAges\n  dates {\n    checkin\n    checkout\n    "
-                     "lengthOfStayInDays\n    __typename\n  }\n  destId\n  destType\n  guessedLocation {\n    destId\n    "
-                     "destType\n    destName\n    __typename\n  }\n  maxLengthOfStayInDays\n  nbRooms\n  nbAdults\n  "
-                     "nbChildren\n  userHasSelectedFilters\n  customerValueStatus\n  isAffiliateBookingOwned\n  "
-                     "affiliatePartnerChannelId\n  affiliateVerticalType\n  geniusLevel\n  __typename\n}\n\nfragment "
-                     "SearchResultsBreadcrumb on SearchResultsBreadcrumb {\n  destId\n  destType\n  name\n  "
-                     "__typename\n}\n\nfragment SorterFields on SorterOption {\n  type: name\n  captionTranslationTag {\n    "
-                     "translation\n    __typename\n  }\n  tooltipTranslationTag {\n    translation\n    __typename\n  }\n  "
-                     "isSelected: selected\n  __typename\n}\n\nfragment OneOfThreeDeal on OneOfThreeDeal {\n  id\n  uuid\n  "
-                     "winnerHotelId\n  winnerBlockId\n  priceDisplayInfoIrene {\n    displayPrice {\n      amountPerStay {\n    "
-                     "    amountRounded\n        amountUnformatted\n        __typename\n      }\n      __typename\n    }\n    "
-                     "__typename\n  }\n  locationInfo {\n    name\n    inName\n    destType\n    __typename\n  }\n  "
-                     "destinationType\n  commonFacilities {\n    id\n    name\n    __typename\n  }\n  tpiParams {\n    "
-                     "wholesalerCode\n    rateKey\n    rateBlockId\n    bookingRoomId\n    supplierId\n    __typename\n  }\n  "
-                     "properties {\n    priceDisplayInfoIrene {\n      priceBeforeDiscount {\n        amountPerStay {\n         "
-                     " amountRounded\n          amountUnformatted\n          __typename\n        }\n        __typename\n      "
-                     "}\n      displayPrice {\n        amountPerStay {\n          amountRounded\n          amountUnformatted\n  "
-                     "        __typename\n        }\n        __typename\n      }\n      __typename\n    }\n    "
-                     "basicPropertyData {\n      id\n      name\n      pageName\n      photos {\n        main {\n          "
-                     "highResUrl {\n            absoluteUrl\n            __typename\n          }\n          __typename\n        "
-                     "}\n        __typename\n      }\n      location {\n        address\n        countryCode\n        "
-                     "__typename\n      }\n      reviews {\n        reviewsCount\n        totalScore\n        __typename\n      "
-                     "}\n      __typename\n    }\n    blocks {\n      thirdPartyInventoryContext {\n        rateBlockId\n       "
-                     " rateKey\n        wholesalerCode\n        tpiRoom {\n          bookingRoomId\n          __typename\n      "
-                     "  }\n        supplierId\n        __typename\n      }\n      __typename\n    }\n    __typename\n  }\n  "
-                     "__typename\n}\n\nfragment TripTypesData on TripTypes {\n  beach {\n    isBeachUfi\n    "
-                     "isEnabledBeachUfi\n    __typename\n  }\n  ski {\n    isSkiExperience\n    isSkiScaleUfi\n    __typename\n "
-                     " }\n  __typename\n}\n\nfragment ZeroResultsSection on ZeroResultsSection {\n  title {\n    text\n    "
-                     "__typename\n  }\n  primaryAction {\n    text {\n      text\n      __typename\n    }\n    action {\n      "
-                     "name\n      __typename\n    }\n    __typename\n  }\n  paragraphs {\n    text\n    __typename\n  }\n  "
-                     "type\n  __typename\n}\n\nfragment PreviousSearches on PreviousSearch {\n  childrenAges\n  "
-                     "__typename\n}\n\nfragment FrontierThemes on FrontierTheme {\n  id\n  name\n  selected\n  "
-                     "__typename\n}\n\nfragment MerchRegionIrene on MerchComponentsResultIrene {\n  regions {\n    id\n    "
-                     "components {\n      ... on PromotionalBannerIrene {\n        promotionalBannerCampaignId\n        "
-                     "contentArea {\n          title {\n            ... on PromotionalBannerSimpleTitleIrene {\n              "
-                     "value\n              __typename\n            }\n            __typename\n          }\n          subTitle {"
-                     "\n            ... on PromotionalBannerSimpleSubTitleIrene {\n              value\n              "
-                     "__typename\n            }\n            __typename\n          }\n          caption {\n            ... on "
-                     "PromotionalBannerSimpleCaptionIrene {\n              value\n              __typename\n            }\n     "
-                     "       ... on PromotionalBannerCountdownCaptionIrene {\n              campaignEnd\n              "
-                     "__typename\n            }\n            __typename\n          }\n          buttons {\n            "
-                     "variant\n            cta {\n              ariaLabel\n              text\n              targetLanding {\n  "
-                     "              ... on OpenContextSheet {\n                  sheet {\n                    ... on "
-                     "WebContextSheet {\n                      title\n                      body {\n                        "
-                     "items {\n                          ... on ContextSheetTextItem {\n                            text\n      "
-                     "                      __typename\n                          }\n                          ... on "
-                     "ContextSheetList {\n                            items {\n                              text\n             "
-                     "                 __typename\n                            }\n                            __typename\n      "
-                     "                    }\n                          __typename\n                        }\n                  "
-                     "      __typename\n                      }\n                      buttons {\n                        "
-                     "variant\n                        cta {\n                          text\n                          "
-                     "ariaLabel\n                          targetLanding {\n                            ... on "
-                     "DirectLinkLanding {\n                              urlPath\n                              queryParams {\n "
-                     "                               name\n                                value\n                              "
-                     "  __typename\n                              }\n                              __typename\n                 "
-                     "           }\n                            ... on LoginLanding {\n                              stub\n     "
-                     "                         __typename\n                            }\n                            ... on "
-                     "DeeplinkLanding {\n                              urlPath\n                              queryParams {\n   "
-                     "                             name\n                                value\n                                "
-                     "__typename\n                              }\n                              __typename\n                   "
-                     "         }\n                            ... on ResolvedLinkLanding {\n                              url\n "
-                     "                             __typename\n                            }\n                            "
-                     "__typename\n                          }\n                          __typename\n                        "
-                     "}\n                        __typename\n                      }\n                      __typename\n        "
-                     "            }\n                    __typename\n                  }\n                  __typename\n        "
-                     "        }\n                ... on SearchResultsLandingIrene {\n                  destType\n               "
-                     "   destId\n                  checkin\n                  checkout\n                  nrAdults\n            "
-                     "      nrChildren\n                  childrenAges\n                  nrRooms\n                  filters {"
-                     "\n                    name\n                    value\n                    __typename\n                  "
-                     "}\n                  __typename\n                }\n                ... on DirectLinkLandingIrene {\n     "
-                     "             urlPath\n                  queryParams {\n                    name\n                    "
-                     "value\n                    __typename\n                  }\n                  __typename\n                "
-                     "}\n                ... on LoginLandingIrene {\n                  stub\n                  __typename\n     "
-                     "           }\n                ... on DeeplinkLandingIrene {\n                  urlPath\n                  "
-                     "queryParams {\n                    name\n                    value\n                    __typename\n      "
-                     "            }\n                  __typename\n                }\n                ... on SorterLandingIrene "
-                     "{\n                  sorterName\n                  __typename\n                }\n                "
-                     "__typename\n              }\n              __typename\n            }\n            __typename\n          "
-                     "}\n          __typename\n        }\n        designVariant {\n          ... on "
-                     "DesktopPromotionalFullBleedImageIrene {\n            image: image {\n              id\n              url("
-                     "width: 814, height: 138)\n              alt\n              overlayGradient\n              "
-                     "primaryColorHex\n              __typename\n            }\n            colorScheme\n            "
-                     "signature\n            __typename\n          }\n          ... on DesktopPromotionalImageLeftIrene {\n     "
-                     "       imageOpt: image {\n              id\n              url(width: 248, height: 248)\n              "
-                     "alt\n              overlayGradient\n              primaryColorHex\n              __typename\n            "
-                     "}\n            colorScheme\n            signature\n            __typename\n          }\n          ... on "
-                     "DesktopPromotionalImageRightIrene {\n            imageOpt: image {\n              id\n              url("
-                     "width: 248, height: 248)\n              alt\n              overlayGradient\n              "
-                     "primaryColorHex\n              __typename\n            }\n            colorScheme\n            "
-                     "signature\n            __typename\n          }\n          ... on MdotPromotionalFullBleedImageIrene {\n   "
-                     "         image: image {\n              id\n              url(width: 358, height: 136)\n              "
-                     "alt\n              overlayGradient\n              primaryColorHex\n              __typename\n            "
-                     "}\n            colorScheme\n            signature\n            __typename\n          }\n          ... on "
-                     "MdotPromotionalImageLeftIrene {\n            imageOpt: image {\n              id\n              url("
-                     "width: 128, height: 128)\n              alt\n              overlayGradient\n              "
-                     "primaryColorHex\n              __typename\n            }\n            colorScheme\n            "
-                     "signature\n            __typename\n          }\n          ... on MdotPromotionalImageRightIrene {\n       "
-                     "     imageOpt: image {\n              id\n              url(width: 128, height: 128)\n              alt\n "
-                     "             overlayGradient\n              primaryColorHex\n              __typename\n            }\n    "
-                     "        colorScheme\n            signature\n            __typename\n          }\n          ... on "
-                     "MdotPromotionalImageTopIrene {\n            imageOpt: image {\n              id\n              url(width: "
-                     "128, height: 128)\n              alt\n              overlayGradient\n              primaryColorHex\n      "
-                     "        __typename\n            }\n            colorScheme\n            signature\n            "
-                     "__typename\n          }\n          ... on MdotPromotionalIllustrationLeftIrene {\n            imageOpt: "
-                     "image {\n              id\n              url(width: 200, height: 200)\n              alt\n              "
-                     "overlayGradient\n              primaryColorHex\n              __typename\n            }\n            "
-                     "colorScheme\n            signature\n            __typename\n          }\n          ... on "
-                     "MdotPromotionalIllustrationRightIrene {\n            imageOpt: image {\n              id\n              "
-                     "url(width: 200, height: 200)\n              alt\n              overlayGradient\n              "
-                     "primaryColorHex\n              __typename\n            }\n            colorScheme\n            "
-                     "signature\n            __typename\n          }\n          __typename\n        }\n        __typename\n     "
-                     " }\n      ... on MerchCarouselIrene @include(if: $carouselLowCodeExp) {\n        carouselCampaignId\n     "
-                     "   __typename\n      }\n      __typename\n    }\n    __typename\n  }\n  __typename\n}\n"
+            "query": get_search_query(query_profile)
         }
 
+        if query_profile == 'minimal':
+            # The minimal query does not declare the $carouselLowCodeExp variable
+            del graphql_query['variables']['carouselLowCodeExp']
+
+        return graphql_query
+
     def _check_currency_data(self) -> str:
         """
         Check currency data from the GraphQL response.
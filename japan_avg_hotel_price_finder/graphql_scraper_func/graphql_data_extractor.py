@@ -3,57 +3,95 @@ import numpy as np
 
 from japan_avg_hotel_price_finder.configure_logging import main_logger
 
+# Columns extracted from each hotel and their dtypes
+HOTEL_COLUMN_DTYPES: dict[str, str] = {
+    "Hotel": 'object',
+    "Review": 'float64',
+    "Price": 'float64',
+    "Location": 'object'
+}
+
 
 def extract_hotel_data(df_list: list[pd.DataFrame], hotel_data_list: list[dict]) -> None:
     """
     Extract data from a list of hotel data.
+    The hotels of the list are collected into column buffers, then one Pandas Dataframe is built for the whole list.
     :param df_list: A list to store Pandas Dataframes.
     :param hotel_data_list: List of results.
     :return:
     """
     main_logger.debug("Extracting data...")
     if hotel_data_list:
-        for hotel_data in hotel_data_list:
-            main_logger.debug("Initialize lists to store extracted data")
-            display_names = []
-            review_scores = []
-            final_prices = []
-            location = []
-            for key, val in hotel_data.items():
-                if key == "displayName":
-                    if val and 'text' in val:
-                        display_names.append(val['text'])
-                    else:
-                        display_names.append(None)
-
-                if key == "basicPropertyData":
-                    if val and 'reviewScore' in val and 'score' in val['reviewScore']:
-                        review_scores.append(float(val['reviewScore']['score']))
-                    else:
-                        review_scores.append(np.nan)
-
-                if key == "blocks":
-                    if val and val[0] and 'finalPrice' in val[0] and 'amount' in val[0]['finalPrice']:
-                        final_prices.append(float(val[0]['finalPrice']['amount']))
-                    else:
-                        final_prices.append(np.nan)
-
-                if key == "location":
-                    if val and 'displayLocation' in val:
-                        location.append(val['displayLocation'])
-                    else:
-                        location.append(None)
-
-            main_logger.debug("Create a Pandas Dataframe to store extracted data")
-            df = pd.DataFrame({
-                "Hotel": pd.Series(display_names, dtype='object'),
-                "Review": pd.Series(review_scores, dtype='float64'),
-                "Price": pd.Series(final_prices, dtype='float64'),
-                "Location": pd.Series(location, dtype='object')
-            })
-
+        columns = extract_hotel_columns(hotel_data_list)
+        if columns["Hotel"]:
             main_logger.debug("Append dataframe to a df_list")
-            df_list.append(df)
+            df_list.append(create_hotel_dataframe(columns))
     else:
         main_logger.warning("No hotel data was found.")
 
+
+def extract_hotel_columns(hotel_data_list: list[dict]) -> dict[str, list]:
+    """
+    Extract hotel name, review score, price and location of every hotel into column buffers.
+    A value which is present but invalid becomes None or NaN.
+    A key which is missing from a hotel becomes NaN.
+    Hotels which have none of the keys are skipped.
+    :param hotel_data_list: List of results.
+    :return: Dictionary of column buffers keyed by column name.
+    """
+    display_names = []
+    review_scores = []
+    final_prices = []
+    location = []
+    for hotel_data in hotel_data_list:
+        if not any(key in hotel_data for key in ("displayName", "basicPropertyData", "blocks", "location")):
+            continue
+
+        if "displayName" in hotel_data:
+            val = hotel_data["displayName"]
+            display_names.append(val['text'] if val and 'text' in val else None)
+        else:
+            display_names.append(np.nan)
+
+        if "basicPropertyData" in hotel_data:
+            val = hotel_data["basicPropertyData"]
+            if val and 'reviewScore' in val and 'score' in val['reviewScore']:
+                review_scores.append(float(val['reviewScore']['score']))
+            else:
+                review_scores.append(np.nan)
+        else:
+            review_scores.append(np.nan)
+
+        if "blocks" in hotel_data:
+            val = hotel_data["blocks"]
+            if val and val[0] and 'finalPrice' in val[0] and 'amount' in val[0]['finalPrice']:
+                final_prices.append(float(val[0]['finalPrice']['amount']))
+            else:
+                final_prices.append(np.nan)
+        else:
+            final_prices.append(np.nan)
+
+        if "location" in hotel_data:
+            val = hotel_data["location"]
+            location.append(val['displayLocation'] if val and 'displayLocation' in val else None)
+        else:
+            location.append(np.nan)
+
+    return {
+        "Hotel": display_names,
+        "Review": review_scores,
+        "Price": final_prices,
+        "Location": location
+    }
+
+
+def create_hotel_dataframe(columns: dict[str, list]) -> pd.DataFrame:
+    """
+    Create a Pandas Dataframe from column buffers.
+    :param columns: Dictionary of column buffers keyed by column name.
+    :return: Pandas Dataframe.
+    """
+    main_logger.debug("Create a Pandas Dataframe to store extracted data")
+    return pd.DataFrame({
+        column: pd.Series(columns[column], dtype=dtype) for column, dtype in HOTEL_COLUMN_DTYPES.items()
+    })
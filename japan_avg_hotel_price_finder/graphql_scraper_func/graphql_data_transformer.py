@@ -5,12 +5,14 @@ import pandas as pd
 from japan_avg_hotel_price_finder.configure_logging import main_logger
 
 
-def transform_data_in_df(check_in, city, dataframe) -> pd.DataFrame:
+def transform_data_in_df(check_in, city, dataframe, as_of: datetime.datetime | None = None) -> pd.DataFrame:
     """
     Transform data in DataFrame.
     :param check_in: Check-in date.
     :param city: City where the hotels are located.
     :param dataframe: Pandas DataFrame to be transformed.
+    :param as_of: AsOf timestamp of the data, default is None.
+                If None, use the current timestamp.
     :return: Pandas DataFrame.
     """
     if not dataframe.empty:
@@ -19,7 +21,7 @@ def transform_data_in_df(check_in, city, dataframe) -> pd.DataFrame:
         main_logger.info("Add Date column to DataFrame")
         dataframe['Date'] = check_in
         main_logger.info("Add AsOf column to DataFrame")
-        dataframe['AsOf'] = datetime.datetime.now()
+        dataframe['AsOf'] = as_of if as_of is not None else datetime.datetime.now()
 
         main_logger.info("Remove duplicate rows from the DataFrame based on 'Hotel' column")
         df_filtered = dataframe.drop_duplicates(subset='Hotel').copy()
@@ -0,0 +1,214 @@
+import asyncio
+import random
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncIterator
+
+from aiohttp import ClientResponse, ClientSession
+
+from japan_avg_hotel_price_finder.configure_logging import main_logger
+
+# Default request rate shared by every scraper in a run
+DEFAULT_REQUESTS_PER_SECOND = 10.0
+DEFAULT_BURST = 20
+
+# Default retry settings for throttled or failed requests
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_BASE_DELAY = 0.5
+DEFAULT_MAX_DELAY = 60.0
+
+
+@dataclass
+class TokenBucketRateLimiter:
+    """
+    Token-bucket rate limiter shared by all requests of a scraping run.
+    The bucket refills at the given rate and holds at most `burst` tokens, each request takes one token.
+
+    Attributes:
+        requests_per_second (float): Sustained request rate, default is 10.
+        burst (int): Maximum number of requests sent at once after an idle period, default is 20.
+    """
+    requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND
+    burst: int = DEFAULT_BURST
+
+    tokens: float = field(init=False)
+    updated_at: float = field(init=False)
+    paused_until: float = field(init=False, default=0.0)
+    lock: asyncio.Lock = field(init=False, repr=False)
+
+    def __post_init__(self):
+        if self.requests_per_second <= 0:
+            raise ValueError(f"Invalid requests_per_second: {self.requests_per_second}. Must be positive.")
+        if self.burst <= 0:
+            raise ValueError(f"Invalid burst: {self.burst}. Must be positive.")
+
+        self.tokens = float(self.burst)
+        self.updated_at = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """
+        Wait until a token is available and take it.
+        Waiting requests are served in arrival order.
+        :return: None
+        """
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.requests_per_second)
+
+    def pause(self, seconds: float) -> None:
+        """
+        Stop handing out tokens for the given number of seconds, e.g., when the server asks to slow down.
+        The bucket is emptied, so requests resume at the sustained rate instead of a burst.
+        :param seconds: Number of seconds to pause.
+        :return: None
+        """
+        now = time.monotonic()
+        self.paused_until = max(self.paused_until, now + seconds)
+        self.tokens = 0.0
+        self.updated_at = max(self.updated_at, self.paused_until)
+
+    def _refill(self, now: float) -> None:
+        """
+        Add the tokens accumulated since the last refill.
+        :param now: Current monotonic time.
+        :return: None
+        """
+        elapsed = max(0.0, now - self.updated_at)
+        self.tokens = min(float(self.burst), self.tokens + elapsed * self.requests_per_second)
+        self.updated_at = max(self.updated_at, now)
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter for throttled (429), failed (5xx) and timed out requests.
+
+    Attributes:
+        max_retries (int): Maximum number of retries of a request, default is 5.
+        base_delay (float): Delay of the first retry in seconds, before jitter, default is 0.5.
+        max_delay (float): Maximum backoff delay in seconds, before jitter, default is 60.
+    """
+    max_retries: int = DEFAULT_MAX_RETRIES
+    base_delay: float = DEFAULT_BASE_DELAY
+    max_delay: float = DEFAULT_MAX_DELAY
+
+    @staticmethod
+    def should_retry(status: int) -> bool:
+        """
+        Check whether a response status is worth retrying.
+        :param status: HTTP status code.
+        :return: True if the request was throttled or failed on the server side, False otherwise.
+        """
+        return status == 429 or status >= 500
+
+    def get_delay(self, attempt: int, retry_after: str | None = None) -> float:
+        """
+        Get the delay before the next retry.
+        :param attempt: Number of retries already made.
+        :param retry_after: Value of the Retry-After header, default is None.
+        :return: Delay in seconds. Never shorter than the Retry-After header.
+        """
+        backoff = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        retry_after_seconds = parse_retry_after(retry_after)
+        if retry_after_seconds is not None:
+            return max(retry_after_seconds, backoff)
+        return backoff
+
+
+def parse_retry_after(retry_after: str | None) -> float | None:
+    """
+    Parse a Retry-After header, which is either a number of seconds or an HTTP date.
+    :param retry_after: Value of the Retry-After header.
+    :return: Number of seconds to wait, or None if the header is missing or invalid.
+    """
+    if not retry_after:
+        return None
+
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        main_logger.warning(f"Invalid Retry-After header: {retry_after}")
+        return None
+
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+@asynccontextmanager
+async def rate_limited_post(session: ClientSession,
+                            url: str,
+                            headers: dict,
+                            graphql_query: dict[str, Any],
+                            rate_limiter: TokenBucketRateLimiter | None = None,
+                            retry_policy: RetryPolicy | None = None) -> AsyncIterator[ClientResponse]:
+    """
+    Send a POST request under the rate limiter, retrying throttled, failed and timed out requests.
+    A 429 response pauses the rate limiter, so every request backs off, not only the throttled one.
+    :param session: Client session.
+    :param url: Url to send the request to.
+    :param headers: Request headers.
+    :param graphql_query: GraphQL query.
+    :param rate_limiter: Rate limiter, default is None.
+                        If None, the request is sent without waiting for a token.
+    :param retry_policy: Retry policy, default is None.
+                        If None, use the default retry policy.
+    :return: Async iterator yielding the last response, which may still be a non-200 response once retries run out.
+    """
+    if retry_policy is None:
+        retry_policy = RetryPolicy()
+
+    attempt = 0
+    while True:
+        if rate_limiter is not None:
+            await rate_limiter.acquire()
+
+        yielded = False
+        try:
+            async with session.post(url, headers=headers, json=graphql_query) as response:
+                if retry_policy.should_retry(response.status) and attempt < retry_policy.max_retries:
+                    delay = retry_policy.get_delay(attempt, response.headers.get('Retry-After'))
+                    if response.status == 429 and rate_limiter is not None:
+                        rate_limiter.pause(delay)
+                    main_logger.warning(f"HTTP status {response.status}, "
+                                        f"retry {attempt + 1}/{retry_policy.max_retries} in {delay:.2f} s")
+                else:
+                    if retry_policy.should_retry(response.status):
+                        main_logger.error(f"HTTP status {response.status}, giving up after {attempt} retries")
+                    yielded = True
+                    yield response
+                    return
+        except asyncio.TimeoutError:
+            # Timeouts raised while the caller reads the response are not retried here
+            if yielded:
+                raise
+            if attempt >= retry_policy.max_retries:
+                main_logger.error(f"Request timed out, giving up after {attempt} retries")
+                raise
+            delay = retry_policy.get_delay(attempt)
+            main_logger.warning(f"Request timed out, retry {attempt + 1}/{retry_policy.max_retries} in {delay:.2f} s")
+
+        await asyncio.sleep(delay)
+        attempt += 1
+
+
+if __name__ == '__main__':
+    pass
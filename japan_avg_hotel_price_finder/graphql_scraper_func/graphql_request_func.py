@@ -1,9 +1,11 @@
 import os
 
-from aiohttp import ClientSession
+from aiohttp import ClientSession, ContentTypeError
 from dotenv import load_dotenv
 
 from japan_avg_hotel_price_finder.configure_logging import main_logger
+from japan_avg_hotel_price_finder.graphql_scraper_func.graphql_rate_limiter import RetryPolicy, \
+    TokenBucketRateLimiter, rate_limited_post
 
 # Load environment variables from .env file
 load_dotenv()
@@ -12,6 +14,7 @@ load_dotenv()
 def get_header() -> dict:
     """
     Return header.
+    Headers whose environment variable is not set are left out, as they cannot be sent.
     :return: Header as a dictionary.
     """
     main_logger.info("Getting header...")
@@ -25,29 +28,74 @@ def get_header() -> dict:
         "x-booking-site-type-id": os.getenv("X_BOOKING_SITE_TYPE_ID"),
         "x-booking-topic": os.getenv("X_BOOKING_TOPIC"),
     }
-    return headers
+    return {key: value for key, value in headers.items() if value is not None}
 
 
-async def fetch_hotel_data(session: ClientSession, url: str, headers: dict, graphql_query: dict) -> list:
+async def fetch_page_data(session: ClientSession,
+                          url: str,
+                          headers: dict,
+                          graphql_query: dict,
+                          rate_limiter: TokenBucketRateLimiter | None = None,
+                          retry_policy: RetryPolicy | None = None) -> dict:
     """
-    Fetch hotel data from GraphQL response.
+    Fetch the whole GraphQL response of a result page.
+    Throttled (429), failed (5xx) and timed out requests are retried with backoff.
     :param session: client session.
     :param url: Url to fetch data from.
     :param headers: Request headers.
     :param graphql_query: GraphQL query.
-    :return: List of hotel data.
+    :param rate_limiter: Rate limiter shared by all requests, default is None.
+    :param retry_policy: Retry policy, default is None.
+                        If None, use the default retry policy.
+    :return: GraphQL response as a dictionary, or an empty dictionary if the request failed.
     """
-    async with session.post(url, headers=headers, json=graphql_query) as response:
+    async with rate_limited_post(session, url, headers, graphql_query, rate_limiter, retry_policy) as response:
         if response.status == 200:
-            data = await response.json()
             try:
-                return data['data']['searchQueries']['search']['results']
-            except (ValueError, KeyError) as e:
-                main_logger.error(f"Error extracting hotel data: {e}")
-                return []
+                return await response.json()
+            except (ValueError, ContentTypeError) as e:
+                main_logger.error(f"Error decoding hotel data: {e}")
+                return {}
             except Exception as e:
                 main_logger.error(f"Unexpected error: {e}")
-                return []
+                return {}
         else:
             main_logger.error(f"Error: {response.status}")
-            return []
+            return {}
+
+
+def get_page_results(page_data: dict) -> list:
+    """
+    Get the hotel results of a result page from its GraphQL response.
+    :param page_data: GraphQL response of the page.
+    :return: List of hotel data, empty if the response has no results.
+    """
+    if not page_data:
+        return []
+    try:
+        return page_data['data']['searchQueries']['search']['results']
+    except (KeyError, TypeError) as e:
+        main_logger.error(f"Error extracting hotel data: {e}")
+        return []
+
+
+async def fetch_hotel_data(session: ClientSession,
+                           url: str,
+                           headers: dict,
+                           graphql_query: dict,
+                           rate_limiter: TokenBucketRateLimiter | None = None,
+                           retry_policy: RetryPolicy | None = None) -> list:
+    """
+    Fetch hotel data from GraphQL response.
+    Throttled (429), failed (5xx) and timed out requests are retried with backoff.
+    :param session: client session.
+    :param url: Url to fetch data from.
+    :param headers: Request headers.
+    :param graphql_query: GraphQL query.
+    :param rate_limiter: Rate limiter shared by all requests, default is None.
+    :param retry_policy: Retry policy, default is None.
+                        If None, use the default retry policy.
+    :return: List of hotel data.
+    """
+    page_data = await fetch_page_data(session, url, headers, graphql_query, rate_limiter, retry_policy)
+    return get_page_results(page_data)
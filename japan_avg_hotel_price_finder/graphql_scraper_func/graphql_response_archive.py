@@ -0,0 +1,95 @@
+import datetime
+import gzip
+import json
+import os
+from dataclasses import dataclass
+from typing import Any, Iterator
+
+from japan_avg_hotel_price_finder.booking_details import BookingDetails
+from japan_avg_hotel_price_finder.configure_logging import main_logger
+
+# Extension of the compressed JSONL archive files
+ARCHIVE_EXTENSION = '.jsonl.gz'
+
+
+@dataclass(frozen=True)
+class ResponseArchive:
+    """
+    Archive of the raw GraphQL responses, so the data can be processed again without scraping.
+    Every scraped check-in date is written to one gzip-compressed JSONL file with one line per result page,
+    which keeps the whole response of the page with the entered booking details,
+    partitioned by city, check-in date and AsOf date:
+    <archive_dir>/city=<city>/date=<check-in>/as_of=<AsOf date>/<AsOf time>.jsonl.gz
+
+    Attributes:
+        archive_dir (str): Root directory of the archive.
+    """
+    archive_dir: str
+
+    def get_archive_path(self, city: str, check_in: str, as_of: datetime.datetime) -> str:
+        """
+        Get the path of the archive file of a city, check-in date and AsOf timestamp.
+        :param city: City where the hotels are located.
+        :param check_in: Check-in date.
+        :param as_of: AsOf timestamp of the scraped data.
+        :return: Path of the archive file.
+        """
+        return os.path.join(self.archive_dir, f'city={city}', f'date={check_in}', f'as_of={as_of:%Y-%m-%d}',
+                            f'{as_of:%H%M%S%f}{ARCHIVE_EXTENSION}')
+
+    def write_pages(self,
+                    booking_details: BookingDetails,
+                    as_of: datetime.datetime,
+                    pages: list[dict[str, Any]]) -> str:
+        """
+        Write the raw GraphQL response of every page of a check-in date to its archive file.
+        The file is written under a temporary name and renamed, so a crash never leaves a partial file.
+        :param booking_details: Booking details entered for the scraper, to check the responses again.
+        :param as_of: AsOf timestamp of the scraped data.
+        :param pages: GraphQL response of each page, ordered by page offset.
+        :return: Path of the archive file.
+        """
+        city, check_in = booking_details.city, booking_details.check_in
+        path = self.get_archive_path(city, check_in, as_of)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        temp_path = f'{path}.tmp'
+        with gzip.open(temp_path, 'wt', encoding='utf-8') as file:
+            for page_num, page_data in enumerate(pages):
+                record = {'booking_details': booking_details.model_dump(), 'as_of': as_of.isoformat(),
+                          'page_offset': page_num * 100, 'response': page_data}
+                file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        os.replace(temp_path, path)
+
+        main_logger.debug(f"Archived {len(pages)} pages of {city} for {check_in} to {path}")
+        return path
+
+
+def find_archive_files(archive_dir: str, city: str | None = None) -> list[str]:
+    """
+    Find the archive files in the archive directory.
+    :param archive_dir: Root directory of the archive.
+    :param city: Only find the files of this city, default is None.
+                If None, find the files of every city.
+    :return: Sorted list of archive file paths.
+    """
+    root = os.path.join(archive_dir, f'city={city}') if city else archive_dir
+    archive_files = []
+    for directory, _, files in os.walk(root):
+        for file in files:
+            if file.endswith(ARCHIVE_EXTENSION):
+                archive_files.append(os.path.join(directory, file))
+    return sorted(archive_files)
+
+
+def read_archive_file(path: str) -> Iterator[dict[str, Any]]:
+    """
+    Read the page records of an archive file.
+    :param path: Path of the archive file.
+    :return: Iterator of page records.
+    """
+    with gzip.open(path, 'rt', encoding='utf-8') as file:
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
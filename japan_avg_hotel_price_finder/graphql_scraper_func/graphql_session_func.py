@@ -0,0 +1,85 @@
+from dataclasses import dataclass
+from types import SimpleNamespace
+
+import aiohttp
+from aiohttp import ClientSession, TCPConnector, TraceConfig, TraceConnectionCreateEndParams, \
+    TraceConnectionReuseconnParams, TraceRequestStartParams
+
+from japan_avg_hotel_price_finder.configure_logging import main_logger
+
+# Connection pool settings shared by every scraper in a run
+CONNECTION_LIMIT = 100
+CONNECTION_LIMIT_PER_HOST = 10
+DNS_CACHE_TTL = 300
+KEEPALIVE_TIMEOUT = 30
+
+
+@dataclass
+class SessionStats:
+    """
+    Connection and request counters of a pooled client session.
+
+    Attributes:
+        new_connections (int): Number of connections newly opened, including the TCP and TLS handshake.
+        reused_connections (int): Number of requests sent over an already opened keep-alive connection.
+        requests_sent (int): Number of HTTP requests sent.
+    """
+    new_connections: int = 0
+    reused_connections: int = 0
+    requests_sent: int = 0
+
+    def log_summary(self) -> None:
+        """
+        Log the connection and request counters.
+        :return: None
+        """
+        main_logger.info(f"Requests sent: {self.requests_sent} | "
+                         f"Connections opened: {self.new_connections} | "
+                         f"Connections reused: {self.reused_connections}")
+
+
+def create_trace_config(stats: SessionStats) -> TraceConfig:
+    """
+    Create a trace config which counts sent requests, new and reused connections.
+    :param stats: SessionStats to update.
+    :return: aiohttp TraceConfig.
+    """
+    async def on_connection_create_end(session: ClientSession,
+                                       context: SimpleNamespace,
+                                       params: TraceConnectionCreateEndParams) -> None:
+        stats.new_connections += 1
+
+    async def on_connection_reuseconn(session: ClientSession,
+                                      context: SimpleNamespace,
+                                      params: TraceConnectionReuseconnParams) -> None:
+        stats.reused_connections += 1
+
+    async def on_request_start(session: ClientSession,
+                               context: SimpleNamespace,
+                               params: TraceRequestStartParams) -> None:
+        stats.requests_sent += 1
+
+    trace_config = TraceConfig()
+    trace_config.on_request_start.append(on_request_start)
+    trace_config.on_connection_create_end.append(on_connection_create_end)
+    trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+    return trace_config
+
+
+def create_client_session(stats: SessionStats | None = None) -> ClientSession:
+    """
+    Create a client session backed by a keep-alive connection pool with a DNS cache.
+    Must be called inside a running event loop.
+    :param stats: SessionStats to count sent requests, new and reused connections, default is None.
+    :return: aiohttp ClientSession.
+    """
+    main_logger.debug("Creating pooled client session...")
+    connector = TCPConnector(
+        limit=CONNECTION_LIMIT,
+        limit_per_host=CONNECTION_LIMIT_PER_HOST,
+        use_dns_cache=True,
+        ttl_dns_cache=DNS_CACHE_TTL,
+        keepalive_timeout=KEEPALIVE_TIMEOUT
+    )
+    trace_configs = [create_trace_config(stats)] if stats is not None else None
+    return aiohttp.ClientSession(connector=connector, trace_configs=trace_configs)
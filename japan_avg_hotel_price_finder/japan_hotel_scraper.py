@@ -1,4 +1,6 @@
 import calendar
+import datetime
+from dataclasses import replace
 from typing import Any
 
 import pandas as pd
@@ -7,7 +9,11 @@ from sqlalchemy import Engine
 from sqlalchemy.orm import sessionmaker
 
 from japan_avg_hotel_price_finder.configure_logging import main_logger
-from japan_avg_hotel_price_finder.sql.db_model import Base, JapanHotel
+from japan_avg_hotel_price_finder.scrape_scheduler import ScrapeScheduler, ScrapeTask
+from japan_avg_hotel_price_finder.sql.bulk_loader import load_dataframe
+from japan_avg_hotel_price_finder.sql.db_model import Base, JapanHotel, create_missing_indexes
+from japan_avg_hotel_price_finder.sql.scrape_manifest import ManifestEntry, get_manifest_entries, get_scraped_dates, \
+    record_manifest_entries
 from japan_avg_hotel_price_finder.whole_mth_graphql_scraper import WholeMonthGraphQLScraper
 
 
@@ -32,6 +38,12 @@ class JapanScraper(WholeMonthGraphQLScraper):
         region (str): The current region being scraped.
         start_month (int): Month to start scraping (1-12), default is 1.
         end_month (int): Last month to scrape (1-12), default is 12.
+        max_concurrent_tasks (int): Maximum number of check-in dates scraped at the same time, default is 1.
+        max_pages_in_flight (int): Maximum number of result pages requested at the same time across all check-in dates,
+                                default is 10.
+        resume (bool): Whether to skip check-in dates already completed on the AsOf date, default is True.
+        as_of (str): AsOf date of the run in 'YYYY-MM-DD' format, which keys the scrape manifest,
+                    default is today.
         engine (Engine): SQLAlchemy engine.
     """
     engine: Engine
@@ -55,6 +67,10 @@ class JapanScraper(WholeMonthGraphQLScraper):
     start_month: int = Field(1, gt=0, le=12)  # month to start scraping
     end_month: int = Field(12, gt=0, le=12)  # last month to scrape
 
+    # Scrape manifest, so a restarted run only scrapes the check-in dates which are not loaded yet
+    resume: bool = True
+    as_of: str = Field(default_factory=lambda: datetime.date.today().strftime('%Y-%m-%d'))
+
     def map_prefecture_to_region(self, prefecture: str) -> str:
         """
         Map a prefecture to its corresponding region.
@@ -96,35 +112,96 @@ class JapanScraper(WholeMonthGraphQLScraper):
         else:
             japan_regions_to_be_used = self.japan_regions
 
-        for region, prefectures in japan_regions_to_be_used.items():
-            self.region = region
-            main_logger.info(f"Scraping Japan hotels for region {self.region}")
+        async with self.shared_session():
+            for region, prefectures in japan_regions_to_be_used.items():
+                self.region = region
+                main_logger.info(f"Scraping Japan hotels for region {self.region}")
 
-            for prefecture in prefectures:
-                main_logger.info(f"Scraping Japan hotels for city {prefecture}")
+                for prefecture in prefectures:
+                    main_logger.info(f"Scraping Japan hotels for city {prefecture}")
 
-                self.city = prefecture
-                await self._scrape_whole_year()
+                    self.city = prefecture
+                    await self._scrape_whole_year()
 
     async def _scrape_whole_year(self) -> None:
         """
-        Scrape hotel data for the whole year
+        Scrape hotel data for the whole year.
+        Check-in dates of all months are scheduled together, and their data is loaded to the database in batches
+        by a background writer while scraping continues.
         :return: None
         """
         main_logger.info(f"Scraping Japan hotels for {self.city} for the whole year")
+        month_tasks: dict[int, list[ScrapeTask]] = {}
         for month in range(self.start_month, self.end_month + 1):
             self.month = month
-            df = await self.scrape_whole_month()
-            if not df.empty:
-                df['Region'] = self.region
-                self._load_to_database(df)
-            else:
-                main_logger.warning(f"No data found for {self.city} for {calendar.month_name[self.month]} {self.year}")
+            last_day: int = await self._find_last_day_of_the_month()
+            month_tasks[month] = self._create_month_tasks(last_day)
+
+        if self.resume:
+            month_tasks = self._skip_completed_tasks(month_tasks)
+
+        for month, tasks in month_tasks.items():
+            if not tasks:
+                main_logger.warning(f"No data found for {self.city} for {calendar.month_name[month]} {self.year}")
+
+        scheduler = ScrapeScheduler(max_concurrent_tasks=self.max_concurrent_tasks,
+                                    max_pages_in_flight=self.max_pages_in_flight)
+        all_tasks = [task for tasks in month_tasks.values() for task in tasks]
+        async with self._create_background_writer(self._load_batch) as writer:
+            await scheduler.run(self, all_tasks, on_result=writer.put, keep_results=False)
+
+    def _skip_completed_tasks(self, month_tasks: dict[int, list[ScrapeTask]]) -> dict[int, list[ScrapeTask]]:
+        """
+        Remove the check-in dates which are already completed on the AsOf date according to the scrape manifest.
+        Months whose check-in dates are all completed are removed.
+        :param month_tasks: Scrape tasks keyed by month.
+        :return: Remaining scrape tasks keyed by month.
+        """
+        completed = get_scraped_dates(self.engine, JapanHotel.__tablename__, self.city, self.as_of, self.nights)
+        if not completed:
+            return month_tasks
+
+        remaining_month_tasks = {}
+        for month, tasks in month_tasks.items():
+            remaining_tasks = [task for task in tasks if task.check_in not in completed]
+            if tasks and not remaining_tasks:
+                main_logger.info(f"{self.city} for {calendar.month_name[month]} {self.year} is already completed. "
+                                 f"Skip it.")
+                continue
+            remaining_month_tasks[month] = remaining_tasks
+
+        num_skipped = sum(len(tasks) for tasks in month_tasks.values()) - sum(
+            len(tasks) for tasks in remaining_month_tasks.values())
+        main_logger.info(f"Resume {self.city}: skip {num_skipped} completed check-in dates as of {self.as_of}")
+        return remaining_month_tasks
+
+    def _load_batch(self, batch: list[tuple[ScrapeTask, pd.DataFrame]]) -> None:
+        """
+        Load a batch of scraped check-in dates to the database, and record them in the scrape manifest.
+        Check-in dates without data are not recorded, so they are scraped again by a resumed run.
+        Called by the background writer in a worker thread.
+        :param batch: List of scrape tasks and their DataFrames.
+        :return: None
+        """
+        df = self._concat_results([result for _, result in batch])
+        if not df.empty:
+            df['Region'] = self.region
+            # Key the manifest by the AsOf date of the run, which resumed runs look up
+            manifest_entries = [replace(entry, as_of=self.as_of, nights=self.nights)
+                                for entry in get_manifest_entries(df)]
+            self._load_to_database(df, manifest_entries)
+        else:
+            check_ins = ', '.join(task.check_in for task, _ in batch)
+            main_logger.warning(f"No data found for {self.city} for check-in dates {check_ins}")
 
-    def _load_to_database(self, prefecture_hotel_data: pd.DataFrame) -> None:
+    def _load_to_database(self,
+                          prefecture_hotel_data: pd.DataFrame,
+                          manifest_entries: list[ManifestEntry] | None = None) -> None:
         """
-        Load hotel data of all Japan Prefectures to a database using SQLAlchemy ORM
+        Load hotel data of all Japan Prefectures to a database with the bulk loader, using COPY on PostgreSQL.
         :param prefecture_hotel_data: DataFrame with the whole-year hotel data of the given prefecture.
+        :param manifest_entries: Scraped check-in dates, recorded in the scrape manifest in the same transaction,
+                                default is None.
         :return: None
         """
         main_logger.info("Loading hotel data to database...")
@@ -135,58 +212,30 @@ class JapanScraper(WholeMonthGraphQLScraper):
         # Rename Price/Review column
         prefecture_hotel_data.rename(columns={'Price/Review': 'PriceReview'}, inplace=True)
 
-        # Create all tables
+        # Create all tables, and the indexes which tables created by an older version do not have
         Base.metadata.create_all(self.engine)
+        create_missing_indexes(self.engine)
+
+        if prefecture_hotel_data.empty:
+            main_logger.warning("No valid hotel records to save")
+            return
+
+        Session = sessionmaker(bind=self.engine)
+        session = Session()
 
         try:
-            # Convert DataFrame to list of dictionaries and remove selected_currency
-            records = prefecture_hotel_data.to_dict('records')
-
-            # Create HotelPrice objects with validation
-            hotel_prices = []
-            for record in records:
-                try:
-                    hotel_prices.append(JapanHotel(**record))
-                except Exception as e:
-                    main_logger.error(f"Error creating hotel record: {str(e)}")
-                    main_logger.debug(f"Problematic record: {record}")
-                    continue
-
-            if not hotel_prices:
-                main_logger.warning("No valid hotel records to save")
-                return
-
-            # Process in chunks for better memory management
-            chunk_size = 1000
-            chunks = [hotel_prices[i:i + chunk_size] for i in range(0, len(hotel_prices), chunk_size)]
-
-            # Create a single session for all chunks
-            Session = sessionmaker(bind=self.engine)
-            session = Session()
-
-            try:
-                for chunk in chunks:
-                    try:
-                        # Bulk insert chunk
-                        session.bulk_save_objects(chunk)
-                        session.flush()
-                        main_logger.debug(f"Processed chunk of {len(chunk)} records")
-                    except Exception as e:
-                        session.rollback()
-                        main_logger.error(f"Error processing chunk: {str(e)}")
-                        raise
-
-                session.commit()
-                main_logger.info(f"Hotel data for {self.city} loaded to database successfully.")
-            except Exception as e:
-                session.rollback()
-                main_logger.error(f"An error occurred while saving data: {str(e)}")
-                raise
-            finally:
-                session.close()
+            # Stream records into the table, with COPY on PostgreSQL
+            load_dataframe(session, JapanHotel, prefecture_hotel_data)
+            if manifest_entries:
+                record_manifest_entries(session, JapanHotel.__tablename__, manifest_entries)
+            session.commit()
+            main_logger.info(f"Hotel data for {self.city} loaded to database successfully.")
         except Exception as e:
-            main_logger.error(f"Error preparing data for database: {str(e)}")
+            session.rollback()
+            main_logger.error(f"An error occurred while saving data: {str(e)}")
             raise
+        finally:
+            session.close()
 
 
 if __name__ == '__main__':
@@ -56,6 +56,56 @@ def add_japan_arguments(parser: argparse.ArgumentParser) -> None:
                        help='Month to start scraping (1-12), default is 1')
     parser.add_argument('--end_month', type=int, default=12,
                        help='Last month to scrape (1-12), default is 12')
+    parser.add_argument('--no_resume', action='store_true',
+                        help='Scrape every check-in date again, even if it is already completed today')
+
+
+def add_request_arguments(parser: argparse.ArgumentParser) -> None:
+    """
+    Add GraphQL request arguments to the parser.
+    :param parser: argparse.ArgumentParser
+    :return: None
+    """
+    parser.add_argument('--query_profile', type=str, choices=['full', 'minimal'], default='full',
+                        help='GraphQL query profile, "minimal" only asks for the fields used by the scraper, '
+                             'default is "full"')
+    parser.add_argument('--compare_query_profiles', action='store_true',
+                        help='Compare response size and latency of all GraphQL query profiles '
+                             'with the Basic GraphQL scraper, without saving data')
+    parser.add_argument('--max_concurrent_tasks', type=int, default=1,
+                        help='Maximum number of check-in dates scraped at the same time by the Whole-Month '
+                             'and Japan hotel scrapers, default is 1')
+    parser.add_argument('--max_pages_in_flight', type=int, default=10,
+                        help='Maximum number of result pages requested at the same time across all check-in dates, '
+                             'default is 10')
+    parser.add_argument('--requests_per_second', type=float, default=10.0,
+                        help='Sustained rate of GraphQL requests shared by the whole run, default is 10')
+    parser.add_argument('--burst', type=int, default=20,
+                        help='Maximum number of GraphQL requests sent at once after an idle period, default is 20')
+    parser.add_argument('--max_retries', type=int, default=5,
+                        help='Maximum number of retries of a throttled (429), failed (5xx) or timed out request, '
+                             'default is 5')
+    parser.add_argument('--base_url', type=str, default='https://www.booking.com',
+                        help='Base URL of the GraphQL endpoint, e.g., the URL of the fake GraphQL server '
+                             'for offline tests, default is "https://www.booking.com"')
+    parser.add_argument('--archive_dir', type=str,
+                        help='Directory to archive the raw GraphQL results of every page as compressed JSONL, '
+                             'so they can be reprocessed with reprocess_archive.py. Not archived by default')
+
+
+def add_database_arguments(parser: argparse.ArgumentParser) -> None:
+    """
+    Add database write arguments to the parser.
+    :param parser: argparse.ArgumentParser
+    :return: None
+    """
+    parser.add_argument('--max_queued_results', type=int, default=10,
+                        help='Maximum number of scraped check-in dates waiting to be written to the database '
+                             'by the Whole-Month and Japan hotel scrapers, default is 10')
+    parser.add_argument('--flush_rows', type=int, default=10_000,
+                        help='Number of scraped rows which triggers a database write, default is 10,000')
+    parser.add_argument('--flush_interval', type=float, default=5.0,
+                        help='Maximum number of seconds scraped data waits before it is written, default is 5')
 
 
 def validate_japan_arguments(args: argparse.Namespace) -> None:
@@ -87,6 +137,46 @@ def validate_booking_details_arguments(args: argparse.Namespace) -> None:
         raise SystemExit
 
 
+def validate_request_arguments(args: argparse.Namespace) -> None:
+    """
+    Validate the parsed arguments of GraphQL requests.
+    :param args: Argparse.Namespace
+    :return: None
+    """
+    if args.max_concurrent_tasks <= 0:
+        main_logger.error("Error: The maximum number of concurrent tasks must be greater than 0.")
+        raise SystemExit
+    if args.max_pages_in_flight <= 0:
+        main_logger.error("Error: The maximum number of pages in flight must be greater than 0.")
+        raise SystemExit
+    if args.requests_per_second <= 0:
+        main_logger.error("Error: The number of requests per second must be greater than 0.")
+        raise SystemExit
+    if args.burst <= 0:
+        main_logger.error("Error: The burst must be greater than 0.")
+        raise SystemExit
+    if args.max_retries < 0:
+        main_logger.error("Error: The maximum number of retries must be greater than or equal to 0.")
+        raise SystemExit
+
+
+def validate_database_arguments(args: argparse.Namespace) -> None:
+    """
+    Validate the parsed arguments of database writes.
+    :param args: Argparse.Namespace
+    :return: None
+    """
+    if args.max_queued_results <= 0:
+        main_logger.error("Error: The maximum number of queued results must be greater than 0.")
+        raise SystemExit
+    if args.flush_rows <= 0:
+        main_logger.error("Error: The number of rows which triggers a write must be greater than 0.")
+        raise SystemExit
+    if args.flush_interval <= 0:
+        main_logger.error("Error: The flush interval must be greater than 0.")
+        raise SystemExit
+
+
 def parse_arguments() -> argparse.Namespace:
     """
     Parse command line arguments.
@@ -102,7 +192,11 @@ def parse_arguments() -> argparse.Namespace:
     add_booking_details_arguments(parser)
     add_date_arguments(parser)
     add_japan_arguments(parser)
+    add_request_arguments(parser)
+    add_database_arguments(parser)
     args = parser.parse_args()
     validate_booking_details_arguments(args)
     validate_japan_arguments(args)
+    validate_request_arguments(args)
+    validate_database_arguments(args)
     return args
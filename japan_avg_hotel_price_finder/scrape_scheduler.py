@@ -0,0 +1,123 @@
+import asyncio
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable
+
+import pandas as pd
+
+from japan_avg_hotel_price_finder.configure_logging import main_logger
+from japan_avg_hotel_price_finder.graphql_scraper import BasicGraphQLScraper
+
+
+@dataclass(frozen=True)
+class ScrapeTask:
+    """
+    One unit of scraping work, which is one city and one check-in date.
+
+    Attributes:
+        city (str): The city where the hotels are located.
+        check_in (str): The check-in date.
+        check_out (str): The check-out date.
+        nights (int): Number of nights (Length of stay).
+    """
+    city: str
+    check_in: str
+    check_out: str
+    nights: int = 1
+
+
+@dataclass
+class ScrapeScheduler:
+    """
+    Run scrape tasks concurrently under a global concurrency limit.
+
+    Attributes:
+        max_concurrent_tasks (int): Maximum number of tasks, which are check-in dates, scraped at the same time.
+        max_pages_in_flight (int): Maximum number of result pages requested at the same time across all tasks.
+    """
+    max_concurrent_tasks: int = 1
+    max_pages_in_flight: int = 10
+
+    task_semaphore: asyncio.Semaphore = field(init=False)
+    page_semaphore: asyncio.Semaphore = field(init=False)
+
+    def __post_init__(self):
+        if self.max_concurrent_tasks <= 0:
+            raise ValueError(f"Invalid max_concurrent_tasks: {self.max_concurrent_tasks}. Must be positive.")
+        if self.max_pages_in_flight <= 0:
+            raise ValueError(f"Invalid max_pages_in_flight: {self.max_pages_in_flight}. Must be positive.")
+
+        self.task_semaphore = asyncio.Semaphore(self.max_concurrent_tasks)
+        self.page_semaphore = asyncio.Semaphore(self.max_pages_in_flight)
+
+    async def run(self,
+                  scraper: BasicGraphQLScraper,
+                  tasks: list[ScrapeTask],
+                  on_result: Callable[[ScrapeTask, pd.DataFrame], Awaitable[None]] | None = None,
+                  keep_results: bool = True,
+                  on_error: Callable[[ScrapeTask, Exception], None] | None = None) -> list[pd.DataFrame]:
+        """
+        Scrape all tasks with copies of the given scraper, sharing its pooled client session.
+        :param scraper: Scraper used as a template for every task.
+        :param tasks: List of scrape tasks.
+        :param on_result: Coroutine function called with the task and its DataFrame as soon as a task is done,
+                        default is None.
+        :param keep_results: Whether to keep the DataFrames of all tasks until the end, default is True.
+                            Set it to False when on_result consumes the DataFrames, so they are not kept in memory.
+        :param on_error: Function called with the task and its exception when a task fails, default is None.
+                        If None, the first failure cancels the other tasks and is raised.
+                        Otherwise, the other tasks go on and a failed task gives an empty DataFrame.
+        :return: List of DataFrames, in the same order as the tasks, or an empty list if keep_results is False.
+        """
+        main_logger.info(f"Scheduling {len(tasks)} scrape tasks with at most {self.max_concurrent_tasks} tasks "
+                         f"and {self.max_pages_in_flight} pages in flight...")
+        async with scraper.shared_session():
+            running = [asyncio.ensure_future(self._run_task(scraper, task, on_result, keep_results, on_error))
+                       for task in tasks]
+            try:
+                results = await asyncio.gather(*running)
+            except BaseException:
+                # Stop the other tasks, so none of them is left running after a failure
+                for running_task in running:
+                    running_task.cancel()
+                await asyncio.gather(*running, return_exceptions=True)
+                raise
+        return results if keep_results else []
+
+    async def _run_task(self,
+                        scraper: BasicGraphQLScraper,
+                        task: ScrapeTask,
+                        on_result: Callable[[ScrapeTask, pd.DataFrame], Awaitable[None]] | None,
+                        keep_results: bool = True,
+                        on_error: Callable[[ScrapeTask, Exception], None] | None = None) -> pd.DataFrame | None:
+        """
+        Scrape one task once a task slot is free.
+        :param scraper: Scraper used as a template for the task.
+        :param task: Scrape task.
+        :param on_result: Coroutine function called with the task and its DataFrame, or None.
+        :param keep_results: Whether to return the DataFrame, default is True.
+        :param on_error: Function called with the task and its exception if scraping fails, or None to raise it.
+        :return: DataFrame of the task, or None if keep_results is False.
+        """
+        async with self.task_semaphore:
+            main_logger.debug(f"Scraping {task.city} | Check-in: {task.check_in} | Check-out: {task.check_out}")
+            task_scraper = scraper.model_copy(update={
+                'city': task.city,
+                'check_in': task.check_in,
+                'check_out': task.check_out,
+                'page_semaphore': self.page_semaphore
+            })
+            try:
+                df = await task_scraper.scrape_graphql()
+            except Exception as e:
+                if on_error is None:
+                    raise
+                on_error(task, e)
+                return pd.DataFrame() if keep_results else None
+
+        if on_result is not None:
+            await on_result(task, df)
+        return df if keep_results else None
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,219 @@
+import io
+
+import pandas as pd
+from sqlalchemy import Table, MetaData, Column, Index, ColumnElement, insert, inspect, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.dml import Insert
+
+from japan_avg_hotel_price_finder.configure_logging import main_logger
+from japan_avg_hotel_price_finder.sql.db_model import Base, TimestampDate, has_index
+from japan_avg_hotel_price_finder.sql.partitioning import create_partitions_for_dataframe
+
+# Number of rows sent to the database at once
+CHUNK_SIZE = 50_000
+
+# NULL marker of the CSV streamed to PostgreSQL COPY, so empty strings are not loaded as NULL
+COPY_NULL = '\\N'
+
+
+def load_dataframe(session: Session, model: type[Base], dataframe: pd.DataFrame, chunk_size: int = CHUNK_SIZE) -> int:
+    """
+    Load a DataFrame into the table of an ORM model within the transaction of the session.
+    PostgreSQL uses COPY FROM STDIN with CSV, other databases use an executemany INSERT.
+    If the table has the unique index of its model, e.g., a hotel per city, check-in date and scrape day,
+    the rows are upserted on it, so loading the same rows again updates them instead of duplicating them.
+    If the table is partitioned on PostgreSQL, the partitions of the months in the DataFrame are created first.
+    Nothing is committed, so the load is rolled back with the session.
+    :param session: SQLAlchemy session.
+    :param model: ORM model of the table.
+    :param dataframe: Pandas DataFrame whose columns are named after the model attributes, e.g., PriceReview.
+    :param chunk_size: Number of rows sent at once, default is 50,000.
+    :return: Number of loaded rows.
+    """
+    if dataframe.empty:
+        main_logger.warning(f"No rows to load into {model.__tablename__}")
+        return 0
+
+    unique_index = get_unique_index(session, model)
+    if unique_index is not None:
+        return upsert_dataframe(session, model, dataframe, list(unique_index.expressions), chunk_size)
+
+    table: Table = model.__table__
+    dataframe = rename_to_column_names(model, dataframe)
+
+    if isinstance(session.get_bind().dialect, postgresql.dialect):
+        create_partitions_for_dataframe(session, table, dataframe)
+        main_logger.info(f"Copying {len(dataframe)} rows into {table.name}...")
+        copy_dataframe(session, table, dataframe, chunk_size)
+    else:
+        main_logger.info(f"Inserting {len(dataframe)} rows into {table.name}...")
+        insert_dataframe(session, table, dataframe, chunk_size)
+    return len(dataframe)
+
+
+def upsert_dataframe(session: Session,
+                     model: type[Base],
+                     dataframe: pd.DataFrame,
+                     conflict_target: list[ColumnElement],
+                     chunk_size: int = CHUNK_SIZE) -> int:
+    """
+    Upsert a DataFrame into the table of an ORM model within the transaction of the session,
+    with INSERT ... ON CONFLICT DO UPDATE on a unique index or the primary key.
+    PostgreSQL copies the rows into a temporary table with COPY FROM STDIN and upserts them with one statement,
+    other databases use an executemany upsert.
+    Rows of the DataFrame with the same key are loaded once, the last of them wins like a later upsert would.
+    :param session: SQLAlchemy session.
+    :param model: ORM model of the table.
+    :param dataframe: Pandas DataFrame whose columns are named after the model attributes, e.g., PriceReview.
+    :param conflict_target: Columns and expressions of the unique index or primary key.
+    :param chunk_size: Number of rows sent at once, default is 50,000.
+    :return: Number of upserted rows.
+    """
+    if dataframe.empty:
+        main_logger.warning(f"No rows to load into {model.__tablename__}")
+        return 0
+
+    table: Table = model.__table__
+    dataframe = rename_to_column_names(model, dataframe)
+    duplicated = get_conflict_keys(dataframe, conflict_target).duplicated(keep='last')
+    if duplicated.any():
+        main_logger.warning(f"Keep the last of {duplicated.sum()} rows with the same key of {table.name}")
+        dataframe = dataframe[~duplicated.to_numpy()]
+
+    if isinstance(session.get_bind().dialect, postgresql.dialect):
+        create_partitions_for_dataframe(session, table, dataframe)
+        main_logger.info(f"Upserting {len(dataframe)} rows into {table.name} through a temporary table...")
+        staging_table = Table(f'{table.name}_staging', MetaData(),
+                              *[Column(column, table.c[column].type) for column in dataframe.columns],
+                              prefixes=['TEMPORARY'], postgresql_on_commit='DROP')
+        staging_table.create(session.connection())
+        copy_dataframe(session, staging_table, dataframe, chunk_size)
+        statement = create_upsert_statement(postgresql.insert(table), conflict_target, list(dataframe.columns))
+        session.execute(statement.from_select(list(dataframe.columns), select(staging_table)))
+        staging_table.drop(session.connection())
+    else:
+        main_logger.info(f"Upserting {len(dataframe)} rows into {table.name}...")
+        statement = create_upsert_statement(sqlite.insert(table), conflict_target, list(dataframe.columns))
+        insert_dataframe(session, table, dataframe, chunk_size, statement)
+    return len(dataframe)
+
+
+def get_unique_index(session: Session, model: type[Base]) -> Index | None:
+    """
+    Get the unique index of a model which rows are upserted on, if its table has it.
+    A table created before the index was declared, or partitioned by AsOf, does not have it.
+    :param session: SQLAlchemy session.
+    :param model: ORM model of the table.
+    :return: Unique index, None if the model has none or the table does not have it.
+    """
+    for index in model.__table__.indexes:
+        if index.unique and has_index(session.connection(), index):
+            return index
+    return None
+
+
+def get_conflict_keys(dataframe: pd.DataFrame, conflict_target: list[ColumnElement]) -> pd.DataFrame:
+    """
+    Get the key of each row of a DataFrame on a unique index, e.g., with the date of AsOf instead of AsOf.
+    :param dataframe: Pandas DataFrame whose columns are named after the table columns.
+    :param conflict_target: Columns and expressions of the unique index or primary key.
+    :return: Pandas DataFrame of the keys.
+    """
+    keys = {}
+    for element in conflict_target:
+        if isinstance(element, TimestampDate):
+            column = element.clauses.clauses[0]
+            keys[f'{column.name}Date'] = pd.to_datetime(dataframe[column.name]).dt.date
+        else:
+            keys[element.name] = dataframe[element.name]
+    return pd.DataFrame(keys)
+
+
+def create_upsert_statement(statement: postgresql.Insert | sqlite.Insert,
+                            conflict_target: list[ColumnElement],
+                            columns: list[str]) -> Insert:
+    """
+    Add ON CONFLICT DO UPDATE to an INSERT, which updates the loaded columns which are not part of the key.
+    :param statement: INSERT of the PostgreSQL or SQLite dialect.
+    :param conflict_target: Columns and expressions of the unique index or primary key.
+    :param columns: Names of the loaded columns.
+    :return: INSERT ... ON CONFLICT statement.
+    """
+    key_columns = {element.name for element in conflict_target if isinstance(element, Column)}
+    update_columns = {column.name: statement.excluded[column.key] for column in statement.table.columns
+                      if column.name in columns and column.name not in key_columns}
+    if not update_columns:
+        return statement.on_conflict_do_nothing(index_elements=conflict_target)
+    return statement.on_conflict_do_update(index_elements=conflict_target, set_=update_columns)
+
+
+def rename_to_column_names(model: type[Base], dataframe: pd.DataFrame) -> pd.DataFrame:
+    """
+    Rename DataFrame columns from model attribute names to table column names and drop the unknown ones.
+    :param model: ORM model of the table.
+    :param dataframe: Pandas DataFrame.
+    :return: Pandas DataFrame with only the table columns.
+    """
+    column_names = {attr.key: attr.columns[0].name for attr in inspect(model).column_attrs}
+    unknown_columns = [column for column in dataframe.columns if column not in column_names]
+    if unknown_columns:
+        main_logger.warning(f"Ignoring columns not in {model.__tablename__}: {unknown_columns}")
+
+    known_columns = [column for column in dataframe.columns if column in column_names]
+    return dataframe[known_columns].rename(columns=column_names)
+
+
+def copy_dataframe(session: Session, table: Table, dataframe: pd.DataFrame, chunk_size: int) -> None:
+    """
+    Stream a DataFrame into a PostgreSQL table with COPY FROM STDIN, one CSV chunk at a time.
+    :param session: SQLAlchemy session bound to PostgreSQL.
+    :param table: Table to load into.
+    :param dataframe: Pandas DataFrame whose columns are named after the table columns.
+    :param chunk_size: Number of rows sent at once.
+    :return: None
+    """
+    preparer = session.get_bind().dialect.identifier_preparer
+    columns = ', '.join(preparer.quote(column) for column in dataframe.columns)
+    copy_sql = (f"COPY {preparer.format_table(table)} ({columns}) "
+                f"FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL}')")
+
+    # Use the connection of the session, so COPY is part of its transaction
+    dbapi_connection = session.connection().connection.dbapi_connection
+    with dbapi_connection.cursor() as cursor:
+        for start in range(0, len(dataframe), chunk_size):
+            buffer = io.StringIO()
+            dataframe.iloc[start:start + chunk_size].to_csv(buffer, header=False, index=False, na_rep=COPY_NULL)
+            buffer.seek(0)
+
+            if hasattr(cursor, 'copy_expert'):
+                # psycopg2
+                cursor.copy_expert(copy_sql, buffer)
+            else:
+                # psycopg 3
+                with cursor.copy(copy_sql) as copy:
+                    copy.write(buffer.getvalue())
+            main_logger.debug(f"Copied rows {start} to {min(start + chunk_size, len(dataframe))}")
+
+
+def insert_dataframe(session: Session,
+                     table: Table,
+                     dataframe: pd.DataFrame,
+                     chunk_size: int,
+                     statement: Insert | None = None) -> None:
+    """
+    Insert a DataFrame into a table with an executemany INSERT.
+    :param session: SQLAlchemy session.
+    :param table: Table to insert into.
+    :param dataframe: Pandas DataFrame whose columns are named after the table columns.
+    :param chunk_size: Number of rows sent at once.
+    :param statement: INSERT statement, e.g., an upsert, default is None.
+                    If None, use a plain INSERT into the table.
+    :return: None
+    """
+    if statement is None:
+        statement = insert(table)
+    for start in range(0, len(dataframe), chunk_size):
+        records = dataframe.iloc[start:start + chunk_size].to_dict('records')
+        session.execute(statement, records)
+        main_logger.debug(f"Inserted rows {start} to {min(start + chunk_size, len(dataframe))}")
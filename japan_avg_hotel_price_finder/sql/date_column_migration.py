@@ -0,0 +1,121 @@
+import argparse
+import os
+
+from dotenv import load_dotenv
+from sqlalchemy import Engine, inspect, text, Date, create_engine
+from sqlalchemy.schema import CreateIndex
+
+from japan_avg_hotel_price_finder.configure_logging import main_logger
+from japan_avg_hotel_price_finder.sql.db_model import Base, HotelPrice, JapanHotel
+from japan_avg_hotel_price_finder.sql.partitioning import get_partition_column
+
+# Temporary column which is backfilled with the typed dates before it replaces the Date column
+TYPED_DATE_COLUMN = 'TypedDate'
+
+
+def is_date_column_typed(engine: Engine, table_name: str) -> bool:
+    """
+    Check whether the Date column of a table is a DATE column.
+    :param engine: SQLAlchemy engine.
+    :param table_name: Name of the table.
+    :return: True if the Date column is a DATE column, otherwise False.
+    """
+    columns = {column['name']: column['type'] for column in inspect(engine).get_columns(table_name)}
+    return isinstance(columns.get('Date'), Date)
+
+
+def migrate_date_column(engine: Engine, model: type[Base], batch_size: int = 50_000) -> bool:
+    """
+    Convert the 'YYYY-MM-DD' text Date column of an existing table on PostgreSQL to a DATE column, online.
+    A typed column is backfilled in batches of IDs, each committed on its own, so the table stays readable and
+    writable during the backfill, then it replaces the Date column in one short transaction.
+    Rows inserted during the backfill are converted in that transaction, and the indexes on Date,
+    which are dropped with the column, are created again concurrently, except on a partitioned table.
+    The unique index is created by the deduplicate step instead, as rows saved again on the same day fail it.
+    An interrupted migration resumes from the rows which are not backfilled yet.
+    SQLite needs no migration, as it stores the dates as the same text.
+    :param engine: SQLAlchemy engine.
+    :param model: ORM model of the table, HotelPrice or JapanHotel.
+    :param batch_size: Number of IDs backfilled in each transaction, default is 50,000.
+    :return: True if the column was migrated, otherwise False.
+    """
+    table_name = model.__tablename__
+    if engine.dialect.name != 'postgresql':
+        main_logger.info(f"{engine.dialect.name} stores dates as text, {table_name} needs no migration")
+        return False
+    if not inspect(engine).has_table(table_name):
+        main_logger.info(f"{table_name} does not exist, it will be created with a DATE column")
+        return False
+    if is_date_column_typed(engine, table_name):
+        main_logger.info(f"Date column of {table_name} is already a DATE column")
+        return False
+
+    table = engine.dialect.identifier_preparer.quote(table_name)
+    with engine.begin() as connection:
+        connection.execute(text(f'ALTER TABLE {table} ADD COLUMN IF NOT EXISTS "{TYPED_DATE_COLUMN}" DATE'))
+        min_id, max_id = connection.execute(text(f'SELECT min("ID"), max("ID") FROM {table}')).one()
+
+    if max_id is not None:
+        main_logger.info(f"Backfilling the DATE column of {table_name}, IDs {min_id} to {max_id}...")
+        for start_id in range(min_id, max_id + 1, batch_size):
+            with engine.begin() as connection:
+                connection.execute(text(f'UPDATE {table} SET "{TYPED_DATE_COLUMN}" = "Date"::date '
+                                        f'WHERE "ID" >= :start_id AND "ID" < :end_id '
+                                        f'AND "{TYPED_DATE_COLUMN}" IS NULL'),
+                                   {'start_id': start_id, 'end_id': start_id + batch_size})
+            main_logger.debug(f"Backfilled IDs {start_id} to {min(start_id + batch_size - 1, max_id)}")
+
+    with engine.begin() as connection:
+        connection.execute(text(f'LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE'))
+        connection.execute(text(f'UPDATE {table} SET "{TYPED_DATE_COLUMN}" = "Date"::date '
+                                f'WHERE "{TYPED_DATE_COLUMN}" IS NULL'))
+        connection.execute(text(f'ALTER TABLE {table} DROP COLUMN "Date"'))
+        connection.execute(text(f'ALTER TABLE {table} RENAME COLUMN "{TYPED_DATE_COLUMN}" TO "Date"'))
+        connection.execute(text(f'ALTER TABLE {table} ALTER COLUMN "Date" SET NOT NULL'))
+
+    # CREATE INDEX CONCURRENTLY cannot run in a transaction
+    with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+        # Indexes of a partitioned table cannot be created concurrently, they are created on each partition
+        is_partitioned = get_partition_column(connection, table_name) is not None
+        for index in model.__table__.indexes:
+            if index.unique:
+                # Rows saved again on the same day before upserts fail the unique index, it is created by deduplicate
+                main_logger.info(f"{index.name} is not created, run python -m "
+                                 f"japan_avg_hotel_price_finder.sql.deduplicate to create it")
+                continue
+            main_logger.info(f"Creating index {index.name}...")
+            create_index = str(CreateIndex(index, if_not_exists=True).compile(dialect=engine.dialect))
+            if not is_partitioned:
+                create_index = create_index.replace('CREATE INDEX', 'CREATE INDEX CONCURRENTLY', 1)
+            connection.execute(text(create_index))
+
+    main_logger.info(f"Date column of {table_name} is now a DATE column")
+    return True
+
+
+def parse_arguments() -> argparse.Namespace:
+    """
+    Parse the command line arguments
+    :return: argparse.Namespace
+    """
+    parser = argparse.ArgumentParser(description='Convert the Date column of HotelPrice and JapanHotels to DATE.')
+    parser.add_argument('--batch_size', type=int, default=50_000,
+                        help='Number of IDs backfilled in each transaction, default is 50,000')
+    parser.add_argument('--db_url', type=str,
+                        help='Database URL to migrate, default is the PostgreSQL database of the .env file')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_arguments()
+
+    if args.db_url:
+        db_url = args.db_url
+    else:
+        load_dotenv(dotenv_path='.env')
+        db_url = (f"postgresql://{os.getenv('POSTGRES_USER')}:{os.getenv('POSTGRES_PASSWORD')}"
+                  f"@{os.getenv('POSTGRES_HOST')}:{os.getenv('POSTGRES_PORT')}/{os.getenv('POSTGRES_DB')}")
+
+    migration_engine = create_engine(db_url)
+    for hotel_model in (HotelPrice, JapanHotel):
+        migrate_date_column(migration_engine, hotel_model, args.batch_size)
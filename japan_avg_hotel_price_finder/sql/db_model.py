@@ -1,7 +1,11 @@
-from sqlalchemy import Column, Integer, String, Float, TIMESTAMP, event
+from sqlalchemy import Column, Integer, String, Float, TIMESTAMP, Index, Engine, event, inspect, Date, TypeDecorator, \
+    ForeignKey, Connection, text
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import declarative_base
+from sqlalchemy.sql.expression import FunctionElement
 import sqlite3
-from datetime import datetime
+from contextlib import nullcontext
+from datetime import datetime, date
 
 def adapt_datetime(val):
     """Adapt datetime to SQLite format"""
@@ -18,8 +22,57 @@ sqlite3.register_converter("datetime", convert_datetime)
 Base = declarative_base()
 
 
+class IsoDate(TypeDecorator):
+    """
+    Native DATE column, read and written as 'YYYY-MM-DD' strings like the dates of the scraped data,
+    so the database compares dates and extracts their parts without parsing text.
+    """
+    impl = Date
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == 'sqlite':
+            # SQLite has no date type, its date functions work on 'YYYY-MM-DD' text
+            return dialect.type_descriptor(String())
+        return dialect.type_descriptor(Date())
+
+    def process_bind_param(self, value, dialect):
+        if dialect.name == 'sqlite':
+            return value.strftime('%Y-%m-%d') if isinstance(value, date) else value
+        if isinstance(value, str):
+            return date.fromisoformat(value)
+        if isinstance(value, datetime):
+            return value.date()
+        return value
+
+    def process_result_value(self, value, dialect):
+        return value.isoformat() if isinstance(value, date) else value
+
+
+class TimestampDate(FunctionElement):
+    """
+    Date of a TIMESTAMP column, e.g., the scrape day of AsOf, usable in index expressions.
+    """
+    type = Date()
+    name = 'timestamp_date'
+    inherit_cache = True
+
+
+@compiles(TimestampDate)
+def compile_timestamp_date(element, compiler, **kw):
+    return f"CAST({compiler.process(element.clauses, **kw)} AS DATE)"
+
+
+@compiles(TimestampDate, 'sqlite')
+def compile_timestamp_date_sqlite(element, compiler, **kw):
+    # CAST AS DATE has numeric affinity on SQLite, date() keeps the 'YYYY-MM-DD' text
+    return f"date({compiler.process(element.clauses, **kw)})"
+
+
 class HotelPrice(Base):
     __tablename__ = 'HotelPrice'
+    # Serves the lookups of the check-in dates of a city scraped on an AsOf date
+    __table_args__ = (Index('ix_HotelPrice_City_Date_AsOf', 'City', 'Date', 'AsOf'),)
 
     ID = Column(Integer, primary_key=True, autoincrement=True)
     Hotel = Column(String, nullable=False)
@@ -28,10 +81,15 @@ class HotelPrice(Base):
     Location = Column(String, nullable=False)
     PriceReview = Column('Price/Review', Float, nullable=False)
     City = Column(String, nullable=False)
-    Date = Column(String, nullable=False)
+    Date = Column(IsoDate, nullable=False)
     AsOf = Column(TIMESTAMP, nullable=False)
 
 
+# A hotel has one price per city, check-in date and scrape day, so reruns of the same day update it
+Index('ux_HotelPrice_City_Hotel_Date_AsOfDate', HotelPrice.City, HotelPrice.Hotel, HotelPrice.Date,
+      TimestampDate(HotelPrice.AsOf), unique=True)
+
+
 class AverageRoomPriceByDate(Base):
     __tablename__ = 'AverageRoomPriceByDateTable'
 
@@ -73,14 +131,139 @@ class AverageHotelRoomPriceByLocation(Base):
 
 class JapanHotel(Base):
     __tablename__ = 'JapanHotels'
+    # Serves the lookups of the check-in dates of a prefecture scraped on an AsOf date
+    __table_args__ = (Index('ix_JapanHotels_Prefecture_Date_AsOf', 'Prefecture', 'Date', 'AsOf'),)
 
     ID = Column(Integer, primary_key=True, autoincrement=True)
     Hotel = Column(String, nullable=False)
     Price = Column(Float, nullable=False)
     Review = Column(Float, nullable=False)
     PriceReview = Column('Price/Review', Float, nullable=False)
-    Date = Column(String, nullable=False)
+    Date = Column(IsoDate, nullable=False)
     Region = Column(String, nullable=False)
     Prefecture = Column(String, nullable=False)
     Location = Column(String, nullable=False)
     AsOf = Column(TIMESTAMP, nullable=False)
+
+
+Index('ux_JapanHotels_Prefecture_Hotel_Date_AsOfDate', JapanHotel.Prefecture, JapanHotel.Hotel, JapanHotel.Date,
+      TimestampDate(JapanHotel.AsOf), unique=True)
+
+
+class HotelPriceHistory(Base):
+    __tablename__ = 'HotelPriceHistory'
+    # Serves the lookups of the open price intervals of the check-in dates of a city
+    __table_args__ = (Index('ix_HotelPriceHistory_City_Date_ValidTo', 'City', 'Date', 'ValidTo'),)
+
+    ID = Column(Integer, primary_key=True, autoincrement=True)
+    Hotel = Column(String, nullable=False)
+    Price = Column(Float, nullable=False)
+    Review = Column(Float, nullable=False)
+    Location = Column(String, nullable=False)
+    PriceReview = Column('Price/Review', Float, nullable=False)
+    City = Column(String, nullable=False)
+    Date = Column(IsoDate, nullable=False)
+    # AsOf of the first snapshot with this price, and of the first snapshot without it, NULL while it is current
+    ValidFrom = Column(TIMESTAMP, nullable=False)
+    ValidTo = Column(TIMESTAMP, nullable=True)
+
+
+class HotelPriceSnapshot(Base):
+    __tablename__ = 'HotelPriceSnapshot'
+
+    City = Column(String, primary_key=True)
+    Date = Column(IsoDate, primary_key=True)
+    AsOf = Column(TIMESTAMP, primary_key=True)
+
+
+class HotelDimension(Base):
+    __tablename__ = 'HotelDimension'
+
+    ID = Column(Integer, primary_key=True, autoincrement=True)
+    Name = Column(String, nullable=False, unique=True)
+
+
+class LocationDimension(Base):
+    __tablename__ = 'LocationDimension'
+
+    ID = Column(Integer, primary_key=True, autoincrement=True)
+    Name = Column(String, nullable=False, unique=True)
+
+
+class CityDimension(Base):
+    __tablename__ = 'CityDimension'
+
+    ID = Column(Integer, primary_key=True, autoincrement=True)
+    Name = Column(String, nullable=False, unique=True)
+
+
+class HotelPriceFact(Base):
+    __tablename__ = 'HotelPriceFact'
+    # Serves the lookups of the check-in dates of a city scraped on an AsOf date
+    __table_args__ = (Index('ix_HotelPriceFact_CityID_Date_AsOf', 'CityID', 'Date', 'AsOf'),)
+
+    ID = Column(Integer, primary_key=True, autoincrement=True)
+    HotelID = Column(Integer, ForeignKey('HotelDimension.ID'), nullable=False)
+    Price = Column(Float, nullable=False)
+    Review = Column(Float, nullable=False)
+    LocationID = Column(Integer, ForeignKey('LocationDimension.ID'), nullable=False)
+    PriceReview = Column('Price/Review', Float, nullable=False)
+    CityID = Column(Integer, ForeignKey('CityDimension.ID'), nullable=False)
+    Date = Column(IsoDate, nullable=False)
+    AsOf = Column(TIMESTAMP, nullable=False)
+
+
+Index('ux_HotelPriceFact_CityID_HotelID_Date_AsOfDate', HotelPriceFact.CityID, HotelPriceFact.HotelID,
+      HotelPriceFact.Date, TimestampDate(HotelPriceFact.AsOf), unique=True)
+
+
+class ScrapeManifest(Base):
+    __tablename__ = 'ScrapeManifest'
+
+    # The primary key starts with the columns of coverage lookups, so they are answered from its index
+    TableName = Column(String, primary_key=True)
+    City = Column(String, primary_key=True)
+    AsOf = Column(String, primary_key=True)
+    Date = Column(String, primary_key=True)
+    Nights = Column(Integer, primary_key=True)
+    Adults = Column(Integer, primary_key=True)
+    Children = Column(Integer, primary_key=True)
+    Rooms = Column(Integer, primary_key=True)
+    Rows = Column(Integer, nullable=False)
+    Requests = Column(Integer, nullable=False)
+    Duration = Column(Float, nullable=False)
+    CompletedAt = Column(TIMESTAMP, nullable=False)
+
+
+def has_index(bind: Engine | Connection, index: Index) -> bool:
+    """
+    Check whether an index exists in the database.
+    SQLAlchemy does not reflect the expression indexes of SQLite, so they are looked up by name in its catalog.
+    :param bind: SQLAlchemy engine or connection.
+    :param index: Index of a model.
+    :return: True if the index exists, otherwise False.
+    """
+    if bind.dialect.name != 'sqlite':
+        return inspect(bind).has_index(index.table.name, index.name)
+
+    query = text("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = :name")
+    with bind.connect() if isinstance(bind, Engine) else nullcontext(bind) as connection:
+        return connection.execute(query, {'name': index.name}).first() is not None
+
+
+def create_missing_indexes(engine: Engine) -> None:
+    """
+    Create the indexes of the existing tables which do not have them yet.
+    create_all only creates the indexes of the tables it creates, so tables created before an index was declared
+    need this to get it.
+    Unique indexes are skipped, as building them fails on tables with duplicated rows,
+    they are created by python -m japan_avg_hotel_price_finder.sql.deduplicate instead.
+    :param engine: SQLAlchemy engine.
+    :return: None
+    """
+    table_names = set(inspect(engine).get_table_names())
+    for table in Base.metadata.sorted_tables:
+        if table.name in table_names:
+            for index in table.indexes:
+                if not index.unique and not has_index(engine, index):
+                    index.create(engine)
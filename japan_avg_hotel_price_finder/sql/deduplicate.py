@@ -0,0 +1,91 @@
+import argparse
+import os
+
+from dotenv import load_dotenv
+from sqlalchemy import Engine, Select, select, delete, func, inspect, create_engine
+from sqlalchemy.exc import NotSupportedError
+
+from japan_avg_hotel_price_finder.configure_logging import main_logger
+from japan_avg_hotel_price_finder.sql.db_model import Base, HotelPrice, JapanHotel, has_index
+
+MODELS: dict[str, type[Base]] = {
+    HotelPrice.__tablename__: HotelPrice,
+    JapanHotel.__tablename__: JapanHotel
+}
+
+
+def get_latest_ids_query(model: type[Base]) -> Select:
+    """
+    Get the query of the ID of the latest row of each key of the unique index of a model,
+    e.g., of each hotel, city, check-in date and scrape day of HotelPrice.
+    :param model: ORM model with a unique index and an ID column.
+    :return: SELECT of the IDs.
+    """
+    unique_index = next(index for index in model.__table__.indexes if index.unique)
+    return select(func.max(model.ID)).group_by(*unique_index.expressions)
+
+
+def remove_duplicated_rows(engine: Engine, model: type[Base]) -> int:
+    """
+    Delete the rows with the same key of the unique index of a model, e.g., of reruns on the same day,
+    and keep the latest of them, like the upserts of the loader do.
+    The unique index is then created, so later loads of the table are upserted.
+    Tables created before the unique index was declared need this once, even without duplicated rows,
+    as the index is not built when data is saved.
+    :param engine: SQLAlchemy engine.
+    :param model: ORM model of the table, HotelPrice or JapanHotel.
+    :return: Number of deleted rows.
+    """
+    table_name = model.__tablename__
+    if not inspect(engine).has_table(table_name) or table_name in inspect(engine).get_view_names():
+        main_logger.info(f"{table_name} is not a table, it has no duplicated rows to remove")
+        return 0
+
+    with engine.begin() as connection:
+        deleted_rows = connection.execute(
+            delete(model).where(model.ID.not_in(get_latest_ids_query(model)))).rowcount
+    main_logger.info(f"Deleted {deleted_rows} duplicated rows of {table_name}")
+
+    for index in model.__table__.indexes:
+        if not index.unique or has_index(engine, index):
+            continue
+        try:
+            index.create(engine)
+            main_logger.info(f"Created {index.name}, rows of {table_name} are upserted from now on")
+        except NotSupportedError:
+            main_logger.info(f"{table_name} is partitioned by AsOf, so {index.name} is not created and "
+                             f"rows are appended instead of upserted")
+    return deleted_rows
+
+
+def parse_arguments() -> argparse.Namespace:
+    """
+    Parse the command line arguments
+    :return: argparse.Namespace
+    """
+    parser = argparse.ArgumentParser(description='Remove the rows of HotelPrice and JapanHotels saved again '
+                                                 'on the same day, so their rows are upserted from now on.')
+    parser.add_argument('--table', type=str, choices=list(MODELS),
+                        help='Table to deduplicate, default is both tables')
+    parser.add_argument('--db_url', type=str,
+                        help='Database URL, default is the PostgreSQL database of the .env file')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_arguments()
+
+    if args.db_url:
+        db_url = args.db_url
+    else:
+        load_dotenv(dotenv_path='.env')
+        db_url = (f"postgresql://{os.getenv('POSTGRES_USER')}:{os.getenv('POSTGRES_PASSWORD')}"
+                  f"@{os.getenv('POSTGRES_HOST')}:{os.getenv('POSTGRES_PORT')}/{os.getenv('POSTGRES_DB')}")
+
+    deduplicate_engine = create_engine(db_url)
+    for hotel_model in ([MODELS[args.table]] if args.table else MODELS.values()):
+        removed_rows = remove_duplicated_rows(deduplicate_engine, hotel_model)
+        if removed_rows and hotel_model is HotelPrice:
+            # The aggregate tables were calculated with the duplicated rows
+            from japan_avg_hotel_price_finder.sql.save_to_db import refresh_aggregate_tables
+            refresh_aggregate_tables(deduplicate_engine)
@@ -0,0 +1,231 @@
+import argparse
+import os
+import weakref
+from dataclasses import dataclass, field
+
+import pandas as pd
+from dotenv import load_dotenv
+from sqlalchemy import Engine, Connection, inspect, select, insert, cast, text, event, create_engine, Date
+from sqlalchemy.orm import Session
+
+from japan_avg_hotel_price_finder.configure_logging import main_logger
+from japan_avg_hotel_price_finder.sql.bulk_loader import load_dataframe
+from japan_avg_hotel_price_finder.sql.db_model import Base, HotelPrice, HotelPriceFact, HotelDimension, \
+    LocationDimension, CityDimension
+from japan_avg_hotel_price_finder.sql.deduplicate import get_latest_ids_query
+
+# Dimension table of each string column of HotelPrice, and the ID column of HotelPriceFact which refers to it
+DIMENSIONS: dict[str, tuple[type[Base], str]] = {
+    'Hotel': (HotelDimension, 'HotelID'),
+    'Location': (LocationDimension, 'LocationID'),
+    'City': (CityDimension, 'CityID')
+}
+
+# Number of names looked up in one query, below the bound parameter limit of SQLite
+LOOKUP_CHUNK_SIZE = 10_000
+
+
+@dataclass
+class DimensionCache:
+    """
+    In-memory lookup of the IDs of the names in the dimension tables, so the loader only queries the names
+    it has not seen yet.
+
+    Attributes:
+        ids (dict[str, dict[str, int]]): ID of each known name, by dimension table name.
+    """
+    ids: dict[str, dict[str, int]] = field(default_factory=lambda: {
+        model.__tablename__: {} for model, _ in DIMENSIONS.values()
+    })
+
+    def clear(self) -> None:
+        """
+        Forget all IDs, e.g., after names inserted by a rolled back transaction.
+        :return: None
+        """
+        for names in self.ids.values():
+            names.clear()
+
+    def get_ids(self, session: Session, model: type[Base], names: pd.Series) -> pd.Series:
+        """
+        Get the IDs of names within the transaction of the session, inserting the names which are not in the
+        dimension table yet.
+        :param session: SQLAlchemy session.
+        :param model: ORM model of the dimension table.
+        :param names: Pandas Series of names.
+        :return: Pandas Series of IDs with the index of the names.
+        """
+        known_ids = self.ids[model.__tablename__]
+        unknown_names = [name for name in names.unique() if name not in known_ids]
+        if unknown_names:
+            known_ids.update(self.select_ids(session, model, unknown_names))
+            new_names = [name for name in unknown_names if name not in known_ids]
+            if new_names:
+                main_logger.debug(f"Inserting {len(new_names)} names into {model.__tablename__}")
+                session.execute(insert(model), [{'Name': name} for name in new_names])
+                known_ids.update(self.select_ids(session, model, new_names))
+                # IDs of the inserted names are gone if the transaction is rolled back
+                event.listen(session, 'after_rollback', lambda rolled_back_session: self.clear(), once=True)
+        return names.map(known_ids)
+
+    @staticmethod
+    def select_ids(session: Session, model: type[Base], names: list[str]) -> dict[str, int]:
+        """
+        Select the IDs of names from a dimension table.
+        :param session: SQLAlchemy session.
+        :param model: ORM model of the dimension table.
+        :param names: Names to look up.
+        :return: Dictionary of name to ID, without the names which are not in the table.
+        """
+        ids = {}
+        for start in range(0, len(names), LOOKUP_CHUNK_SIZE):
+            chunk = names[start:start + LOOKUP_CHUNK_SIZE]
+            ids.update(session.execute(select(model.Name, model.ID).where(model.Name.in_(chunk))).tuples().all())
+        return ids
+
+
+# Lookup cache of each database, kept for as long as its engine
+_dimension_caches: weakref.WeakKeyDictionary[Engine, DimensionCache] = weakref.WeakKeyDictionary()
+
+
+def get_dimension_cache(engine: Engine) -> DimensionCache:
+    """
+    Get the lookup cache of the dimension tables of a database.
+    :param engine: SQLAlchemy engine.
+    :return: DimensionCache
+    """
+    if engine not in _dimension_caches:
+        _dimension_caches[engine] = DimensionCache()
+    return _dimension_caches[engine]
+
+
+def is_normalized_storage_enabled(bind: Engine | Connection) -> bool:
+    """
+    Check whether HotelPrice is stored as ID-keyed facts, in which case HotelPrice is a view of HotelPriceFact.
+    :param bind: SQLAlchemy engine or connection.
+    :return: True if HotelPrice is a view of HotelPriceFact, otherwise False.
+    """
+    inspector = inspect(bind)
+    if HotelPrice.__tablename__ not in inspector.get_view_names():
+        return False
+    return HotelPriceFact.__tablename__ in inspector.get_view_definition(HotelPrice.__tablename__)
+
+
+def create_hotel_price_view_sql(engine: Engine) -> str:
+    """
+    Get the CREATE VIEW statement of HotelPrice, which joins the facts with the names of their dimensions.
+    :param engine: SQLAlchemy engine.
+    :return: CREATE VIEW statement.
+    """
+    fact = HotelPriceFact.__table__
+    hotel = HotelDimension.__table__
+    location = LocationDimension.__table__
+    city = CityDimension.__table__
+    query = (
+        select(fact.c.ID, hotel.c.Name.label('Hotel'), fact.c.Price, fact.c.Review, location.c.Name.label('Location'),
+               fact.c['Price/Review'], city.c.Name.label('City'), fact.c.Date, fact.c.AsOf)
+        .join_from(fact, hotel, hotel.c.ID == fact.c.HotelID)
+        .join(location, location.c.ID == fact.c.LocationID)
+        .join(city, city.c.ID == fact.c.CityID)
+    )
+    view = engine.dialect.identifier_preparer.quote(HotelPrice.__tablename__)
+    return f"CREATE VIEW {view} AS {query.compile(dialect=engine.dialect)}"
+
+
+def copy_hotel_price_to_facts(connection: Connection) -> int:
+    """
+    Copy the rows of the HotelPrice table into the dimension tables and HotelPriceFact.
+    :param connection: SQLAlchemy connection.
+    :return: Number of copied rows.
+    """
+    for column, (model, _) in DIMENSIONS.items():
+        connection.execute(insert(model).from_select(
+            ['Name'], select(getattr(HotelPrice, column)).distinct()))
+
+    date_column = HotelPrice.Date
+    if connection.dialect.name == 'postgresql':
+        # The Date column of a table created before DATE columns is text
+        date_column = cast(HotelPrice.__table__.c.Date, Date)
+    query = (
+        select(HotelDimension.ID, HotelPrice.Price, HotelPrice.Review, LocationDimension.ID, HotelPrice.PriceReview,
+               CityDimension.ID, date_column, HotelPrice.AsOf)
+        .join_from(HotelPrice, HotelDimension, HotelDimension.Name == HotelPrice.Hotel)
+        .join(LocationDimension, LocationDimension.Name == HotelPrice.Location)
+        .join(CityDimension, CityDimension.Name == HotelPrice.City)
+        # Rows saved again on the same day before upserts are copied once
+        .where(HotelPrice.ID.in_(get_latest_ids_query(HotelPrice)))
+        .order_by(HotelPrice.ID)
+    )
+    fact_columns = ['HotelID', 'Price', 'Review', 'LocationID', 'Price/Review', 'CityID', 'Date', 'AsOf']
+    return connection.execute(insert(HotelPriceFact).from_select(fact_columns, query)).rowcount
+
+
+def enable_normalized_storage(engine: Engine) -> None:
+    """
+    Store HotelPrice as ID-keyed facts: HotelDimension, LocationDimension and CityDimension keep each hotel,
+    location and city name once, HotelPriceFact keeps the scraped rows with their integer IDs,
+    and HotelPrice becomes a view of both with the previous columns, so the aggregates and the Missing Date Checker
+    read it as before.
+    The rows of an existing HotelPrice table are copied into the new tables in the same transaction,
+    the latest of them if a hotel was saved more than once on the same day.
+    :param engine: SQLAlchemy engine.
+    :return: None
+    """
+    if is_normalized_storage_enabled(engine):
+        main_logger.info("HotelPrice is already stored as ID-keyed facts")
+        return
+    if HotelPrice.__tablename__ in inspect(engine).get_view_names():
+        raise ValueError("HotelPrice is already a view of another storage mode")
+
+    tables = [model.__table__ for model, _ in DIMENSIONS.values()] + [HotelPriceFact.__table__]
+    Base.metadata.create_all(engine, tables=tables)
+    with engine.begin() as connection:
+        if inspect(connection).has_table(HotelPrice.__tablename__):
+            copied_rows = copy_hotel_price_to_facts(connection)
+            main_logger.info(f"Copied {copied_rows} rows of HotelPrice into HotelPriceFact")
+            HotelPrice.__table__.drop(connection)
+        connection.execute(text(create_hotel_price_view_sql(engine)))
+    main_logger.info("HotelPrice is now stored as ID-keyed facts")
+
+
+def save_normalized_prices(session: Session, dataframe: pd.DataFrame) -> int:
+    """
+    Save scraped hotel data as ID-keyed facts within the transaction of the session.
+    The hotel, location and city names are replaced by their IDs from the lookup cache of the database,
+    and the names which are new are added to their dimension tables.
+    :param session: SQLAlchemy session.
+    :param dataframe: Pandas DataFrame of hotel data with Hotel, Price, Review, Location, PriceReview, City, Date and
+                    AsOf columns.
+    :return: Number of saved rows.
+    """
+    facts = dataframe.rename(columns={'Price/Review': 'PriceReview'})
+    cache = get_dimension_cache(session.get_bind())
+    for column, (model, id_column) in DIMENSIONS.items():
+        facts = facts.assign(**{id_column: cache.get_ids(session, model, facts[column])})
+
+    fact_columns = [attr.key for attr in inspect(HotelPriceFact).column_attrs if attr.key != 'ID']
+    return load_dataframe(session, HotelPriceFact, facts[fact_columns])
+
+
+def parse_arguments() -> argparse.Namespace:
+    """
+    Parse the command line arguments
+    :return: argparse.Namespace
+    """
+    parser = argparse.ArgumentParser(description='Store HotelPrice as facts keyed by hotel, location and city IDs.')
+    parser.add_argument('--db_url', type=str,
+                        help='Database URL, default is the PostgreSQL database of the .env file')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_arguments()
+
+    if args.db_url:
+        db_url = args.db_url
+    else:
+        load_dotenv(dotenv_path='.env')
+        db_url = (f"postgresql://{os.getenv('POSTGRES_USER')}:{os.getenv('POSTGRES_PASSWORD')}"
+                  f"@{os.getenv('POSTGRES_HOST')}:{os.getenv('POSTGRES_PORT')}/{os.getenv('POSTGRES_DB')}")
+
+    enable_normalized_storage(create_engine(db_url))
@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+from sqlalchemy.orm import Session, Query
+
+from japan_avg_hotel_price_finder.configure_logging import main_logger
+
+# Number of rows read from the database at once
+READ_CHUNK_SIZE = 100_000
+
+
+def read_query_in_chunks(session: Session, query: Query, chunk_size: int = READ_CHUNK_SIZE) -> pd.DataFrame:
+    """
+    Read the result of a query in chunks into compact columns.
+    Text columns are stored as categoricals and numeric columns as NumPy arrays,
+    so repeated values such as dates, cities and locations are kept only once in memory.
+    :param session: SQLAlchemy session.
+    :param query: SQLAlchemy query whose selected columns are labelled.
+    :param chunk_size: Number of rows read at once, default is 100,000.
+    :return: Pandas DataFrame with one column per selected column.
+    """
+    column_names = [column['name'] for column in query.column_descriptions]
+    chunks: dict[str, list] = {name: [] for name in column_names}
+
+    # Read through the DBAPI cursor, as building SQLAlchemy rows costs more than the query itself
+    connection = session.connection()
+    sql = str(query.statement.compile(dialect=connection.dialect, compile_kwargs={'literal_binds': True}))
+    cursor = connection.connection.dbapi_connection.cursor()
+    try:
+        cursor.execute(sql)
+        while rows := cursor.fetchmany(chunk_size):
+            chunk = pd.DataFrame.from_records(rows, columns=column_names)
+            for name in column_names:
+                if chunk[name].dtype == object:
+                    chunks[name].append(pd.Categorical(chunk[name]))
+                else:
+                    chunks[name].append(chunk[name].to_numpy())
+            main_logger.debug(f"Read chunk of {len(chunk)} rows")
+    finally:
+        cursor.close()
+
+    if not chunks[column_names[0]]:
+        return pd.DataFrame(columns=column_names)
+
+    return pd.DataFrame({
+        name: union_categoricals(parts) if isinstance(parts[0], pd.Categorical) else np.concatenate(parts)
+        for name, parts in chunks.items()
+    })
+
+
+def grouped_median(group_codes: np.ndarray, values: np.ndarray, num_groups: int) -> np.ndarray:
+    """
+    Calculate the median of the values of every group at once.
+    Values are sorted within their group, then the middle value, or the mean of the two middle values,
+    is picked from each group, which gives the same result as np.median per group.
+    :param group_codes: Group code of each value, from 0 to num_groups - 1.
+    :param values: Values as a NumPy array.
+    :param num_groups: Number of groups. Every group must have at least one value.
+    :return: Median of each group, indexed by group code.
+    """
+    values = np.asarray(values, dtype='float64')
+    sorted_values = values[np.lexsort((values, group_codes))]
+
+    counts = np.bincount(group_codes, minlength=num_groups)
+    starts = np.cumsum(counts) - counts
+    lower = sorted_values[starts + (counts - 1) // 2]
+    upper = sorted_values[starts + counts // 2]
+    return (lower + upper) / 2
+
+
+def compute_grouped_medians(data: pd.DataFrame, keys: list[str], values: list[str]) -> list[tuple]:
+    """
+    Group the data by the key columns and calculate the median of each value column.
+    :param data: Pandas DataFrame with the key and value columns.
+    :param keys: Key columns to group by.
+    :param values: Value columns to calculate the median of.
+    :return: List of (*keys, *medians) tuples with Python types, sorted by the keys.
+    """
+    if data.empty:
+        return []
+
+    grouped = data.groupby(keys, sort=True, observed=True, dropna=False)
+    group_codes = grouped.ngroup().to_numpy()
+    num_groups = grouped.ngroups
+
+    # Keys of each group, in group code order
+    first_rows = np.full(num_groups, -1)
+    first_rows[group_codes[::-1]] = np.arange(len(group_codes))[::-1]
+    key_columns = [np.asarray(data[key])[first_rows].tolist() for key in keys]
+
+    median_columns = [grouped_median(group_codes, data[value].to_numpy(), num_groups).tolist() for value in values]
+    return list(zip(*key_columns, *median_columns))
@@ -0,0 +1,255 @@
+import argparse
+import datetime
+import os
+import re
+
+import pandas as pd
+from dotenv import load_dotenv
+from sqlalchemy import Engine, Table, MetaData, Column, inspect, text, create_engine, delete, Connection
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateTable
+
+from japan_avg_hotel_price_finder.configure_logging import main_logger
+from japan_avg_hotel_price_finder.sql.db_model import Base, HotelPrice, JapanHotel, ScrapeManifest
+
+MODELS: dict[str, type[Base]] = {
+    HotelPrice.__tablename__: HotelPrice,
+    JapanHotel.__tablename__: JapanHotel
+}
+
+# Partition key of each --partition_by choice, by AsOf month or by check-in month
+PARTITION_COLUMNS = {
+    'as_of': 'AsOf',
+    'check_in': 'Date'
+}
+
+
+def get_partition_name(table_name: str, month: datetime.date) -> str:
+    """
+    Get the name of the partition of a month, e.g., HotelPrice_2025_01.
+    :param table_name: Name of the partitioned table.
+    :param month: Any date of the month.
+    :return: Name of the partition.
+    """
+    return f'{table_name}_{month.year:04d}_{month.month:02d}'
+
+
+def get_month_bounds(month: datetime.date) -> tuple[datetime.date, datetime.date]:
+    """
+    Get the first day of a month and the first day of the next month, the bounds of its partition.
+    :param month: Any date of the month.
+    :return: Tuple of the inclusive lower bound and the exclusive upper bound.
+    """
+    start = month.replace(day=1)
+    end = (start + datetime.timedelta(days=32)).replace(day=1)
+    return start, end
+
+
+def get_months(values: pd.Series) -> list[datetime.date]:
+    """
+    Get the distinct months of dates or timestamps.
+    :param values: Pandas Series of dates, timestamps or 'YYYY-MM-DD' strings.
+    :return: Sorted list of the first days of the months.
+    """
+    months = pd.to_datetime(values.drop_duplicates()).dt.to_period('M').unique()
+    return sorted(month.start_time.date() for month in months)
+
+
+def get_partition_column(connection: Connection | Session, table_name: str) -> str | None:
+    """
+    Get the partition key column of a table on PostgreSQL.
+    :param connection: SQLAlchemy connection or session.
+    :param table_name: Name of the table.
+    :return: Name of the partition key column, None if the table does not exist or is not partitioned.
+    """
+    partition_key = connection.execute(text('SELECT pg_get_partkeydef(to_regclass(:table_name))'),
+                                       {'table_name': f'"{table_name}"'}).scalar()
+    if partition_key is None:
+        return None
+    match = re.fullmatch(r'RANGE \("?(\w+)"?\)', partition_key)
+    return match.group(1) if match else None
+
+
+def create_partitions(session: Session, table: Table, months: list[datetime.date]) -> None:
+    """
+    Create the monthly partitions of a partitioned table which do not exist yet, within the transaction of the session.
+    :param session: SQLAlchemy session bound to PostgreSQL.
+    :param table: Partitioned table.
+    :param months: First days of the months.
+    :return: None
+    """
+    preparer = session.get_bind().dialect.identifier_preparer
+    for month in months:
+        start, end = get_month_bounds(month)
+        partition = preparer.quote(get_partition_name(table.name, month))
+        session.execute(text(f"CREATE TABLE IF NOT EXISTS {partition} PARTITION OF {preparer.format_table(table)} "
+                             f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"))
+
+
+def create_partitions_for_dataframe(session: Session, table: Table, dataframe: pd.DataFrame) -> None:
+    """
+    Create the partitions which the rows of a DataFrame are routed to, if the table is partitioned.
+    :param session: SQLAlchemy session bound to PostgreSQL.
+    :param table: Table the DataFrame is loaded into.
+    :param dataframe: Pandas DataFrame whose columns are named after the table columns.
+    :return: None
+    """
+    partition_column = get_partition_column(session, table.name)
+    if partition_column is None or partition_column not in dataframe.columns:
+        return
+    months = get_months(dataframe[partition_column])
+    create_partitions(session, table, months)
+    main_logger.debug(f"Partitions of {table.name} for {len(months)} months are ready")
+
+
+def create_partitioned_table(engine: Engine, model: type[Base], partition_by: str) -> None:
+    """
+    Create the table of a model on PostgreSQL, partitioned by the month of AsOf or of the check-in date.
+    The partition key is added to the primary key, as PostgreSQL requires, and the partitions are created
+    by the loader when rows of a new month are loaded.
+    Partitioned by AsOf, the table has no unique index of the scrape day, so its rows are appended, not upserted.
+    :param engine: SQLAlchemy engine bound to PostgreSQL.
+    :param model: ORM model of the table, HotelPrice or JapanHotel.
+    :param partition_by: 'as_of' or 'check_in'.
+    :return: None
+    """
+    if engine.dialect.name != 'postgresql':
+        raise NotImplementedError(f"Partitioning is only implemented for PostgreSQL, not {engine.dialect.name}")
+
+    partition_column = PARTITION_COLUMNS[partition_by]
+    table_name = model.__tablename__
+    with engine.connect() as connection:
+        existing_column = get_partition_column(connection, table_name)
+    if existing_column == partition_column:
+        main_logger.info(f"{table_name} is already partitioned by {partition_column}")
+        return
+    if inspect(engine).has_table(table_name):
+        raise ValueError(f"{table_name} already exists and is not partitioned by {partition_column}, "
+                         f"rename or drop it first")
+
+    columns = [Column(column.name, column.type, nullable=column.nullable,
+                      primary_key=column.primary_key or column.name == partition_column,
+                      autoincrement=column.autoincrement if column.primary_key else False)
+               for column in model.__table__.columns]
+    table = Table(table_name, MetaData(), *columns, postgresql_partition_by=f'RANGE ("{partition_column}")')
+
+    with engine.begin() as connection:
+        connection.execute(CreateTable(table))
+        # Indexes of a partitioned table are created on each of its partitions
+        for index in model.__table__.indexes:
+            key_columns = {element.name for element in index.expressions if isinstance(element, Column)}
+            if index.unique and partition_column not in key_columns:
+                # A unique index of a partitioned table must have its partition key as a column
+                main_logger.info(f"{index.name} is not created, rows of {table_name} are appended instead of upserted")
+                continue
+            index.create(connection)
+    main_logger.info(f"Created {table_name} partitioned by the month of {partition_column}")
+
+
+def get_partitions(engine: Engine, table_name: str) -> dict[str, datetime.date]:
+    """
+    Get the partitions of a partitioned table with their exclusive upper bounds.
+    :param engine: SQLAlchemy engine bound to PostgreSQL.
+    :param table_name: Name of the partitioned table.
+    :return: Dictionary of partition name to the first day after it.
+    """
+    query = text("SELECT child.relname, pg_get_expr(child.relpartbound, child.oid) "
+                 "FROM pg_inherits JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+                 "WHERE pg_inherits.inhparent = to_regclass(:table_name)")
+    partitions = {}
+    with engine.connect() as connection:
+        for name, bound in connection.execute(query, {'table_name': f'"{table_name}"'}):
+            match = re.search(r"TO \('(\d{4}-\d{2}-\d{2})", bound)
+            if match:
+                partitions[name] = datetime.date.fromisoformat(match.group(1))
+    return partitions
+
+
+def drop_partitions_before(engine: Engine, model: type[Base], cutoff: datetime.date) -> list[str]:
+    """
+    Drop the partitions whose rows are all before the cutoff, instead of deleting the rows.
+    The scrape manifest entries of the dropped rows are deleted in the same transaction.
+    :param engine: SQLAlchemy engine bound to PostgreSQL.
+    :param model: ORM model of the partitioned table, HotelPrice or JapanHotel.
+    :param cutoff: First date to keep.
+    :return: Names of the dropped partitions.
+    """
+    table_name = model.__tablename__
+    with engine.connect() as connection:
+        partition_column = get_partition_column(connection, table_name)
+    if partition_column is None:
+        raise ValueError(f"{table_name} is not partitioned, create it with create_partitioned_table")
+
+    old_partitions = sorted(name for name, end in get_partitions(engine, table_name).items() if end <= cutoff)
+    if not old_partitions:
+        main_logger.info(f"No partitions of {table_name} before {cutoff}")
+        return []
+
+    preparer = engine.dialect.identifier_preparer
+    manifest_column = ScrapeManifest.AsOf if partition_column == 'AsOf' else ScrapeManifest.Date
+    with engine.begin() as connection:
+        for partition in old_partitions:
+            connection.execute(text(f'DROP TABLE {preparer.quote(partition)}'))
+        if inspect(connection).has_table(ScrapeManifest.__tablename__):
+            connection.execute(delete(ScrapeManifest).where(ScrapeManifest.TableName == table_name,
+                                                            manifest_column < cutoff.isoformat()))
+    main_logger.info(f"Dropped {len(old_partitions)} partitions of {table_name} before {cutoff}: {old_partitions}")
+    return old_partitions
+
+
+def get_retention_cutoff(keep_months: int, today: datetime.date | None = None) -> datetime.date:
+    """
+    Get the first day of the oldest month to keep.
+    :param keep_months: Number of months to keep before the current month.
+    :param today: Today, default is None.
+                If None, use the current date.
+    :return: First date to keep.
+    """
+    if today is None:
+        today = datetime.date.today()
+    month_index = today.year * 12 + today.month - 1 - keep_months
+    return datetime.date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def parse_arguments() -> argparse.Namespace:
+    """
+    Parse the command line arguments
+    :return: argparse.Namespace
+    """
+    parser = argparse.ArgumentParser(description='Partition HotelPrice or JapanHotels by month on PostgreSQL, '
+                                                 'and drop old partitions.')
+    parser.add_argument('command', choices=['create', 'retention'],
+                        help='create: create the partitioned table, retention: drop the partitions of old months')
+    parser.add_argument('--table', type=str, choices=list(MODELS), default=HotelPrice.__tablename__,
+                        help='Table to partition, default is HotelPrice')
+    parser.add_argument('--partition_by', type=str, choices=list(PARTITION_COLUMNS), default='as_of',
+                        help='Partition by the month of AsOf or of the check-in date, default is as_of')
+    parser.add_argument('--keep_months', type=int, default=12,
+                        help='Number of months before the current month kept by retention, default is 12')
+    parser.add_argument('--db_url', type=str,
+                        help='Database URL, default is the PostgreSQL database of the .env file')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_arguments()
+
+    if args.db_url:
+        db_url = args.db_url
+    else:
+        load_dotenv(dotenv_path='.env')
+        db_url = (f"postgresql://{os.getenv('POSTGRES_USER')}:{os.getenv('POSTGRES_PASSWORD')}"
+                  f"@{os.getenv('POSTGRES_HOST')}:{os.getenv('POSTGRES_PORT')}/{os.getenv('POSTGRES_DB')}")
+
+    partition_engine = create_engine(db_url)
+    hotel_model = MODELS[args.table]
+    if args.command == 'create':
+        create_partitioned_table(partition_engine, hotel_model, args.partition_by)
+        Base.metadata.create_all(partition_engine)
+    else:
+        dropped_partitions = drop_partitions_before(partition_engine, hotel_model,
+                                                    get_retention_cutoff(args.keep_months))
+        if dropped_partitions and hotel_model is HotelPrice:
+            # Imported here, as save_to_db imports this module through the bulk loader
+            from japan_avg_hotel_price_finder.sql.save_to_db import refresh_aggregate_tables
+            refresh_aggregate_tables(partition_engine)
@@ -0,0 +1,256 @@
+import argparse
+import os
+from dataclasses import dataclass
+
+import pandas as pd
+from dotenv import load_dotenv
+from sqlalchemy import Engine, inspect, select, update, delete, bindparam, and_, or_, text, create_engine, Connection
+from sqlalchemy.orm import Session
+
+from japan_avg_hotel_price_finder.configure_logging import main_logger
+from japan_avg_hotel_price_finder.sql.bulk_loader import load_dataframe
+from japan_avg_hotel_price_finder.sql.db_model import Base, HotelPrice, HotelPriceHistory, HotelPriceSnapshot
+
+# Columns which open a new price interval when any of them changes
+TRACKED_COLUMNS = ['Price', 'Review', 'Location', 'PriceReview']
+
+# Key of a price interval
+INTERVAL_KEY = ['Hotel', 'City', 'Date']
+
+# Number of HotelPrice rows read at once when they are copied into the price history
+COPY_CHUNK_SIZE = 100_000
+
+
+@dataclass
+class PriceHistoryChanges:
+    """
+    Changes made to the price history by a batch of scraped data.
+
+    Attributes:
+        inserted (int): Number of opened price intervals, of new hotels or changed prices.
+        closed (int): Number of closed price intervals, of changed prices or hotels no longer listed.
+        unchanged (int): Number of scraped rows whose price interval stays open.
+    """
+    inserted: int = 0
+    closed: int = 0
+    unchanged: int = 0
+
+
+def is_price_history_enabled(bind: Engine | Connection) -> bool:
+    """
+    Check whether HotelPrice is stored as price history, in which case HotelPrice is a view.
+    :param bind: SQLAlchemy engine or connection.
+    :return: True if HotelPrice is a view of the price history, otherwise False.
+    """
+    inspector = inspect(bind)
+    if HotelPrice.__tablename__ not in inspector.get_view_names():
+        return False
+    return HotelPriceHistory.__tablename__ in inspector.get_view_definition(HotelPrice.__tablename__)
+
+
+def create_hotel_price_view_sql(engine: Engine) -> str:
+    """
+    Get the CREATE VIEW statement of HotelPrice, which rebuilds a row per scraped hotel and AsOf
+    by joining each price interval with the snapshots of its city and check-in date within its AsOf bounds.
+    :param engine: SQLAlchemy engine.
+    :return: CREATE VIEW statement.
+    """
+    history = HotelPriceHistory.__table__
+    snapshot = HotelPriceSnapshot.__table__
+    query = (
+        select(history.c.ID, history.c.Hotel, history.c.Price, history.c.Review, history.c.Location,
+               history.c['Price/Review'], history.c.City, history.c.Date, snapshot.c.AsOf)
+        .join_from(history, snapshot, and_(
+            snapshot.c.City == history.c.City,
+            snapshot.c.Date == history.c.Date,
+            snapshot.c.AsOf >= history.c.ValidFrom,
+            or_(history.c.ValidTo.is_(None), snapshot.c.AsOf < history.c.ValidTo)
+        ))
+    )
+    view = engine.dialect.identifier_preparer.quote(HotelPrice.__tablename__)
+    return f"CREATE VIEW {view} AS {query.compile(dialect=engine.dialect)}"
+
+
+def enable_price_history(engine: Engine) -> None:
+    """
+    Store HotelPrice as price history: HotelPriceHistory keeps one row per hotel, city and check-in date
+    for as long as its price stays the same, HotelPriceSnapshot keeps the AsOf of each scraped city and check-in date,
+    and HotelPrice becomes a view of both with the previous columns, so the aggregates and the Missing Date Checker
+    read it as before.
+    The rows of an existing HotelPrice table are folded into the price history in the same transaction.
+    :param engine: SQLAlchemy engine.
+    :return: None
+    """
+    if is_price_history_enabled(engine):
+        main_logger.info("HotelPrice is already stored as price history")
+        return
+    if HotelPrice.__tablename__ in inspect(engine).get_view_names():
+        raise ValueError("HotelPrice is already a view of another storage mode")
+
+    Base.metadata.create_all(engine, tables=[HotelPriceHistory.__table__, HotelPriceSnapshot.__table__])
+    with Session(engine) as session:
+        if inspect(session.connection()).has_table(HotelPrice.__tablename__):
+            copied_rows = copy_hotel_price_to_history(session)
+            main_logger.info(f"Copied {copied_rows} rows of HotelPrice into the price history")
+            HotelPrice.__table__.drop(session.connection())
+        session.execute(text(create_hotel_price_view_sql(engine)))
+        session.commit()
+    main_logger.info("HotelPrice is now stored as price history")
+
+
+def copy_hotel_price_to_history(session: Session, chunk_size: int = COPY_CHUNK_SIZE) -> int:
+    """
+    Fold the rows of the HotelPrice table into price intervals and snapshots within the transaction of the session.
+    The rows are read in AsOf order and saved one scrape day at a time, as if they had been saved as price history.
+    A city and check-in date scraped more than once on a day keeps its latest snapshot of that day.
+    :param session: SQLAlchemy session.
+    :param chunk_size: Number of rows read at once, default is 100,000.
+    :return: Number of copied rows.
+    """
+    columns = INTERVAL_KEY + TRACKED_COLUMNS + ['AsOf']
+    query = select(*[getattr(HotelPrice, column) for column in columns]).order_by(HotelPrice.AsOf, HotelPrice.ID)
+
+    def save_days(rows: pd.DataFrame) -> None:
+        for _, day_rows in rows.groupby(rows['AsOf'].dt.normalize()):
+            latest_as_of = day_rows.groupby(['City', 'Date'])['AsOf'].transform('max')
+            save_price_history(session, day_rows[day_rows['AsOf'] == latest_as_of]
+                               .drop_duplicates(INTERVAL_KEY, keep='last'))
+
+    copied_rows = 0
+    pending = pd.DataFrame(columns=columns)
+    for rows in session.execute(query, execution_options={'yield_per': chunk_size}).partitions():
+        chunk = pd.DataFrame(rows, columns=columns).assign(AsOf=lambda df: pd.to_datetime(df['AsOf']))
+        copied_rows += len(chunk)
+        pending = pd.concat([pending, chunk], ignore_index=True) if not pending.empty else chunk
+        # The last day may continue in the next chunk
+        last_day = pending['AsOf'].iloc[-1].normalize()
+        is_complete = pending['AsOf'] < last_day
+        save_days(pending[is_complete])
+        pending = pending[~is_complete]
+    if not pending.empty:
+        save_days(pending)
+    return copied_rows
+
+
+def remove_same_day_snapshots(session: Session, snapshots: pd.DataFrame) -> int:
+    """
+    Undo the snapshots saved earlier on the scrape day of new snapshots of the same city and check-in date,
+    e.g., by a rerun, so the new snapshots replace them like the upserts of the HotelPrice table:
+    the price intervals they opened are deleted, and the ones they closed are opened again.
+    :param session: SQLAlchemy session.
+    :param snapshots: Pandas DataFrame of the City, Date and AsOf of the new snapshots.
+    :return: Number of removed snapshots.
+    """
+    start_of_day = snapshots['AsOf'].min().normalize().to_pydatetime()
+    query = (
+        select(HotelPriceSnapshot.City, HotelPriceSnapshot.Date, HotelPriceSnapshot.AsOf)
+        .where(HotelPriceSnapshot.City.in_(snapshots['City'].unique().tolist()))
+        .where(HotelPriceSnapshot.Date.in_(snapshots['Date'].unique().tolist()))
+        .where(HotelPriceSnapshot.AsOf >= start_of_day)
+    )
+    existing = pd.DataFrame(session.execute(query).all(), columns=['City', 'Date', 'AsOf'])
+    if existing.empty:
+        return 0
+    same_day = existing.merge(snapshots, on=['City', 'Date'], suffixes=('', 'New'))
+    same_day = same_day[pd.to_datetime(same_day['AsOf']).dt.normalize() == same_day['AsOfNew'].dt.normalize()]
+    if same_day.empty:
+        return 0
+
+    parameters = [{'city': city, 'date': date, 'as_of': pd.Timestamp(as_of).to_pydatetime()}
+                  for city, date, as_of in zip(same_day['City'], same_day['Date'], same_day['AsOf'])]
+    history = HotelPriceHistory.__table__
+    snapshot = HotelPriceSnapshot.__table__
+    is_history_of_snapshot = and_(history.c.City == bindparam('city'), history.c.Date == bindparam('date'))
+    session.execute(delete(history).where(is_history_of_snapshot, history.c.ValidFrom == bindparam('as_of')),
+                    parameters)
+    session.execute(update(history).where(is_history_of_snapshot, history.c.ValidTo == bindparam('as_of'))
+                    .values(ValidTo=None), parameters)
+    session.execute(delete(snapshot).where(snapshot.c.City == bindparam('city'), snapshot.c.Date == bindparam('date'),
+                                           snapshot.c.AsOf == bindparam('as_of')), parameters)
+    main_logger.info(f"Replaced {len(parameters)} snapshots saved earlier on the same day")
+    return len(parameters)
+
+
+def save_price_history(session: Session, dataframe: pd.DataFrame) -> PriceHistoryChanges:
+    """
+    Save scraped hotel data as price history within the transaction of the session.
+    Every scraped city and check-in date is a complete snapshot, so the open price interval of a hotel is closed
+    if its price changed, or if it is not listed anymore, and a new interval is opened for a changed price
+    or a newly listed hotel. Rows whose price did not change are not written.
+    Snapshots must be saved in AsOf order, and a snapshot of a city and check-in date saved again on the same day
+    replaces the earlier one of that day.
+    :param session: SQLAlchemy session.
+    :param dataframe: Pandas DataFrame of hotel data with Hotel, Price, Review, Location, PriceReview, City, Date and
+                    AsOf columns.
+    :return: PriceHistoryChanges
+    """
+    batch = dataframe.rename(columns={'Price/Review': 'PriceReview'})[INTERVAL_KEY + TRACKED_COLUMNS + ['AsOf']]
+    batch = batch.assign(Date=pd.to_datetime(batch['Date']).dt.strftime('%Y-%m-%d'),
+                         AsOf=pd.to_datetime(batch['AsOf']))
+    duplicated = batch.duplicated(INTERVAL_KEY)
+    if duplicated.any():
+        main_logger.warning(f"Keep the first of {duplicated.sum()} duplicated hotels of the same city and date")
+        batch = batch[~duplicated]
+
+    snapshots = batch[['City', 'Date', 'AsOf']].drop_duplicates(['City', 'Date'])
+    remove_same_day_snapshots(session, snapshots)
+    load_dataframe(session, HotelPriceSnapshot, snapshots)
+
+    open_query = (
+        select(HotelPriceHistory.ID, HotelPriceHistory.Hotel, HotelPriceHistory.City, HotelPriceHistory.Date,
+               HotelPriceHistory.Price, HotelPriceHistory.Review, HotelPriceHistory.Location,
+               HotelPriceHistory.PriceReview)
+        .where(HotelPriceHistory.ValidTo.is_(None))
+        .where(HotelPriceHistory.City.in_(snapshots['City'].unique().tolist()))
+        .where(HotelPriceHistory.Date.in_(snapshots['Date'].unique().tolist()))
+    )
+    open_intervals = pd.DataFrame(session.execute(open_query).all(),
+                                  columns=['ID'] + INTERVAL_KEY + TRACKED_COLUMNS)
+    # Only the intervals of the scraped cities and dates, closed at the AsOf of their snapshot
+    open_intervals = open_intervals.merge(snapshots.rename(columns={'AsOf': 'SnapshotAsOf'}), on=['City', 'Date'])
+
+    merged = batch.merge(open_intervals, on=INTERVAL_KEY, how='outer', suffixes=('', 'Open'), indicator=True)
+    is_both = merged['_merge'] == 'both'
+    is_unchanged = is_both.copy()
+    for column in TRACKED_COLUMNS:
+        is_unchanged &= merged[column] == merged[f'{column}Open']
+
+    to_close = merged[(is_both & ~is_unchanged) | (merged['_merge'] == 'right_only')]
+    to_open = merged[(is_both & ~is_unchanged) | (merged['_merge'] == 'left_only')]
+
+    if not to_close.empty:
+        session.execute(update(HotelPriceHistory), [
+            {'ID': int(interval_id), 'ValidTo': valid_to.to_pydatetime()}
+            for interval_id, valid_to in zip(to_close['ID'], to_close['SnapshotAsOf'])
+        ])
+    load_dataframe(session, HotelPriceHistory,
+                   to_open[INTERVAL_KEY + TRACKED_COLUMNS + ['AsOf']].rename(columns={'AsOf': 'ValidFrom'}))
+
+    changes = PriceHistoryChanges(inserted=len(to_open), closed=len(to_close), unchanged=int(is_unchanged.sum()))
+    main_logger.info(f"Price history: {changes.inserted} intervals opened, {changes.closed} closed, "
+                     f"{changes.unchanged} unchanged")
+    return changes
+
+
+def parse_arguments() -> argparse.Namespace:
+    """
+    Parse the command line arguments
+    :return: argparse.Namespace
+    """
+    parser = argparse.ArgumentParser(description='Store HotelPrice as change-only price history.')
+    parser.add_argument('--db_url', type=str,
+                        help='Database URL, default is the PostgreSQL database of the .env file')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_arguments()
+
+    if args.db_url:
+        db_url = args.db_url
+    else:
+        load_dotenv(dotenv_path='.env')
+        db_url = (f"postgresql://{os.getenv('POSTGRES_USER')}:{os.getenv('POSTGRES_PASSWORD')}"
+                  f"@{os.getenv('POSTGRES_HOST')}:{os.getenv('POSTGRES_PORT')}/{os.getenv('POSTGRES_DB')}")
+
+    enable_price_history(create_engine(db_url))
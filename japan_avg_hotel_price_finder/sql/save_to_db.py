@@ -1,43 +1,407 @@
-from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Iterable
 
 import numpy as np
 import pandas as pd
-from sqlalchemy import func, case, Engine, extract, Integer, cast
+from sqlalchemy import func, case, Engine, extract, Integer, cast, select, tuple_
 from sqlalchemy.dialects import sqlite, postgresql
-from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.orm import sessionmaker, Session, Query
 
 from japan_avg_hotel_price_finder.configure_logging import main_logger
+from japan_avg_hotel_price_finder.sql.bulk_loader import load_dataframe
+from japan_avg_hotel_price_finder.sql.median_engine import read_query_in_chunks, compute_grouped_medians
+from japan_avg_hotel_price_finder.sql.dimensions import is_normalized_storage_enabled, save_normalized_prices
+from japan_avg_hotel_price_finder.sql.price_history import is_price_history_enabled, save_price_history
+from japan_avg_hotel_price_finder.sql.scrape_manifest import get_manifest_entries, record_manifest_entries
 from japan_avg_hotel_price_finder.sql.db_model import Base, HotelPrice, AverageRoomPriceByDate, \
     AverageHotelRoomPriceByReview, AverageHotelRoomPriceByDayOfWeek, AverageHotelRoomPriceByMonth, \
-    AverageHotelRoomPriceByLocation
+    AverageHotelRoomPriceByLocation, create_missing_indexes
+
+# Map numeric days to readable names
+DOW_NAMES = {
+    0: 'Sunday', 1: 'Monday', 2: 'Tuesday', 3: 'Wednesday',
+    4: 'Thursday', 5: 'Friday', 6: 'Saturday'
+}
+
+# Map numeric months to readable names
+MONTH_NAMES = {
+    1: 'January', 2: 'February', 3: 'March', 4: 'April',
+    5: 'May', 6: 'June', 7: 'July', 8: 'August',
+    9: 'September', 10: 'October', 11: 'November', 12: 'December'
+}
+
+# Key and value columns of the rows each aggregate table is calculated from, by AggregateMedians attribute name
+AGGREGATE_COLUMNS: dict[str, tuple[list[str], list[str]]] = {
+    'by_date': (['Date', 'City'], ['Price']),
+    'by_review': (['ReviewBucket'], ['Price']),
+    'by_day_of_week': (['DayOfWeek'], ['Price']),
+    'by_month': (['Month'], ['Price']),
+    'by_location': (['Location'], ['Price', 'Review', 'PriceReview'])
+}
+
+
+@dataclass
+class AggregateKeys:
+    """
+    Keys of the aggregate tables touched by newly saved hotel data.
+    Only the rows of these keys need to be recomputed.
+
+    Attributes:
+        dates (set[str]): Dates of the AverageRoomPriceByDate table.
+        reviews (set[float]): Rounded review scores of the AverageHotelRoomPriceByReview table.
+        days_of_week (set[int]): Days of the week of the AverageHotelRoomPriceByDayOfWeek table, 0 is Sunday.
+        months (set[int]): Months of the AverageHotelRoomPriceByMonth table.
+        locations (set[str]): Locations of the AverageHotelRoomPriceByLocation table.
+    """
+    dates: set[str] = field(default_factory=set)
+    reviews: set[float] = field(default_factory=set)
+    days_of_week: set[int] = field(default_factory=set)
+    months: set[int] = field(default_factory=set)
+    locations: set[str] = field(default_factory=set)
+
+    @classmethod
+    def from_dataframe(cls, dataframe: pd.DataFrame) -> 'AggregateKeys':
+        """
+        Find the aggregate keys touched by a DataFrame of hotel data.
+        :param dataframe: Pandas DataFrame with Date, Review and Location columns.
+        :return: AggregateKeys
+        """
+        if dataframe.empty:
+            return cls()
+
+        dates = pd.to_datetime(dataframe['Date'].drop_duplicates(), format='%Y-%m-%d')
+        reviews = dataframe['Review'].dropna().astype(float).unique()
+        # The database may round half to even or half away from zero, so both neighbouring buckets are touched
+        review_buckets = set(np.floor(reviews).tolist()) | set(np.ceil(reviews).tolist())
+        return cls(
+            dates=set(dataframe['Date'].unique().tolist()),
+            reviews=review_buckets,
+            # Pandas counts days from Monday, the aggregate table from Sunday
+            days_of_week=set(((dates.dt.dayofweek + 1) % 7).tolist()),
+            months=set(dates.dt.month.tolist()),
+            locations=set(dataframe['Location'].unique().tolist())
+        )
+
+    def update(self, other: 'AggregateKeys') -> None:
+        """
+        Add the keys of another AggregateKeys.
+        :param other: AggregateKeys to add.
+        :return: None
+        """
+        self.dates |= other.dates
+        self.reviews |= other.reviews
+        self.days_of_week |= other.days_of_week
+        self.months |= other.months
+        self.locations |= other.locations
+
+    def is_empty(self) -> bool:
+        """
+        Check whether no key is touched.
+        :return: True if there are no keys, False otherwise.
+        """
+        return not (self.dates or self.reviews or self.days_of_week or self.months or self.locations)
+
+
+@dataclass
+class AggregateMedians:
+    """
+    Median rows of the five aggregate tables.
+
+    Attributes:
+        by_date (list[tuple]): (Date, MedianPrice, City) rows.
+        by_review (list[tuple]): (Review, MedianPrice) rows, Review is rounded.
+        by_day_of_week (list[tuple]): (DayOfWeek, MedianPrice) rows, 0 is Sunday.
+        by_month (list[tuple]): (Month, MedianPrice, Quarter) rows.
+        by_location (list[tuple]): (Location, MedianPrice, MedianRating, MedianPricePerReview) rows.
+    """
+    by_date: list[tuple] = field(default_factory=list)
+    by_review: list[tuple] = field(default_factory=list)
+    by_day_of_week: list[tuple] = field(default_factory=list)
+    by_month: list[tuple] = field(default_factory=list)
+    by_location: list[tuple] = field(default_factory=list)
 
 
-def save_scraped_data(dataframe: pd.DataFrame, engine: Engine) -> None:
+def filter_by_keys(query: Query, column: Any, keys: Iterable | None) -> Query:
+    """
+    Filter a query to the given keys of a column.
+    :param query: SQLAlchemy query.
+    :param column: Column or SQL expression to filter on.
+    :param keys: Keys to keep. If None, the query is not filtered.
+    :return: SQLAlchemy query.
+    """
+    if keys is None:
+        return query
+    return query.filter(column.in_(list(keys)))
+
+
+def save_scraped_data(dataframe: pd.DataFrame, engine: Engine, defer_aggregates: bool = False) -> AggregateKeys:
     """
     Save scraped data to a database.
     :param dataframe: Pandas DataFrame.
     :param engine: SQLAlchemy engine.
-    :return: None
+    :param defer_aggregates: Whether to skip updating the aggregate tables, default is False.
+                            If True, pass the returned keys of all saves to refresh_aggregate_tables
+                            at the end of the run.
+    :return: AggregateKeys touched by the saved data.
     """
     main_logger.info("Saving scraped data...")
     if not dataframe.empty:
         main_logger.info('Save data to a database')
-        migrate_data_to_database(dataframe, engine)
+        return migrate_data_to_database(dataframe, engine, defer_aggregates=defer_aggregates)
     else:
         main_logger.warning('The dataframe is empty. No data to save')
+        return AggregateKeys()
+
+
+def refresh_aggregate_tables(engine: Engine, keys: AggregateKeys | None = None) -> None:
+    """
+    Recompute the aggregate tables, e.g., once at the end of a run whose saves deferred the aggregates.
+    :param engine: SQLAlchemy engine.
+    :param keys: AggregateKeys to recompute, default is None.
+                If None, recompute the whole aggregate tables.
+    :return: None
+    """
+    main_logger.info('Refreshing aggregate tables...')
+    Base.metadata.create_all(engine)
+
+    Session = sessionmaker(bind=engine)
+    session = Session()
+
+    try:
+        update_aggregate_tables(session, keys)
+        session.commit()
+        main_logger.info('Aggregate tables have been refreshed successfully.')
+    except Exception as e:
+        session.rollback()
+        main_logger.error(f"An unexpected error occurred: {str(e)}")
+        main_logger.error("Database changes have been rolled back.")
+        raise
+    finally:
+        session.close()
+
+
+def update_aggregate_tables(session: Session, keys: AggregateKeys | None = None) -> None:
+    """
+    Recompute the rows of the given keys in the five aggregate tables.
+    The medians of all tables are calculated by compute_aggregate_medians.
+    :param session: SQLAlchemy session
+    :param keys: AggregateKeys to recompute, default is None.
+                If None, recompute the whole aggregate tables.
+    :return: None
+    """
+    medians = compute_aggregate_medians(session, keys)
+
+    create_avg_hotel_room_price_by_date_table(session, keys.dates if keys is not None else None, medians.by_date)
+    create_avg_room_price_by_review_table(session, keys.reviews if keys is not None else None, medians.by_review)
+    create_avg_hotel_price_by_dow_table(session, keys.days_of_week if keys is not None else None,
+                                        medians.by_day_of_week)
+    create_avg_hotel_price_by_month_table(session, keys.months if keys is not None else None, medians.by_month)
+    create_avg_room_price_by_location(session, keys.locations if keys is not None else None, medians.by_location)
+
+
+def get_aggregate_columns(session: Session) -> dict[str, Any]:
+    """
+    Get the key and value columns of HotelPrice which the aggregate tables are calculated from.
+    :param session: SQLAlchemy session
+    :return: Dictionary of column label to column or SQL expression.
+    """
+    dialect = session.bind.dialect
+    if isinstance(dialect, postgresql.dialect):
+        dow_func = cast(extract('dow', HotelPrice.Date), Integer)
+        month_func = cast(extract('month', HotelPrice.Date), Integer)
+    elif isinstance(dialect, sqlite.dialect):
+        dow_func = func.cast(func.strftime('%w', HotelPrice.Date), Integer)
+        month_func = cast(func.strftime('%m', HotelPrice.Date), Integer)
+    else:
+        raise NotImplementedError("Median calculation is only implemented for PostgreSQL and SQLite.")
+
+    return {
+        'Date': HotelPrice.Date,
+        'City': HotelPrice.City,
+        'ReviewBucket': func.round(HotelPrice.Review),
+        'DayOfWeek': dow_func,
+        'Month': month_func,
+        'Location': HotelPrice.Location,
+        'Price': HotelPrice.Price,
+        'Review': HotelPrice.Review,
+        'PriceReview': HotelPrice.PriceReview
+    }
+
+
+def create_aggregate_queries(session: Session, keys: AggregateKeys) -> dict[str, Query]:
+    """
+    Create the query of the rows of HotelPrice each aggregate table is recomputed from.
+    Each query is filtered by the touched keys of its own table only,
+    e.g., the query of AverageRoomPriceByDate reads the rows of the touched dates,
+    and the aggregates without touched keys have no query.
+    :param session: SQLAlchemy session
+    :param keys: AggregateKeys to recompute.
+    :return: Dictionary of AggregateMedians attribute name to query.
+    """
+    columns = get_aggregate_columns(session)
+    touched_keys = {
+        'by_date': keys.dates,
+        'by_review': keys.reviews,
+        'by_day_of_week': keys.days_of_week,
+        'by_month': keys.months,
+        'by_location': keys.locations
+    }
+
+    queries = {}
+    for name, (key_columns, value_columns) in AGGREGATE_COLUMNS.items():
+        if not touched_keys[name]:
+            continue
+        query = session.query(*[columns[column].label(column) for column in key_columns + value_columns])
+        queries[name] = filter_by_keys(query, columns[key_columns[0]], touched_keys[name])
+    return queries
 
 
-def migrate_data_to_database(df_filtered: pd.DataFrame, engine: Engine) -> None:
+def compute_aggregate_medians(session: Session, keys: AggregateKeys | None = None) -> AggregateMedians:
+    """
+    Calculate the medians of the five aggregate tables.
+    Without keys, every group is calculated with a single read of HotelPrice:
+    PostgreSQL uses one statement with GROUPING SETS over a CTE,
+    SQLite reads the columns once and groups them with the median engine.
+    With keys, each table is calculated from the rows of its own touched keys,
+    so the dates and locations of a save only read the rows of those dates and locations.
+    A review score or day of the week spans every check-in date, so their exact medians still read all rows
+    of the touched groups.
+    :param session: SQLAlchemy session
+    :param keys: AggregateKeys to calculate, default is None.
+                If None, calculate every group.
+    :return: AggregateMedians
+    """
+    if keys is not None:
+        main_logger.info('Calculate the medians of the touched keys of each aggregate table...')
+        return create_aggregate_medians({
+            name: compute_medians_of_query(session, query, *AGGREGATE_COLUMNS[name])
+            for name, query in create_aggregate_queries(session, keys).items()
+        })
+
+    main_logger.info('Calculate the medians of all aggregate tables in one pass...')
+    columns = get_aggregate_columns(session)
+    query = session.query(*[column.label(label) for label, column in columns.items()])
+
+    if isinstance(session.bind.dialect, postgresql.dialect):
+        return compute_aggregate_medians_with_grouping_sets(session, query)
+
+    data = read_query_in_chunks(session, query)
+    return create_aggregate_medians({
+        name: compute_grouped_medians(data, key_columns, value_columns)
+        for name, (key_columns, value_columns) in AGGREGATE_COLUMNS.items()
+    })
+
+
+def compute_medians_of_query(session: Session,
+                             query: Query,
+                             key_columns: list[str],
+                             value_columns: list[str]) -> list[tuple]:
+    """
+    Calculate the medians of the value columns of each group of the key columns of a query.
+    PostgreSQL groups the query with percentile_cont, SQLite reads it and groups it with the median engine.
+    :param session: SQLAlchemy session
+    :param query: Query with the labelled key and value columns.
+    :param key_columns: Labels of the key columns.
+    :param value_columns: Labels of the value columns.
+    :return: List of (*keys, *medians) rows.
+    """
+    if isinstance(session.bind.dialect, postgresql.dialect):
+        rows = query.subquery()
+        statement = select(
+            *[rows.c[column] for column in key_columns],
+            *[func.percentile_cont(0.5).within_group(rows.c[column]) for column in value_columns]
+        ).group_by(*[rows.c[column] for column in key_columns])
+        return [tuple(row) for row in session.execute(statement)]
+
+    return compute_grouped_medians(read_query_in_chunks(session, query), key_columns, value_columns)
+
+
+def create_aggregate_medians(grouped_medians: dict[str, list[tuple]]) -> AggregateMedians:
+    """
+    Create AggregateMedians from the (*keys, *medians) rows of each aggregate table.
+    :param grouped_medians: Dictionary of AggregateMedians attribute name to rows, a missing name has no rows.
+    :return: AggregateMedians
+    """
+    return AggregateMedians(
+        by_date=[(date, median_price, city) for date, city, median_price in grouped_medians.get('by_date', [])],
+        by_review=grouped_medians.get('by_review', []),
+        by_day_of_week=grouped_medians.get('by_day_of_week', []),
+        by_month=[(month, median_price, get_quarter(month)) for month, median_price in
+                  grouped_medians.get('by_month', [])],
+        by_location=grouped_medians.get('by_location', [])
+    )
+
+
+def compute_aggregate_medians_with_grouping_sets(session: Session, query: Query) -> AggregateMedians:
+    """
+    Calculate the medians of the five aggregate tables with one PostgreSQL statement.
+    :param session: SQLAlchemy session bound to PostgreSQL.
+    :param query: Query of the keys and values of HotelPrice, used as a CTE.
+    :return: AggregateMedians
+    """
+    hotel_prices = query.cte('hotel_prices')
+    c = hotel_prices.c
+    statement = select(
+        c.Date, c.City, c.ReviewBucket, c.DayOfWeek, c.Month, c.Location,
+        func.grouping(c.Date).label('ByDate'),
+        func.grouping(c.ReviewBucket).label('ByReview'),
+        func.grouping(c.DayOfWeek).label('ByDayOfWeek'),
+        func.grouping(c.Month).label('ByMonth'),
+        func.percentile_cont(0.5).within_group(c.Price).label('MedianPrice'),
+        func.percentile_cont(0.5).within_group(c.Review).label('MedianRating'),
+        func.percentile_cont(0.5).within_group(c.PriceReview).label('MedianPricePerReview')
+    ).group_by(func.grouping_sets(
+        tuple_(c.Date, c.City), tuple_(c.ReviewBucket), tuple_(c.DayOfWeek), tuple_(c.Month), tuple_(c.Location)
+    ))
+
+    # GROUPING() is 0 for the columns of the grouping set a row belongs to
+    medians = AggregateMedians()
+    for row in session.execute(statement):
+        if row.ByDate == 0:
+            medians.by_date.append((row.Date, row.MedianPrice, row.City))
+        elif row.ByReview == 0:
+            medians.by_review.append((row.ReviewBucket, row.MedianPrice))
+        elif row.ByDayOfWeek == 0:
+            medians.by_day_of_week.append((row.DayOfWeek, row.MedianPrice))
+        elif row.ByMonth == 0:
+            medians.by_month.append((row.Month, row.MedianPrice, get_quarter(row.Month)))
+        else:
+            medians.by_location.append(
+                (row.Location, row.MedianPrice, row.MedianRating, row.MedianPricePerReview))
+    return medians
+
+
+def get_quarter(month: int) -> str:
+    """
+    Get the quarter of a month.
+    :param month: Month (1-12).
+    :return: Quarter, e.g., 'Quarter1'.
+    """
+    return 'Quarter1' if month in [1, 2, 3] else \
+        'Quarter2' if month in [4, 5, 6] else \
+        'Quarter3' if month in [7, 8, 9] else \
+        'Quarter4'
+
+
+def migrate_data_to_database(df_filtered: pd.DataFrame,
+                             engine: Engine,
+                             defer_aggregates: bool = False) -> AggregateKeys:
     """
     Migrate hotel data to a database using SQLAlchemy ORM.
+    The scraped check-in dates are recorded in the scrape manifest in the same transaction.
+    If HotelPrice is stored as price history, only the changed prices are saved,
+    and if it is stored as ID-keyed facts, the names are saved as the IDs of their dimension tables.
+    Only the aggregate rows of the dates, months, review scores and locations in the data are recomputed.
     :param df_filtered: pandas dataframe.
     :param engine: SQLAlchemy engine.
-    :return: None
+    :param defer_aggregates: Whether to skip updating the aggregate tables, default is False.
+    :return: AggregateKeys touched by the data.
     """
     main_logger.info('Connecting to a database (or create it if it doesn\'t exist)...')
 
-    # Create all tables
+    # Create all tables, and the indexes which tables created by an older version do not have
     Base.metadata.create_all(engine)
+    create_missing_indexes(engine)
 
     Session = sessionmaker(bind=engine)
     session = Session()
@@ -46,20 +410,26 @@ def migrate_data_to_database(df_filtered: pd.DataFrame, engine: Engine) -> None:
         # Rename Price/Review column
         df_filtered.rename(columns={'Price/Review': 'PriceReview'}, inplace=True)
 
-        # Convert DataFrame to list of dictionaries
-        records = df_filtered.to_dict('records')
-
-        # Bulk insert records
-        session.bulk_insert_mappings(HotelPrice, records)
-
-        create_avg_hotel_room_price_by_date_table(session)
-        create_avg_room_price_by_review_table(session)
-        create_avg_hotel_price_by_dow_table(session)
-        create_avg_hotel_price_by_month_table(session)
-        create_avg_room_price_by_location(session)
+        if is_price_history_enabled(session.connection()):
+            # Only write the prices which changed since the previous snapshot
+            save_price_history(session, df_filtered)
+        elif is_normalized_storage_enabled(session.connection()):
+            # Store the hotel, location and city names once, and their integer IDs in each row
+            save_normalized_prices(session, df_filtered)
+        else:
+            # Stream records into the table, with COPY on PostgreSQL
+            load_dataframe(session, HotelPrice, df_filtered)
+        record_manifest_entries(session, HotelPrice.__tablename__, get_manifest_entries(df_filtered))
+
+        keys = AggregateKeys.from_dataframe(df_filtered)
+        if defer_aggregates:
+            main_logger.info('Aggregate tables are not updated until refresh_aggregate_tables is called.')
+        else:
+            update_aggregate_tables(session, keys)
 
         session.commit()
         main_logger.info('Data has been saved to a database successfully.')
+        return keys
     except Exception as e:
         session.rollback()
         main_logger.error(f"An unexpected error occurred: {str(e)}")
@@ -69,28 +439,42 @@ def migrate_data_to_database(df_filtered: pd.DataFrame, engine: Engine) -> None:
         session.close()
 
 
-def create_avg_hotel_room_price_by_date_table(session: Session) -> None:
+def create_avg_hotel_room_price_by_date_table(session: Session,
+                                              dates: set[str] | None = None,
+                                              median_data: list[tuple] | None = None) -> None:
     """
     Create AverageHotelRoomPriceByDate table using the median (instead of average).
     Supports PostgreSQL and SQLite.
     :param session: SQLAlchemy session
+    :param dates: Dates to recompute, default is None.
+                If None, recompute the whole table.
+    :param median_data: (Date, MedianPrice, City) rows from compute_aggregate_medians, default is None.
+                        If None, calculate the medians with a query of this table only.
     :return: None
     """
     main_logger.info('Create AverageRoomPriceByDate table...')
+    if dates is not None and not dates:
+        main_logger.info('No dates to update.')
+        return
 
     # Clear existing data
-    session.query(AverageRoomPriceByDate).delete()
+    filter_by_keys(session.query(AverageRoomPriceByDate), AverageRoomPriceByDate.Date, dates).delete(
+        synchronize_session=False)
 
     # Detect database dialect
     dialect = session.bind.dialect
 
-    if isinstance(dialect, postgresql.dialect):
+    if median_data is not None:
+        main_logger.debug('Use the medians of the combined aggregation pass')
+    elif isinstance(dialect, postgresql.dialect):
         # PostgreSQL specific median calculation using `percentile_cont`
-        median_subquery = session.query(
+        median_query = session.query(
             HotelPrice.Date,
             HotelPrice.City,
             func.percentile_cont(0.5).within_group(HotelPrice.Price).label('MedianPrice')
-        ).group_by(HotelPrice.Date, HotelPrice.City).subquery()
+        )
+        median_subquery = filter_by_keys(median_query, HotelPrice.Date, dates).group_by(
+            HotelPrice.Date, HotelPrice.City).subquery()
 
         median_data = session.query(
             median_subquery.c.Date,
@@ -99,22 +483,17 @@ def create_avg_hotel_room_price_by_date_table(session: Session) -> None:
         ).all()
 
     elif isinstance(dialect, sqlite.dialect):
-        # SQLite: Calculate median in Python by fetching grouped data
-        grouped_data = session.query(
-            HotelPrice.Date,
-            HotelPrice.City,
-            HotelPrice.Price
-        ).order_by(HotelPrice.Date, HotelPrice.City, HotelPrice.Price).all()
-
-        # Organize data into groups by (Date, City)
-        grouped_prices = defaultdict(list)
-        for date, city, price in grouped_data:
-            grouped_prices[(date, city)].append(price)
+        # SQLite: Calculate median with the vectorized median engine
+        grouped_query = session.query(
+            HotelPrice.Date.label('Date'),
+            HotelPrice.City.label('City'),
+            HotelPrice.Price.label('Price')
+        )
+        grouped_data = read_query_in_chunks(session, filter_by_keys(grouped_query, HotelPrice.Date, dates))
 
-        # Calculate median for each group
         median_data = [
-            (date, np.median(prices), city)
-            for (date, city), prices in grouped_prices.items()
+            (date, median_price, city)
+            for date, city, median_price in compute_grouped_medians(grouped_data, ['Date', 'City'], ['Price'])
         ]
 
     else:
@@ -131,27 +510,41 @@ def create_avg_hotel_room_price_by_date_table(session: Session) -> None:
     session.commit()
 
 
-def create_avg_room_price_by_review_table(session: Session) -> None:
+def create_avg_room_price_by_review_table(session: Session,
+                                          reviews: set[float] | None = None,
+                                          median_data: list[tuple] | None = None) -> None:
     """
     Create AverageHotelRoomPriceByReview table using the median (instead of average).
     Supports PostgreSQL and SQLite.
     :param session: SQLAlchemy session
+    :param reviews: Rounded review scores to recompute, default is None.
+                    If None, recompute the whole table.
+    :param median_data: (Review, MedianPrice) rows from compute_aggregate_medians, default is None.
+                        If None, calculate the medians with a query of this table only.
     :return: None
     """
     main_logger.info("Create AverageHotelRoomPriceByReview table...")
+    if reviews is not None and not reviews:
+        main_logger.info('No review scores to update.')
+        return
 
     # Clear existing data
-    session.query(AverageHotelRoomPriceByReview).delete()
+    filter_by_keys(session.query(AverageHotelRoomPriceByReview), AverageHotelRoomPriceByReview.Review,
+                   reviews).delete(synchronize_session=False)
 
     # Detect database dialect
     dialect = session.bind.dialect
 
-    if isinstance(dialect, postgresql.dialect):
+    if median_data is not None:
+        main_logger.debug('Use the medians of the combined aggregation pass')
+    elif isinstance(dialect, postgresql.dialect):
         # PostgreSQL-specific median calculation using percentile_cont
-        median_subquery = session.query(
+        median_query = session.query(
             func.round(HotelPrice.Review).label("Review"),
             func.percentile_cont(0.5).within_group(HotelPrice.Price).label("MedianPrice")
-        ).group_by(func.round(HotelPrice.Review)).subquery()
+        )
+        median_subquery = filter_by_keys(median_query, func.round(HotelPrice.Review), reviews).group_by(
+            func.round(HotelPrice.Review)).subquery()
 
         median_data = session.query(
             median_subquery.c.Review,
@@ -159,21 +552,15 @@ def create_avg_room_price_by_review_table(session: Session) -> None:
         ).all()
 
     elif isinstance(dialect, sqlite.dialect):
-        # SQLite: Calculate median manually using Python
-        grouped_data = session.query(
+        # SQLite: Calculate median with the vectorized median engine
+        grouped_query = session.query(
             func.round(HotelPrice.Review).label("Review"),
-            HotelPrice.Price
-        ).order_by(func.round(HotelPrice.Review), HotelPrice.Price).all()
-
-        # Organize data into groups by rounded Review
-        grouped_prices = defaultdict(list)
-        for review, price in grouped_data:
-            grouped_prices[review].append(price)
+            HotelPrice.Price.label("Price")
+        )
+        grouped_data = read_query_in_chunks(
+            session, filter_by_keys(grouped_query, func.round(HotelPrice.Review), reviews))
 
-        # Calculate the median for each group
-        median_data = [
-            (review, np.median(prices)) for review, prices in grouped_prices.items()
-        ]
+        median_data = compute_grouped_medians(grouped_data, ['Review'], ['Price'])
     else:
         raise NotImplementedError("Median calculation is only implemented for PostgreSQL and SQLite.")
 
@@ -188,30 +575,44 @@ def create_avg_room_price_by_review_table(session: Session) -> None:
     session.commit()
 
 
-def create_avg_hotel_price_by_dow_table(session: Session) -> None:
+def create_avg_hotel_price_by_dow_table(session: Session,
+                                        days_of_week: set[int] | None = None,
+                                        median_data: list[tuple] | None = None) -> None:
     """
     Create AverageHotelRoomPriceByDayOfWeek table using the median (instead of average).
     Supports PostgreSQL and SQLite.
     :param session: SQLAlchemy session
+    :param days_of_week: Days of the week to recompute, 0 is Sunday, default is None.
+                        If None, recompute the whole table.
+    :param median_data: (DayOfWeek, MedianPrice) rows from compute_aggregate_medians, default is None.
+                        If None, calculate the medians with a query of this table only.
     :return: None
     """
     main_logger.info("Create AverageHotelRoomPriceByDayOfWeek table...")
+    if days_of_week is not None and not days_of_week:
+        main_logger.info('No days of the week to update.')
+        return
 
     # Clear existing data
-    session.query(AverageHotelRoomPriceByDayOfWeek).delete()
+    dow_names = [DOW_NAMES[dow] for dow in days_of_week] if days_of_week is not None else None
+    filter_by_keys(session.query(AverageHotelRoomPriceByDayOfWeek), AverageHotelRoomPriceByDayOfWeek.DayOfWeek,
+                   dow_names).delete(synchronize_session=False)
 
     # Detect database dialect
     dialect = session.bind.dialect
 
-    if isinstance(dialect, postgresql.dialect):
+    if median_data is not None:
+        main_logger.debug('Use the medians of the combined aggregation pass')
+    elif isinstance(dialect, postgresql.dialect):
         # PostgreSQL specific date extraction
-        dow_func = extract('dow', func.to_date(HotelPrice.Date, 'YYYY-MM-DD'))
+        dow_func = extract('dow', HotelPrice.Date)
 
         # Median calculation using percentile_cont
-        median_subquery = session.query(
+        median_query = session.query(
             dow_func.label("day_of_week"),
             func.percentile_cont(0.5).within_group(HotelPrice.Price).label("MedianPrice")
-        ).group_by(dow_func).subquery()
+        )
+        median_subquery = filter_by_keys(median_query, dow_func, days_of_week).group_by(dow_func).subquery()
 
         median_data = session.query(
             median_subquery.c.day_of_week,
@@ -220,35 +621,22 @@ def create_avg_hotel_price_by_dow_table(session: Session) -> None:
 
     elif isinstance(dialect, sqlite.dialect):
         # SQLite-specific date extraction
-        dow_func = func.cast(func.strftime('%w', func.date(HotelPrice.Date)), Integer)
+        dow_func = func.cast(func.strftime('%w', HotelPrice.Date), Integer)
 
-        # Retrieve grouped data
-        grouped_data = session.query(
+        # Calculate median with the vectorized median engine
+        grouped_query = session.query(
             dow_func.label("day_of_week"),
-            HotelPrice.Price
-        ).order_by(dow_func, HotelPrice.Price).all()
-
-        # Organize data into Python groups by day_of_week
-        grouped_prices = defaultdict(list)
-        for dow, price in grouped_data:
-            grouped_prices[dow].append(price)
+            HotelPrice.Price.label("Price")
+        )
+        grouped_data = read_query_in_chunks(session, filter_by_keys(grouped_query, dow_func, days_of_week))
 
-        # Calculate the median for each day_of_week
-        median_data = [
-            (dow, np.median(prices)) for dow, prices in grouped_prices.items()
-        ]
+        median_data = compute_grouped_medians(grouped_data, ['day_of_week'], ['Price'])
     else:
         raise NotImplementedError("Median calculation is only implemented for PostgreSQL and SQLite.")
 
-    # Map numeric days to readable names
-    dow_mapping = {
-        0: 'Sunday', 1: 'Monday', 2: 'Tuesday', 3: 'Wednesday',
-        4: 'Thursday', 5: 'Friday', 6: 'Saturday'
-    }
-
     # Create new records
     new_records = [
-        AverageHotelRoomPriceByDayOfWeek(DayOfWeek=dow_mapping[dow], AveragePrice=median_price)
+        AverageHotelRoomPriceByDayOfWeek(DayOfWeek=DOW_NAMES[dow], AveragePrice=median_price)
         for dow, median_price in median_data
     ]
 
@@ -257,24 +645,37 @@ def create_avg_hotel_price_by_dow_table(session: Session) -> None:
     session.commit()
 
 
-def create_avg_hotel_price_by_month_table(session: Session) -> None:
+def create_avg_hotel_price_by_month_table(session: Session,
+                                          months: set[int] | None = None,
+                                          median_data: list[tuple] | None = None) -> None:
     """
     Create AverageHotelRoomPriceByMonth table using the median instead of average.
     Supports PostgreSQL and SQLite.
     :param session: SQLAlchemy session
+    :param months: Months to recompute, default is None.
+                If None, recompute the whole table.
+    :param median_data: (Month, MedianPrice, Quarter) rows from compute_aggregate_medians, default is None.
+                        If None, calculate the medians with a query of this table only.
     :return: None
     """
     main_logger.info("Create AverageHotelRoomPriceByMonth table...")
+    if months is not None and not months:
+        main_logger.info('No months to update.')
+        return
 
     # Clear existing data
-    session.query(AverageHotelRoomPriceByMonth).delete()
+    month_names = [MONTH_NAMES[month] for month in months] if months is not None else None
+    filter_by_keys(session.query(AverageHotelRoomPriceByMonth), AverageHotelRoomPriceByMonth.Month,
+                   month_names).delete(synchronize_session=False)
 
     # Detect database dialect
     dialect = session.bind.dialect
 
-    if isinstance(dialect, postgresql.dialect):
+    if median_data is not None:
+        main_logger.debug('Use the medians of the combined aggregation pass')
+    elif isinstance(dialect, postgresql.dialect):
         # PostgreSQL-specific date extraction
-        month_func = extract('month', func.to_date(HotelPrice.Date, 'YYYY-MM-DD'))
+        month_func = extract('month', HotelPrice.Date)
         quarter_case = case(
             (month_func.in_([1, 2, 3]), 'Quarter1'),
             (month_func.in_([4, 5, 6]), 'Quarter2'),
@@ -283,11 +684,13 @@ def create_avg_hotel_price_by_month_table(session: Session) -> None:
         ).label('quarter')
 
         # Query grouped by Month and Quarter with median calculation
-        median_subquery = session.query(
+        median_query = session.query(
             month_func.label('Month'),
             quarter_case.label('Quarter'),
             func.percentile_cont(0.5).within_group(HotelPrice.Price).label('MedianPrice')
-        ).group_by(month_func, quarter_case).subquery()
+        )
+        median_subquery = filter_by_keys(median_query, month_func, months).group_by(
+            month_func, quarter_case).subquery()
 
         median_data = session.query(
             median_subquery.c.Month,
@@ -299,40 +702,24 @@ def create_avg_hotel_price_by_month_table(session: Session) -> None:
         # SQLite-specific date extraction
         month_func = cast(func.strftime('%m', HotelPrice.Date), Integer)
 
-        # Gather data for Python-based median calculation
-        grouped_data = session.query(
+        # Calculate median with the vectorized median engine
+        grouped_query = session.query(
             month_func.label('Month'),
-            HotelPrice.Price  # Include only the necessary columns
-        ).all()
+            HotelPrice.Price.label('Price')  # Include only the necessary columns
+        )
+        grouped_data = read_query_in_chunks(session, filter_by_keys(grouped_query, month_func, months))
 
-        # Organize it by Month
-        price_by_month = defaultdict(list)
-        for month, price in grouped_data:
-            price_by_month[month].append(price)
-
-        # Calculate the median price for each month
-        median_data = []
-        for month, prices in price_by_month.items():
-            median_price = np.median(prices)
-            quarter = 'Quarter1' if month in [1, 2, 3] else \
-                'Quarter2' if month in [4, 5, 6] else \
-                    'Quarter3' if month in [7, 8, 9] else \
-                        'Quarter4'
-            median_data.append((month, median_price, quarter))
+        median_data = [
+            (month, median_price, get_quarter(month))
+            for month, median_price in compute_grouped_medians(grouped_data, ['Month'], ['Price'])
+        ]
 
     else:
         raise NotImplementedError(f"Unsupported dialect: {dialect}")
 
-    # Map numeric months to readable names
-    month_names = {
-        1: 'January', 2: 'February', 3: 'March', 4: 'April',
-        5: 'May', 6: 'June', 7: 'July', 8: 'August',
-        9: 'September', 10: 'October', 11: 'November', 12: 'December'
-    }
-
     # Create new records
     new_records = [
-        AverageHotelRoomPriceByMonth(Month=month_names[month], AveragePrice=median_price, Quarter=quarter)
+        AverageHotelRoomPriceByMonth(Month=MONTH_NAMES[month], AveragePrice=median_price, Quarter=quarter)
         for month, median_price, quarter in median_data
     ]
 
@@ -341,29 +728,44 @@ def create_avg_hotel_price_by_month_table(session: Session) -> None:
     session.commit()
 
 
-def create_avg_room_price_by_location(session: Session) -> None:
+def create_avg_room_price_by_location(session: Session,
+                                      locations: set[str] | None = None,
+                                      median_data: list[tuple] | None = None) -> None:
     """
     Create AverageHotelRoomPriceByLocation table using median instead of average.
     Supports PostgreSQL and SQLite.
     :param session: SQLAlchemy session
+    :param locations: Locations to recompute, default is None.
+                    If None, recompute the whole table.
+    :param median_data: (Location, MedianPrice, MedianRating, MedianPricePerReview) rows
+                        from compute_aggregate_medians, default is None.
+                        If None, calculate the medians with a query of this table only.
     :return: None
     """
     main_logger.info("Create AverageHotelRoomPriceByLocation table...")
+    if locations is not None and not locations:
+        main_logger.info('No locations to update.')
+        return
 
     # Clear existing data
-    session.query(AverageHotelRoomPriceByLocation).delete()
+    filter_by_keys(session.query(AverageHotelRoomPriceByLocation), AverageHotelRoomPriceByLocation.Location,
+                   locations).delete(synchronize_session=False)
 
     # Detect database dialect
     dialect = session.bind.dialect
 
-    if isinstance(dialect, postgresql.dialect):
+    if median_data is not None:
+        main_logger.debug('Use the medians of the combined aggregation pass')
+    elif isinstance(dialect, postgresql.dialect):
         # PostgreSQL specific median calculation using percentile_cont
-        median_subquery = session.query(
+        median_query = session.query(
             HotelPrice.Location,
             func.percentile_cont(0.5).within_group(HotelPrice.Price).label('MedianPrice'),
             func.percentile_cont(0.5).within_group(HotelPrice.Review).label('MedianRating'),
             func.percentile_cont(0.5).within_group(HotelPrice.PriceReview).label('MedianPricePerReview')
-        ).group_by(HotelPrice.Location).subquery()
+        )
+        median_subquery = filter_by_keys(median_query, HotelPrice.Location, locations).group_by(
+            HotelPrice.Location).subquery()
 
         median_data = session.query(
             median_subquery.c.Location,
@@ -373,29 +775,16 @@ def create_avg_room_price_by_location(session: Session) -> None:
         ).all()
 
     elif isinstance(dialect, sqlite.dialect):
-        # SQLite: Calculate median in Python by fetching grouped data
-        grouped_data = session.query(
-            HotelPrice.Location,
-            HotelPrice.Price,
-            HotelPrice.Review,
-            HotelPrice.PriceReview
-        ).order_by(HotelPrice.Location).all()
-
-        # Organize data into groups by Location
-        grouped_metrics = defaultdict(lambda: {'prices': [], 'ratings': [], 'price_per_reviews': []})
-        for location, price, rating, price_per_review in grouped_data:
-            grouped_metrics[location]['prices'].append(price)
-            grouped_metrics[location]['ratings'].append(rating)
-            grouped_metrics[location]['price_per_reviews'].append(price_per_review)
-
-        # Calculate median for each group and metric
-        median_data = [
-            (location,
-             np.median(metrics['prices']),
-             np.median(metrics['ratings']),
-             np.median(metrics['price_per_reviews']))
-            for location, metrics in grouped_metrics.items()
-        ]
+        # SQLite: Calculate median with the vectorized median engine
+        grouped_query = session.query(
+            HotelPrice.Location.label('Location'),
+            HotelPrice.Price.label('Price'),
+            HotelPrice.Review.label('Review'),
+            HotelPrice.PriceReview.label('PriceReview')
+        )
+        grouped_data = read_query_in_chunks(session, filter_by_keys(grouped_query, HotelPrice.Location, locations))
+
+        median_data = compute_grouped_medians(grouped_data, ['Location'], ['Price', 'Review', 'PriceReview'])
 
     else:
         raise NotImplementedError("Median calculation is only implemented for PostgreSQL and SQLite.")
@@ -0,0 +1,192 @@
+import datetime
+from dataclasses import dataclass
+
+import pandas as pd
+from sqlalchemy import Engine, Connection, Table, String, select, insert, inspect, cast, literal, func, event
+from sqlalchemy.orm import Session
+
+from japan_avg_hotel_price_finder.configure_logging import main_logger
+from japan_avg_hotel_price_finder.sql.bulk_loader import upsert_dataframe
+from japan_avg_hotel_price_finder.sql.db_model import Base, ScrapeManifest, HotelPrice, JapanHotel, TimestampDate
+
+# Key of DataFrame.attrs holding the ManifestEntry list of the scraped data
+MANIFEST_ENTRIES_ATTR = 'manifest_entries'
+
+
+@dataclass(frozen=True)
+class ManifestEntry:
+    """
+    Coverage of one scraped check-in date.
+
+    Attributes:
+        city (str): City, or prefecture for the JapanHotels table.
+        date (str): Check-in date in 'YYYY-MM-DD' format.
+        as_of (str): AsOf date of the scraped data in 'YYYY-MM-DD' format.
+        rows (int): Number of saved rows.
+        requests (int): Number of GraphQL requests sent, default is 0 if unknown.
+        duration (float): Scraping duration in seconds, default is 0 if unknown.
+        nights (int): Number of nights (Length of stay), default is 1.
+        adults (int): Number of adults, default is 1.
+        children (int): Number of children, default is 0.
+        rooms (int): Number of rooms, default is 1.
+    """
+    city: str
+    date: str
+    as_of: str
+    rows: int
+    requests: int = 0
+    duration: float = 0.0
+    nights: int = 1
+    adults: int = 1
+    children: int = 0
+    rooms: int = 1
+
+
+def get_manifest_entries(df: pd.DataFrame) -> list[ManifestEntry]:
+    """
+    Get the manifest entries of scraped data.
+    Use the entries attached by the scraper if there are any, as they know the requests, duration and occupancy,
+    otherwise count the rows of each city, check-in date and AsOf date.
+    :param df: Pandas DataFrame of hotel data, with City or Prefecture, Date and AsOf columns.
+    :return: List of ManifestEntry.
+    """
+    entries = df.attrs.get(MANIFEST_ENTRIES_ATTR)
+    if entries:
+        return list(entries)
+    if df.empty:
+        return []
+
+    city_column = 'Prefecture' if 'Prefecture' in df.columns else 'City'
+    as_of_dates = pd.to_datetime(df['AsOf']).dt.strftime('%Y-%m-%d')
+    dates = pd.to_datetime(df['Date']).dt.strftime('%Y-%m-%d')
+    counts = df.groupby([df[city_column], dates, as_of_dates]).size()
+    return [ManifestEntry(city=city, date=date, as_of=as_of, rows=int(rows))
+            for (city, date, as_of), rows in counts.items()]
+
+
+def set_manifest_entries(df: pd.DataFrame, entries: list[ManifestEntry]) -> pd.DataFrame:
+    """
+    Attach manifest entries to scraped data, so they are recorded when it is saved.
+    :param df: Pandas DataFrame of hotel data.
+    :param entries: List of ManifestEntry.
+    :return: The same DataFrame.
+    """
+    df.attrs[MANIFEST_ENTRIES_ATTR] = list(entries)
+    return df
+
+
+def combine_manifest_entries(df: pd.DataFrame, parts: list[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Attach the manifest entries of DataFrames to their concatenation, as pandas drops them if they differ.
+    If a part has no entries, none are attached and they are counted from the rows when the data is saved.
+    :param df: Concatenated Pandas DataFrame.
+    :param parts: DataFrames which were concatenated.
+    :return: The concatenated DataFrame.
+    """
+    if parts and all(part.attrs.get(MANIFEST_ENTRIES_ATTR) for part in parts):
+        return set_manifest_entries(df, [entry for part in parts for entry in part.attrs[MANIFEST_ENTRIES_ATTR]])
+    df.attrs.pop(MANIFEST_ENTRIES_ATTR, None)
+    return df
+
+
+def create_manifest_table(engine: Engine) -> None:
+    """
+    Create the ScrapeManifest table if it does not exist.
+    A new table is filled with the check-in dates of the rows already in HotelPrice and JapanHotels.
+    :param engine: SQLAlchemy engine.
+    :return: None
+    """
+    Base.metadata.create_all(engine, tables=[ScrapeManifest.__table__])
+
+
+def backfill_manifest_entries(connection: Connection) -> int:
+    """
+    Record the city, check-in date and AsOf date of the rows already in HotelPrice and JapanHotels,
+    e.g., the rows saved before the manifest existed, so the Missing Date Checker and the scrapers see them.
+    Those tables do not store the occupancy, so the defaults of ManifestEntry are recorded, without requests
+    and duration.
+    :param connection: SQLAlchemy connection.
+    :return: Number of recorded check-in dates.
+    """
+    recorded_dates = 0
+    for model, city_column in ((HotelPrice, HotelPrice.City), (JapanHotel, JapanHotel.Prefecture)):
+        if not inspect(connection).has_table(model.__tablename__):
+            continue
+
+        date = cast(model.Date, String)
+        as_of_date = cast(TimestampDate(model.AsOf), String)
+        query = (
+            select(literal(model.__tablename__), city_column, as_of_date, date, literal(1), literal(1), literal(0),
+                   literal(1), func.count(), literal(0), literal(0.0), func.max(model.AsOf))
+            .group_by(city_column, as_of_date, date)
+        )
+        manifest_columns = ['TableName', 'City', 'AsOf', 'Date', 'Nights', 'Adults', 'Children', 'Rooms', 'Rows',
+                            'Requests', 'Duration', 'CompletedAt']
+        recorded_dates += connection.execute(insert(ScrapeManifest).from_select(manifest_columns, query)).rowcount
+        main_logger.info(f"Recorded the check-in dates of the existing rows of {model.__tablename__} in the manifest")
+    return recorded_dates
+
+
+def backfill_created_manifest(table: Table, connection: Connection, **kwargs) -> None:
+    """
+    Fill the ScrapeManifest table after it is created, by create_manifest_table or by create_all.
+    :param table: Created table.
+    :param connection: SQLAlchemy connection of the CREATE TABLE statement.
+    :return: None
+    """
+    backfill_manifest_entries(connection)
+
+
+event.listen(ScrapeManifest.__table__, 'after_create', backfill_created_manifest)
+
+
+def record_manifest_entries(session: Session, table_name: str, entries: list[ManifestEntry]) -> None:
+    """
+    Record manifest entries within the transaction of the session,
+    so they are only recorded if the hotel data saved in the same transaction is committed.
+    An entry recorded again, e.g., by a rerun on the same day, is replaced with an upsert.
+    :param session: SQLAlchemy session.
+    :param table_name: Name of the table where the hotel data is saved, e.g., HotelPrice.
+    :param entries: List of ManifestEntry.
+    :return: None
+    """
+    if not entries:
+        return
+
+    completed_at = datetime.datetime.now()
+    records = pd.DataFrame([
+        {'TableName': table_name, 'City': entry.city, 'AsOf': entry.as_of, 'Date': entry.date, 'Nights': entry.nights,
+         'Adults': entry.adults, 'Children': entry.children, 'Rooms': entry.rooms, 'Rows': entry.rows,
+         'Requests': entry.requests, 'Duration': entry.duration, 'CompletedAt': completed_at}
+        for entry in entries
+    ])
+    upsert_dataframe(session, ScrapeManifest, records, list(ScrapeManifest.__table__.primary_key.columns))
+    main_logger.debug(f"Recorded {len(entries)} check-in dates in the manifest of {table_name}")
+
+
+def get_scraped_dates(engine: Engine, table_name: str, city: str, as_of: str, nights: int | None = None) -> set[str]:
+    """
+    Get the check-in dates of a city which were already scraped and saved on the given AsOf date.
+    :param engine: SQLAlchemy engine.
+    :param table_name: Name of the table where the hotel data is saved, e.g., JapanHotels.
+    :param city: City, or prefecture for the JapanHotels table.
+    :param as_of: AsOf date in 'YYYY-MM-DD' format.
+    :param nights: Only get the dates scraped with this number of nights, default is None.
+                    If None, get the dates of any number of nights.
+    :return: Set of check-in dates in 'YYYY-MM-DD' format.
+    """
+    create_manifest_table(engine)
+
+    query = select(ScrapeManifest.Date).where(
+        ScrapeManifest.TableName == table_name,
+        ScrapeManifest.City == city,
+        ScrapeManifest.AsOf == as_of
+    )
+    if nights is not None:
+        query = query.where(ScrapeManifest.Nights == nights)
+
+    with Session(engine) as session:
+        scraped_dates = set(session.scalars(query))
+
+    main_logger.debug(f"{len(scraped_dates)} check-in dates of {city} are already scraped as of {as_of}")
+    return scraped_dates
@@ -0,0 +1,325 @@
+import argparse
+import calendar
+import datetime
+import math
+from dataclasses import dataclass, field
+from typing import Iterator, Literal
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import Engine, create_engine
+from sqlalchemy.orm import sessionmaker
+
+from japan_avg_hotel_price_finder.configure_logging import main_logger
+from japan_avg_hotel_price_finder.japan_hotel_scraper import JapanScraper
+from japan_avg_hotel_price_finder.sql.bulk_loader import load_dataframe, rename_to_column_names
+from japan_avg_hotel_price_finder.sql.db_model import Base, HotelPrice, JapanHotel
+
+SyntheticTable = Literal['HotelPrice', 'JapanHotels']
+
+DEFAULT_CITIES = ['Osaka', 'Tokyo', 'Kyoto', 'Fukuoka', 'Sapporo']
+
+JAPAN_REGIONS: dict[str, list[str]] = JapanScraper.model_fields['japan_regions'].default
+
+MODELS = {'HotelPrice': HotelPrice, 'JapanHotels': JapanHotel}
+
+
+def get_prefecture_regions() -> dict[str, str]:
+    """
+    Map every prefecture to its region.
+    :return: Dictionary of prefectures and their regions.
+    """
+    return {prefecture: region for region, prefectures in JAPAN_REGIONS.items() for prefecture in prefectures}
+
+
+@dataclass
+class SyntheticDatasetConfig:
+    """
+    Shape and distributions of a synthetic hotel price dataset.
+    Every AsOf snapshot scrapes each hotel of each city for every check-in date from the snapshot date
+    to the end date, like daily runs of the Whole-Month or Japan scraper.
+
+    Attributes:
+        table (str): 'HotelPrice' or 'JapanHotels', default is 'HotelPrice'.
+        cities (list[str]): Cities of HotelPrice, or prefectures of JapanHotels,
+                            default is five large cities for HotelPrice and every prefecture for JapanHotels.
+        num_hotels (int): Number of hotels of each city, default is 1,000.
+        start_date (datetime.date): First check-in date, default is January 1st of the current year.
+        end_date (datetime.date): Last check-in date, default is the last day of the start month.
+        as_of_start (datetime.date): Date of the first AsOf snapshot, default is the start date.
+        as_of_days (int): Number of daily AsOf snapshots, default is 1.
+        locations_per_city (int): Number of distinct locations of each city, default is 150.
+                                Hotels are spread over them with a Zipf-like distribution, as in the real data.
+        availability (float): Share of hotels with a room on a given date, default is 0.8.
+        daily_drift (float): Standard deviation of the daily random walk of each hotel's log price, default is 0.02.
+        seed (int): Random seed, default is 42.
+    """
+    table: SyntheticTable = 'HotelPrice'
+    cities: list[str] = field(default_factory=list)
+    num_hotels: int = 1_000
+    start_date: datetime.date = field(default_factory=lambda: datetime.date(datetime.date.today().year, 1, 1))
+    end_date: datetime.date | None = None
+    as_of_start: datetime.date | None = None
+    as_of_days: int = 1
+    locations_per_city: int = 150
+    availability: float = 0.8
+    daily_drift: float = 0.02
+    seed: int = 42
+
+    def __post_init__(self):
+        if self.table not in MODELS:
+            raise ValueError(f"Invalid table: {self.table}. Must be one of {list(MODELS)}.")
+        if not self.cities:
+            self.cities = list(get_prefecture_regions()) if self.table == 'JapanHotels' else list(DEFAULT_CITIES)
+        if self.end_date is None:
+            self.end_date = self.start_date.replace(
+                day=calendar.monthrange(self.start_date.year, self.start_date.month)[1])
+        if self.as_of_start is None:
+            self.as_of_start = self.start_date
+        if self.end_date < self.start_date:
+            raise ValueError(f"end_date {self.end_date} is before start_date {self.start_date}.")
+        if self.num_hotels < 1 or self.as_of_days < 1 or self.locations_per_city < 1:
+            raise ValueError("num_hotels, as_of_days and locations_per_city must be at least 1.")
+        if not 0 < self.availability <= 1:
+            raise ValueError(f"Invalid availability: {self.availability}. Must be in (0, 1].")
+        if self.table == 'JapanHotels':
+            unknown = [city for city in self.cities if city not in get_prefecture_regions()]
+            if unknown:
+                raise ValueError(f"Unknown prefectures: {unknown}")
+
+    def get_as_of_dates(self) -> list[datetime.date]:
+        """
+        Get the dates of the AsOf snapshots.
+        :return: List of dates.
+        """
+        return [self.as_of_start + datetime.timedelta(days=day) for day in range(self.as_of_days)]
+
+    def get_check_in_dates(self, as_of_date: datetime.date) -> pd.DatetimeIndex:
+        """
+        Get the check-in dates scraped by a snapshot, which are not in the past on its AsOf date.
+        :param as_of_date: Date of the snapshot.
+        :return: Pandas DatetimeIndex.
+        """
+        return pd.date_range(max(self.start_date, as_of_date), self.end_date)
+
+    def estimate_rows(self) -> int:
+        """
+        Estimate the number of generated rows.
+        :return: Expected number of rows.
+        """
+        dates = sum(len(self.get_check_in_dates(as_of_date)) for as_of_date in self.get_as_of_dates())
+        return round(dates * len(self.cities) * self.num_hotels * self.availability)
+
+    def scale_to_rows(self, rows: int) -> None:
+        """
+        Set the number of hotels of each city so the dataset has about the given number of rows.
+        :param rows: Target number of rows.
+        :return: None
+        """
+        self.num_hotels = 1
+        self.num_hotels = max(1, round(rows / self.estimate_rows()))
+
+
+@dataclass
+class CityHotels:
+    """
+    Hotels of a city and their state across snapshots.
+
+    Attributes:
+        names (np.ndarray): Hotel names.
+        locations (np.ndarray): Location of each hotel.
+        reviews (np.ndarray): Review score of each hotel.
+        log_prices (np.ndarray): Current log base price of each hotel, drifting between snapshots.
+    """
+    names: np.ndarray
+    locations: np.ndarray
+    reviews: np.ndarray
+    log_prices: np.ndarray
+
+
+def create_city_hotels(city: str, config: SyntheticDatasetConfig, rng: np.random.Generator) -> CityHotels:
+    """
+    Create the hotels of a city.
+    Base prices are log-normal, better reviewed hotels are pricier, and a few locations hold most hotels.
+    :param city: City or prefecture.
+    :param config: SyntheticDatasetConfig.
+    :param rng: Numpy random generator.
+    :return: CityHotels
+    """
+    location_weights = 1 / np.arange(1, config.locations_per_city + 1) ** 1.1
+    location_names = np.array([f'{city} Area {index:03d}' for index in range(config.locations_per_city)])
+    locations = rng.choice(location_names, config.num_hotels, p=location_weights / location_weights.sum())
+
+    reviews = np.clip(rng.normal(8.0, 0.8, config.num_hotels), 1.0, 10.0).round(1)
+    log_prices = rng.normal(math.log(120), 0.55, config.num_hotels) + 0.15 * (reviews - 8.0)
+    names = np.array([f'{city} Hotel {index:05d}' for index in range(config.num_hotels)])
+    return CityHotels(names=names, locations=locations, reviews=reviews, log_prices=log_prices)
+
+
+def get_date_multipliers(check_in_dates: pd.DatetimeIndex, as_of_date: datetime.date) -> np.ndarray:
+    """
+    Get the price multiplier of each check-in date from its season, weekday and lead time.
+    :param check_in_dates: Check-in dates.
+    :param as_of_date: Date of the snapshot.
+    :return: Numpy array of multipliers.
+    """
+    season = 1 + 0.2 * np.sin(2 * np.pi * (check_in_dates.dayofyear.to_numpy() - 80) / 365)
+    weekend = np.where(check_in_dates.dayofweek.isin([4, 5]), 1.25, 1.0)
+    lead_days = (check_in_dates - pd.Timestamp(as_of_date)).days.to_numpy()
+    last_minute = 1 + 0.15 * np.exp(-lead_days / 10)
+    return season * weekend * last_minute
+
+
+def generate_snapshot(city: str,
+                      hotels: CityHotels,
+                      config: SyntheticDatasetConfig,
+                      as_of_date: datetime.date,
+                      rng: np.random.Generator) -> pd.DataFrame:
+    """
+    Generate the rows of a city scraped by one AsOf snapshot.
+    :param city: City or prefecture.
+    :param hotels: Hotels of the city.
+    :param config: SyntheticDatasetConfig.
+    :param as_of_date: Date of the snapshot.
+    :param rng: Numpy random generator.
+    :return: Pandas DataFrame with columns named after the model attributes, e.g., PriceReview.
+    """
+    check_in_dates = config.get_check_in_dates(as_of_date)
+    num_dates = len(check_in_dates)
+    available = rng.random((num_dates, config.num_hotels)) < config.availability
+    date_index, hotel_index = np.nonzero(available)
+
+    noise = rng.normal(0, 0.05, len(date_index))
+    price = (np.exp(hotels.log_prices[hotel_index] + noise)
+             * get_date_multipliers(check_in_dates, as_of_date)[date_index]).round(2)
+    review = hotels.reviews[hotel_index]
+
+    # Snapshots of a day finish at different times, like real scraping runs
+    as_of = datetime.datetime.combine(as_of_date, datetime.time(1)) + datetime.timedelta(
+        seconds=int(rng.integers(0, 6 * 3600)))
+
+    df = pd.DataFrame({
+        'Hotel': hotels.names[hotel_index],
+        'Price': price,
+        'Review': review,
+        'PriceReview': price / review,
+        'Location': hotels.locations[hotel_index],
+        'Date': check_in_dates.strftime('%Y-%m-%d').to_numpy()[date_index],
+        'AsOf': as_of
+    })
+    if config.table == 'JapanHotels':
+        df['Prefecture'] = city
+        df['Region'] = get_prefecture_regions()[city]
+    else:
+        df['City'] = city
+    return df
+
+
+def generate_dataset(config: SyntheticDatasetConfig) -> Iterator[pd.DataFrame]:
+    """
+    Generate the dataset one city snapshot at a time, so its size is not limited by memory.
+    The same config always gives the same data.
+    :param config: SyntheticDatasetConfig.
+    :return: Iterator of Pandas DataFrames with columns named after the model attributes, e.g., PriceReview.
+    """
+    rng = np.random.default_rng(config.seed)
+    city_hotels = {city: create_city_hotels(city, config, rng) for city in config.cities}
+
+    for as_of_date in config.get_as_of_dates():
+        for city, hotels in city_hotels.items():
+            yield generate_snapshot(city, hotels, config, as_of_date, rng)
+            # Each hotel's price drifts between daily snapshots
+            hotels.log_prices += rng.normal(0, config.daily_drift, config.num_hotels)
+
+
+def write_to_database(config: SyntheticDatasetConfig, engine: Engine) -> int:
+    """
+    Generate the dataset into its table with the bulk loader, committing every city snapshot.
+    The aggregate tables are not updated.
+    :param config: SyntheticDatasetConfig.
+    :param engine: SQLAlchemy engine.
+    :return: Number of rows written.
+    """
+    model = MODELS[config.table]
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+
+    total_rows = 0
+    for df in generate_dataset(config):
+        with Session() as session:
+            total_rows += load_dataframe(session, model, df)
+            session.commit()
+        main_logger.info(f"Written {total_rows} rows to {config.table}")
+    return total_rows
+
+
+def write_to_parquet(config: SyntheticDatasetConfig, path: str) -> int:
+    """
+    Generate the dataset into a Parquet file, one row group per city snapshot.
+    Columns are named like the table columns, e.g., Price/Review.
+    :param config: SyntheticDatasetConfig.
+    :param path: Path of the Parquet file.
+    :return: Number of rows written.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    model = MODELS[config.table]
+    total_rows = 0
+    writer = None
+    try:
+        for df in generate_dataset(config):
+            table = pa.Table.from_pandas(rename_to_column_names(model, df), preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+            total_rows += len(df)
+            main_logger.info(f"Written {total_rows} rows to {path}")
+    finally:
+        if writer is not None:
+            writer.close()
+    return total_rows
+
+
+def parse_arguments() -> argparse.Namespace:
+    """
+    Parse the command line arguments
+    :return: argparse.Namespace
+    """
+    parser = argparse.ArgumentParser(description='Generate a synthetic HotelPrice or JapanHotels dataset.')
+    parser.add_argument('--table', type=str, choices=list(MODELS), default='HotelPrice',
+                        help='Table to generate, default is HotelPrice')
+    parser.add_argument('--cities', type=str,
+                        help='Comma-separated cities, or prefectures for JapanHotels, '
+                             'default is five large cities for HotelPrice and every prefecture for JapanHotels')
+    parser.add_argument('--start_date', type=datetime.date.fromisoformat,
+                        help='First check-in date in YYYY-MM-DD format, default is January 1st of the current year')
+    parser.add_argument('--end_date', type=datetime.date.fromisoformat,
+                        help='Last check-in date in YYYY-MM-DD format, default is the end of the start month')
+    parser.add_argument('--as_of_days', type=int, default=1, help='Number of daily AsOf snapshots, default is 1')
+    parser.add_argument('--num_hotels', type=int, default=1_000, help='Hotels of each city, default is 1,000')
+    parser.add_argument('--rows', type=int, help='Target number of rows, overrides --num_hotels, e.g., 8500000')
+    parser.add_argument('--locations_per_city', type=int, default=150,
+                        help='Distinct locations of each city, default is 150')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed, default is 42')
+    output = parser.add_mutually_exclusive_group(required=True)
+    output.add_argument('--db_url', type=str, help='Database URL to write to, e.g., sqlite:///synthetic.db')
+    output.add_argument('--parquet', type=str, help='Parquet file to write to')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_arguments()
+    dataset_config = SyntheticDatasetConfig(
+        table=args.table, cities=[city.strip() for city in args.cities.split(',')] if args.cities else [], num_hotels=args.num_hotels,
+        as_of_days=args.as_of_days, locations_per_city=args.locations_per_city, seed=args.seed,
+        **({'start_date': args.start_date} if args.start_date else {}), end_date=args.end_date)
+    if args.rows:
+        dataset_config.scale_to_rows(args.rows)
+    main_logger.info(f"Generating about {dataset_config.estimate_rows()} rows "
+                     f"with {dataset_config.num_hotels} hotels per city...")
+
+    if args.db_url:
+        write_to_database(dataset_config, create_engine(args.db_url))
+    else:
+        write_to_parquet(dataset_config, args.parquet)
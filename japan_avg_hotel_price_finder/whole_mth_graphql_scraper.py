@@ -1,14 +1,18 @@
 import calendar
 import datetime
 from datetime import date
+from typing import Callable
 
 import pandas as pd
 from pydantic import Field
 
+from japan_avg_hotel_price_finder.background_writer import BackgroundWriter
 from japan_avg_hotel_price_finder.configure_logging import main_logger
 from japan_avg_hotel_price_finder.date_utils.date_utils import check_if_current_date_has_passed, format_date, \
     calculate_check_out_date
 from japan_avg_hotel_price_finder.graphql_scraper import BasicGraphQLScraper
+from japan_avg_hotel_price_finder.scrape_scheduler import ScrapeScheduler, ScrapeTask
+from japan_avg_hotel_price_finder.sql.scrape_manifest import combine_manifest_entries
 
 
 class WholeMonthGraphQLScraper(BasicGraphQLScraper):
@@ -29,6 +33,13 @@ class WholeMonthGraphQLScraper(BasicGraphQLScraper):
         nights (int): Number of nights (Length of stay) which defines the room price.
                     For example, nights = 1 means scraping the hotel with room price for 1 night.
                     Default is 1.
+        max_concurrent_tasks (int): Maximum number of check-in dates scraped at the same time, default is 1.
+        max_pages_in_flight (int): Maximum number of result pages requested at the same time across all check-in dates,
+                                default is 10.
+        max_queued_results (int): Maximum number of scraped check-in dates waiting to be written to the database,
+                                default is 10.
+        flush_rows (int): Number of rows which triggers a database write, default is 10,000.
+        flush_interval (float): Maximum number of seconds scraped data waits before it is written, default is 5.
     """
     # Set the start day, month, year, and length of stay
     year: int = Field(datetime.datetime.now().year, gt=0)
@@ -36,6 +47,15 @@ class WholeMonthGraphQLScraper(BasicGraphQLScraper):
     start_day: int = Field(1, gt=0, le=31)
     nights: int = Field(1, gt=0)
 
+    # Set the global concurrency limits of the scheduler
+    max_concurrent_tasks: int = Field(1, gt=0)
+    max_pages_in_flight: int = Field(10, gt=0)
+
+    # Set the limits of the background database writer
+    max_queued_results: int = Field(10, gt=0)
+    flush_rows: int = Field(10_000, gt=0)
+    flush_interval: float = Field(5.0, gt=0)
+
     async def scrape_whole_month(self) -> pd.DataFrame:
         """
         Scrape data from the GraphQL endpoint for the whole month.
@@ -47,7 +67,52 @@ class WholeMonthGraphQLScraper(BasicGraphQLScraper):
         last_day: int = await self._find_last_day_of_the_month()
         main_logger.debug(f'Last day of {calendar.month_name[self.month]}-{self.year}: {last_day}')
 
-        df_list = []
+        tasks = self._create_month_tasks(last_day)
+        scheduler = ScrapeScheduler(max_concurrent_tasks=self.max_concurrent_tasks,
+                                    max_pages_in_flight=self.max_pages_in_flight)
+        results = await scheduler.run(self, tasks)
+        return self._concat_results(results)
+
+    async def stream_whole_month(self, write: Callable[[pd.DataFrame], None]) -> None:
+        """
+        Scrape data from the GraphQL endpoint for the whole month, and pass it to the write function in batches.
+        Batches are written in a background thread while scraping continues, so the whole month is never in memory.
+        :param write: Synchronous function saving a DataFrame of hotel data, e.g., to the database.
+        :return: None
+        """
+        main_logger.info('Using Whole-Month GraphQL scraper with background writes...')
+
+        last_day: int = await self._find_last_day_of_the_month()
+        tasks = self._create_month_tasks(last_day)
+
+        def write_batch(batch: list[tuple[ScrapeTask, pd.DataFrame]]) -> None:
+            df = self._concat_results([result for _, result in batch])
+            if not df.empty:
+                write(df)
+
+        scheduler = ScrapeScheduler(max_concurrent_tasks=self.max_concurrent_tasks,
+                                    max_pages_in_flight=self.max_pages_in_flight)
+        async with self._create_background_writer(write_batch) as writer:
+            await scheduler.run(self, tasks, on_result=writer.put, keep_results=False)
+
+    def _create_background_writer(
+            self, write: Callable[[list[tuple[ScrapeTask, pd.DataFrame]]], None]) -> BackgroundWriter:
+        """
+        Create a background writer with the limits of the scraper.
+        :param write: Synchronous function writing a batch of scrape results.
+        :return: BackgroundWriter
+        """
+        return BackgroundWriter(write=write, max_queued_results=self.max_queued_results,
+                                flush_rows=self.flush_rows, flush_interval=self.flush_interval)
+
+    def _create_month_tasks(self, last_day: int) -> list[ScrapeTask]:
+        """
+        Create one scrape task for every day of the month, from the start day to the last day.
+        Days which have already passed are skipped.
+        :param last_day: Last day of the month.
+        :return: List of scrape tasks, ordered by check-in date.
+        """
+        tasks = []
         for day in range(self.start_day, last_day + 1):
             main_logger.debug(f'Process day {day} of {calendar.month_name[self.month]}-{self.year}')
 
@@ -59,23 +124,31 @@ class WholeMonthGraphQLScraper(BasicGraphQLScraper):
                 current_date: datetime = datetime.datetime(self.year, self.month, day)
                 main_logger.debug(f'The current date is {current_date}')
 
-                self.check_in: str = format_date(current_date)
-                main_logger.debug(f'Check-in date is {self.check_in}')
+                check_in: str = format_date(current_date)
+                main_logger.debug(f'Check-in date is {check_in}')
 
                 check_out: date = calculate_check_out_date(current_date=current_date, nights=self.nights)
-                self.check_out: str = format_date(check_out)
-                main_logger.debug(f'Check-out date is {self.check_out}')
+                check_out_str: str = format_date(check_out)
+                main_logger.debug(f'Check-out date is {check_out_str}')
                 main_logger.debug(f'Nights: {self.nights}')
 
-                df = await self.scrape_graphql()
-                if not df.empty:
-                    df_list.append(df)
+                tasks.append(ScrapeTask(city=self.city, check_in=check_in, check_out=check_out_str, nights=self.nights))
+        return tasks
+
+    @staticmethod
+    def _concat_results(results: list[pd.DataFrame]) -> pd.DataFrame:
+        """
+        Concatenate the DataFrames of all scrape tasks, skipping the empty ones, and keep their manifest entries.
+        :param results: List of DataFrames, ordered by check-in date.
+        :return: Pandas Dataframe containing hotel data of all tasks.
+        """
+        df_list = [df for df in results if not df.empty]
 
         if df_list:
             # Ensure all DataFrames have the same columns
             columns = df_list[0].columns
             df_list = [df[columns] for df in df_list]
-            return pd.concat(df_list, ignore_index=True, join='inner')
+            return combine_manifest_entries(pd.concat(df_list, ignore_index=True, join='inner'), df_list)
         return pd.DataFrame()
 
     async def _find_last_day_of_the_month(self) -> int:
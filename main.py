@@ -3,14 +3,17 @@ import asyncio
 from datetime import datetime
 import os
 
+import pandas as pd
 from dotenv import load_dotenv
 from sqlalchemy import Engine, create_engine
 
 from japan_avg_hotel_price_finder.configure_logging import main_logger
 from japan_avg_hotel_price_finder.graphql_scraper import BasicGraphQLScraper
+from japan_avg_hotel_price_finder.graphql_scraper_func.graphql_rate_limiter import RetryPolicy, TokenBucketRateLimiter
+from japan_avg_hotel_price_finder.graphql_scraper_func.graphql_response_archive import ResponseArchive
 from japan_avg_hotel_price_finder.japan_hotel_scraper import JapanScraper
 from japan_avg_hotel_price_finder.main_argparse import parse_arguments
-from japan_avg_hotel_price_finder.sql.save_to_db import save_scraped_data
+from japan_avg_hotel_price_finder.sql.save_to_db import AggregateKeys, refresh_aggregate_tables, save_scraped_data
 from japan_avg_hotel_price_finder.whole_mth_graphql_scraper import WholeMonthGraphQLScraper
 
 def validate_required_args(arguments: argparse.Namespace, required_args: list[str]) -> bool:
@@ -27,6 +30,33 @@ def validate_required_args(arguments: argparse.Namespace, required_args: list[st
     return True
 
 
+def create_rate_limiter(arguments: argparse.Namespace) -> TokenBucketRateLimiter:
+    """
+    Create the rate limiter shared by every request of the run.
+    :param arguments: Arguments with the request rate and burst.
+    :return: TokenBucketRateLimiter
+    """
+    return TokenBucketRateLimiter(requests_per_second=arguments.requests_per_second, burst=arguments.burst)
+
+
+def create_retry_policy(arguments: argparse.Namespace) -> RetryPolicy:
+    """
+    Create the retry policy of throttled, failed and timed out requests.
+    :param arguments: Arguments with the maximum number of retries.
+    :return: RetryPolicy
+    """
+    return RetryPolicy(max_retries=arguments.max_retries)
+
+
+def create_response_archive(arguments: argparse.Namespace) -> ResponseArchive | None:
+    """
+    Create the archive of the raw GraphQL results if an archive directory is given.
+    :param arguments: Arguments with the archive directory.
+    :return: ResponseArchive, or None if raw results are not archived.
+    """
+    return ResponseArchive(archive_dir=arguments.archive_dir) if arguments.archive_dir else None
+
+
 def run_whole_month_scraper(arguments: argparse.Namespace, engine: Engine) -> None:
     """
     Run the Whole-Month GraphQL scraper
@@ -41,10 +71,22 @@ def run_whole_month_scraper(arguments: argparse.Namespace, engine: Engine) -> No
             nights=arguments.nights, scrape_only_hotel=arguments.scrape_only_hotel,
             selected_currency=arguments.selected_currency, group_adults=arguments.group_adults,
             num_rooms=arguments.num_rooms, group_children=arguments.group_children, check_in='', check_out='',
-            country=arguments.country
+            country=arguments.country, query_profile=arguments.query_profile,
+            max_concurrent_tasks=arguments.max_concurrent_tasks, max_pages_in_flight=arguments.max_pages_in_flight,
+            rate_limiter=create_rate_limiter(arguments), retry_policy=create_retry_policy(arguments),
+            response_archive=create_response_archive(arguments), base_url=arguments.base_url,
+            max_queued_results=arguments.max_queued_results, flush_rows=arguments.flush_rows,
+            flush_interval=arguments.flush_interval
         )
-        df = asyncio.run(scraper.scrape_whole_month())
-        save_scraped_data(dataframe=df, engine=engine)
+
+        # Save each batch in the background, and update the aggregate tables once at the end
+        aggregate_keys = AggregateKeys()
+
+        def save_batch(df: pd.DataFrame) -> None:
+            aggregate_keys.update(save_scraped_data(dataframe=df, engine=engine, defer_aggregates=True))
+
+        asyncio.run(scraper.stream_whole_month(save_batch))
+        refresh_aggregate_tables(engine, aggregate_keys)
 
 
 def run_japan_hotel_scraper(arguments: argparse.Namespace, engine: Engine) -> None:
@@ -73,7 +115,13 @@ def run_japan_hotel_scraper(arguments: argparse.Namespace, engine: Engine) -> No
         scrape_only_hotel=arguments.scrape_only_hotel, selected_currency=selected_currency,
         group_adults=arguments.group_adults, num_rooms=arguments.num_rooms, group_children=arguments.group_children,
         check_in='', check_out='', country=arguments.country, engine=engine,
-        start_month=start_month, end_month=end_month
+        start_month=start_month, end_month=end_month, resume=not arguments.no_resume,
+        query_profile=arguments.query_profile,
+        max_concurrent_tasks=arguments.max_concurrent_tasks, max_pages_in_flight=arguments.max_pages_in_flight,
+        rate_limiter=create_rate_limiter(arguments), retry_policy=create_retry_policy(arguments),
+        response_archive=create_response_archive(arguments), base_url=arguments.base_url,
+        max_queued_results=arguments.max_queued_results, flush_rows=arguments.flush_rows,
+        flush_interval=arguments.flush_interval
     )
     asyncio.run(scraper.scrape_japan_hotels())
 
@@ -91,8 +139,14 @@ def run_basic_scraper(arguments: argparse.Namespace, engine: Engine) -> None:
             city=arguments.city, scrape_only_hotel=arguments.scrape_only_hotel,
             selected_currency=arguments.selected_currency, group_adults=arguments.group_adults,
             num_rooms=arguments.num_rooms, group_children=arguments.group_children, check_in=arguments.check_in,
-            check_out=arguments.check_out, country=arguments.country
+            check_out=arguments.check_out, country=arguments.country, query_profile=arguments.query_profile,
+            rate_limiter=create_rate_limiter(arguments), retry_policy=create_retry_policy(arguments),
+            response_archive=create_response_archive(arguments), base_url=arguments.base_url
         )
+        if arguments.compare_query_profiles:
+            asyncio.run(scraper.compare_query_profiles())
+            return
+
         df = asyncio.run(scraper.scrape_graphql())
         save_scraped_data(dataframe=df, engine=engine)
 
@@ -0,0 +1,133 @@
+import argparse
+import asyncio
+import datetime
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
+
+import pandas as pd
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, Engine
+
+from japan_avg_hotel_price_finder.booking_details import BookingDetails
+from japan_avg_hotel_price_finder.configure_logging import main_logger
+from japan_avg_hotel_price_finder.graphql_scraper import BasicGraphQLScraper
+from japan_avg_hotel_price_finder.graphql_scraper_func.graphql_data_extractor import extract_hotel_data
+from japan_avg_hotel_price_finder.graphql_scraper_func.graphql_data_transformer import transform_data_in_df
+from japan_avg_hotel_price_finder.graphql_scraper_func.graphql_request_func import get_page_results
+from japan_avg_hotel_price_finder.graphql_scraper_func.graphql_response_archive import find_archive_files, \
+    read_archive_file
+from japan_avg_hotel_price_finder.graphql_scraper_func.graphql_utils_func import concat_df_list
+from japan_avg_hotel_price_finder.sql.save_to_db import save_scraped_data, AggregateKeys, refresh_aggregate_tables
+
+
+def check_archived_response(booking_details: BookingDetails, response: dict[str, Any]) -> bool:
+    """
+    Check the archived response of the first page against the entered booking details, the same way as the scraper
+    does: city, country, dates, occupancy, currency and the hotel filter.
+    :param booking_details: Booking details entered for the scraper.
+    :param response: Archived GraphQL response of the first page.
+    :return: True if the response matches the booking details, False otherwise.
+    """
+    scraper = BasicGraphQLScraper(**booking_details.model_dump(), data=response)
+    try:
+        return asyncio.run(scraper.check_info()) > 0
+    except (SystemExit, KeyError) as e:
+        main_logger.error(f"Archived response does not match the booking details: {e!r}")
+        return False
+
+
+def reprocess_archive_file(path: str) -> pd.DataFrame:
+    """
+    Check, extract and transform the hotel data of an archive file, the same way as the scraper does.
+    The AsOf column keeps the archived timestamp.
+    :param path: Path of the archive file.
+    :return: Pandas DataFrame of the hotel data, empty if the archived response does not pass the checks.
+    """
+    records = read_archive_file(path)
+    first_record = next(records, None)
+    if first_record is None:
+        main_logger.warning(f"No pages in {path}")
+        return pd.DataFrame()
+
+    booking_details = BookingDetails(**first_record['booking_details'])
+    as_of = datetime.datetime.fromisoformat(first_record['as_of'])
+    if not check_archived_response(booking_details, first_record['response']):
+        main_logger.warning(f"Skipped {path}, as its response does not pass the checks")
+        return pd.DataFrame()
+
+    df_list = []
+    for record in itertools.chain([first_record], records):
+        hotel_data_list = get_page_results(record['response'])
+        if hotel_data_list:
+            extract_hotel_data(df_list, hotel_data_list)
+
+    if not df_list:
+        main_logger.warning(f"No hotel data in {path}")
+        return pd.DataFrame()
+
+    df = concat_df_list(df_list)
+    return transform_data_in_df(booking_details.check_in, booking_details.city, df, as_of=as_of)
+
+
+def reprocess_archive(archive_files: list[str], engine: Engine, max_workers: int | None = None) -> int:
+    """
+    Check, extract and transform the archived raw GraphQL responses in parallel worker processes,
+    and save them to the database.
+    No request is sent to the network.
+    The aggregate tables are updated once for everything saved.
+    :param archive_files: List of archive file paths.
+    :param engine: SQLAlchemy engine.
+    :param max_workers: Number of worker processes, default is None.
+                        If None, use the number of CPUs.
+    :return: Number of saved rows.
+    """
+    main_logger.info(f"Reprocessing {len(archive_files)} archive files...")
+    aggregate_keys = AggregateKeys()
+    saved_rows = 0
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        # Workers only check, extract and transform, saving stays in this process
+        for path, df in zip(archive_files, executor.map(reprocess_archive_file, archive_files)):
+            main_logger.debug(f"Reprocessed {len(df)} rows from {path}")
+            if not df.empty:
+                aggregate_keys.update(save_scraped_data(dataframe=df, engine=engine, defer_aggregates=True))
+                saved_rows += len(df)
+
+    refresh_aggregate_tables(engine, aggregate_keys)
+    main_logger.info(f"Reprocessed {saved_rows} rows from {len(archive_files)} archive files")
+    return saved_rows
+
+
+def parse_arguments() -> argparse.Namespace:
+    """
+    Parse the command line arguments
+    :return: argparse.Namespace
+    """
+    parser = argparse.ArgumentParser(description='Parser which controls the reprocessing of the response archive.')
+    parser.add_argument('--archive_dir', type=str, required=True,
+                        help='Directory of the response archive written with --archive_dir of main.py')
+    parser.add_argument('--city', type=str, help='Only reprocess the archive of this city, default is every city')
+    parser.add_argument('--max_workers', type=int,
+                        help='Number of worker processes, default is the number of CPUs')
+    parser.add_argument('--db_url', type=str,
+                        help='Database URL to save to, default is the PostgreSQL database of the .env file')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_arguments()
+
+    if args.db_url:
+        db_url = args.db_url
+    else:
+        load_dotenv(dotenv_path='.env')
+        db_url = (f"postgresql://{os.getenv('POSTGRES_USER')}:{os.getenv('POSTGRES_PASSWORD')}"
+                  f"@{os.getenv('POSTGRES_HOST')}:{os.getenv('POSTGRES_PORT')}/{os.getenv('POSTGRES_DB')}")
+
+    files = find_archive_files(args.archive_dir, args.city)
+    if not files:
+        main_logger.warning(f"No archive files found in {args.archive_dir}")
+    else:
+        reprocess_archive(files, create_engine(db_url), max_workers=args.max_workers)
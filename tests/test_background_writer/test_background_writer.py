@@ -0,0 +1,125 @@
+import asyncio
+import threading
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from japan_avg_hotel_price_finder.background_writer import BackgroundWriter
+from japan_avg_hotel_price_finder.graphql_scraper import BasicGraphQLScraper
+from japan_avg_hotel_price_finder.scrape_scheduler import ScrapeTask
+from japan_avg_hotel_price_finder.whole_mth_graphql_scraper import WholeMonthGraphQLScraper
+
+
+def create_result(day: int, rows: int = 1) -> tuple[ScrapeTask, pd.DataFrame]:
+    check_in = f'2025-01-{day:02d}'
+    task = ScrapeTask(city='Osaka', check_in=check_in, check_out=f'2025-01-{day + 1:02d}')
+    return task, pd.DataFrame({'Date': [check_in] * rows})
+
+
+def test_invalid_limits():
+    with pytest.raises(ValueError):
+        BackgroundWriter(write=lambda batch: None, max_queued_results=0)
+    with pytest.raises(ValueError):
+        BackgroundWriter(write=lambda batch: None, flush_rows=0)
+    with pytest.raises(ValueError):
+        BackgroundWriter(write=lambda batch: None, flush_interval=0)
+
+
+@pytest.mark.asyncio
+async def test_writes_in_a_thread_by_size():
+    batches = []
+    write_threads = set()
+
+    def write(batch):
+        write_threads.add(threading.get_ident())
+        batches.append([task.check_in for task, _ in batch])
+
+    async with BackgroundWriter(write=write, flush_rows=4, flush_interval=60) as writer:
+        for day in range(1, 6):
+            await writer.put(*create_result(day, rows=2))
+
+    assert batches == [['2025-01-01', '2025-01-02'], ['2025-01-03', '2025-01-04'], ['2025-01-05']]
+    assert threading.get_ident() not in write_threads
+
+
+@pytest.mark.asyncio
+async def test_writes_by_age():
+    batches = []
+
+    async with BackgroundWriter(write=batches.append, flush_rows=1000, flush_interval=0.01) as writer:
+        await writer.put(*create_result(1))
+        await asyncio.sleep(0.1)
+        assert len(batches) == 1
+        await writer.put(*create_result(2))
+
+    assert [len(batch) for batch in batches] == [1, 1]
+
+
+@pytest.mark.asyncio
+async def test_queue_is_bounded_while_writing():
+    release_write = threading.Event()
+    written = []
+
+    def slow_write(batch):
+        release_write.wait()
+        written.extend(batch)
+
+    async with BackgroundWriter(write=slow_write, max_queued_results=2, flush_rows=1) as writer:
+        # The first result is being written, the next two fill the queue
+        for day in range(1, 4):
+            await asyncio.wait_for(writer.put(*create_result(day)), 1)
+        await asyncio.sleep(0.01)
+
+        blocked_put = asyncio.ensure_future(writer.put(*create_result(4)))
+        await asyncio.sleep(0.05)
+        assert not blocked_put.done()
+        assert writer.queue.qsize() == 2
+
+        release_write.set()
+        await asyncio.wait_for(blocked_put, 1)
+
+    assert len(written) == 4
+
+
+@pytest.mark.asyncio
+async def test_write_error_is_raised():
+    def failing_write(batch):
+        raise RuntimeError('Database is down')
+
+    with pytest.raises(RuntimeError, match='Database is down'):
+        async with BackgroundWriter(write=failing_write, max_queued_results=1, flush_rows=1) as writer:
+            for day in range(1, 6):
+                await writer.put(*create_result(day))
+
+
+@pytest.mark.asyncio
+async def test_pending_results_are_written_when_scraping_fails():
+    batches = []
+
+    with pytest.raises(RuntimeError):
+        async with BackgroundWriter(write=batches.append, flush_rows=1000, flush_interval=60) as writer:
+            await writer.put(*create_result(1))
+            raise RuntimeError('Scraping failed')
+
+    assert len(batches) == 1
+
+
+@pytest.mark.asyncio
+async def test_stream_whole_month():
+    async def mock_scrape_graphql(self):
+        return pd.DataFrame({'Hotel': ['Hotel A'], 'Date': [self.check_in], 'City': [self.city]})
+
+    scraper = WholeMonthGraphQLScraper(city='Osaka', country='Japan', year=2099, month=2, check_in='',
+                                       check_out='', selected_currency='USD', max_concurrent_tasks=4,
+                                       flush_rows=10)
+    written = []
+    with patch.object(BasicGraphQLScraper, 'scrape_graphql', mock_scrape_graphql):
+        await scraper.stream_whole_month(written.append)
+
+    assert all(len(df) <= 10 for df in written)
+    assert sorted(date for df in written for date in df['Date']) == [f'2099-02-{day:02d}' for day in range(1, 29)]
+
+
+if __name__ == '__main__':
+    pytest.main()
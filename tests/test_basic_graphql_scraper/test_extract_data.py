@@ -70,7 +70,8 @@ def test_extract_hotel_data_missing_values():
     extract_hotel_data(df_list, hotel_data_list)
 
     # Assertions
-    assert len(df_list) == 2
+    # One DataFrame is built for the whole page
+    assert len(df_list) == 1
 
     # Ensure all DataFrames have consistent dtypes before concatenation
     expected_dtypes = {
@@ -135,7 +136,8 @@ def test_extract_hotel_data_basic():
     extract_hotel_data(df_list, hotel_data_list)
 
     # Assertions
-    assert len(df_list) == 2
+    # One DataFrame is built for the whole page
+    assert len(df_list) == 1
 
     # Ensure all DataFrames have consistent dtypes before concatenation
     expected_dtypes = {
@@ -157,3 +159,40 @@ def test_extract_hotel_data_basic():
     assert df['Review'].tolist() == [4.5, 4.0]
     assert df['Price'].tolist() == [150.0, 200.0]
     assert df['Location'].tolist() == ['Osaka', 'Tokyo']
+
+
+def test_extract_hotel_data_missing_keys():
+    # A missing key becomes NaN, and a hotel without any key is skipped
+    hotel_data_list = [
+        {
+            "displayName": {"text": "Hotel A"},
+            "basicPropertyData": {"reviewScore": {"score": 4.5}},
+            "blocks": [{"finalPrice": {"amount": 150}}]
+        },
+        {"policies": {}},
+        {
+            "displayName": {"text": "Hotel B"},
+            "location": {'displayLocation': 'Tokyo'}
+        }
+    ]
+
+    df_list = []
+
+    extract_hotel_data(df_list, hotel_data_list)
+
+    assert len(df_list) == 1
+    df = df_list[0]
+    assert df.shape == (2, 4)
+    assert df['Hotel'].tolist() == ['Hotel A', 'Hotel B']
+    assert np.isnan(df['Location'].iloc[0])
+    assert df['Location'].iloc[1] == 'Tokyo'
+    assert np.isnan(df['Review'].iloc[1])
+    assert np.isnan(df['Price'].iloc[1])
+
+
+def test_extract_hotel_data_page_without_hotels():
+    df_list = []
+
+    extract_hotel_data(df_list, [{"policies": {}}])
+
+    assert df_list == []
@@ -2,7 +2,7 @@ import pytest
 from aiohttp import ClientSession
 from aioresponses import aioresponses
 
-from japan_avg_hotel_price_finder.graphql_scraper_func.graphql_request_func import fetch_hotel_data
+from japan_avg_hotel_price_finder.graphql_scraper_func.graphql_request_func import fetch_hotel_data, fetch_page_data
 
 
 @pytest.mark.asyncio
@@ -64,5 +64,25 @@ async def test_fetch_hotel_data_missing_keys():
 
         assert result == []
 
+@pytest.mark.asyncio
+async def test_fetch_page_data_keeps_whole_response():
+    url = "http://example.com/graphql"
+    headers = {"Content-Type": "application/json"}
+    graphql_query = {"query": "some graphql query"}
+    expected_data = {"data": {"searchQueries": {"search": {"pagination": {"nbResultsTotal": 1},
+                                                           "breadcrumbs": [{"name": "Japan"}],
+                                                           "results": [{"id": "1", "name": "Hotel One"}]}}}}
+
+    with aioresponses() as m:
+        m.post(url, payload=expected_data)
+        m.post(url, status=404)
+
+        async with ClientSession() as session:
+            result = await fetch_page_data(session, url, headers, graphql_query)
+            failed_result = await fetch_page_data(session, url, headers, graphql_query)
+
+        assert result == expected_data
+        assert failed_result == {}
+
 if __name__ == "__main__":
     pytest.main()
@@ -0,0 +1,37 @@
+from unittest.mock import patch, AsyncMock
+
+import pytest
+
+from japan_avg_hotel_price_finder.graphql_scraper import BasicGraphQLScraper
+
+
+@pytest.fixture
+def scraper():
+    return BasicGraphQLScraper(
+        city='Tokyo',
+        country='Japan',
+        check_in='2023-10-01',
+        check_out='2023-10-02',
+        selected_currency='USD'
+    )
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("total_page_num, expected_offsets", [
+    (50, []),
+    (100, []),
+    (300, [100, 200]),
+    (301, [100, 200, 300]),
+])
+async def test_fetch_pages_skips_first_page(scraper, total_page_num, expected_offsets):
+    with patch('japan_avg_hotel_price_finder.graphql_scraper.fetch_page_data', new_callable=AsyncMock) as mock_fetch:
+        mock_fetch.return_value = {}
+        pages = await scraper._fetch_pages(total_page_num)
+
+    offsets = [call.args[3]['variables']['input']['pagination']['offset'] for call in mock_fetch.call_args_list]
+    assert offsets == expected_offsets
+    assert len(pages) == len(expected_offsets)
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,87 @@
+import pytest
+from aioresponses import aioresponses
+from pydantic import ValidationError
+
+from japan_avg_hotel_price_finder.graphql_scraper import BasicGraphQLScraper
+from japan_avg_hotel_price_finder.graphql_scraper_func.graphql_query_func import FULL_SEARCH_QUERY, \
+    MINIMAL_SEARCH_QUERY, get_search_query
+
+
+@pytest.fixture
+def scraper():
+    return BasicGraphQLScraper(
+        city='Tokyo',
+        country='Japan',
+        check_in='2023-10-01',
+        check_out='2023-10-02',
+        selected_currency='USD',
+        query_profile='minimal'
+    )
+
+
+def test_get_search_query():
+    assert get_search_query('full') == FULL_SEARCH_QUERY
+    assert get_search_query('minimal') == MINIMAL_SEARCH_QUERY
+    with pytest.raises(ValueError):
+        get_search_query('unknown')
+
+
+def test_minimal_query_only_asks_for_used_fields():
+    assert len(MINIMAL_SEARCH_QUERY) < len(FULL_SEARCH_QUERY) / 10
+    for field in ['breadcrumbs', 'dateRangeCalendar', 'appliedFilterOptions', 'nbResultsTotal', 'searchMeta',
+                  'displayName', 'reviewScore: reviews', 'score: totalScore', 'finalPrice', 'displayLocation']:
+        assert field in MINIMAL_SEARCH_QUERY
+    for field in ['banners', 'carousels', 'sorters', 'propertySustainability', 'photos', 'geniusInfo']:
+        assert field not in MINIMAL_SEARCH_QUERY
+
+
+def test_get_graphql_query_with_minimal_profile(scraper):
+    query = scraper._get_graphql_query(page_offset=100)
+
+    assert query['operationName'] == 'FullSearch'
+    assert query['query'] == MINIMAL_SEARCH_QUERY
+    assert 'carouselLowCodeExp' not in query['variables']
+    assert query['variables']['input']['pagination']['offset'] == 100
+
+
+def test_get_graphql_query_profile_override(scraper):
+    query = scraper._get_graphql_query(query_profile='full')
+
+    assert query['query'] == FULL_SEARCH_QUERY
+    assert query['variables']['carouselLowCodeExp'] is False
+
+
+def test_invalid_query_profile():
+    with pytest.raises(ValidationError):
+        BasicGraphQLScraper(city='Tokyo', country='Japan', check_in='2023-10-01', check_out='2023-10-02',
+                            query_profile='tiny')
+
+
+@pytest.mark.asyncio
+async def test_compare_query_profiles(scraper):
+    url = scraper._get_graphql_url()
+    with aioresponses() as mocked:
+        mocked.post(url, payload={'data': {'searchQueries': {'search': {'results': [{'a': 'x' * 1000}]}}}})
+        mocked.post(url, payload={'data': {'searchQueries': {'search': {'results': []}}}})
+
+        measurements = await scraper.compare_query_profiles()
+
+    assert set(measurements) == {'full', 'minimal'}
+    assert measurements['minimal']['bytes'] < measurements['full']['bytes']
+    assert measurements['full']['latency_seconds'] >= 0
+
+
+@pytest.mark.asyncio
+async def test_compare_query_profiles_error_status(scraper):
+    url = scraper._get_graphql_url()
+    with aioresponses() as mocked:
+        mocked.post(url, status=500)
+        mocked.post(url, payload={})
+
+        measurements = await scraper.compare_query_profiles()
+
+    assert set(measurements) == {'minimal'}
+
+
+if __name__ == '__main__':
+    pytest.main()
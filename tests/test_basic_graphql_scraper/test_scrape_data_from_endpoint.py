@@ -2,6 +2,11 @@ import pytest
 from unittest.mock import patch, AsyncMock
 from japan_avg_hotel_price_finder.graphql_scraper import BasicGraphQLScraper
 
+
+def create_page(results):
+    return {'data': {'searchQueries': {'search': {'results': results}}}}
+
+
 @pytest.fixture
 def scraper():
     return BasicGraphQLScraper(
@@ -18,11 +23,11 @@ def scraper():
     )
 
 @pytest.mark.asyncio
-@patch('japan_avg_hotel_price_finder.graphql_scraper.BasicGraphQLScraper._fetch_hotel_data', new_callable=AsyncMock)
+@patch('japan_avg_hotel_price_finder.graphql_scraper.BasicGraphQLScraper._fetch_pages', new_callable=AsyncMock)
 @patch('japan_avg_hotel_price_finder.graphql_scraper.extract_hotel_data')
-async def test_scrape_data_from_endpoint_case1(mock_extract_hotel_data, mock_fetch_hotel_data, scraper, caplog):
+async def test_scrape_data_from_endpoint_case1(mock_extract_hotel_data, mock_fetch_pages, scraper, caplog):
     # Normal case
-    mock_fetch_hotel_data.return_value = [[{'hotel': 'Hotel1'}], [{'hotel': 'Hotel2'}]]
+    mock_fetch_pages.return_value = [create_page([{'hotel': 'Hotel1'}]), create_page([{'hotel': 'Hotel2'}])]
     mock_extract_hotel_data.side_effect = lambda df_list, hotel_data_list: df_list.append(hotel_data_list)
 
     with caplog.at_level('INFO'):
@@ -33,11 +38,11 @@ async def test_scrape_data_from_endpoint_case1(mock_extract_hotel_data, mock_fet
     assert [{'hotel': 'Hotel2'}] in df_list
 
 @pytest.mark.asyncio
-@patch('japan_avg_hotel_price_finder.graphql_scraper.BasicGraphQLScraper._fetch_hotel_data', new_callable=AsyncMock)
+@patch('japan_avg_hotel_price_finder.graphql_scraper.BasicGraphQLScraper._fetch_pages', new_callable=AsyncMock)
 @patch('japan_avg_hotel_price_finder.graphql_scraper.extract_hotel_data')
-async def test_scrape_data_from_endpoint_case2(mock_extract_hotel_data, mock_fetch_hotel_data, scraper):
+async def test_scrape_data_from_endpoint_case2(mock_extract_hotel_data, mock_fetch_pages, scraper):
     # Normal case 2
-    mock_fetch_hotel_data.return_value = [[{'hotel': 'Hotel1'}], [{}]]
+    mock_fetch_pages.return_value = [create_page([{'hotel': 'Hotel1'}]), create_page([{}])]
     mock_extract_hotel_data.side_effect = lambda df_list, hotel_data_list: df_list.append(hotel_data_list)
 
     df_list = await scraper._scrape_data_from_endpoint(2)
@@ -47,11 +52,11 @@ async def test_scrape_data_from_endpoint_case2(mock_extract_hotel_data, mock_fet
     assert [{}] in df_list
 
 @pytest.mark.asyncio
-@patch('japan_avg_hotel_price_finder.graphql_scraper.BasicGraphQLScraper._fetch_hotel_data', new_callable=AsyncMock)
+@patch('japan_avg_hotel_price_finder.graphql_scraper.BasicGraphQLScraper._fetch_pages', new_callable=AsyncMock)
 @patch('japan_avg_hotel_price_finder.graphql_scraper.extract_hotel_data')
-async def test_scrape_data_from_endpoint_case3(mock_extract_hotel_data, mock_fetch_hotel_data, scraper):
+async def test_scrape_data_from_endpoint_case3(mock_extract_hotel_data, mock_fetch_pages, scraper):
     # Normal case 3
-    mock_fetch_hotel_data.return_value = [[{'hotel': 'Hotel1'}], [{'blocks': 'invalid_data'}]]
+    mock_fetch_pages.return_value = [create_page([{'hotel': 'Hotel1'}]), create_page([{'blocks': 'invalid_data'}])]
     mock_extract_hotel_data.side_effect = lambda df_list, hotel_data_list: df_list.append(hotel_data_list)
 
     df_list = await scraper._scrape_data_from_endpoint(2)
@@ -61,11 +66,11 @@ async def test_scrape_data_from_endpoint_case3(mock_extract_hotel_data, mock_fet
     assert [{'blocks': 'invalid_data'}] in df_list
 
 @pytest.mark.asyncio
-@patch('japan_avg_hotel_price_finder.graphql_scraper.BasicGraphQLScraper._fetch_hotel_data', new_callable=AsyncMock)
+@patch('japan_avg_hotel_price_finder.graphql_scraper.BasicGraphQLScraper._fetch_pages', new_callable=AsyncMock)
 @patch('japan_avg_hotel_price_finder.graphql_scraper.extract_hotel_data')
-async def test_scrape_data_from_endpoint_case4(mock_extract_hotel_data, mock_fetch_hotel_data, scraper):
+async def test_scrape_data_from_endpoint_case4(mock_extract_hotel_data, mock_fetch_pages, scraper):
     # Normal case 4
-    mock_fetch_hotel_data.return_value = [[{'hotel': 'Hotel1'}], [{'blocks': [{}]}]]
+    mock_fetch_pages.return_value = [create_page([{'hotel': 'Hotel1'}]), create_page([{'blocks': [{}]}])]
     mock_extract_hotel_data.side_effect = lambda df_list, hotel_data_list: df_list.append(hotel_data_list)
 
     df_list = await scraper._scrape_data_from_endpoint(2)
@@ -75,14 +80,40 @@ async def test_scrape_data_from_endpoint_case4(mock_extract_hotel_data, mock_fet
     assert [{'blocks': [{}]}] in df_list
 
 @pytest.mark.asyncio
-@patch('japan_avg_hotel_price_finder.graphql_scraper.BasicGraphQLScraper._fetch_hotel_data', new_callable=AsyncMock)
+@patch('japan_avg_hotel_price_finder.graphql_scraper.BasicGraphQLScraper._fetch_pages', new_callable=AsyncMock)
 @patch('japan_avg_hotel_price_finder.graphql_scraper.extract_hotel_data')
-async def test_scrape_data_from_endpoint_case5(mock_extract_hotel_data, mock_fetch_hotel_data, scraper):
+async def test_scrape_data_from_endpoint_case5(mock_extract_hotel_data, mock_fetch_pages, scraper):
     # Normal case 5
-    mock_fetch_hotel_data.return_value = [[{'hotel': 'Hotel1'}]]
+    mock_fetch_pages.return_value = [create_page([{'hotel': 'Hotel1'}])]
     mock_extract_hotel_data.side_effect = lambda df_list, hotel_data_list: df_list.append(hotel_data_list)
 
     df_list = await scraper._scrape_data_from_endpoint(1)
 
     assert len(df_list) == 1
-    assert [{'hotel': 'Hotel1'}] in df_list
\ No newline at end of file
+    assert [{'hotel': 'Hotel1'}] in df_list
+
+@pytest.mark.asyncio
+@patch('japan_avg_hotel_price_finder.graphql_scraper.BasicGraphQLScraper._fetch_pages', new_callable=AsyncMock)
+@patch('japan_avg_hotel_price_finder.graphql_scraper.extract_hotel_data')
+async def test_scrape_data_from_endpoint_reuses_first_page(mock_extract_hotel_data, mock_fetch_pages, scraper):
+    # The first page comes from the response used to find the total page number
+    scraper.data = create_page([{'hotel': 'Hotel1'}])
+    mock_fetch_pages.return_value = [create_page([{'hotel': 'Hotel2'}])]
+    mock_extract_hotel_data.side_effect = lambda df_list, hotel_data_list: df_list.append(hotel_data_list)
+
+    df_list = await scraper._scrape_data_from_endpoint(150)
+
+    assert df_list == [[{'hotel': 'Hotel1'}], [{'hotel': 'Hotel2'}]]
+
+@pytest.mark.asyncio
+@patch('japan_avg_hotel_price_finder.graphql_scraper.BasicGraphQLScraper._fetch_pages', new_callable=AsyncMock)
+@patch('japan_avg_hotel_price_finder.graphql_scraper.extract_hotel_data')
+async def test_scrape_data_from_endpoint_skips_pages_without_results(mock_extract_hotel_data, mock_fetch_pages,
+                                                                     scraper):
+    # Failed and malformed pages are skipped
+    mock_fetch_pages.return_value = [create_page([{'hotel': 'Hotel1'}]), {}, {'data': None}]
+    mock_extract_hotel_data.side_effect = lambda df_list, hotel_data_list: df_list.append(hotel_data_list)
+
+    df_list = await scraper._scrape_data_from_endpoint(300)
+
+    assert df_list == [[{'hotel': 'Hotel1'}]]
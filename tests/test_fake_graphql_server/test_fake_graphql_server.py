@@ -0,0 +1,102 @@
+import pandas as pd
+import pytest
+
+from japan_avg_hotel_price_finder.fake_graphql_server import FakeGraphQLServer, FakeServerConfig, create_hotel
+from japan_avg_hotel_price_finder.graphql_scraper import BasicGraphQLScraper
+from japan_avg_hotel_price_finder.graphql_scraper_func.graphql_rate_limiter import RetryPolicy, \
+    TokenBucketRateLimiter
+from japan_avg_hotel_price_finder.graphql_scraper_func.graphql_request_func import get_page_results
+from japan_avg_hotel_price_finder.sql.scrape_manifest import get_manifest_entries
+from japan_avg_hotel_price_finder.whole_mth_graphql_scraper import WholeMonthGraphQLScraper
+
+FAST_RETRY_POLICY = RetryPolicy(max_retries=10, base_delay=0.001, max_delay=0.01)
+
+
+def create_scraper(base_url: str, **kwargs) -> BasicGraphQLScraper:
+    return BasicGraphQLScraper(city='Osaka', country='Japan', check_in='2025-02-01', check_out='2025-02-02',
+                               base_url=base_url, retry_policy=FAST_RETRY_POLICY,
+                               rate_limiter=TokenBucketRateLimiter(requests_per_second=1000, burst=1000), **kwargs)
+
+
+def test_invalid_config():
+    with pytest.raises(ValueError):
+        FakeServerConfig(num_results=-1)
+    with pytest.raises(ValueError):
+        FakeServerConfig(rate_limit_rate=0.6, server_error_rate=0.6)
+
+
+def test_hotels_are_deterministic():
+    assert create_hotel('Osaka', '2025-02-01', 7, 'USD') == create_hotel('Osaka', '2025-02-01', 7, 'USD')
+    assert create_hotel('Osaka', '2025-02-01', 7, 'USD') != create_hotel('Osaka', '2025-02-02', 7, 'USD')
+
+
+@pytest.mark.asyncio
+async def test_scrape_all_pages():
+    async with FakeGraphQLServer(FakeServerConfig(num_results=250)) as server:
+        df = await create_scraper(server.base_url).scrape_graphql()
+        df_again = await create_scraper(server.base_url).scrape_graphql()
+
+    assert len(df) == 250
+    assert set(df['City']) == {'Osaka'}
+    assert set(df['Date']) == {'2025-02-01'}
+    pd.testing.assert_frame_equal(df.drop(columns='AsOf'), df_again.drop(columns='AsOf'))
+    # One request finds the total page number and returns the first page, then two more pages
+    assert server.stats.requests == 6
+    assert server.stats.status_counts == {200: 6}
+
+
+@pytest.mark.asyncio
+async def test_scraped_data_carries_its_manifest_entry():
+    async with FakeGraphQLServer(FakeServerConfig(num_results=250)) as server:
+        df = await create_scraper(server.base_url, group_adults=2).scrape_graphql()
+
+    [entry] = get_manifest_entries(df)
+    assert (entry.city, entry.date, entry.rows, entry.requests) == ('Osaka', '2025-02-01', 250, 3)
+    assert (entry.nights, entry.adults, entry.children, entry.rooms) == (1, 2, 0, 1)
+    assert entry.as_of == f"{df['AsOf'].iloc[0]:%Y-%m-%d}"
+    assert entry.duration > 0
+
+
+@pytest.mark.asyncio
+async def test_scrape_with_injected_failures_and_latency():
+    config = FakeServerConfig(num_results=500, latency=0.005, latency_distribution='exponential',
+                              rate_limit_rate=0.2, server_error_rate=0.2, seed=3)
+    async with FakeGraphQLServer(config) as server:
+        df = await create_scraper(server.base_url).scrape_graphql()
+
+    assert len(df) == 500
+    assert server.stats.status_counts[429] > 0
+    assert server.stats.status_counts[500] > 0
+    assert server.stats.status_counts[200] == 5
+
+
+@pytest.mark.asyncio
+async def test_scrape_with_malformed_payloads():
+    config = FakeServerConfig(num_results=1000, malformed_rate=0.3, seed=1)
+    async with FakeGraphQLServer(config) as server:
+        scraper = create_scraper(server.base_url)
+        scraper.data = {}
+        scraper.url = scraper._get_graphql_url()
+        pages = await scraper._fetch_pages(1000)
+
+    # Malformed pages are skipped instead of failing the other pages
+    assert server.stats.malformed > 0
+    assert len(pages) == 9
+    assert sum(1 for page in pages if get_page_results(page) == []) == server.stats.malformed
+
+
+@pytest.mark.asyncio
+async def test_whole_month_scraper():
+    async with FakeGraphQLServer(FakeServerConfig(num_results=120)) as server:
+        scraper = WholeMonthGraphQLScraper(city='Osaka', country='Japan', year=2099, month=2, check_in='',
+                                           check_out='', base_url=server.base_url, max_concurrent_tasks=7,
+                                           retry_policy=FAST_RETRY_POLICY,
+                                           rate_limiter=TokenBucketRateLimiter(requests_per_second=1000, burst=1000))
+        df = await scraper.scrape_whole_month()
+
+    assert len(df) == 120 * 28
+    assert df['Date'].nunique() == 28
+
+
+if __name__ == '__main__':
+    pytest.main()
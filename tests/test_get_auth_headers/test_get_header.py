@@ -0,0 +1,59 @@
+import pytest
+
+from japan_avg_hotel_price_finder.graphql_scraper_func.graphql_request_func import get_header
+
+HEADER_ENV_VARS = {
+    "User-Agent": "USER_AGENT",
+    "x-booking-context-action-name": "X_BOOKING_CONTEXT_ACTION_NAME",
+    "x-booking-context-aid": "X_BOOKING_CONTEXT_AID",
+    "x-booking-csrf-token": "X_BOOKING_CSRF_TOKEN",
+    "x-booking-et-serialized-state": "X_BOOKING_ET_SERIALIZED_STATE",
+    "x-booking-pageview-id": "X_BOOKING_PAGEVIEW_ID",
+    "x-booking-site-type-id": "X_BOOKING_SITE_TYPE_ID",
+    "x-booking-topic": "X_BOOKING_TOPIC",
+}
+
+
+@pytest.fixture
+def header_env(monkeypatch):
+    for env_var in HEADER_ENV_VARS.values():
+        monkeypatch.setenv(env_var, f"{env_var.lower()}_value")
+    return monkeypatch
+
+
+def test_get_header_with_all_env_vars_set(header_env):
+    headers = get_header()
+
+    assert headers == {header: f"{env_var.lower()}_value" for header, env_var in HEADER_ENV_VARS.items()}
+
+
+def test_get_header_leaves_out_unset_env_vars(header_env):
+    header_env.delenv("X_BOOKING_CSRF_TOKEN")
+    header_env.delenv("X_BOOKING_TOPIC")
+
+    headers = get_header()
+
+    assert "x-booking-csrf-token" not in headers
+    assert "x-booking-topic" not in headers
+    assert headers["User-Agent"] == "user_agent_value"
+    assert headers["x-booking-pageview-id"] == "x_booking_pageview_id_value"
+    assert None not in headers.values()
+
+
+def test_get_header_keeps_empty_env_vars(header_env):
+    header_env.setenv("X_BOOKING_CSRF_TOKEN", "")
+
+    headers = get_header()
+
+    assert headers["x-booking-csrf-token"] == ""
+
+
+def test_get_header_without_env_vars(monkeypatch):
+    for env_var in HEADER_ENV_VARS.values():
+        monkeypatch.delenv(env_var, raising=False)
+
+    assert get_header() == {}
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,136 @@
+import asyncio
+import time
+from unittest.mock import patch
+
+import pytest
+from aiohttp import ClientSession
+from aioresponses import aioresponses
+
+from japan_avg_hotel_price_finder.graphql_scraper_func.graphql_rate_limiter import RetryPolicy, \
+    TokenBucketRateLimiter, parse_retry_after, rate_limited_post
+from japan_avg_hotel_price_finder.graphql_scraper_func.graphql_request_func import fetch_hotel_data
+
+URL = "http://example.com/graphql"
+HOTEL_DATA = {"data": {"searchQueries": {"search": {"results": [{"id": "1", "name": "Hotel One"}]}}}}
+
+
+@pytest.fixture
+def no_sleep():
+    """Skip the backoff delays, but record them."""
+    delays = []
+
+    async def mock_sleep(delay):
+        delays.append(delay)
+
+    with patch('japan_avg_hotel_price_finder.graphql_scraper_func.graphql_rate_limiter.asyncio.sleep', mock_sleep):
+        yield delays
+
+
+def test_invalid_rate_limiter():
+    with pytest.raises(ValueError):
+        TokenBucketRateLimiter(requests_per_second=0)
+    with pytest.raises(ValueError):
+        TokenBucketRateLimiter(burst=0)
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_allows_burst_then_sustained_rate():
+    rate_limiter = TokenBucketRateLimiter(requests_per_second=100, burst=5)
+
+    start_time = time.monotonic()
+    for _ in range(5):
+        await rate_limiter.acquire()
+    assert time.monotonic() - start_time < 0.02
+
+    for _ in range(5):
+        await rate_limiter.acquire()
+    # 5 requests over the burst take at least 5 / 100 seconds
+    assert time.monotonic() - start_time >= 0.045
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_pause():
+    rate_limiter = TokenBucketRateLimiter(requests_per_second=1000, burst=10)
+    rate_limiter.pause(0.05)
+
+    start_time = time.monotonic()
+    await rate_limiter.acquire()
+    assert time.monotonic() - start_time >= 0.045
+
+
+def test_parse_retry_after():
+    assert parse_retry_after(None) is None
+    assert parse_retry_after('') is None
+    assert parse_retry_after('3') == 3.0
+    assert parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT') == 0.0
+    assert parse_retry_after('not a date') is None
+
+
+def test_get_delay_is_capped_and_honours_retry_after():
+    retry_policy = RetryPolicy(base_delay=1, max_delay=4)
+    for attempt in range(10):
+        assert 0 <= retry_policy.get_delay(attempt) <= min(4, 2 ** attempt)
+    assert retry_policy.get_delay(0, retry_after='30') == 30
+
+
+@pytest.mark.asyncio
+async def test_fetch_hotel_data_retries_429_and_5xx(no_sleep):
+    with aioresponses() as m:
+        m.post(URL, status=429, headers={'Retry-After': '7'})
+        m.post(URL, status=503)
+        m.post(URL, payload=HOTEL_DATA)
+
+        async with ClientSession() as session:
+            result = await fetch_hotel_data(session, URL, {}, {}, retry_policy=RetryPolicy())
+
+    assert result == [{"id": "1", "name": "Hotel One"}]
+    assert len(no_sleep) == 2
+    assert no_sleep[0] == 7
+
+
+def test_429_pauses_rate_limiter():
+    rate_limiter = TokenBucketRateLimiter()
+    rate_limiter.pause(7)
+    assert rate_limiter.tokens == 0
+    assert rate_limiter.paused_until - time.monotonic() > 6
+
+
+@pytest.mark.asyncio
+async def test_fetch_hotel_data_retries_timeout(no_sleep):
+    with aioresponses() as m:
+        m.post(URL, exception=asyncio.TimeoutError())
+        m.post(URL, payload=HOTEL_DATA)
+
+        async with ClientSession() as session:
+            result = await fetch_hotel_data(session, URL, {}, {})
+
+    assert result == [{"id": "1", "name": "Hotel One"}]
+    assert len(no_sleep) == 1
+
+
+@pytest.mark.asyncio
+async def test_rate_limited_post_gives_up_after_max_retries(no_sleep):
+    with aioresponses() as m:
+        m.post(URL, status=500, repeat=True)
+
+        async with ClientSession() as session:
+            async with rate_limited_post(session, URL, {}, {}, retry_policy=RetryPolicy(max_retries=2)) as response:
+                assert response.status == 500
+
+    assert len(no_sleep) == 2
+
+
+@pytest.mark.asyncio
+async def test_rate_limited_post_does_not_retry_client_errors(no_sleep):
+    with aioresponses() as m:
+        m.post(URL, status=404)
+
+        async with ClientSession() as session:
+            async with rate_limited_post(session, URL, {}, {}) as response:
+                assert response.status == 404
+
+    assert no_sleep == []
+
+
+if __name__ == '__main__':
+    pytest.main()
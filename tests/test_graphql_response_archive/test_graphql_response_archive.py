@@ -0,0 +1,158 @@
+import datetime
+import gzip
+import os
+from unittest.mock import patch, AsyncMock
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, text
+
+from japan_avg_hotel_price_finder.booking_details import BookingDetails
+from japan_avg_hotel_price_finder.graphql_scraper import BasicGraphQLScraper
+from japan_avg_hotel_price_finder.graphql_scraper_func.graphql_data_extractor import extract_hotel_data
+from japan_avg_hotel_price_finder.graphql_scraper_func.graphql_data_transformer import transform_data_in_df
+from japan_avg_hotel_price_finder.graphql_scraper_func.graphql_response_archive import ResponseArchive, \
+    find_archive_files, read_archive_file
+from japan_avg_hotel_price_finder.graphql_scraper_func.graphql_utils_func import concat_df_list
+from reprocess_archive import reprocess_archive, reprocess_archive_file
+
+AS_OF = datetime.datetime(2025, 1, 1, 10, 30, 15, 123456)
+BOOKING_DETAILS = BookingDetails(city='Osaka', country='Japan', check_in='2025-02-01', check_out='2025-02-02',
+                                 selected_currency='USD')
+
+
+def create_results(names: list[str], price: float) -> list[dict]:
+    return [
+        {
+            "displayName": {"text": name},
+            "basicPropertyData": {"reviewScore": {"score": 8.0}, "starRating": {"value": 4}},
+            "blocks": [{"finalPrice": {"amount": price, "currency": "USD"}}],
+            "location": {"displayLocation": "Namba", "geoDistanceMeters": 500}
+        }
+        for name in names
+    ]
+
+
+def create_page(results: list[dict], booking_details: BookingDetails = BOOKING_DETAILS,
+                hotel_filter: bool = True) -> dict:
+    return {
+        "data": {
+            "searchQueries": {
+                "search": {
+                    "pagination": {"nbResultsTotal": 250},
+                    "breadcrumbs": [{"name": booking_details.country}, {"name": booking_details.city}],
+                    "appliedFilterOptions": [{"urlId": "ht_id=204"}] if hotel_filter else [],
+                    "flexibleDatesConfig": {
+                        "dateRangeCalendar": {"checkin": [booking_details.check_in],
+                                              "checkout": [booking_details.check_out]}
+                    },
+                    "searchMeta": {"nbAdults": 1, "nbChildren": 0, "nbRooms": 1},
+                    "results": results
+                }
+            }
+        }
+    }
+
+
+@pytest.fixture
+def pages():
+    return [create_page(create_results(['Hotel A', 'Hotel B'], 100)), create_page(create_results(['Hotel C'], 150)),
+            {}]
+
+
+def test_write_and_read_pages(tmp_path, pages):
+    archive = ResponseArchive(archive_dir=str(tmp_path))
+
+    path = archive.write_pages(BOOKING_DETAILS, AS_OF, pages)
+
+    assert path == os.path.join(str(tmp_path), 'city=Osaka', 'date=2025-02-01', 'as_of=2025-01-01',
+                                '103015123456.jsonl.gz')
+    with gzip.open(path, 'rb') as file:
+        assert file.read(1) == b'{'
+    records = list(read_archive_file(path))
+    assert [record['page_offset'] for record in records] == [0, 100, 200]
+    assert [record['response'] for record in records] == pages
+    assert records[0]['as_of'] == AS_OF.isoformat()
+    assert BookingDetails(**records[0]['booking_details']) == BOOKING_DETAILS
+    # The whole response is kept, with the fields which the extractor does not read
+    search = records[0]['response']['data']['searchQueries']['search']
+    assert search['breadcrumbs'] == [{"name": "Japan"}, {"name": "Osaka"}]
+    assert search['pagination'] == {"nbResultsTotal": 250}
+    assert search['results'][0]['location']['geoDistanceMeters'] == 500
+    assert not os.path.exists(f'{path}.tmp')
+
+
+def test_find_archive_files(tmp_path, pages):
+    archive = ResponseArchive(archive_dir=str(tmp_path))
+    osaka_path = archive.write_pages(BOOKING_DETAILS, AS_OF, pages)
+    tokyo_path = archive.write_pages(BOOKING_DETAILS.model_copy(update={'city': 'Tokyo'}), AS_OF, pages)
+
+    assert find_archive_files(str(tmp_path)) == sorted([osaka_path, tokyo_path])
+    assert find_archive_files(str(tmp_path), 'Osaka') == [osaka_path]
+    assert find_archive_files(str(tmp_path / 'missing')) == []
+
+
+def test_reprocess_matches_scraping(tmp_path, pages):
+    path = ResponseArchive(archive_dir=str(tmp_path)).write_pages(BOOKING_DETAILS, AS_OF, pages)
+
+    df_list = []
+    for page in pages:
+        if page:
+            extract_hotel_data(df_list, page['data']['searchQueries']['search']['results'])
+    expected = transform_data_in_df('2025-02-01', 'Osaka', concat_df_list(df_list), as_of=AS_OF)
+
+    result = reprocess_archive_file(path)
+
+    pd.testing.assert_frame_equal(result, expected)
+    assert (result['AsOf'] == AS_OF).all()
+
+
+@pytest.mark.parametrize("response_booking_details, hotel_filter", [
+    (BOOKING_DETAILS.model_copy(update={'city': 'Kyoto'}), True),
+    (BOOKING_DETAILS.model_copy(update={'country': 'Korea'}), True),
+    (BOOKING_DETAILS.model_copy(update={'check_out': '2025-02-03'}), True),
+    (BOOKING_DETAILS, False),
+])
+def test_reprocess_skips_response_not_matching_booking_details(tmp_path, response_booking_details, hotel_filter):
+    pages = [create_page(create_results(['Hotel A'], 100), response_booking_details, hotel_filter)]
+    path = ResponseArchive(archive_dir=str(tmp_path)).write_pages(BOOKING_DETAILS, AS_OF, pages)
+
+    assert reprocess_archive_file(path).empty
+
+
+@pytest.mark.asyncio
+@patch('japan_avg_hotel_price_finder.graphql_scraper.BasicGraphQLScraper._fetch_pages', new_callable=AsyncMock)
+async def test_scraper_archives_every_page(mock_fetch_pages, tmp_path, pages):
+    mock_fetch_pages.return_value = pages[1:]
+    scraper = BasicGraphQLScraper(**BOOKING_DETAILS.model_dump(),
+                                  response_archive=ResponseArchive(archive_dir=str(tmp_path)))
+    scraper.data = pages[0]
+
+    await scraper._scrape_data_from_endpoint(300, AS_OF)
+
+    archive_files = find_archive_files(str(tmp_path))
+    assert len(archive_files) == 1
+    records = list(read_archive_file(archive_files[0]))
+    assert [record['response'] for record in records] == pages
+    assert BookingDetails(**records[0]['booking_details']) == BOOKING_DETAILS
+
+
+def test_reprocess_archive_saves_to_database(tmp_path, pages):
+    archive = ResponseArchive(archive_dir=str(tmp_path / 'archive'))
+    for check_in in ('2025-02-01', '2025-02-02'):
+        booking_details = BOOKING_DETAILS.model_copy(update={'check_in': check_in, 'check_out': '2025-02-03'})
+        archive.write_pages(booking_details, AS_OF, [create_page(results, booking_details)
+                                                     for results in (create_results(['Hotel A', 'Hotel B'], 100),
+                                                                     create_results(['Hotel C'], 150))])
+    engine = create_engine(f'sqlite:///{tmp_path / "test_reprocess_archive.db"}')
+
+    saved_rows = reprocess_archive(find_archive_files(archive.archive_dir), engine, max_workers=2)
+
+    assert saved_rows == 6
+    with engine.connect() as conn:
+        assert conn.execute(text('SELECT COUNT(*) FROM "HotelPrice"')).scalar() == 6
+        assert conn.execute(text('SELECT COUNT(*) FROM "AverageRoomPriceByDateTable"')).scalar() == 2
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,70 @@
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from japan_avg_hotel_price_finder.graphql_scraper import BasicGraphQLScraper
+from japan_avg_hotel_price_finder.graphql_scraper_func.graphql_session_func import SessionStats, \
+    create_client_session
+
+
+async def handle_graphql(request: web.Request) -> web.Response:
+    return web.json_response({'data': {}})
+
+
+@pytest.fixture
+def scraper():
+    return BasicGraphQLScraper(
+        city='Tokyo',
+        country='Japan',
+        check_in='2023-10-01',
+        check_out='2023-10-02',
+        selected_currency='USD'
+    )
+
+
+@pytest.mark.asyncio
+async def test_create_client_session_counts_new_and_reused_connections():
+    app = web.Application()
+    app.router.add_post('/dml/graphql', handle_graphql)
+
+    stats = SessionStats()
+    async with TestServer(app) as server:
+        async with create_client_session(stats) as session:
+            for _ in range(3):
+                async with session.post(server.make_url('/dml/graphql'), json={}) as response:
+                    assert response.status == 200
+                    await response.read()
+
+    assert stats.new_connections == 1
+    assert stats.reused_connections == 2
+    assert stats.requests_sent == 3
+
+
+@pytest.mark.asyncio
+async def test_create_client_session_without_stats():
+    async with create_client_session() as session:
+        assert not session.closed
+        assert session.connector.limit_per_host > 0
+
+
+@pytest.mark.asyncio
+async def test_shared_session_reuses_injected_session(scraper):
+    async with create_client_session() as session:
+        scraper.session = session
+        async with scraper.shared_session() as shared_session:
+            assert shared_session is session
+        assert not session.closed
+
+
+@pytest.mark.asyncio
+async def test_shared_session_opens_and_closes_own_session(scraper):
+    async with scraper.shared_session() as outer_session:
+        async with scraper.shared_session() as inner_session:
+            assert inner_session is outer_session
+
+    assert outer_session.closed
+    assert scraper.session is None
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,109 @@
+import calendar
+import datetime
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, text
+
+from japan_avg_hotel_price_finder.graphql_scraper import BasicGraphQLScraper
+from japan_avg_hotel_price_finder.japan_hotel_scraper import JapanScraper
+
+YEAR = datetime.date.today().year + 1
+DAYS_IN_FEBRUARY = calendar.monthrange(YEAR, 2)[1]
+
+
+def create_scraper(engine, **kwargs) -> JapanScraper:
+    return JapanScraper(
+        engine=engine, city='Osaka', year=YEAR, month=1, start_month=1, end_month=2, country='Japan',
+        check_in='', check_out='', group_adults=1, num_rooms=1, group_children=0, selected_currency='USD',
+        scrape_only_hotel=True, as_of='2025-01-01', **kwargs
+    )
+
+
+def create_hotel_data(check_in: str) -> pd.DataFrame:
+    return pd.DataFrame({
+        'Hotel': [f'Hotel {check_in}'],
+        'Price': [100.0],
+        'Review': [8.0],
+        'Location': ['Namba'],
+        'Price/Review': [12.5],
+        'City': ['Osaka'],
+        'Date': [check_in],
+        'AsOf': [datetime.datetime(2025, 1, 1)]
+    })
+
+
+def read_loaded_dates(engine) -> list[str]:
+    with engine.connect() as conn:
+        return [row.Date for row in conn.execute(text('SELECT "Date" FROM "JapanHotels" ORDER BY "Date"'))]
+
+
+@pytest.mark.asyncio
+async def test_resumed_run_only_scrapes_incomplete_check_ins(tmp_path):
+    engine = create_engine(f'sqlite:///{tmp_path / "test_japan_scraper_resume.db"}')
+    requested: list[str] = []
+
+    async def crash_in_february(self):
+        requested.append(self.check_in)
+        if self.check_in == f'{YEAR}-02-10':
+            raise RuntimeError('Auth header expired')
+        return create_hotel_data(self.check_in)
+
+    with patch.object(BasicGraphQLScraper, 'scrape_graphql', new=crash_in_february):
+        with pytest.raises(RuntimeError):
+            await create_scraper(engine).scrape_japan_hotels()
+
+    # Only check-in dates finished before the crash were loaded and recorded
+    loaded_before_crash = set(read_loaded_dates(engine))
+    assert loaded_before_crash
+    assert f'{YEAR}-02-10' not in loaded_before_crash
+    all_check_ins = [f'{YEAR}-{month:02d}-{day:02d}' for month, days in ((1, 31), (2, DAYS_IN_FEBRUARY))
+                     for day in range(1, days + 1)]
+
+    requested.clear()
+
+    async def scrape(self):
+        requested.append(self.check_in)
+        return create_hotel_data(self.check_in)
+
+    with patch.object(BasicGraphQLScraper, 'scrape_graphql', new=scrape):
+        await create_scraper(engine).scrape_japan_hotels()
+
+    assert sorted(requested) == [check_in for check_in in all_check_ins if check_in not in loaded_before_crash]
+    loaded_dates = read_loaded_dates(engine)
+    assert len(loaded_dates) == len(set(loaded_dates)) == len(all_check_ins)
+
+    # Nothing is left to scrape for the same AsOf date
+    requested.clear()
+    with patch.object(BasicGraphQLScraper, 'scrape_graphql', new=scrape):
+        await create_scraper(engine).scrape_japan_hotels()
+    assert requested == []
+
+    # Without resume, every check-in date is scraped again
+    with patch.object(BasicGraphQLScraper, 'scrape_graphql', new=scrape):
+        await create_scraper(engine, resume=False).scrape_japan_hotels()
+    assert len(requested) == len(all_check_ins)
+
+
+@pytest.mark.asyncio
+async def test_check_ins_without_data_are_not_recorded(tmp_path):
+    engine = create_engine(f'sqlite:///{tmp_path / "test_japan_scraper_resume.db"}')
+    requested: list[str] = []
+
+    async def scrape_without_first_day(self):
+        requested.append(self.check_in)
+        if self.check_in.endswith('-01'):
+            return pd.DataFrame()
+        return create_hotel_data(self.check_in)
+
+    with patch.object(BasicGraphQLScraper, 'scrape_graphql', new=scrape_without_first_day):
+        await create_scraper(engine).scrape_japan_hotels()
+        requested.clear()
+        await create_scraper(engine).scrape_japan_hotels()
+
+    assert sorted(requested) == [f'{YEAR}-01-01', f'{YEAR}-02-01']
+
+
+if __name__ == '__main__':
+    pytest.main()
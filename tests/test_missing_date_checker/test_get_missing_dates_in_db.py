@@ -0,0 +1,90 @@
+import datetime
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from check_missing_dates import get_missing_dates_in_db
+from japan_avg_hotel_price_finder.sql.db_model import HotelPrice
+from japan_avg_hotel_price_finder.sql.scrape_manifest import ManifestEntry, record_manifest_entries
+
+AS_OF = datetime.datetime(2024, 2, 10, 8, 30)
+
+
+@pytest.fixture
+def db_session():
+    engine = create_engine('sqlite:///:memory:')
+    Session = sessionmaker(bind=engine)
+    HotelPrice.metadata.create_all(engine)
+    session = Session()
+    yield session
+    session.close()
+
+
+def add_dates(session, city: str, dates: list[str], as_of: datetime.datetime = AS_OF) -> None:
+    entries = [ManifestEntry(city=city, date=date, as_of=f'{as_of:%Y-%m-%d}', rows=1) for date in dates]
+    record_manifest_entries(session, HotelPrice.__tablename__, entries)
+    session.commit()
+
+
+def get_missing(session, cities: list[str], year: int = 2024, today: datetime.date = datetime.date(2024, 2, 10)):
+    rows = get_missing_dates_in_db(session, cities, year, as_of=AS_OF.date(), today=today)
+    return [(row.City, row.Date) for row in rows]
+
+
+def test_several_cities_in_one_query(db_session):
+    add_dates(db_session, 'Osaka', [f'2024-03-{day:02d}' for day in range(1, 32) if day != 15])
+    add_dates(db_session, 'Tokyo', [f'2024-03-{day:02d}' for day in range(1, 30)])
+    add_dates(db_session, 'Kyoto', [f'2024-03-{day:02d}' for day in range(1, 32)])
+
+    assert get_missing(db_session, ['Osaka', 'Tokyo', 'Kyoto', 'Nara']) == [
+        ('Osaka', '2024-03-15'), ('Tokyo', '2024-03-30'), ('Tokyo', '2024-03-31')
+    ]
+    assert get_missing(db_session, ['Tokyo']) == [('Tokyo', '2024-03-30'), ('Tokyo', '2024-03-31')]
+
+
+def test_past_dates_are_skipped(db_session):
+    add_dates(db_session, 'Osaka', ['2024-01-05', '2024-02-20'])
+
+    missing = get_missing(db_session, ['Osaka'])
+
+    assert ('Osaka', '2024-01-06') not in missing
+    assert missing[0] == ('Osaka', '2024-02-10')
+    assert ('Osaka', '2024-02-20') not in missing
+    assert missing[-1] == ('Osaka', '2024-02-29')
+    assert len(missing) == 19
+
+
+DECEMBER_MISSING = [('Osaka', f'2024-12-{day:02d}') for day in range(1, 32) if day != 30]
+
+
+@pytest.mark.parametrize("today, expected", [
+    (datetime.date(2024, 2, 28), [('Osaka', '2024-02-29')] + DECEMBER_MISSING),  # Leap year
+    (datetime.date(2024, 2, 29), [('Osaka', '2024-02-29')] + DECEMBER_MISSING),  # Last day of leap year February
+    (datetime.date(2024, 12, 31), [('Osaka', '2024-12-31')]),  # Year rollover
+    (datetime.date(2025, 1, 1), []),  # Whole year has passed
+])
+def test_special_dates(db_session, today, expected):
+    add_dates(db_session, 'Osaka', ['2024-02-28', '2024-12-30'])
+
+    assert get_missing(db_session, ['Osaka'], today=today) == expected
+
+
+def test_only_hotel_price_coverage_counts(db_session):
+    add_dates(db_session, 'Osaka', [f'2024-05-{day:02d}' for day in range(1, 31)])
+    record_manifest_entries(db_session, 'JapanHotels', [ManifestEntry(city='Osaka', date='2024-05-31',
+                                                                      as_of='2024-02-10', rows=1)])
+    db_session.commit()
+
+    assert get_missing(db_session, ['Osaka']) == [('Osaka', '2024-05-31')]
+
+
+def test_only_the_as_of_date_counts(db_session):
+    add_dates(db_session, 'Osaka', [f'2024-04-{day:02d}' for day in range(1, 30)])
+    add_dates(db_session, 'Osaka', ['2024-04-30'], as_of=AS_OF - datetime.timedelta(days=1))
+
+    assert get_missing(db_session, ['Osaka']) == [('Osaka', '2024-04-30')]
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -1,5 +1,8 @@
+import asyncio
+
 import pytest
 from unittest.mock import patch, AsyncMock, MagicMock
+from aiohttp import ClientSession
 from sqlalchemy import func, create_engine
 from sqlalchemy.orm import sessionmaker
 from freezegun import freeze_time
@@ -8,9 +11,10 @@ import pandas as pd
 
 from check_missing_dates import scrape_missing_dates
 from japan_avg_hotel_price_finder.booking_details import BookingDetails
-from japan_avg_hotel_price_finder.sql.db_model import HotelPrice, Base
+from japan_avg_hotel_price_finder.sql.db_model import HotelPrice, Base, ScrapeManifest
 from japan_avg_hotel_price_finder.graphql_scraper import BasicGraphQLScraper
 from japan_avg_hotel_price_finder.sql.save_to_db import save_scraped_data
+from japan_avg_hotel_price_finder.sql.scrape_manifest import ManifestEntry, set_manifest_entries
 
 
 @pytest.mark.asyncio
@@ -134,7 +138,7 @@ async def test_scrape_missing_dates(tmp_path) -> None:
         mock_response.__aexit__ = AsyncMock(return_value=None)
 
         # Create mock session
-        mock_session = MagicMock()
+        mock_session = MagicMock(spec=ClientSession)
         mock_session.post = MagicMock(return_value=mock_response)
         mock_session.__aenter__ = AsyncMock(return_value=mock_session)
         mock_session.__aexit__ = AsyncMock(return_value=None)
@@ -144,7 +148,7 @@ async def test_scrape_missing_dates(tmp_path) -> None:
     # Keep track of current date being processed
     current_date = None
 
-    def get_mock_session():
+    def get_mock_session(*args, **kwargs):
         nonlocal current_date
         session, data = create_mock_session(current_date)
         BasicGraphQLScraper.data = data
@@ -193,4 +197,76 @@ async def test_scrape_missing_dates(tmp_path) -> None:
         session.close()
 
     # Clean up: drop all tables
-    Base.metadata.drop_all(engine)
\ No newline at end of file
+    Base.metadata.drop_all(engine)
+
+
+@pytest.mark.asyncio
+async def test_scrape_missing_dates_concurrently_with_failures(tmp_path) -> None:
+    engine = create_engine(f'sqlite:///{tmp_path / "test_scrape_missing_dates_concurrently.db"}')
+    booking_details_param = BookingDetails(city='Osaka', group_adults=1, num_rooms=1, group_children=0,
+                                           selected_currency='USD', scrape_only_hotel=True, country='Japan')
+    missing_dates = [f'2099-03-{day:02d}' for day in range(1, 11)]
+    in_flight = 0
+    max_in_flight = 0
+
+    async def mock_scrape_graphql(self):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        if self.check_in in ('2099-03-04', '2099-03-08'):
+            raise RuntimeError('Too many retries')
+        return pd.DataFrame({'Hotel': ['Hotel A'], 'Price': [100.0], 'Review': [8.0], 'Location': ['Namba'],
+                             'Price/Review': [12.5], 'City': [self.city], 'Date': [self.check_in],
+                             'AsOf': [datetime.datetime(2099, 3, 1)]})
+
+    with patch.object(BasicGraphQLScraper, 'scrape_graphql', mock_scrape_graphql), \
+            patch('check_missing_dates.refresh_aggregate_tables') as mock_refresh:
+        failed_dates = await scrape_missing_dates(missing_dates, booking_details_class=booking_details_param,
+                                                  engine=engine, max_concurrent_tasks=3, flush_rows=4)
+
+    assert failed_dates == ['2099-03-04', '2099-03-08']
+    assert max_in_flight == 3
+
+    with sessionmaker(bind=engine)() as session:
+        saved_dates = sorted(date for date, in session.query(HotelPrice.Date).all())
+    assert saved_dates == [date for date in missing_dates if date not in failed_dates]
+
+    # Aggregates are refreshed once, for the keys of every saved date
+    mock_refresh.assert_called_once()
+    assert mock_refresh.call_args.args[1].dates == set(saved_dates)
+
+
+@pytest.mark.asyncio
+async def test_scrape_missing_dates_records_the_manifest_entries(tmp_path) -> None:
+    engine = create_engine(f'sqlite:///{tmp_path / "test_scrape_missing_dates_manifest.db"}')
+    booking_details_param = BookingDetails(city='Osaka', group_adults=2, num_rooms=1, group_children=0,
+                                           selected_currency='USD', scrape_only_hotel=True, country='Japan')
+    missing_dates = ['2099-03-01', '2099-03-02', '2099-03-03']
+
+    async def mock_scrape_graphql(self):
+        df = pd.DataFrame({'Hotel': ['Hotel A', 'Hotel B'], 'Price': [100.0, 200.0], 'Review': [8.0, 8.0],
+                           'Location': ['Namba', 'Umeda'], 'Price/Review': [12.5, 25.0], 'City': [self.city] * 2,
+                           'Date': [self.check_in] * 2, 'AsOf': [datetime.datetime(2099, 2, 1)] * 2})
+        day = int(self.check_in[-2:])
+        return set_manifest_entries(df, [ManifestEntry(city=self.city, date=self.check_in, as_of='2099-02-01',
+                                                       rows=len(df), requests=day, duration=day / 10,
+                                                       adults=self.group_adults)])
+
+    # All dates are written in one batch
+    with patch.object(BasicGraphQLScraper, 'scrape_graphql', mock_scrape_graphql), \
+            patch('check_missing_dates.refresh_aggregate_tables'):
+        await scrape_missing_dates(missing_dates, booking_details_class=booking_details_param, engine=engine,
+                                   flush_rows=100)
+
+    with sessionmaker(bind=engine)() as session:
+        rows = session.query(ScrapeManifest.Date, ScrapeManifest.Rows, ScrapeManifest.Requests,
+                             ScrapeManifest.Duration, ScrapeManifest.Adults).order_by(ScrapeManifest.Date).all()
+    assert [tuple(row) for row in rows] == [('2099-03-01', 2, 1, 0.1, 2), ('2099-03-02', 2, 2, 0.2, 2),
+                                            ('2099-03-03', 2, 3, 0.3, 2)]
+
+
+@pytest.mark.asyncio
+async def test_scrape_missing_dates_without_dates() -> None:
+    assert await scrape_missing_dates([], booking_details_class=None, engine=None) == []
@@ -0,0 +1,131 @@
+import asyncio
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from japan_avg_hotel_price_finder.graphql_scraper import BasicGraphQLScraper
+from japan_avg_hotel_price_finder.scrape_scheduler import ScrapeScheduler, ScrapeTask
+
+
+@pytest.fixture
+def scraper():
+    return BasicGraphQLScraper(
+        city='Osaka',
+        country='Japan',
+        check_in='2025-01-01',
+        check_out='2025-01-02',
+        selected_currency='USD'
+    )
+
+
+@pytest.fixture
+def tasks():
+    return [ScrapeTask(city='Osaka', check_in=f'2025-01-{day:02d}', check_out=f'2025-01-{day + 1:02d}')
+            for day in range(1, 11)]
+
+
+def test_invalid_limits():
+    with pytest.raises(ValueError):
+        ScrapeScheduler(max_concurrent_tasks=0)
+    with pytest.raises(ValueError):
+        ScrapeScheduler(max_pages_in_flight=0)
+
+
+@pytest.mark.asyncio
+async def test_run_respects_task_limit_and_keeps_order(scraper, tasks):
+    in_flight = 0
+    max_in_flight = 0
+
+    async def mock_scrape_graphql(self):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        # Finish later tasks first to make sure the results keep the task order
+        await asyncio.sleep(0.001 * (20 - int(self.check_in[-2:])))
+        in_flight -= 1
+        return pd.DataFrame({'Date': [self.check_in], 'City': [self.city]})
+
+    completed = []
+
+    async def on_result(task: ScrapeTask, df: pd.DataFrame) -> None:
+        completed.append(task)
+
+    scheduler = ScrapeScheduler(max_concurrent_tasks=3, max_pages_in_flight=5)
+    with patch.object(BasicGraphQLScraper, 'scrape_graphql', mock_scrape_graphql):
+        results = await scheduler.run(scraper, tasks, on_result=on_result)
+
+    assert max_in_flight == 3
+    assert [df['Date'].iloc[0] for df in results] == [task.check_in for task in tasks]
+    assert sorted(completed, key=lambda task: task.check_in) == tasks
+    # The template scraper is not modified by the tasks
+    assert scraper.check_in == '2025-01-01'
+    assert scraper.page_semaphore is None
+    assert scraper.session is None
+
+
+@pytest.mark.asyncio
+async def test_run_respects_page_limit(scraper, tasks):
+    in_flight = 0
+    max_in_flight = 0
+
+    async def mock_fetch_page_data(session, url, headers, graphql_query, rate_limiter, retry_policy):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.001)
+        in_flight -= 1
+        return {}
+
+    async def mock_scrape_graphql(self):
+        await self._fetch_pages(1000)
+        return pd.DataFrame()
+
+    scheduler = ScrapeScheduler(max_concurrent_tasks=5, max_pages_in_flight=4)
+    with patch.object(BasicGraphQLScraper, 'scrape_graphql', mock_scrape_graphql), \
+            patch('japan_avg_hotel_price_finder.graphql_scraper.fetch_page_data', mock_fetch_page_data):
+        await scheduler.run(scraper, tasks)
+
+    assert max_in_flight == 4
+
+
+@pytest.mark.asyncio
+async def test_run_raises_first_failure(scraper, tasks):
+    async def mock_scrape_graphql(self):
+        if self.check_in == '2025-01-03':
+            raise RuntimeError('Scraping failed')
+        await asyncio.sleep(0.01)
+        return pd.DataFrame({'Date': [self.check_in]})
+
+    scheduler = ScrapeScheduler(max_concurrent_tasks=3)
+    with patch.object(BasicGraphQLScraper, 'scrape_graphql', mock_scrape_graphql):
+        with pytest.raises(RuntimeError, match='Scraping failed'):
+            await scheduler.run(scraper, tasks)
+
+
+@pytest.mark.asyncio
+async def test_run_reports_failures_without_stopping(scraper, tasks):
+    async def mock_scrape_graphql(self):
+        if self.check_in in ('2025-01-03', '2025-01-07'):
+            raise RuntimeError(f'Scraping {self.check_in} failed')
+        await asyncio.sleep(0.001)
+        return pd.DataFrame({'Date': [self.check_in]})
+
+    failures = {}
+    completed = []
+
+    async def on_result(task: ScrapeTask, df: pd.DataFrame) -> None:
+        completed.append(task.check_in)
+
+    scheduler = ScrapeScheduler(max_concurrent_tasks=3)
+    with patch.object(BasicGraphQLScraper, 'scrape_graphql', mock_scrape_graphql):
+        results = await scheduler.run(scraper, tasks, on_result=on_result,
+                                      on_error=lambda task, error: failures.update({task.check_in: str(error)}))
+
+    assert failures == {'2025-01-03': 'Scraping 2025-01-03 failed', '2025-01-07': 'Scraping 2025-01-07 failed'}
+    assert sorted(completed) == [task.check_in for task in tasks if task.check_in not in failures]
+    assert [df.empty for df in results] == [task.check_in in failures for task in tasks]
+
+
+if __name__ == '__main__':
+    pytest.main()
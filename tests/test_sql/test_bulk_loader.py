@@ -0,0 +1,95 @@
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from japan_avg_hotel_price_finder.sql.bulk_loader import load_dataframe
+from japan_avg_hotel_price_finder.sql.db_model import Base, HotelPrice, JapanHotel
+
+
+@pytest.fixture
+def db_session(tmp_path):
+    engine = create_engine(f'sqlite:///{tmp_path / "test_bulk_loader.db"}')
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    session = Session()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def hotel_data():
+    return pd.DataFrame({
+        'Hotel': ['Hotel A', 'Hotel B', 'Hotel C'],
+        'Price': [100.0, 150.5, 80.0],
+        'Review': [8.5, 7.0, 9.1],
+        'Location': ['Namba', '', 'Umeda, Kita'],
+        'PriceReview': [100.0 / 8.5, 150.5 / 7.0, 80.0 / 9.1],
+        'City': ['Osaka'] * 3,
+        'Date': ['2025-01-01'] * 3,
+        'AsOf': [pd.Timestamp('2025-01-01 10:00:00')] * 3
+    })
+
+
+def test_load_dataframe(db_session, hotel_data):
+    rows = load_dataframe(db_session, HotelPrice, hotel_data, chunk_size=2)
+    db_session.commit()
+
+    assert rows == 3
+    result = db_session.execute(select(HotelPrice).order_by(HotelPrice.ID)).scalars().all()
+    assert [hotel.Hotel for hotel in result] == ['Hotel A', 'Hotel B', 'Hotel C']
+    assert [hotel.Location for hotel in result] == ['Namba', '', 'Umeda, Kita']
+    assert result[1].PriceReview == pytest.approx(150.5 / 7.0)
+    assert result[0].AsOf == pd.Timestamp('2025-01-01 10:00:00')
+
+
+def test_load_dataframe_is_rolled_back_with_the_session(db_session, hotel_data):
+    load_dataframe(db_session, HotelPrice, hotel_data)
+    db_session.rollback()
+
+    assert db_session.query(HotelPrice).count() == 0
+
+
+def test_load_dataframe_ignores_unknown_columns(db_session, hotel_data):
+    japan_hotel_data = hotel_data.rename(columns={'City': 'Prefecture'}).assign(Region='Kansai', Unknown=1)
+
+    rows = load_dataframe(db_session, JapanHotel, japan_hotel_data)
+    db_session.commit()
+
+    assert rows == 3
+    assert db_session.query(JapanHotel).filter(JapanHotel.Region == 'Kansai').count() == 3
+
+
+def test_load_empty_dataframe(db_session):
+    assert load_dataframe(db_session, HotelPrice, pd.DataFrame()) == 0
+
+
+def test_load_dataframe_again_on_the_same_day_upserts(db_session, hotel_data):
+    load_dataframe(db_session, HotelPrice, hotel_data)
+    rerun_data = hotel_data.assign(Price=[110.0, 160.0, 90.0], AsOf=pd.Timestamp('2025-01-01 18:00:00'))
+    load_dataframe(db_session, HotelPrice, rerun_data)
+    db_session.commit()
+
+    result = db_session.execute(select(HotelPrice).order_by(HotelPrice.ID)).scalars().all()
+    assert [hotel.Price for hotel in result] == [110.0, 160.0, 90.0]
+    assert {hotel.AsOf for hotel in result} == {pd.Timestamp('2025-01-01 18:00:00')}
+
+
+def test_load_dataframe_on_another_day_appends(db_session, hotel_data):
+    load_dataframe(db_session, HotelPrice, hotel_data)
+    load_dataframe(db_session, HotelPrice, hotel_data.assign(AsOf=pd.Timestamp('2025-01-02 10:00:00')))
+    db_session.commit()
+
+    assert db_session.query(HotelPrice).count() == 6
+
+
+def test_load_dataframe_keeps_the_last_row_of_a_key(db_session, hotel_data):
+    rows = load_dataframe(db_session, HotelPrice, pd.concat([hotel_data, hotel_data.assign(Price=120.0)]))
+    db_session.commit()
+
+    assert rows == 3
+    assert db_session.scalars(select(HotelPrice.Price)).all() == [120.0] * 3
+
+
+if __name__ == '__main__':
+    pytest.main()
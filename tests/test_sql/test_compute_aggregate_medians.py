@@ -0,0 +1,122 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from japan_avg_hotel_price_finder.sql.db_model import Base, HotelPrice, AverageRoomPriceByDate, \
+    AverageHotelRoomPriceByReview, AverageHotelRoomPriceByDayOfWeek, AverageHotelRoomPriceByMonth, \
+    AverageHotelRoomPriceByLocation
+from japan_avg_hotel_price_finder.sql.save_to_db import AggregateKeys, compute_aggregate_medians, \
+    create_aggregate_queries, create_avg_hotel_room_price_by_date_table, create_avg_room_price_by_review_table, \
+    create_avg_hotel_price_by_dow_table, create_avg_hotel_price_by_month_table, create_avg_room_price_by_location, \
+    get_quarter, migrate_data_to_database, update_aggregate_tables
+
+
+@pytest.fixture
+def sqlite_engine(tmp_path):
+    engine = create_engine(f'sqlite:///{tmp_path / "test_compute_aggregate_medians.db"}')
+    Base.metadata.create_all(engine)
+    return engine
+
+
+def create_hotel_data(rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(7)
+    price = rng.uniform(30, 800, rows).round(2)
+    review = rng.uniform(5, 10, rows).round(1)
+    return pd.DataFrame({
+        'Hotel': [f'Hotel {i}' for i in range(rows)],
+        'Price': price,
+        'Review': review,
+        'Location': rng.choice(['Namba', 'Umeda', 'Tennoji'], rows),
+        'Price/Review': price / review,
+        'City': 'Osaka',
+        'Date': rng.choice(pd.date_range('2025-01-01', '2025-06-30').strftime('%Y-%m-%d'), rows),
+        'AsOf': pd.Timestamp('2025-01-01')
+    })
+
+
+def read_aggregate_rows(session) -> dict[str, list]:
+    models = [AverageRoomPriceByDate, AverageHotelRoomPriceByReview, AverageHotelRoomPriceByDayOfWeek,
+              AverageHotelRoomPriceByMonth, AverageHotelRoomPriceByLocation]
+    return {
+        model.__tablename__: sorted(
+            tuple(getattr(row, column.key) for column in model.__table__.columns if column.key != 'ID')
+            for row in session.query(model).all()
+        )
+        for model in models
+    }
+
+
+def test_single_pass_matches_per_table_queries(sqlite_engine):
+    migrate_data_to_database(create_hotel_data(2000), sqlite_engine, defer_aggregates=True)
+    Session = sessionmaker(bind=sqlite_engine)
+
+    with Session() as session:
+        create_avg_hotel_room_price_by_date_table(session)
+        create_avg_room_price_by_review_table(session)
+        create_avg_hotel_price_by_dow_table(session)
+        create_avg_hotel_price_by_month_table(session)
+        create_avg_room_price_by_location(session)
+        per_table = read_aggregate_rows(session)
+
+        update_aggregate_tables(session)
+        single_pass = read_aggregate_rows(session)
+
+    assert single_pass == per_table
+    assert len(single_pass['AverageHotelRoomPriceByMonth']) == 6
+
+
+def test_compute_aggregate_medians_keeps_only_touched_keys(sqlite_engine):
+    migrate_data_to_database(create_hotel_data(500), sqlite_engine, defer_aggregates=True)
+    keys = AggregateKeys(dates={'2025-03-02'}, months={4}, locations={'Umeda'})
+    Session = sessionmaker(bind=sqlite_engine)
+
+    with Session() as session:
+        medians = compute_aggregate_medians(session, keys)
+        full = compute_aggregate_medians(session)
+
+    assert [row[0] for row in medians.by_date] == ['2025-03-02']
+    assert medians.by_review == []
+    assert medians.by_day_of_week == []
+    assert medians.by_month == [row for row in full.by_month if row[0] == 4]
+    assert medians.by_location == [row for row in full.by_location if row[0] == 'Umeda']
+    assert medians.by_date == [row for row in full.by_date if row[0] == '2025-03-02']
+
+
+def test_aggregate_queries_select_only_the_rows_of_their_own_keys(sqlite_engine):
+    migrate_data_to_database(create_hotel_data(500), sqlite_engine, defer_aggregates=True)
+    keys = AggregateKeys(dates={'2025-03-02'}, days_of_week={0}, locations={'Umeda'})
+    Session = sessionmaker(bind=sqlite_engine)
+
+    with Session() as session:
+        queries = create_aggregate_queries(session, keys)
+        hotel_data = pd.read_sql(select(HotelPrice.Date, HotelPrice.City, HotelPrice.Price, HotelPrice.Location),
+                                 session.connection())
+        rows = {name: query.all() for name, query in queries.items()}
+
+    assert set(rows) == {'by_date', 'by_day_of_week', 'by_location'}
+    on_date = hotel_data[hotel_data['Date'] == '2025-03-02']
+    assert sorted(tuple(row) for row in rows['by_date']) == sorted(
+        on_date[['Date', 'City', 'Price']].itertuples(index=False, name=None))
+    on_sunday = hotel_data[pd.to_datetime(hotel_data['Date']).dt.dayofweek == 6]
+    assert sorted(row.Price for row in rows['by_day_of_week']) == sorted(on_sunday['Price'])
+    assert {row.DayOfWeek for row in rows['by_day_of_week']} == {0}
+    assert {row.Location for row in rows['by_location']} == {'Umeda'}
+    assert len(rows['by_location']) == (hotel_data['Location'] == 'Umeda').sum()
+
+
+def test_compute_aggregate_medians_without_keys(sqlite_engine):
+    Session = sessionmaker(bind=sqlite_engine)
+    with Session() as session:
+        medians = compute_aggregate_medians(session, AggregateKeys())
+
+    assert medians.by_date == [] and medians.by_location == []
+
+
+def test_get_quarter():
+    assert [get_quarter(month) for month in (1, 4, 9, 12)] == ['Quarter1', 'Quarter2', 'Quarter3', 'Quarter4']
+
+
+if __name__ == '__main__':
+    pytest.main()
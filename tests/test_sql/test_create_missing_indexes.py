@@ -0,0 +1,74 @@
+import datetime
+
+import pytest
+from sqlalchemy import create_engine, inspect, Table, MetaData, Column, Integer, String, TIMESTAMP, text
+
+from japan_avg_hotel_price_finder.sql.db_model import Base, create_missing_indexes
+
+
+def get_index_names(engine, table_name: str) -> set[str]:
+    # SQLAlchemy does not reflect the expression indexes of SQLite
+    with engine.connect() as connection:
+        return set(connection.execute(text("SELECT name FROM sqlite_master WHERE type = 'index' "
+                                           "AND tbl_name = :table_name AND sql IS NOT NULL"),
+                                      {'table_name': table_name}).scalars())
+
+
+def test_create_all_creates_the_indexes():
+    engine = create_engine('sqlite:///:memory:')
+    Base.metadata.create_all(engine)
+
+    assert get_index_names(engine, 'HotelPrice') == {'ix_HotelPrice_City_Date_AsOf',
+                                                     'ux_HotelPrice_City_Hotel_Date_AsOfDate'}
+    assert get_index_names(engine, 'JapanHotels') == {'ix_JapanHotels_Prefecture_Date_AsOf',
+                                                      'ux_JapanHotels_Prefecture_Hotel_Date_AsOfDate'}
+
+
+def create_legacy_hotel_price_table(engine) -> Table:
+    # HotelPrice created before its indexes were declared
+    table = Table('HotelPrice', MetaData(), Column('ID', Integer, primary_key=True), Column('Hotel', String),
+                  Column('City', String), Column('Date', String), Column('AsOf', TIMESTAMP))
+    table.create(engine)
+    return table
+
+
+def test_create_missing_indexes_of_existing_table():
+    engine = create_engine('sqlite:///:memory:')
+    create_legacy_hotel_price_table(engine)
+
+    Base.metadata.create_all(engine)
+    assert get_index_names(engine, 'HotelPrice') == set()
+
+    create_missing_indexes(engine)
+    assert get_index_names(engine, 'HotelPrice') == {'ix_HotelPrice_City_Date_AsOf'}
+
+    # Running it again is a no-op
+    create_missing_indexes(engine)
+    assert get_index_names(engine, 'HotelPrice') == {'ix_HotelPrice_City_Date_AsOf'}
+
+
+def test_create_missing_indexes_does_not_build_unique_indexes():
+    engine = create_engine('sqlite:///:memory:')
+    table = create_legacy_hotel_price_table(engine)
+    with engine.begin() as connection:
+        # Rows of a rerun on the same day
+        connection.execute(table.insert(), [
+            {'Hotel': 'Hotel A', 'City': 'Osaka', 'Date': '2025-01-01', 'AsOf': datetime.datetime(2025, 1, 1, 9)},
+            {'Hotel': 'Hotel A', 'City': 'Osaka', 'Date': '2025-01-01', 'AsOf': datetime.datetime(2025, 1, 1, 18)}
+        ])
+
+    create_missing_indexes(engine)
+
+    assert get_index_names(engine, 'HotelPrice') == {'ix_HotelPrice_City_Date_AsOf'}
+
+
+def test_create_missing_indexes_skips_missing_tables():
+    engine = create_engine('sqlite:///:memory:')
+
+    create_missing_indexes(engine)
+
+    assert inspect(engine).get_table_names() == []
+
+
+if __name__ == '__main__':
+    pytest.main()
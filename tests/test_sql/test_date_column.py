@@ -0,0 +1,44 @@
+import datetime
+
+import pytest
+from sqlalchemy import create_engine, select, func, Integer
+from sqlalchemy.orm import Session
+
+from japan_avg_hotel_price_finder.sql.db_model import Base, HotelPrice, JapanHotel
+from japan_avg_hotel_price_finder.sql.date_column_migration import migrate_date_column
+
+
+def create_hotel(date) -> HotelPrice:
+    return HotelPrice(Hotel='Hotel', Price=100.0, Review=8.0, Location='Namba', PriceReview=12.5, City='Osaka',
+                      Date=date, AsOf=datetime.datetime(2025, 1, 1, 9, 30))
+
+
+def test_dates_are_read_as_strings():
+    engine = create_engine('sqlite:///:memory:')
+    Base.metadata.create_all(engine)
+
+    with Session(engine) as session:
+        session.add_all([create_hotel('2025-02-01'), create_hotel(datetime.date(2025, 2, 2)),
+                         create_hotel(datetime.datetime(2025, 2, 3, 12, 0))])
+        session.commit()
+
+        assert session.scalars(select(HotelPrice.Date).order_by(HotelPrice.Date)).all() == [
+            '2025-02-01', '2025-02-02', '2025-02-03']
+        assert session.scalars(select(HotelPrice.Date).where(
+            HotelPrice.Date.between(datetime.date(2025, 2, 2), '2025-02-03'))).all() == ['2025-02-02', '2025-02-03']
+
+        # Date functions work on the stored dates without parsing them first
+        day_of_week = func.cast(func.strftime('%w', HotelPrice.Date), Integer)
+        assert session.scalars(select(day_of_week).order_by(HotelPrice.Date)).all() == [6, 0, 1]
+
+
+def test_migrate_date_column_is_not_needed_on_sqlite():
+    engine = create_engine('sqlite:///:memory:')
+    Base.metadata.create_all(engine)
+
+    assert migrate_date_column(engine, HotelPrice) is False
+    assert migrate_date_column(engine, JapanHotel) is False
+
+
+if __name__ == '__main__':
+    pytest.main()
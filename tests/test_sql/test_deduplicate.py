@@ -0,0 +1,43 @@
+import datetime
+
+import pytest
+from sqlalchemy import create_engine, select, Table, MetaData, Column, Integer, String, Float, TIMESTAMP
+from sqlalchemy.orm import Session
+
+from japan_avg_hotel_price_finder.sql.bulk_loader import get_unique_index
+from japan_avg_hotel_price_finder.sql.db_model import HotelPrice, has_index
+from japan_avg_hotel_price_finder.sql.deduplicate import remove_duplicated_rows
+
+
+def create_hotel(hotel: str, price: float, as_of: datetime.datetime) -> dict:
+    return {'Hotel': hotel, 'Price': price, 'Review': 8.0, 'Location': 'Namba', 'Price/Review': price / 8.0,
+            'City': 'Osaka', 'Date': '2025-02-01', 'AsOf': as_of}
+
+
+def test_remove_duplicated_rows():
+    engine = create_engine('sqlite:///:memory:')
+    # HotelPrice saved by reruns before it had its unique index
+    table = Table('HotelPrice', MetaData(), Column('ID', Integer, primary_key=True), Column('Hotel', String),
+                  Column('Price', Float), Column('Review', Float), Column('Location', String),
+                  Column('Price/Review', Float), Column('City', String), Column('Date', String),
+                  Column('AsOf', TIMESTAMP))
+    table.create(engine)
+    with engine.begin() as connection:
+        connection.execute(table.insert(), [
+            create_hotel('Hotel A', 100.0, datetime.datetime(2025, 1, 1, 9)),
+            create_hotel('Hotel B', 200.0, datetime.datetime(2025, 1, 1, 9)),
+            create_hotel('Hotel A', 110.0, datetime.datetime(2025, 1, 1, 18)),
+            create_hotel('Hotel A', 120.0, datetime.datetime(2025, 1, 2, 9))
+        ])
+
+    assert remove_duplicated_rows(engine, HotelPrice) == 1
+
+    with Session(engine) as session:
+        assert session.execute(select(HotelPrice.Hotel, HotelPrice.Price).order_by(HotelPrice.ID)).tuples().all() == [
+            ('Hotel B', 200.0), ('Hotel A', 110.0), ('Hotel A', 120.0)]
+        assert get_unique_index(session, HotelPrice) is not None
+    assert all(has_index(engine, index) for index in HotelPrice.__table__.indexes if index.unique)
+
+
+if __name__ == '__main__':
+    pytest.main()
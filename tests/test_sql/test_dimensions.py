@@ -0,0 +1,115 @@
+import datetime
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, select, func
+from sqlalchemy.orm import Session
+
+from japan_avg_hotel_price_finder.sql.db_model import HotelPrice, HotelPriceFact, HotelDimension, CityDimension, \
+    AverageHotelRoomPriceByLocation
+from japan_avg_hotel_price_finder.sql.dimensions import enable_normalized_storage, is_normalized_storage_enabled, \
+    get_dimension_cache, save_normalized_prices
+from japan_avg_hotel_price_finder.sql.price_history import enable_price_history, is_price_history_enabled
+from japan_avg_hotel_price_finder.sql.save_to_db import save_scraped_data
+
+AS_OF = datetime.datetime(2025, 1, 1, 9, 30)
+
+
+def create_hotel_data(hotels: list[str], city: str = 'Osaka', date: str = '2025-02-01') -> pd.DataFrame:
+    return pd.DataFrame({
+        'Hotel': hotels,
+        'Price': [100.0 * (i + 1) for i in range(len(hotels))],
+        'Review': 8.0,
+        'Location': ['Namba' if i % 2 == 0 else 'Umeda' for i in range(len(hotels))],
+        'Price/Review': [100.0 * (i + 1) / 8.0 for i in range(len(hotels))],
+        'City': city,
+        'Date': date,
+        'AsOf': AS_OF
+    })
+
+
+BATCHES = [
+    create_hotel_data(['Hotel A', 'Hotel B', 'Hotel C']),
+    create_hotel_data(['Hotel A', 'Hotel B'], date='2025-02-02'),
+    create_hotel_data(['Hotel A', 'Hotel D'], city='Tokyo', date='2025-02-03')
+]
+
+
+@pytest.fixture
+def normalized_engine():
+    engine = create_engine('sqlite:///:memory:')
+    enable_normalized_storage(engine)
+    return engine
+
+
+def read_rows(engine) -> list[tuple]:
+    with Session(engine) as session:
+        return [tuple(row) for row in session.execute(
+            select(HotelPrice.Hotel, HotelPrice.Price, HotelPrice.Location, HotelPrice.City, HotelPrice.Date,
+                   HotelPrice.AsOf).order_by(HotelPrice.ID)).all()]
+
+
+def test_view_has_the_rows_of_the_table(normalized_engine):
+    table_engine = create_engine('sqlite:///:memory:')
+    for batch in BATCHES:
+        save_scraped_data(batch.copy(), normalized_engine)
+        save_scraped_data(batch.copy(), table_engine)
+
+    assert is_normalized_storage_enabled(normalized_engine)
+    assert not is_price_history_enabled(normalized_engine)
+    assert len(read_rows(normalized_engine)) == 7
+    assert read_rows(normalized_engine) == read_rows(table_engine)
+
+    with Session(normalized_engine) as session:
+        assert session.scalars(select(HotelDimension.Name).order_by(HotelDimension.ID)).all() == [
+            'Hotel A', 'Hotel B', 'Hotel C', 'Hotel D']
+        assert session.scalars(select(CityDimension.Name).order_by(CityDimension.ID)).all() == ['Osaka', 'Tokyo']
+        assert session.execute(select(AverageHotelRoomPriceByLocation.Location,
+                                      AverageHotelRoomPriceByLocation.AveragePrice)
+                               .order_by(AverageHotelRoomPriceByLocation.Location)).all() == [
+            ('Namba', 100.0), ('Umeda', 200.0)]
+
+
+def test_enable_copies_existing_rows():
+    engine = create_engine('sqlite:///:memory:')
+    for batch in BATCHES:
+        save_scraped_data(batch.copy(), engine, defer_aggregates=True)
+    rows = read_rows(engine)
+
+    enable_normalized_storage(engine)
+
+    assert is_normalized_storage_enabled(engine)
+    assert read_rows(engine) == rows
+    save_scraped_data(BATCHES[0].assign(AsOf=AS_OF + datetime.timedelta(days=1)), engine, defer_aggregates=True)
+    assert len(read_rows(engine)) == len(rows) + 3
+
+
+def test_cache_is_cleared_on_rollback(normalized_engine):
+    cache = get_dimension_cache(normalized_engine)
+
+    with Session(normalized_engine) as session:
+        save_normalized_prices(session, BATCHES[0])
+        assert set(cache.ids[HotelDimension.__tablename__]) == {'Hotel A', 'Hotel B', 'Hotel C'}
+        session.rollback()
+    assert cache.ids[HotelDimension.__tablename__] == {}
+
+    with Session(normalized_engine) as session:
+        save_normalized_prices(session, BATCHES[0])
+        session.commit()
+        hotel_ids = dict(cache.ids[HotelDimension.__tablename__])
+        assert session.scalar(select(func.count()).select_from(HotelPriceFact)) == 3
+        assert dict(session.execute(select(HotelDimension.Name, HotelDimension.ID)).tuples().all()) == hotel_ids
+
+
+def test_enable_with_another_storage_mode():
+    engine = create_engine('sqlite:///:memory:')
+    enable_price_history(engine)
+
+    with pytest.raises(ValueError):
+        enable_normalized_storage(engine)
+    assert is_price_history_enabled(engine)
+    assert not is_normalized_storage_enabled(engine)
+
+
+if __name__ == '__main__':
+    pytest.main()
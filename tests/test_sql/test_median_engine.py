@@ -0,0 +1,80 @@
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import sessionmaker
+
+from japan_avg_hotel_price_finder.sql.db_model import Base, HotelPrice
+from japan_avg_hotel_price_finder.sql.median_engine import compute_grouped_medians, grouped_median, \
+    read_query_in_chunks
+
+
+@pytest.fixture
+def db_session(tmp_path):
+    engine = create_engine(f'sqlite:///{tmp_path / "test_median_engine.db"}')
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    session = Session()
+    yield session
+    session.close()
+
+
+def test_grouped_median_matches_np_median():
+    rng = np.random.default_rng(0)
+    group_codes = rng.integers(0, 50, 10_000)
+    values = rng.uniform(0, 1000, 10_000).round(2)
+
+    medians = grouped_median(group_codes, values, 50)
+
+    for code in range(50):
+        assert medians[code] == np.median(values[group_codes == code])
+
+
+def test_compute_grouped_medians():
+    data = pd.DataFrame({
+        'Date': pd.Categorical(['2025-01-02', '2025-01-01', '2025-01-02', '2025-01-01', '2025-01-01']),
+        'City': ['Osaka'] * 5,
+        'Price': [100.0, 300.0, 200.0, 100.0, 50.0]
+    })
+
+    result = compute_grouped_medians(data, ['Date', 'City'], ['Price'])
+
+    assert result == [('2025-01-01', 'Osaka', 100.0), ('2025-01-02', 'Osaka', 150.0)]
+    assert all(type(median) is float for *_, median in result)
+
+
+def test_compute_grouped_medians_empty():
+    assert compute_grouped_medians(pd.DataFrame(columns=['Date', 'Price']), ['Date'], ['Price']) == []
+
+
+def test_read_query_in_chunks_matches_grouped_rows(db_session):
+    rng = np.random.default_rng(1)
+    prices = rng.uniform(30, 800, 1000).round(2)
+    locations = rng.choice(['Namba', 'Umeda', 'Tennoji'], 1000)
+    db_session.add_all([
+        HotelPrice(Hotel=f'Hotel {i}', Price=price, Review=8.0, Location=location, PriceReview=price / 8,
+                   City='Osaka', Date='2025-01-01', AsOf=pd.Timestamp('2025-01-01'))
+        for i, (price, location) in enumerate(zip(prices, locations))
+    ])
+    db_session.commit()
+
+    query = db_session.query(HotelPrice.Location.label('Location'), HotelPrice.Price.label('Price'),
+                             func.round(HotelPrice.Review).label('Review'))
+    data = read_query_in_chunks(db_session, query.filter(HotelPrice.Location.in_(['Namba', 'Umeda'])),
+                                chunk_size=64)
+
+    assert len(data) == sum(location in ('Namba', 'Umeda') for location in locations)
+    assert isinstance(data['Location'].dtype, pd.CategoricalDtype)
+
+    grouped_prices = defaultdict(list)
+    for location, price in zip(locations, prices):
+        if location in ('Namba', 'Umeda'):
+            grouped_prices[location].append(price)
+    expected = sorted((location, np.median(values)) for location, values in grouped_prices.items())
+    assert compute_grouped_medians(data, ['Location'], ['Price']) == expected
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,39 @@
+import datetime
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+
+from japan_avg_hotel_price_finder.sql.db_model import HotelPrice
+from japan_avg_hotel_price_finder.sql.partitioning import get_partition_name, get_month_bounds, get_months, \
+    get_retention_cutoff, create_partitioned_table
+
+
+def test_get_partition_name_and_bounds():
+    assert get_partition_name('HotelPrice', datetime.date(2025, 1, 15)) == 'HotelPrice_2025_01'
+    assert get_month_bounds(datetime.date(2025, 1, 31)) == (datetime.date(2025, 1, 1), datetime.date(2025, 2, 1))
+    assert get_month_bounds(datetime.date(2024, 12, 1)) == (datetime.date(2024, 12, 1), datetime.date(2025, 1, 1))
+
+
+def test_get_months():
+    as_of = pd.Series([datetime.datetime(2025, 1, 31, 23, 59), datetime.datetime(2025, 1, 1),
+                       datetime.datetime(2024, 12, 15)])
+    assert get_months(as_of) == [datetime.date(2024, 12, 1), datetime.date(2025, 1, 1)]
+
+    dates = pd.Series(['2025-03-01', '2025-03-31', '2025-05-02'])
+    assert get_months(dates) == [datetime.date(2025, 3, 1), datetime.date(2025, 5, 1)]
+
+
+def test_get_retention_cutoff():
+    assert get_retention_cutoff(12, datetime.date(2026, 2, 10)) == datetime.date(2025, 2, 1)
+    assert get_retention_cutoff(1, datetime.date(2026, 1, 31)) == datetime.date(2025, 12, 1)
+    assert get_retention_cutoff(0, datetime.date(2026, 1, 31)) == datetime.date(2026, 1, 1)
+
+
+def test_create_partitioned_table_on_sqlite():
+    with pytest.raises(NotImplementedError):
+        create_partitioned_table(create_engine('sqlite:///:memory:'), HotelPrice, 'as_of')
+
+
+if __name__ == '__main__':
+    pytest.main()
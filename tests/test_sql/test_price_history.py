@@ -0,0 +1,159 @@
+import datetime
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from japan_avg_hotel_price_finder.sql.db_model import HotelPrice, HotelPriceHistory, AverageRoomPriceByDate, \
+    AverageHotelRoomPriceByDayOfWeek
+from japan_avg_hotel_price_finder.sql.price_history import enable_price_history, is_price_history_enabled, \
+    save_price_history
+from japan_avg_hotel_price_finder.sql.save_to_db import save_scraped_data
+
+AS_OF = [datetime.datetime(2025, 1, day, 9, 30) for day in (1, 2, 3)]
+
+
+def create_snapshot(as_of: datetime.datetime, prices: dict[str, float], date: str = '2025-02-01') -> pd.DataFrame:
+    return pd.DataFrame({
+        'Hotel': list(prices),
+        'Price': list(prices.values()),
+        'Review': 8.0,
+        'Location': 'Namba',
+        'Price/Review': [price / 8.0 for price in prices.values()],
+        'City': 'Osaka',
+        'Date': date,
+        'AsOf': as_of
+    })
+
+
+SNAPSHOTS = [
+    create_snapshot(AS_OF[0], {'Hotel A': 100.0, 'Hotel B': 200.0}),
+    create_snapshot(AS_OF[1], {'Hotel A': 100.0, 'Hotel B': 250.0, 'Hotel C': 50.0}),
+    create_snapshot(AS_OF[2], {'Hotel A': 100.0, 'Hotel C': 50.0})
+]
+
+
+def read_rows(engine) -> list[tuple]:
+    with Session(engine) as session:
+        return [tuple(row) for row in session.execute(
+            select(HotelPrice.Hotel, HotelPrice.Price, HotelPrice.City, HotelPrice.Date, HotelPrice.AsOf)
+            .order_by(HotelPrice.AsOf, HotelPrice.Hotel)).all()]
+
+
+def read_intervals(engine) -> list[tuple]:
+    with Session(engine) as session:
+        return [tuple(interval) for interval in session.execute(
+            select(HotelPriceHistory.Hotel, HotelPriceHistory.Price, HotelPriceHistory.ValidFrom,
+                   HotelPriceHistory.ValidTo).order_by(HotelPriceHistory.Hotel, HotelPriceHistory.ValidFrom)).all()]
+
+
+@pytest.fixture
+def history_engine():
+    engine = create_engine('sqlite:///:memory:')
+    enable_price_history(engine)
+    return engine
+
+
+def test_only_changed_prices_are_stored(history_engine):
+    assert is_price_history_enabled(history_engine)
+    for snapshot in SNAPSHOTS:
+        save_scraped_data(snapshot, history_engine, defer_aggregates=True)
+
+    with Session(history_engine) as session:
+        intervals = session.execute(select(HotelPriceHistory.Hotel, HotelPriceHistory.Price,
+                                           HotelPriceHistory.ValidFrom, HotelPriceHistory.ValidTo)
+                                    .order_by(HotelPriceHistory.ID)).all()
+    assert [tuple(interval) for interval in intervals] == [
+        ('Hotel A', 100.0, AS_OF[0], None),
+        ('Hotel B', 200.0, AS_OF[0], AS_OF[1]),
+        ('Hotel B', 250.0, AS_OF[1], AS_OF[2]),
+        ('Hotel C', 50.0, AS_OF[1], None)
+    ]
+
+
+def test_view_rebuilds_the_snapshots(history_engine):
+    snapshot_engine = create_engine('sqlite:///:memory:')
+    for snapshot in SNAPSHOTS:
+        save_scraped_data(snapshot.copy(), history_engine)
+        save_scraped_data(snapshot.copy(), snapshot_engine)
+
+    def read_aggregates(engine) -> tuple[list, list]:
+        with Session(engine) as session:
+            return (session.execute(select(AverageRoomPriceByDate.Date, AverageRoomPriceByDate.AveragePrice)).all(),
+                    session.execute(select(AverageHotelRoomPriceByDayOfWeek.DayOfWeek,
+                                           AverageHotelRoomPriceByDayOfWeek.AveragePrice)).all())
+
+    assert len(read_rows(history_engine)) == 7
+    assert read_rows(history_engine) == read_rows(snapshot_engine)
+    assert read_aggregates(history_engine) == read_aggregates(snapshot_engine)
+
+
+def test_other_dates_are_not_closed(history_engine):
+    with Session(history_engine) as session:
+        save_price_history(session, create_snapshot(AS_OF[0], {'Hotel A': 100.0}, date='2025-02-01'))
+        changes = save_price_history(session, create_snapshot(AS_OF[1], {'Hotel B': 100.0}, date='2025-02-02'))
+        session.commit()
+
+        assert (changes.inserted, changes.closed, changes.unchanged) == (1, 0, 0)
+        assert session.scalars(select(HotelPriceHistory.ValidTo)).all() == [None, None]
+
+
+def test_duplicated_hotels_are_stored_once(history_engine):
+    snapshot = pd.concat([create_snapshot(AS_OF[0], {'Hotel A': 100.0}), create_snapshot(AS_OF[0], {'Hotel A': 120.0})])
+
+    with Session(history_engine) as session:
+        changes = save_price_history(session, snapshot)
+        session.commit()
+
+    assert changes.inserted == 1
+
+
+def test_enable_price_history_copies_existing_rows():
+    engine = create_engine('sqlite:///:memory:')
+    for snapshot in SNAPSHOTS:
+        save_scraped_data(snapshot.copy(), engine, defer_aggregates=True)
+    # Rows of another check-in date, saved again later on the same day
+    rerun_as_of = AS_OF[0] + datetime.timedelta(hours=2)
+    save_scraped_data(create_snapshot(AS_OF[0], {'Hotel A': 90.0}, date='2025-02-02'), engine,
+                      defer_aggregates=True)
+    save_scraped_data(create_snapshot(rerun_as_of, {'Hotel A': 95.0}, date='2025-02-02'), engine,
+                      defer_aggregates=True)
+    rows = read_rows(engine)
+
+    enable_price_history(engine)
+
+    assert is_price_history_enabled(engine)
+    assert read_rows(engine) == rows
+    assert read_intervals(engine) == [
+        ('Hotel A', 100.0, AS_OF[0], None),
+        ('Hotel A', 95.0, rerun_as_of, None),
+        ('Hotel B', 200.0, AS_OF[0], AS_OF[1]),
+        ('Hotel B', 250.0, AS_OF[1], AS_OF[2]),
+        ('Hotel C', 50.0, AS_OF[1], None)
+    ]
+
+
+def test_same_day_rerun_replaces_the_snapshot(history_engine):
+    rerun_as_of = AS_OF[1] + datetime.timedelta(hours=3)
+    save_scraped_data(SNAPSHOTS[0].copy(), history_engine, defer_aggregates=True)
+    save_scraped_data(SNAPSHOTS[1].copy(), history_engine, defer_aggregates=True)
+    save_scraped_data(create_snapshot(rerun_as_of, {'Hotel A': 100.0, 'Hotel B': 200.0, 'Hotel D': 80.0}),
+                      history_engine, defer_aggregates=True)
+
+    assert read_rows(history_engine) == [
+        ('Hotel A', 100.0, 'Osaka', '2025-02-01', AS_OF[0]),
+        ('Hotel B', 200.0, 'Osaka', '2025-02-01', AS_OF[0]),
+        ('Hotel A', 100.0, 'Osaka', '2025-02-01', rerun_as_of),
+        ('Hotel B', 200.0, 'Osaka', '2025-02-01', rerun_as_of),
+        ('Hotel D', 80.0, 'Osaka', '2025-02-01', rerun_as_of)
+    ]
+    assert read_intervals(history_engine) == [
+        ('Hotel A', 100.0, AS_OF[0], None),
+        ('Hotel B', 200.0, AS_OF[0], None),
+        ('Hotel D', 80.0, rerun_as_of, None)
+    ]
+
+
+if __name__ == '__main__':
+    pytest.main()
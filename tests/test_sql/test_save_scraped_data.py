@@ -28,7 +28,7 @@ def test_save_scraped_data_non_empty(mock_migrate, mock_logger, sample_dataframe
     save_scraped_data(sample_dataframe, mock_engine)
     mock_logger.info.assert_any_call("Saving scraped data...")
     mock_logger.info.assert_any_call('Save data to a database')
-    mock_migrate.assert_called_once_with(sample_dataframe, mock_engine)
+    mock_migrate.assert_called_once_with(sample_dataframe, mock_engine, defer_aggregates=False)
 
 @patch('japan_avg_hotel_price_finder.sql.save_to_db.main_logger')
 @patch('japan_avg_hotel_price_finder.sql.save_to_db.migrate_data_to_database')
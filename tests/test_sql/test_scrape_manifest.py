@@ -0,0 +1,144 @@
+import datetime
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from japan_avg_hotel_price_finder.sql.db_model import ScrapeManifest
+from japan_avg_hotel_price_finder.sql.save_to_db import save_scraped_data
+from japan_avg_hotel_price_finder.sql.scrape_manifest import ManifestEntry, get_scraped_dates, \
+    record_manifest_entries, get_manifest_entries, set_manifest_entries, combine_manifest_entries, \
+    create_manifest_table
+
+
+@pytest.fixture
+def sqlite_engine(tmp_path):
+    return create_engine(f'sqlite:///{tmp_path / "test_scrape_manifest.db"}')
+
+
+def create_entries(dates_rows: dict[str, int], nights: int = 1) -> list[ManifestEntry]:
+    return [ManifestEntry(city='Osaka', date=date, as_of='2025-01-01', rows=rows, nights=nights)
+            for date, rows in dates_rows.items()]
+
+
+def create_hotel_data(dates: list[str], city: str = 'Osaka') -> pd.DataFrame:
+    return pd.DataFrame({
+        'Hotel': [f'Hotel {i}' for i in range(len(dates))],
+        'Price': 100.0,
+        'Review': 8.0,
+        'Location': 'Namba',
+        'Price/Review': 12.5,
+        'City': city,
+        'Date': dates,
+        'AsOf': datetime.datetime(2025, 1, 1, 9, 30)
+    })
+
+
+def test_record_and_get_scraped_dates(sqlite_engine):
+    assert get_scraped_dates(sqlite_engine, 'JapanHotels', 'Osaka', '2025-01-01', nights=1) == set()
+
+    Session = sessionmaker(bind=sqlite_engine)
+    with Session() as session:
+        record_manifest_entries(session, 'JapanHotels', create_entries({'2025-02-01': 10, '2025-02-02': 5}))
+        session.commit()
+
+    assert get_scraped_dates(sqlite_engine, 'JapanHotels', 'Osaka', '2025-01-01', 1) == {'2025-02-01', '2025-02-02'}
+    assert get_scraped_dates(sqlite_engine, 'JapanHotels', 'Osaka', '2025-01-01') == {'2025-02-01', '2025-02-02'}
+    assert get_scraped_dates(sqlite_engine, 'JapanHotels', 'Osaka', '2025-01-01', nights=2) == set()
+    assert get_scraped_dates(sqlite_engine, 'JapanHotels', 'Osaka', '2025-01-02', nights=1) == set()
+    assert get_scraped_dates(sqlite_engine, 'JapanHotels', 'Kyoto', '2025-01-01', nights=1) == set()
+    assert get_scraped_dates(sqlite_engine, 'HotelPrice', 'Osaka', '2025-01-01', nights=1) == set()
+
+
+def test_recorded_entries_are_rolled_back_with_the_session(sqlite_engine):
+    get_scraped_dates(sqlite_engine, 'JapanHotels', 'Osaka', '2025-01-01')
+
+    Session = sessionmaker(bind=sqlite_engine)
+    with Session() as session:
+        record_manifest_entries(session, 'JapanHotels', create_entries({'2025-02-01': 10}))
+        session.rollback()
+
+    assert get_scraped_dates(sqlite_engine, 'JapanHotels', 'Osaka', '2025-01-01') == set()
+
+
+def test_record_manifest_entries_twice(sqlite_engine):
+    get_scraped_dates(sqlite_engine, 'JapanHotels', 'Osaka', '2025-01-01')
+
+    Session = sessionmaker(bind=sqlite_engine)
+    for rows in (10, 12):
+        with Session() as session:
+            record_manifest_entries(session, 'JapanHotels', create_entries({'2025-02-01': rows}))
+            session.commit()
+
+    with Session() as session:
+        assert session.scalars(select(ScrapeManifest.Rows)).all() == [12]
+
+
+def test_get_manifest_entries_counts_rows():
+    df = create_hotel_data(['2025-02-01', '2025-02-01', '2025-02-02'])
+
+    assert get_manifest_entries(df) == [ManifestEntry(city='Osaka', date='2025-02-01', as_of='2025-01-01', rows=2),
+                                        ManifestEntry(city='Osaka', date='2025-02-02', as_of='2025-01-01', rows=1)]
+
+    prefecture_df = df.rename(columns={'City': 'Prefecture'})
+    assert [entry.city for entry in get_manifest_entries(prefecture_df)] == ['Osaka', 'Osaka']
+    assert get_manifest_entries(pd.DataFrame()) == []
+
+
+def test_attached_manifest_entries_are_kept():
+    entry = ManifestEntry(city='Osaka', date='2025-02-01', as_of='2025-01-01', rows=1, requests=3, duration=1.5,
+                          nights=2, adults=2, children=1, rooms=1)
+    df = set_manifest_entries(create_hotel_data(['2025-02-01']), [entry])
+
+    assert get_manifest_entries(df.rename(columns={'Price/Review': 'PriceReview'})) == [entry]
+
+    other_entry = ManifestEntry(city='Osaka', date='2025-02-02', as_of='2025-01-01', rows=1, requests=2)
+    other_df = set_manifest_entries(create_hotel_data(['2025-02-02']), [other_entry])
+    combined = combine_manifest_entries(pd.concat([df, other_df]), [df, other_df])
+    assert get_manifest_entries(combined) == [entry, other_entry]
+
+    # Without the entries of every part, they are counted from the rows
+    partial = combine_manifest_entries(pd.concat([df, create_hotel_data(['2025-02-03'])]),
+                                       [df, create_hotel_data(['2025-02-03'])])
+    assert [entry.date for entry in get_manifest_entries(partial)] == ['2025-02-01', '2025-02-03']
+    assert all(entry.requests == 0 for entry in get_manifest_entries(partial))
+
+
+def test_save_scraped_data_records_the_manifest(sqlite_engine):
+    entry = ManifestEntry(city='Osaka', date='2025-02-01', as_of='2025-01-01', rows=2, requests=1, duration=0.5)
+    save_scraped_data(set_manifest_entries(create_hotel_data(['2025-02-01', '2025-02-01']), [entry]), sqlite_engine,
+                      defer_aggregates=True)
+    save_scraped_data(create_hotel_data(['2025-02-02'], city='Tokyo'), sqlite_engine, defer_aggregates=True)
+
+    Session = sessionmaker(bind=sqlite_engine)
+    with Session() as session:
+        rows = session.execute(select(ScrapeManifest.TableName, ScrapeManifest.City, ScrapeManifest.Date,
+                                      ScrapeManifest.AsOf, ScrapeManifest.Rows, ScrapeManifest.Requests)
+                               .order_by(ScrapeManifest.City)).all()
+
+    assert [tuple(row) for row in rows] == [('HotelPrice', 'Osaka', '2025-02-01', '2025-01-01', 2, 1),
+                                            ('HotelPrice', 'Tokyo', '2025-02-02', '2025-01-01', 1, 0)]
+
+
+def test_new_manifest_has_the_dates_of_existing_rows(sqlite_engine):
+    save_scraped_data(create_hotel_data(['2025-02-01', '2025-02-01', '2025-02-02']), sqlite_engine,
+                      defer_aggregates=True)
+    save_scraped_data(create_hotel_data(['2025-02-03'], city='Tokyo'), sqlite_engine, defer_aggregates=True)
+    ScrapeManifest.__table__.drop(sqlite_engine)
+
+    create_manifest_table(sqlite_engine)
+
+    Session = sessionmaker(bind=sqlite_engine)
+    with Session() as session:
+        rows = session.execute(select(ScrapeManifest.City, ScrapeManifest.Date, ScrapeManifest.AsOf,
+                                      ScrapeManifest.Nights, ScrapeManifest.Rows)
+                               .order_by(ScrapeManifest.Date)).all()
+    assert [tuple(row) for row in rows] == [('Osaka', '2025-02-01', '2025-01-01', 1, 2),
+                                            ('Osaka', '2025-02-02', '2025-01-01', 1, 1),
+                                            ('Tokyo', '2025-02-03', '2025-01-01', 1, 1)]
+    assert get_scraped_dates(sqlite_engine, 'HotelPrice', 'Osaka', '2025-01-01') == {'2025-02-01', '2025-02-02'}
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,93 @@
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, text
+
+from japan_avg_hotel_price_finder.sql.db_model import Base
+from japan_avg_hotel_price_finder.sql.save_to_db import AggregateKeys, migrate_data_to_database, \
+    refresh_aggregate_tables
+
+AGGREGATE_TABLES = {
+    'AverageRoomPriceByDateTable': 'Date',
+    'AverageHotelRoomPriceByReview': 'Review',
+    'AverageHotelRoomPriceByDayOfWeek': 'DayOfWeek',
+    'AverageHotelRoomPriceByMonth': 'Month',
+    'AverageHotelRoomPriceByLocation': 'Location'
+}
+
+
+@pytest.fixture
+def sqlite_engine(tmp_path):
+    engine = create_engine(f'sqlite:///{tmp_path / "test_update_aggregate_tables.db"}')
+    Base.metadata.create_all(engine)
+    return engine
+
+
+def create_batch(dates: list[str], locations: list[str], prices: list[float], reviews: list[float]) -> pd.DataFrame:
+    return pd.DataFrame({
+        'Hotel': [f'Hotel {i}' for i in range(len(dates))],
+        'Price': prices,
+        'Review': reviews,
+        'Location': locations,
+        'Price/Review': [price / review for price, review in zip(prices, reviews)],
+        'City': ['Osaka'] * len(dates),
+        'Date': dates,
+        'AsOf': [pd.Timestamp('2025-01-01')] * len(dates)
+    })
+
+
+def read_aggregate_tables(engine) -> dict[str, list]:
+    with engine.connect() as conn:
+        return {
+            table: conn.execute(text(f'SELECT * FROM "{table}" ORDER BY "{key}"')).fetchall()
+            for table, key in AGGREGATE_TABLES.items()
+        }
+
+
+def test_aggregate_keys_from_dataframe():
+    df = create_batch(['2025-03-02', '2025-04-10'], ['Namba', 'Umeda'], [100, 200], [8.5, 7.2])
+
+    keys = AggregateKeys.from_dataframe(df)
+
+    assert keys.dates == {'2025-03-02', '2025-04-10'}
+    # 2025-03-02 is a Sunday, 2025-04-10 is a Thursday
+    assert keys.days_of_week == {0, 4}
+    assert keys.months == {3, 4}
+    assert keys.locations == {'Namba', 'Umeda'}
+    assert keys.reviews == {7.0, 8.0, 9.0}
+
+
+def test_incremental_update_matches_full_recompute(sqlite_engine):
+    migrate_data_to_database(create_batch(['2025-03-02', '2025-03-03', '2025-04-10'],
+                                          ['Namba', 'Umeda', 'Namba'], [100, 150, 120], [8.5, 7.2, 9.0]),
+                             sqlite_engine)
+    migrate_data_to_database(create_batch(['2025-03-02', '2025-05-05'],
+                                          ['Namba', 'Tennoji'], [300, 80], [8.4, 6.0]),
+                             sqlite_engine)
+    incremental = read_aggregate_tables(sqlite_engine)
+
+    refresh_aggregate_tables(sqlite_engine)
+    full = read_aggregate_tables(sqlite_engine)
+
+    assert incremental == full
+    assert len(full['AverageRoomPriceByDateTable']) == 4
+
+
+def test_deferred_aggregates_are_refreshed_once(sqlite_engine):
+    keys = AggregateKeys()
+    keys.update(migrate_data_to_database(create_batch(['2025-03-02'], ['Namba'], [100], [8.5]),
+                                         sqlite_engine, defer_aggregates=True))
+    keys.update(migrate_data_to_database(create_batch(['2025-03-03'], ['Umeda'], [150], [7.2]),
+                                         sqlite_engine, defer_aggregates=True))
+
+    assert all(not rows for rows in read_aggregate_tables(sqlite_engine).values())
+
+    refresh_aggregate_tables(sqlite_engine, keys)
+    deferred = read_aggregate_tables(sqlite_engine)
+
+    refresh_aggregate_tables(sqlite_engine)
+    assert deferred == read_aggregate_tables(sqlite_engine)
+    assert len(deferred['AverageHotelRoomPriceByLocation']) == 2
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,109 @@
+import datetime
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, select, func
+from sqlalchemy.orm import Session
+
+from japan_avg_hotel_price_finder.sql.db_model import HotelPrice, JapanHotel
+from japan_avg_hotel_price_finder.synthetic_dataset import SyntheticDatasetConfig, generate_dataset, \
+    write_to_database, write_to_parquet, get_prefecture_regions
+
+
+def create_config(**kwargs) -> SyntheticDatasetConfig:
+    settings = dict(cities=['Osaka', 'Tokyo'], num_hotels=50, start_date=datetime.date(2025, 3, 1),
+                    end_date=datetime.date(2025, 3, 10), as_of_days=3, locations_per_city=20)
+    settings.update(kwargs)
+    return SyntheticDatasetConfig(**settings)
+
+
+def test_invalid_config():
+    with pytest.raises(ValueError):
+        create_config(table='Hotels')
+    with pytest.raises(ValueError):
+        create_config(end_date=datetime.date(2025, 2, 1))
+    with pytest.raises(ValueError):
+        create_config(availability=0)
+    with pytest.raises(ValueError):
+        create_config(table='JapanHotels', cities=['Atlantis'])
+
+
+def test_default_cities_and_end_date():
+    config = SyntheticDatasetConfig(start_date=datetime.date(2025, 2, 1))
+    assert len(config.cities) > 1
+    assert config.end_date == datetime.date(2025, 2, 28)
+    assert SyntheticDatasetConfig(table='JapanHotels').cities == list(get_prefecture_regions())
+
+
+def test_dataset_is_deterministic():
+    first = pd.concat(generate_dataset(create_config()))
+    second = pd.concat(generate_dataset(create_config()))
+    pd.testing.assert_frame_equal(first, second)
+
+    other_seed = pd.concat(generate_dataset(create_config(seed=1)))
+    assert not first['Price'].equals(other_seed['Price'])
+
+
+def test_snapshots_and_distributions():
+    config = create_config(availability=1.0)
+    df = pd.concat(generate_dataset(config))
+
+    # Snapshots of March 1st, 2nd and 3rd scrape 10, 9 and 8 check-in dates
+    assert len(df) == config.estimate_rows() == (10 + 9 + 8) * 2 * 50
+    assert df.groupby('City')['AsOf'].nunique().tolist() == [3, 3]
+    assert (pd.to_datetime(df['Date']).dt.date >= df['AsOf'].dt.date).all()
+
+    assert df['Review'].between(1, 10).all()
+    assert (df['Price'] > 0).all()
+    assert df['PriceReview'].round(6).equals((df['Price'] / df['Review']).round(6))
+    assert 1 < df['Location'].nunique() <= 2 * 20
+
+    # Prices of the same hotel and check-in date drift between snapshots
+    hotel_prices = df[(df['Hotel'] == 'Osaka Hotel 00000') & (df['Date'] == '2025-03-10')]
+    assert hotel_prices['Price'].nunique() == 3
+
+
+def test_scale_to_rows():
+    config = create_config()
+    config.scale_to_rows(100_000)
+    assert config.estimate_rows() == pytest.approx(100_000, rel=0.05)
+
+
+def test_write_hotel_price_to_database():
+    engine = create_engine('sqlite:///:memory:')
+    config = create_config()
+
+    written_rows = write_to_database(config, engine)
+
+    with Session(engine) as session:
+        assert session.scalar(select(func.count()).select_from(HotelPrice)) == written_rows
+        assert set(session.scalars(select(HotelPrice.City).distinct())) == {'Osaka', 'Tokyo'}
+
+
+def test_write_japan_hotels_to_database():
+    engine = create_engine('sqlite:///:memory:')
+    config = create_config(table='JapanHotels', cities=['Osaka', 'Hokkaido'], as_of_days=1)
+
+    written_rows = write_to_database(config, engine)
+
+    with Session(engine) as session:
+        assert session.scalar(select(func.count()).select_from(JapanHotel)) == written_rows
+        regions = dict(session.execute(select(JapanHotel.Prefecture, JapanHotel.Region).distinct()).all())
+    assert regions == {'Osaka': 'Kansai', 'Hokkaido': 'Hokkaido'}
+
+
+def test_write_to_parquet(tmp_path):
+    pytest.importorskip('pyarrow')
+    path = str(tmp_path / 'hotel_price.parquet')
+    config = create_config()
+
+    written_rows = write_to_parquet(config, path)
+
+    df = pd.read_parquet(path)
+    assert len(df) == written_rows
+    assert 'Price/Review' in df.columns
+    assert set(df['City']) == {'Osaka', 'Tokyo'}
+
+
+if __name__ == '__main__':
+    pytest.main()